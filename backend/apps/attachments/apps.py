@@ -0,0 +1,14 @@
+"""
+Attachments app configuration.
+"""
+
+from django.apps import AppConfig
+
+
+class AttachmentsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.attachments"
+    verbose_name = "附件"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
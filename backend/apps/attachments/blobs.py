@@ -0,0 +1,302 @@
+"""
+附件 Blob 服务模块
+
+上传的文件按内容 SHA-256 去重：同一用户的相同内容只存一份文件（AttachmentBlob），
+附件指向共享的 Blob 并增加引用计数；删除附件时减少计数，计数归零时删除
+Blob 记录，文件在事务提交后删除（见 signals）。
+
+去重按用户划分：不同用户上传相同文件仍各存一份，既不会通过秒传泄露
+“他人是否上传过某文件”，删除账号时也只需删除自己的文件。
+
+哈希不单独再读一遍文件：
+- 单次上传：HashingUploadHandler 在接收请求体时顺带计算
+- 分块上传：完成时对临时文件顺序读取一次
+"""
+
+import hashlib
+import os
+import shutil
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from apps.users.backup import record_deletions
+from apps.users.storage import adjust_usage
+from utils.bulk_delete import delete_without_signals
+from .derivatives import derivative_names
+from .models import Attachment, AttachmentBlob, UploadSession, blob_file_path
+
+# 计算文件哈希时每次读取的字节数
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file) -> str:
+    """计算 Django File 对象内容的 SHA-256（读取后回到开头）"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks(HASH_BLOCK_SIZE):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hash_path(path) -> str:
+    """计算磁盘文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashingUploadHandlerMixin:
+    """
+    接收上传数据时计算 SHA-256，结果写入上传文件对象的 sha256 属性
+
+    只对自己实际接收的文件计算：内存处理器未启用（文件过大）时
+    数据原样交给下一个处理器，由其计算。
+    """
+
+    def new_file(self, *args, **kwargs):
+        # 内存处理器启用时 new_file 会抛出 StopFutureHandlers，先建好摘要对象
+        self._digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        result = super().receive_data_chunk(raw_data, start)
+        if result is None:
+            self._digest.update(raw_data)
+        return result
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self._digest.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(
+    HashingUploadHandlerMixin, MemoryFileUploadHandler
+):
+    """小文件：保存在内存中并计算哈希"""
+
+
+class HashingTemporaryFileUploadHandler(
+    HashingUploadHandlerMixin, TemporaryFileUploadHandler
+):
+    """大文件：写入临时文件并计算哈希"""
+
+
+def _acquire(owner, sha256: str, size: int, store) -> tuple[AttachmentBlob, bool]:
+    """
+    增加 Blob 引用计数，不存在时调用 store(blob) 写入文件后建行
+
+    Returns:
+        (Blob, 是否新建)
+    """
+    for attempt in range(2):
+        updated = AttachmentBlob.objects.filter(owner=owner, sha256=sha256).update(
+            refcount=F("refcount") + 1
+        )
+        if updated:
+            return AttachmentBlob.objects.get(owner=owner, sha256=sha256), False
+
+        blob = AttachmentBlob(owner=owner, sha256=sha256, size=size, refcount=1)
+        store(blob)
+        try:
+            with transaction.atomic():
+                blob.save()
+            return blob, True
+        except IntegrityError:
+            # 并发上传同一内容：对方已建行，删除自己写入的文件后回到计数递增
+            blob.file.delete(save=False)
+            if attempt:
+                raise
+    raise AssertionError("unreachable")
+
+
+def acquire_upload(owner, upload) -> AttachmentBlob:
+    """
+    为上传文件获取 Blob（内容已存在时不再写入）
+
+    Args:
+        owner: 上传用户
+        upload: UploadedFile，由 HashingUploadHandler 接收时带 sha256 属性
+    """
+    sha256 = getattr(upload, "sha256", None) or hash_file(upload)
+
+    def store(blob):
+        blob.file.save(upload.name, upload, save=False)
+
+    blob, _ = _acquire(owner, sha256, upload.size, store)
+    return blob
+
+
+def acquire_path(owner, path, filename: str) -> tuple[AttachmentBlob, bool]:
+    """
+    为磁盘上的文件获取 Blob
+
+    新内容把文件移动到 Blob 位置（同一文件系统下为重命名），
+    内容已存在时直接删除该文件。
+
+    Args:
+        owner: 上传用户
+        path: 待入库的文件路径（调用后不再存在）
+        filename: 原始文件名（用于扩展名）
+
+    Returns:
+        (Blob, 是否新建)
+    """
+    sha256 = hash_path(path)
+    size = os.path.getsize(path)
+
+    def store(blob):
+        storage = blob.file.storage
+        name = storage.get_available_name(blob_file_path(blob, filename))
+        target = storage.path(name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+        blob.file.name = name
+
+    blob, created = _acquire(owner, sha256, size, store)
+    if not created:
+        Path(path).unlink(missing_ok=True)
+    return blob, created
+
+
+def release_blob(blob_id) -> None:
+    """减少引用计数，归零时删除 Blob（文件由 post_delete 信号在提交后删除）"""
+    if blob_id:
+        release_blobs({blob_id: 1})
+
+
+def release_blobs(counts: dict) -> None:
+    """
+    批量减少引用计数
+
+    Args:
+        counts: {Blob ID: 释放的引用数}；计数相同的 Blob 合并为一条 UPDATE
+    """
+    by_count = defaultdict(list)
+    for blob_id, count in counts.items():
+        by_count[count].append(blob_id)
+
+    with transaction.atomic():
+        for count, blob_ids in by_count.items():
+            AttachmentBlob.objects.filter(id__in=blob_ids).update(
+                refcount=Greatest(F("refcount") - count, 0)
+            )
+        doomed = AttachmentBlob.objects.filter(id__in=list(counts), refcount=0)
+        freed = defaultdict(int)
+        for owner_id, size in doomed.values_list("owner_id", "size"):
+            freed[owner_id] += size
+        doomed.delete()
+        # 按用户合并扣减实际占用（post_delete 信号只负责删除文件）
+        for owner_id, size in freed.items():
+            adjust_usage(owner_id, attachments_stored_bytes=-size)
+
+
+def referenced_names(names) -> set[str]:
+    """返回 names 中仍被附件或 Blob 引用的存储名"""
+    names = list(names)
+    attachments = Attachment.objects.filter(file__in=names)
+    blobs = AttachmentBlob.objects.filter(file__in=names)
+    return set(attachments.values_list("file", flat=True)) | set(
+        blobs.values_list("file", flat=True)
+    )
+
+
+def delete_files_on_commit(storage, names) -> None:
+    """事务提交后删除不再被引用的文件及其衍生图"""
+    names = [name for name in names if name]
+    if not names:
+        return
+
+    def delete_files():
+        # 提交前可能已被重新引用
+        live = referenced_names(names)
+        for name in names:
+            if name in live:
+                continue
+            storage.delete(name)
+            for derivative in derivative_names(name):
+                storage.delete(derivative)
+
+    transaction.on_commit(delete_files)
+
+
+def delete_attachments(queryset) -> int:
+    """
+    批量删除附件
+
+    一条 DELETE 删除全部行（不逐行触发信号），Blob 引用计数按 Blob 合并递减，
+    独占文件与归零的 Blob 文件在事务提交后删除。
+
+    Returns:
+        实际删除的附件数
+    """
+    rows = list(queryset.values("id", "owner_id", "blob_id", "file", "size"))
+    if not rows:
+        return 0
+
+    ids = [row["id"] for row in rows]
+    usage = defaultdict(Counter)
+    for row in rows:
+        usage[row["owner_id"]].update(
+            attachments_count=-1,
+            attachments_bytes=-row["size"],
+            attachments_stored_bytes=0 if row["blob_id"] else -row["size"],
+        )
+
+    with transaction.atomic():
+        UploadSession.objects.filter(attachment_id__in=ids).update(attachment=None)
+        deleted = delete_without_signals(Attachment.objects.filter(id__in=ids))
+        release_blobs(Counter(row["blob_id"] for row in rows if row["blob_id"]))
+        # 批量删除不触发 post_delete，手动更新用量台账并记录删除
+        for owner_id, deltas in usage.items():
+            adjust_usage(owner_id, **deltas)
+        record_deletions("attachment", [(row["owner_id"], row["id"]) for row in rows])
+        delete_files_on_commit(
+            Attachment._meta.get_field("file").storage,
+            [row["file"] for row in rows if not row["blob_id"]],
+        )
+    return deleted
+
+
+def adopt_file(attachment) -> bool:
+    """
+    把旧附件独占的文件纳入 Blob 存储
+
+    内容已有 Blob 时改为引用该 Blob 并删除自己的文件，
+    否则以现有文件新建 Blob（文件原地保留，不移动）。
+
+    Returns:
+        是否与已有 Blob 合并（即释放了一份重复文件）
+    """
+    storage = attachment.file.storage
+    name = attachment.file.name
+    sha256 = hash_path(storage.path(name))
+
+    with transaction.atomic():
+        blob, created = AttachmentBlob.objects.select_for_update().get_or_create(
+            owner_id=attachment.owner_id,
+            sha256=sha256,
+            defaults={"file": name, "size": storage.size(name)},
+        )
+        AttachmentBlob.objects.filter(id=blob.id).update(refcount=F("refcount") + 1)
+        Attachment.objects.filter(id=attachment.id).update(
+            blob=blob, file=blob.file.name
+        )
+
+        # 原独占文件计入了实际占用；合并后只计 Blob，新建 Blob 时由信号计入
+        adjust_usage(attachment.owner_id, attachments_stored_bytes=-attachment.size)
+
+    if not created:
+        storage.delete(name)
+    return not created
@@ -0,0 +1,159 @@
+"""
+附件衍生图模块
+
+图片附件上传后在后台生成衍生图，编辑器按显示宽度选用，不再下载原图：
+- 固定宽度的缩略图（DERIVATIVE_WIDTHS，只生成比原图窄的）
+- 原尺寸的 WebP 转码图（原图已是 WebP 时不生成）
+
+衍生图与源文件放在同一目录，按源文件名派生命名：
+    {源文件名去扩展名}.w{宽度}.webp / {源文件名去扩展名}.full.webp
+共享同一 Blob 的附件因此共用一套衍生图，源文件删除时一并删除。
+
+render_derivatives 只读写文件、不访问数据库，可在进程池中并行执行
+（见 generate_derivatives 命令）；结果由调用方写回附件。
+"""
+
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from utils.images import ImageError, image_size, make_derivatives, thumbnail_format
+
+logger = logging.getLogger(__name__)
+
+# 缩略图宽度（像素）
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+
+FULL_SIZE_KEY = "full"
+
+# 衍生图文件名：{源文件名去扩展名}.w{宽度}.webp / .full.webp（不支持 WebP 时为 .png）
+DERIVATIVE_PATTERN = re.compile(r"^(?P<stem>.+)\.(?:w\d+|full)\.(?:webp|png)$")
+
+# 不转码原尺寸图的格式
+WEBP_MIME_TYPES = {"image/webp"}
+
+
+class RenderedDerivatives(NamedTuple):
+    """衍生图生成结果"""
+
+    width: int
+    height: int
+    files: dict[str, str]
+
+
+def _suffix() -> str:
+    return ".webp" if thumbnail_format()[1] == "image/webp" else ".png"
+
+
+def derivative_name(source_name: str, key: str) -> str:
+    """衍生图的存储名（key 为宽度字符串或 "full"）"""
+    stem = os.path.splitext(source_name)[0]
+    label = key if key == FULL_SIZE_KEY else f"w{key}"
+    return f"{stem}.{label}{_suffix()}"
+
+
+def derivative_names(source_name: str) -> list[str]:
+    """源文件可能存在的全部衍生图存储名（删除源文件时使用）"""
+    keys = [str(width) for width in DERIVATIVE_WIDTHS] + [FULL_SIZE_KEY]
+    return [derivative_name(source_name, key) for key in keys]
+
+
+def derivative_source_stem(name: str) -> Optional[str]:
+    """衍生图对应源文件去扩展名后的存储名；name 不是衍生图时返回 None"""
+    match = DERIVATIVE_PATTERN.match(name)
+    return match.group("stem") if match else None
+
+
+def _write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def render_derivatives(
+    media_root: str, source_name: str, full_size: bool = True, force: bool = False
+) -> RenderedDerivatives:
+    """
+    为 media_root 下的源文件生成衍生图
+
+    衍生图已全部存在时（其他附件共享同一文件）只读取尺寸，不重新编码。
+
+    Args:
+        media_root: 存储根目录
+        source_name: 源文件存储名
+        full_size: 是否生成原尺寸转码图
+        force: 忽略已存在的衍生图重新生成
+
+    Raises:
+        ImageError: 图片无法识别或像素数过大
+        OSError: 源文件不可读
+    """
+    root = Path(media_root)
+    data = (root / source_name).read_bytes()
+
+    width, height = image_size(data)
+    keys = [str(w) for w in DERIVATIVE_WIDTHS if w < width]
+    if full_size:
+        keys.append(FULL_SIZE_KEY)
+    expected = {key: derivative_name(source_name, key) for key in keys}
+    if not force and all((root / name).exists() for name in expected.values()):
+        return RenderedDerivatives(width, height, expected)
+
+    width, height, images = make_derivatives(data, DERIVATIVE_WIDTHS, full_size)
+    files = {}
+    for key, image in images.items():
+        name = derivative_name(source_name, key)
+        _write(root / name, image.data)
+        files[key] = name
+    return RenderedDerivatives(width, height, files)
+
+
+def needs_derivatives(attachment) -> bool:
+    return attachment.file_type == "image" and bool(attachment.file)
+
+
+def generate_derivatives(attachment_id, force: bool = False) -> Optional[dict]:
+    """
+    为图片附件生成衍生图并写回尺寸与衍生图映射
+
+    Returns:
+        衍生图映射；附件不存在、不是图片或图片无法处理时返回 None
+    """
+    from .models import Attachment
+
+    attachment = Attachment.objects.filter(id=attachment_id).first()
+    if attachment is None or not needs_derivatives(attachment):
+        return None
+
+    try:
+        result = render_derivatives(
+            attachment.file.storage.location,
+            attachment.file.name,
+            full_size=attachment.mime_type not in WEBP_MIME_TYPES,
+            force=force,
+        )
+    except (ImageError, OSError) as e:
+        logger.warning("附件衍生图生成失败: %s %s", attachment_id, e)
+        return None
+
+    apply_derivatives(attachment.file.name, result)
+    return result.files
+
+
+def apply_derivatives(source_name: str, result: RenderedDerivatives) -> int:
+    """把生成结果写回所有使用该源文件的图片附件，返回更新行数"""
+    from .models import Attachment
+
+    return Attachment.objects.filter(file=source_name, file_type="image").update(
+        width=result.width, height=result.height, derivatives=result.files
+    )
@@ -0,0 +1,244 @@
+"""
+附件下载模块
+
+生产环境下载附件的响应构造：
+- 条件请求：ETag（去重附件为内容 SHA-256）/ Last-Modified，未变化时返回 304
+- 范围请求：支持单个 Range（含 If-Range），视频/音频拖动进度只下载所需部分；
+  多段范围按整文件返回（RFC 9110 允许）
+- 整文件使用 FileResponse，WSGI 服务器支持 wsgi.file_wrapper 时走 sendfile；
+  范围请求按 CHUNK_SIZE 分块流式读取
+- 图片衍生图（缩略图 / WebP 转码图）通过 variant 参数经同一接口返回，
+  与原文件一样需要登录且只能访问自己的附件
+- <img srcset> 无法携带 JWT：序列化器为图片签发带时效的令牌（sign_image），
+  令牌地址无需登录即可访问，过期时间见 ATTACHMENT_IMAGE_URL_MAX_AGE
+- 配置 ATTACHMENT_ACCEL_REDIRECT_PREFIX 后交给前端代理发送文件（X-Accel-Redirect），
+  Python 不读取文件内容。nginx 配置示例：
+
+    location /protected-media/ {
+        internal;
+        alias /app/backend/media/;
+    }
+"""
+
+import mimetypes
+import os
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date
+
+# 范围请求每次读取的字节数
+CHUNK_SIZE = 64 * 1024
+
+# 浏览器内联显示的类型，其余类型一律作为下载返回
+INLINE_PREFIXES = ("image/", "video/", "audio/")
+INLINE_TYPES = {"application/pdf", "text/plain"}
+
+
+SIGNING_SALT = "attachments.image"
+
+_signer = signing.TimestampSigner(salt=SIGNING_SALT)
+
+
+class RangeNotSatisfiable(Exception):
+    """请求范围超出文件大小"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    解析 Range 请求头
+
+    Returns:
+        (起始字节, 结束字节)，均包含；无需按范围返回时为 None
+        （请求头缺失、格式无效或为多段范围）
+
+    Raises:
+        RangeNotSatisfiable: 范围起点超出文件大小
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    specs = header[len("bytes=") :].split(",")
+    if len(specs) != 1:
+        return None
+
+    first, sep, last = specs[0].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # 后缀范围：最后 N 个字节
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def _iter_range(storage, name: str, start: int, length: int):
+    with storage.open(name, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def sign_image(attachment_id: int, variant: Optional[str] = None) -> str:
+    """为附件图片（variant 为衍生图键，为空时为原文件）签发带时间戳的令牌"""
+    return _signer.sign_object([attachment_id, variant or ""])
+
+
+def unsign_image(token: str) -> tuple[int, Optional[str]]:
+    """
+    校验图片令牌，返回 (附件 ID, 衍生图键)
+
+    Raises:
+        Http404: 令牌无效或已过期
+    """
+    try:
+        attachment_id, variant = _signer.unsign_object(
+            token, max_age=settings.ATTACHMENT_IMAGE_URL_MAX_AGE
+        )
+    except (signing.BadSignature, ValueError, TypeError):
+        raise Http404("图片地址无效或已过期")
+    return int(attachment_id), variant or None
+
+
+def file_validators(attachment, variant: Optional[str] = None) -> tuple[str, datetime]:
+    """附件文件（或其衍生图）的 (ETag, 最后修改时间)"""
+    storage = attachment.file.storage
+    name = attachment.derivatives[variant] if variant else attachment.file.name
+    try:
+        modified = storage.get_modified_time(name)
+    except FileNotFoundError:
+        raise Http404("文件不存在")
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    modified = modified.replace(microsecond=0)
+
+    if attachment.blob_id:
+        etag = attachment.blob.sha256
+    else:
+        etag = f"{int(modified.timestamp()):x}-{attachment.size:x}"
+    if variant:
+        etag = f"{etag}-{variant}"
+    return f'"{etag}"', modified
+
+
+def _if_range_matches(request, etag: str, modified: datetime) -> bool:
+    """If-Range 缺失或与当前文件一致时按范围返回，否则返回整个文件"""
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith(('"', "W/")):
+        # If-Range 只接受强校验
+        return value == etag
+    try:
+        return parse_http_date(value) == int(modified.timestamp())
+    except ValueError:
+        return False
+
+
+def download_response(
+    request, attachment, as_attachment: bool = False, variant: Optional[str] = None
+):
+    """
+    构造附件下载响应
+
+    Args:
+        request: 当前请求（读取条件请求与 Range 头）
+        attachment: 要下载的附件
+        as_attachment: 是否强制作为下载（Content-Disposition: attachment）
+        variant: 衍生图键（宽度字符串或 "full"），为空时返回原文件
+    """
+    if not attachment.file:
+        raise Http404("文件不存在")
+    if variant and variant not in (attachment.derivatives or {}):
+        raise Http404("衍生图不存在")
+
+    storage = attachment.file.storage
+    name = attachment.derivatives[variant] if variant else attachment.file.name
+    etag, modified = file_validators(attachment, variant)
+
+    # 304（If-None-Match / If-Modified-Since）或 412（If-Match / If-Unmodified-Since）
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(modified.timestamp())
+    )
+    if conditional is not None:
+        response = conditional
+    else:
+        size = storage.size(name)
+        if variant:
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        else:
+            content_type = attachment.mime_type or "application/octet-stream"
+        try:
+            byte_range = (
+                parse_range(request.headers.get("Range"), size)
+                if _if_range_matches(request, etag, modified)
+                else None
+            )
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        accel_prefix = getattr(settings, "ATTACHMENT_ACCEL_REDIRECT_PREFIX", "")
+        if accel_prefix:
+            # 前端代理自行处理 Range 并发送文件
+            response = HttpResponse(content_type=content_type)
+            location = f"{accel_prefix.rstrip('/')}/{quote(name)}"
+            response["X-Accel-Redirect"] = location
+        elif byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _iter_range(storage, name, start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(length)
+        else:
+            response = FileResponse(storage.open(name, "rb"), content_type=content_type)
+            response.block_size = CHUNK_SIZE
+
+        inline = not as_attachment and (
+            content_type.startswith(INLINE_PREFIXES) or content_type in INLINE_TYPES
+        )
+        filename = attachment.name
+        extension = os.path.splitext(name)[1] if variant else attachment.extension
+        if not filename.lower().endswith(extension):
+            filename += extension
+        response["Content-Disposition"] = content_disposition_header(
+            not inline, filename
+        )
+        response["Accept-Ranges"] = "bytes"
+        response["X-Content-Type-Options"] = "nosniff"
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modified.timestamp())
+    # 附件内容不会变化，但需要登录才能访问，只允许浏览器私有缓存
+    response["Cache-Control"] = "private, max-age=3600"
+    return response
@@ -0,0 +1,40 @@
+"""
+附件去重迁移
+
+把内容去重上线前上传的附件（blob 为空、各自独占文件）纳入 Blob 存储：
+同一用户内容相同的附件改为引用同一个文件，重复的文件被删除。
+可重复执行，只处理尚未关联 Blob 的附件。
+
+用法:
+    python manage.py dedupe_attachments
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.attachments.blobs import adopt_file
+from apps.attachments.models import Attachment
+
+
+class Command(BaseCommand):
+    help = "把旧附件按内容哈希合并到共享文件"
+
+    def handle(self, *args, **options):
+        adopted = merged = missing = freed = 0
+        legacy = Attachment.objects.filter(blob__isnull=True).exclude(file="")
+
+        for attachment in legacy.iterator():
+            if not attachment.file.storage.exists(attachment.file.name):
+                missing += 1
+                continue
+            if adopt_file(attachment):
+                merged += 1
+                freed += attachment.size
+            else:
+                adopted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"新建 {adopted} 个 Blob，合并 {merged} 个重复附件"
+                f"（释放 {freed} 字节），{missing} 个附件文件缺失"
+            )
+        )
@@ -0,0 +1,45 @@
+"""
+清理过期的分块上传
+
+删除超过有效期（settings.UPLOAD_SESSION_TTL，每上传一块顺延）的上传会话及其临时文件，
+并清除没有对应会话的残留临时文件。建议由 cron 定时执行，例如每小时一次：
+
+    0 * * * * cd /app/backend && python manage.py expire_uploads
+
+用法:
+    python manage.py expire_uploads
+"""
+
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.attachments.models import UploadSession
+from apps.attachments.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+    help = "删除过期的分块上传会话及临时文件"
+
+    def handle(self, *args, **options):
+        expired = expire_sessions()
+
+        # 会话已不存在、且超过有效期未修改的临时文件
+        orphans = 0
+        root = Path(settings.UPLOAD_TEMP_ROOT)
+        if root.exists():
+            cutoff = time.time() - settings.UPLOAD_SESSION_TTL
+            live = {
+                str(session_id)
+                for session_id in UploadSession.objects.values_list("id", flat=True)
+            }
+            for path in root.glob("*.part"):
+                if path.stem not in live and path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+                    orphans += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"已清理 {expired} 个过期会话，{orphans} 个残留临时文件")
+        )
@@ -0,0 +1,98 @@
+"""
+回收孤立的附件文件
+
+逐目录扫描 MEDIA_ROOT/attachments/，按批次（--batch-size）查询数据库引用，
+删除既不被附件也不被 Blob 引用的文件；衍生图随其源文件判断。
+最近修改的文件（--min-age 秒内）跳过，避免误删正在上传、尚未提交的文件。
+
+附件删除后文件在事务提交后即被删除，该命令用于回收历史遗留
+（例如去重上线前删除笔记时级联删除的附件）和进程中断留下的文件。
+建议由 cron 定期执行，例如每天一次：
+
+    30 3 * * * cd /app/backend && python manage.py gc_attachments
+
+用法:
+    python manage.py gc_attachments --dry-run
+    python manage.py gc_attachments --min-age 86400 --batch-size 1000
+"""
+
+import os
+import time
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.attachments.blobs import referenced_names
+from apps.attachments.derivatives import derivative_source_stem
+
+ATTACHMENTS_DIR = "attachments"
+
+
+class Command(BaseCommand):
+    help = "删除数据库中不再引用的附件文件"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="只统计，不删除文件"
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="只处理修改时间早于该秒数的文件（默认 3600）",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="每次查询引用的文件数"
+        )
+
+    def handle(self, *args, **options):
+        media_root = Path(default_storage.location)
+        root = media_root / ATTACHMENTS_DIR
+        dry_run = options["dry_run"]
+        batch_size = max(1, options["batch_size"])
+        cutoff = time.time() - options["min_age"]
+        stats = {"scanned": 0, "recent": 0, "orphans": 0, "bytes": 0}
+        started = time.monotonic()
+
+        for dirpath, _, filenames in os.walk(root):
+            prefix = Path(dirpath).relative_to(media_root).as_posix()
+            files = {}
+            for filename in filenames:
+                try:
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except FileNotFoundError:
+                    continue
+                files[f"{prefix}/{filename}"] = stat
+            stats["scanned"] += len(files)
+
+            sources = [name for name in files if derivative_source_stem(name) is None]
+            live = set()
+            for start in range(0, len(sources), batch_size):
+                live |= referenced_names(sources[start : start + batch_size])
+            live_stems = {os.path.splitext(name)[0] for name in live}
+
+            for name, stat in files.items():
+                stem = derivative_source_stem(name)
+                if name in live or (stem is not None and stem in live_stems):
+                    continue
+                if stat.st_mtime > cutoff:
+                    stats["recent"] += 1
+                    continue
+                stats["orphans"] += 1
+                stats["bytes"] += stat.st_size
+                if options["verbosity"] >= 2:
+                    self.stdout.write(name)
+                if not dry_run:
+                    default_storage.delete(name)
+
+        elapsed = time.monotonic() - started
+        rate = stats["scanned"] / elapsed if elapsed else 0
+        action = "可回收" if dry_run else "已删除"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"扫描 {stats['scanned']} 个文件（{rate:.0f} 个/秒，耗时 {elapsed:.2f}s），"
+                f"{action} {stats['orphans']} 个孤立文件共 {stats['bytes']} 字节，"
+                f"跳过 {stats['recent']} 个最近修改的文件"
+            )
+        )
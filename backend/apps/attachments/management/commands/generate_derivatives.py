@@ -0,0 +1,96 @@
+"""
+补生成图片附件的衍生图
+
+衍生图功能上线前上传的图片、或后台任务因进程重启丢失的图片，
+可用该命令批量生成。解码与编码是 CPU 密集操作，使用进程池并行；
+子进程只读写文件，尺寸与衍生图映射由主进程写回数据库。
+共享同一文件的附件只处理一次。
+
+用法:
+    python manage.py generate_derivatives
+    python manage.py generate_derivatives --workers 8 --user 1
+    python manage.py generate_derivatives --force
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.attachments.derivatives import (
+    WEBP_MIME_TYPES,
+    apply_derivatives,
+    render_derivatives,
+)
+from apps.attachments.models import Attachment
+from utils.images import ImageError
+
+
+class Command(BaseCommand):
+    help = "使用进程池为图片附件批量生成缩略图与 WebP 衍生图"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="进程数（默认 CPU 核数）",
+        )
+        parser.add_argument("--user", type=int, help="仅处理指定用户 ID")
+        parser.add_argument(
+            "--force", action="store_true", help="重新生成已有衍生图的附件"
+        )
+
+    def handle(self, *args, **options):
+        queryset = Attachment.objects.filter(file_type="image").exclude(file="")
+        if not options["force"]:
+            queryset = queryset.filter(derivatives={})
+        if options["user"]:
+            queryset = queryset.filter(owner_id=options["user"])
+        sources = list(queryset.order_by().values_list("file", "mime_type").distinct())
+
+        root = default_storage.location
+        workers = max(1, options["workers"])
+        # 控制在途任务数，避免一次性提交全部任务
+        window = workers * 4
+        stats = {"images": 0, "attachments": 0, "failed": 0}
+        started = time.monotonic()
+
+        def collect(done):
+            for future in done:
+                name = futures.pop(future)
+                try:
+                    result = future.result()
+                except (ImageError, OSError) as e:
+                    stats["failed"] += 1
+                    self.stderr.write(f"{name}: {e}")
+                    continue
+                stats["images"] += 1
+                stats["attachments"] += apply_derivatives(name, result)
+
+        futures = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for name, mime_type in sources:
+                future = pool.submit(
+                    render_derivatives,
+                    root,
+                    name,
+                    mime_type not in WEBP_MIME_TYPES,
+                    options["force"],
+                )
+                futures[future] = name
+                if len(futures) >= window:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(list(futures))
+
+        elapsed = time.monotonic() - started
+        rate = stats["images"] / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"已处理 {stats['images']} 张图片（{stats['attachments']} 个附件），"
+                f"失败 {stats['failed']}，耗时 {elapsed:.2f}s（{rate:.1f} 张/秒）"
+            )
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:43
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attachments', '0001_initial'),
+        ('notes', '0005_notereference'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, verbose_name='文件名')),
+                ('mime_type', models.CharField(blank=True, default='', max_length=100, verbose_name='MIME类型')),
+                ('total_size', models.PositiveBigIntegerField(verbose_name='文件大小（字节）')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='分块大小（字节）')),
+                ('received_bytes', models.PositiveBigIntegerField(default=0, help_text='已连续写入的字节数，即下一块的偏移量', verbose_name='已接收字节数')),
+                ('status', models.CharField(choices=[('uploading', '上传中'), ('completed', '已完成')], default='uploading', max_length=20, verbose_name='状态')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='过期时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('attachment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='attachments.attachment', verbose_name='生成的附件')),
+                ('note', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='notes.note', verbose_name='所属笔记')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='所属用户')),
+            ],
+            options={
+                'verbose_name': '分块上传会话',
+                'verbose_name_plural': '分块上传会话',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:48
+
+import apps.attachments.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attachments', '0002_upload_session'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='内容哈希')),
+                ('file', models.FileField(max_length=255, upload_to=apps.attachments.models.blob_file_path, verbose_name='文件')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='文件大小（字节）')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='引用计数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachment_blobs', to=settings.AUTH_USER_MODEL, verbose_name='所属用户')),
+            ],
+            options={
+                'verbose_name': '附件 Blob',
+                'verbose_name_plural': '附件 Blob',
+            },
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, help_text='去重存储的文件；为空表示独占文件的旧附件', null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='attachments', to='attachments.attachmentblob', verbose_name='文件 Blob'),
+        ),
+        migrations.AddConstraint(
+            model_name='attachmentblob',
+            constraint=models.UniqueConstraint(fields=('owner', 'sha256'), name='unique_attachment_blob'),
+        ),
+    ]
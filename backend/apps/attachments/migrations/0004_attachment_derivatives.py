@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attachments', '0003_attachment_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, help_text='宽度（或 full 表示原尺寸转码图）到存储名的映射，后台生成', verbose_name='衍生图'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='图片高度'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='图片宽度'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attachments', '0004_attachment_derivatives'),
+        ('notes', '0006_updated_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='更新时间'),
+        ),
+        migrations.AddIndex(
+            model_name='attachment',
+            index=models.Index(fields=['owner', 'updated_at'], name='attachments_owner_i_d61a1e_idx'),
+        ),
+    ]
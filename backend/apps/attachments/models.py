@@ -4,6 +4,9 @@
 
 import os
 import uuid
+from pathlib import Path
+
+from django.conf import settings
 from django.db import models
 
 
@@ -24,6 +27,66 @@ def attachment_file_path(instance, filename):
     return f"attachments/{user_id}/{unique_id}{ext}"
 
 
+def blob_file_path(instance, filename):
+    """
+    生成附件 Blob 文件路径
+
+    按内容哈希命名: media/attachments/{user_id}/{hash[:2]}/{hash}{ext}
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    blob_hash = instance.sha256
+    return f"attachments/{instance.owner_id}/{blob_hash[:2]}/{blob_hash}{ext}"
+
+
+class AttachmentBlob(models.Model):
+    """
+    附件文件 Blob
+
+    同一用户上传的相同内容（按 SHA-256 判断）只存一份文件，
+    多个附件指向同一 Blob，引用计数归零时删除记录与文件。
+    """
+
+    owner = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="attachment_blobs",
+        verbose_name="所属用户",
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        verbose_name="内容哈希",
+    )
+    file = models.FileField(
+        upload_to=blob_file_path,
+        max_length=255,
+        verbose_name="文件",
+    )
+    size = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="文件大小（字节）",
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name="引用计数",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="创建时间",
+    )
+
+    class Meta:
+        verbose_name = "附件 Blob"
+        verbose_name_plural = "附件 Blob"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "sha256"], name="unique_attachment_blob"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.refcount})"
+
+
 class Attachment(models.Model):
     """
     附件模型
@@ -63,6 +126,31 @@ class Attachment(models.Model):
         default=0,
         verbose_name="文件大小（字节）",
     )
+    width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="图片宽度",
+    )
+    height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="图片高度",
+    )
+    derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="衍生图",
+        help_text="宽度（或 full 表示原尺寸转码图）到存储名的映射，后台生成",
+    )
+    blob = models.ForeignKey(
+        AttachmentBlob,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="attachments",
+        verbose_name="文件 Blob",
+        help_text="去重存储的文件；为空表示独占文件的旧附件",
+    )
     owner = models.ForeignKey(
         "users.User",
         on_delete=models.CASCADE,
@@ -82,6 +170,10 @@ class Attachment(models.Model):
         verbose_name="创建时间",
         db_index=True,
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="更新时间",
+    )
 
     class Meta:
         verbose_name = "附件"
@@ -90,6 +182,7 @@ class Attachment(models.Model):
         indexes = [
             models.Index(fields=["owner", "created_at"]),
             models.Index(fields=["note", "created_at"]),
+            models.Index(fields=["owner", "updated_at"]),
         ]
 
     def __str__(self):
@@ -105,9 +198,10 @@ class Attachment(models.Model):
         if self.file and self.size == 0:
             self.size = self.file.size
 
-        # 推断文件类型
+        # 推断文件类型（新上传的文件带 content_type，已落盘的文件沿用 mime_type）
         if self.file:
-            mime = self.file.content_type if self.file.content_type else ""
+            uploaded = getattr(self.file, "_file", None)
+            mime = getattr(uploaded, "content_type", None) or self.mime_type or ""
 
             if not self.mime_type:
                 self.mime_type = mime
@@ -152,3 +246,104 @@ class Attachment(models.Model):
         if self.file:
             return os.path.splitext(self.file.name)[1].lower()
         return ""
+
+
+class UploadSession(models.Model):
+    """
+    分块上传会话
+
+    大文件按块上传：创建会话 → 按偏移量依次上传各块 → 完成后生成附件。
+    分块直接写入临时文件（settings.UPLOAD_TEMP_ROOT），连接中断后可从
+    已接收的偏移量继续；超过 expires_at 未完成的会话由 expire_uploads 命令清理。
+    """
+
+    STATUS_UPLOADING = "uploading"
+    STATUS_COMPLETED = "completed"
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, "上传中"),
+        (STATUS_COMPLETED, "已完成"),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    owner = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+        verbose_name="所属用户",
+    )
+    name = models.CharField(
+        max_length=255,
+        verbose_name="文件名",
+    )
+    mime_type = models.CharField(
+        max_length=100,
+        blank=True,
+        default="",
+        verbose_name="MIME类型",
+    )
+    note = models.ForeignKey(
+        "notes.Note",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="所属笔记",
+    )
+    total_size = models.PositiveBigIntegerField(
+        verbose_name="文件大小（字节）",
+    )
+    chunk_size = models.PositiveIntegerField(
+        verbose_name="分块大小（字节）",
+    )
+    received_bytes = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="已接收字节数",
+        help_text="已连续写入的字节数，即下一块的偏移量",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_UPLOADING,
+        verbose_name="状态",
+    )
+    attachment = models.ForeignKey(
+        Attachment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="生成的附件",
+    )
+    expires_at = models.DateTimeField(
+        verbose_name="过期时间",
+        db_index=True,
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="创建时间",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="更新时间",
+    )
+
+    class Meta:
+        verbose_name = "分块上传会话"
+        verbose_name_plural = "分块上传会话"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.name} ({self.received_bytes}/{self.total_size})"
+
+    @property
+    def temp_path(self) -> Path:
+        """分块写入的临时文件路径"""
+        return Path(settings.UPLOAD_TEMP_ROOT) / f"{self.id}.part"
+
+    @property
+    def is_complete(self) -> bool:
+        return self.received_bytes >= self.total_size
@@ -2,8 +2,59 @@
 附件序列化器模块
 """
 
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Attachment
+
+from .blobs import acquire_upload
+from .downloads import sign_image
+from .derivatives import FULL_SIZE_KEY
+from .models import Attachment, UploadSession
+
+# 允许的文件类型（移除 SVG 防止 XSS 攻击）
+ALLOWED_MIME_TYPES = [
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+    # "image/svg+xml",  # 已移除：SVG 可能包含恶意脚本
+    "application/pdf",
+    "text/plain",
+    "text/markdown",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-powerpoint",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "video/mp4",
+    "video/webm",
+    "audio/mpeg",
+    "audio/wav",
+]
+
+
+def build_srcset(attachment, request=None) -> dict:
+    """
+    图片附件的 srcset 映射：{"320w": URL, ..., "{原图宽}w": URL}
+
+    原尺寸项优先使用 WebP 转码图，没有时使用原文件；衍生图尚未生成时为空。
+    <img srcset> 不携带 JWT，URL 为带时效签名的图片地址（MEDIA_URL 仅在 DEBUG 下提供）。
+    """
+    if not attachment.derivatives:
+        return {}
+
+    def signed(variant=None):
+        url = reverse("attachments:image", args=[sign_image(attachment.id, variant)])
+        return request.build_absolute_uri(url) if request is not None else url
+
+    srcset = {}
+    for key in attachment.derivatives:
+        width = attachment.width if key == FULL_SIZE_KEY else key
+        srcset[f"{width}w"] = signed(key)
+    if attachment.width and f"{attachment.width}w" not in srcset:
+        srcset[f"{attachment.width}w"] = signed()
+    return dict(sorted(srcset.items(), key=lambda item: int(item[0][:-1])))
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
@@ -11,6 +62,7 @@ class AttachmentSerializer(serializers.ModelSerializer):
 
     size_formatted = serializers.ReadOnlyField()
     extension = serializers.ReadOnlyField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Attachment
@@ -23,6 +75,9 @@ class AttachmentSerializer(serializers.ModelSerializer):
             "size",
             "size_formatted",
             "extension",
+            "width",
+            "height",
+            "srcset",
             "note",
             "created_at",
         ]
@@ -32,14 +87,20 @@ class AttachmentSerializer(serializers.ModelSerializer):
             "size",
             "size_formatted",
             "extension",
+            "width",
+            "height",
             "created_at",
         ]
 
+    def get_srcset(self, obj):
+        return build_srcset(obj, self.context.get("request"))
+
 
 class AttachmentListSerializer(serializers.ModelSerializer):
     """附件列表序列化器（精简版）"""
 
     size_formatted = serializers.ReadOnlyField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Attachment
@@ -50,9 +111,15 @@ class AttachmentListSerializer(serializers.ModelSerializer):
             "file_type",
             "size",
             "size_formatted",
+            "width",
+            "height",
+            "srcset",
             "created_at",
         ]
 
+    def get_srcset(self, obj):
+        return build_srcset(obj, self.context.get("request"))
+
 
 class AttachmentCreateSerializer(serializers.ModelSerializer):
     """附件创建序列化器"""
@@ -73,36 +140,85 @@ class AttachmentCreateSerializer(serializers.ModelSerializer):
         if value.size > max_size:
             raise serializers.ValidationError("文件大小不能超过 50MB")
 
-        # 允许的文件类型（移除 SVG 防止 XSS 攻击）
-        allowed_types = [
-            "image/jpeg",
-            "image/png",
-            "image/gif",
-            "image/webp",
-            # "image/svg+xml",  # 已移除：SVG 可能包含恶意脚本
-            "application/pdf",
-            "text/plain",
-            "text/markdown",
-            "application/msword",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "application/vnd.ms-excel",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "application/vnd.ms-powerpoint",
-            "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            "video/mp4",
-            "video/webm",
-            "audio/mpeg",
-            "audio/wav",
-        ]
-
         content_type = value.content_type if value.content_type else ""
 
-        if content_type and content_type not in allowed_types:
+        if content_type and content_type not in ALLOWED_MIME_TYPES:
             raise serializers.ValidationError("不支持的文件类型")
 
         return value
 
     def create(self, validated_data):
-        """创建附件"""
-        validated_data["owner"] = self.context["request"].user
-        return super().create(validated_data)
+        """创建附件（相同内容复用已存储的文件）"""
+        owner = self.context["request"].user
+        upload = validated_data.pop("file")
+        with transaction.atomic():
+            blob = acquire_upload(owner, upload)
+            return Attachment.objects.create(
+                owner=owner,
+                name=validated_data["name"],
+                note=validated_data.get("note"),
+                mime_type=upload.content_type or "",
+                size=blob.size,
+                blob=blob,
+                file=blob.file.name,
+            )
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """分块上传会话序列化器"""
+
+    offset = serializers.IntegerField(source="received_bytes", read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            "id",
+            "name",
+            "mime_type",
+            "note",
+            "total_size",
+            "chunk_size",
+            "offset",
+            "status",
+            "attachment",
+            "expires_at",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class UploadSessionCreateSerializer(serializers.ModelSerializer):
+    """分块上传会话创建序列化器"""
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            "name",
+            "mime_type",
+            "note",
+            "total_size",
+        ]
+
+    def validate_total_size(self, value):
+        """验证文件大小"""
+        from django.conf import settings
+
+        if value <= 0:
+            raise serializers.ValidationError("文件大小必须大于 0")
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"文件大小不能超过 {settings.UPLOAD_MAX_SIZE // (1024 * 1024)}MB"
+            )
+        return value
+
+    def validate_mime_type(self, value):
+        """验证文件类型"""
+        if value and value not in ALLOWED_MIME_TYPES:
+            raise serializers.ValidationError("不支持的文件类型")
+        return value
+
+    def validate_note(self, value):
+        """只能关联自己的笔记"""
+        if value and value.owner_id != self.context["request"].user.id:
+            raise serializers.ValidationError("笔记不存在")
+        return value
@@ -0,0 +1,64 @@
+"""
+Attachments signals.
+
+Release shared file blobs when attachments are deleted, remove files (and
+their image derivatives) from storage once nothing references them, and
+queue derivative generation for new image attachments. Every change is
+also applied to the owner's storage usage ledger.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.storage import adjust_usage
+from .blobs import delete_files_on_commit, release_blob
+from .derivatives import needs_derivatives
+from .models import Attachment, AttachmentBlob
+from .tasks import enqueue_derivatives
+
+
+@receiver(post_delete, sender=Attachment)
+def release_attachment_file(sender, instance, **kwargs):
+    """Drop the attachment's blob reference; legacy rows own their file."""
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+    else:
+        delete_files_on_commit(instance.file.storage, [instance.file.name])
+    adjust_usage(
+        instance.owner_id,
+        attachments_count=-1,
+        attachments_bytes=-instance.size,
+        attachments_stored_bytes=0 if instance.blob_id else -instance.size,
+    )
+
+
+@receiver(post_delete, sender=AttachmentBlob)
+def delete_blob_file(sender, instance, **kwargs):
+    """Remove the blob's file after the deleting transaction commits."""
+    delete_files_on_commit(instance.file.storage, [instance.file.name])
+
+
+@receiver(post_save, sender=AttachmentBlob)
+def count_blob_storage(sender, instance, created, **kwargs):
+    """A new blob is one more physical copy on disk (removal: release_blobs)."""
+    if created:
+        adjust_usage(instance.owner_id, attachments_stored_bytes=instance.size)
+
+
+@receiver(post_save, sender=Attachment)
+def queue_image_derivatives(sender, instance, created, **kwargs):
+    """Generate thumbnails for newly uploaded images off the request path."""
+    if created and needs_derivatives(instance):
+        enqueue_derivatives(instance)
+
+
+@receiver(post_save, sender=Attachment)
+def count_attachment_storage(sender, instance, created, **kwargs):
+    """Add a new attachment to the usage ledger; owned files also use disk."""
+    if created:
+        adjust_usage(
+            instance.owner_id,
+            attachments_count=1,
+            attachments_bytes=instance.size,
+            attachments_stored_bytes=0 if instance.blob_id else instance.size,
+        )
@@ -0,0 +1,62 @@
+"""
+附件后台任务模块
+
+图片附件的衍生图在请求结束后由进程内线程池生成（Pillow 缩放与编码时释放 GIL），
+上传请求不等待图片处理。批量补生成见 generate_derivatives 命令（进程池）。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_derivative_executor() -> ThreadPoolExecutor:
+    """获取进程内共享的衍生图线程池（按 settings 配置创建）"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.ATTACHMENT_DERIVATIVE_WORKERS),
+                    thread_name_prefix="derivatives",
+                )
+    return _executor
+
+
+def _run(attachment_id) -> None:
+    from .derivatives import generate_derivatives
+
+    close_old_connections()
+    try:
+        generate_derivatives(attachment_id)
+    except Exception:
+        logger.exception("附件衍生图任务执行失败: %s", attachment_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_derivatives(attachment) -> None:
+    """
+    提交衍生图生成任务
+
+    ATTACHMENT_DERIVATIVES_EAGER 为真时在当前线程同步执行（测试/本地调试），
+    否则在事务提交后交给后台线程池。
+    """
+    from .derivatives import generate_derivatives
+
+    if settings.ATTACHMENT_DERIVATIVES_EAGER:
+        generate_derivatives(attachment.id)
+        return
+
+    attachment_id = attachment.id
+    transaction.on_commit(
+        lambda: get_derivative_executor().submit(_run, attachment_id)
+    )
@@ -0,0 +1,213 @@
+"""
+附件分块上传服务模块
+
+协议：
+1. 创建会话：声明文件名、大小、类型，返回会话 ID 与分块大小
+2. 上传分块：PUT 原始字节，携带偏移量与该块的 SHA-256；
+   偏移量必须等于已接收字节数，校验失败的块被丢弃
+3. 查询会话：连接中断后读取已接收字节数，从该偏移量继续上传
+4. 完成：全部字节到齐后把临时文件按内容哈希存入附件 Blob 并创建附件
+
+分块从请求流中按块读取并直接写入临时文件，不在内存中缓存整个文件；
+完成时顺序读取一次临时文件计算 SHA-256，新内容在同文件系统下只做重命名，
+已存在的内容直接复用（见 blobs 模块）。
+"""
+
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .blobs import acquire_path
+from .models import Attachment, UploadSession
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 无 fcntl，退化为仅靠偏移量校验
+    fcntl = None
+
+# 从请求流读取的块大小
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """分块无效（校验和不符、大小超限等）"""
+
+
+class UploadGone(Exception):
+    """会话已完成，但生成的附件已被删除"""
+
+
+class UploadConflict(Exception):
+    """偏移量与服务器状态不一致，或同一会话正在写入"""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+def _expiry():
+    return timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+
+
+def create_session(owner, name: str, total_size: int, mime_type: str = "", note=None):
+    """创建上传会话并预先建立空的临时文件"""
+    session = UploadSession.objects.create(
+        owner=owner,
+        name=name,
+        mime_type=mime_type,
+        note=note,
+        total_size=total_size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        expires_at=_expiry(),
+    )
+    session.temp_path.parent.mkdir(parents=True, exist_ok=True)
+    session.temp_path.touch()
+    return session
+
+
+def write_chunk(session, offset: int, stream, length: int, checksum: str) -> int:
+    """
+    写入一个分块
+
+    Args:
+        session: 上传会话
+        offset: 分块在文件中的偏移量
+        stream: 请求体流（只按 READ_BLOCK_SIZE 逐块读取）
+        length: 分块长度（Content-Length）
+        checksum: 分块的 SHA-256 十六进制摘要
+
+    Returns:
+        写入后的已接收字节数
+
+    Raises:
+        UploadConflict: 偏移量不等于已接收字节数，或会话正被另一请求写入
+        UploadError: 分块过大、超出文件大小或校验和不符
+    """
+    if session.status != UploadSession.STATUS_UPLOADING:
+        raise UploadError("上传会话已结束")
+    if offset != session.received_bytes:
+        raise UploadConflict("偏移量与已接收字节数不一致", session.received_bytes)
+    if length <= 0 or length > session.chunk_size:
+        raise UploadError(f"分块大小必须在 1 到 {session.chunk_size} 字节之间")
+    if offset + length > session.total_size:
+        raise UploadError("分块超出文件大小")
+
+    digest = hashlib.sha256()
+    with open(session.temp_path, "r+b") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflict("该会话正在上传其他分块", session.received_bytes)
+
+        # 持锁后重新读取：加锁前读到的偏移量可能已被刚释放锁的请求推进，
+        # 此时不能再写入或截断文件，否则会覆盖已确认的字节
+        received = (
+            UploadSession.objects.filter(id=session.id)
+            .values_list("received_bytes", flat=True)
+            .first()
+        )
+        if received != offset:
+            session.received_bytes = received or 0
+            raise UploadConflict("偏移量与已接收字节数不一致", session.received_bytes)
+
+        f.seek(offset)
+        remaining = length
+        while remaining:
+            block = stream.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            f.write(block)
+            remaining -= len(block)
+
+        if remaining or digest.hexdigest() != checksum.lower():
+            # 丢弃不完整或损坏的分块，客户端从原偏移量重传
+            f.truncate(offset)
+            raise UploadError("分块不完整或校验和不符")
+        f.flush()
+
+        # 条件更新：只有偏移量仍未被其他请求推进时才生效
+        updated = UploadSession.objects.filter(
+            id=session.id, received_bytes=offset
+        ).update(
+            received_bytes=offset + length,
+            expires_at=_expiry(),
+            updated_at=timezone.now(),
+        )
+    if not updated:
+        session.refresh_from_db()
+        raise UploadConflict("偏移量与已接收字节数不一致", session.received_bytes)
+
+    session.received_bytes = offset + length
+    return session.received_bytes
+
+
+def complete_session(session) -> Attachment:
+    """
+    完成上传：把临时文件存入附件 Blob 并创建附件
+
+    并发的完成请求按会话行加锁依次执行，后到的请求返回同一个附件。
+
+    Raises:
+        UploadError: 仍有字节未上传
+        UploadGone: 会话已完成但附件已被删除
+    """
+    blob = created = None
+    try:
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status == UploadSession.STATUS_COMPLETED:
+                if session.attachment_id is None:
+                    raise UploadGone("上传已完成，生成的附件已被删除")
+                return session.attachment
+            if not session.is_complete:
+                raise UploadError(
+                    f"文件尚未上传完成：{session.received_bytes}/{session.total_size}"
+                )
+
+            # 计算整个文件的哈希并入库；内容已存在时临时文件直接删除
+            blob, created = acquire_path(session.owner, session.temp_path, session.name)
+            attachment = Attachment.objects.create(
+                owner=session.owner,
+                note=session.note,
+                name=os.path.splitext(session.name)[0][:255],
+                mime_type=session.mime_type,
+                size=session.total_size,
+                blob=blob,
+                file=blob.file.name,
+            )
+            session.status = UploadSession.STATUS_COMPLETED
+            session.attachment = attachment
+            session.save(update_fields=["status", "attachment", "updated_at"])
+    except Exception:
+        if created:
+            blob.file.delete(save=False)
+        raise
+    return attachment
+
+
+def discard_session(session) -> None:
+    """删除会话及其临时文件"""
+    session.temp_path.unlink(missing_ok=True)
+    session.delete()
+
+
+def expire_sessions(now=None) -> int:
+    """
+    清理过期的未完成会话与已完成会话的记录
+
+    Returns:
+        删除的会话数
+    """
+    now = now or timezone.now()
+    expired = UploadSession.objects.filter(expires_at__lte=now)
+    count = 0
+    for session in expired.iterator():
+        discard_session(session)
+        count += 1
+    return count
@@ -4,13 +4,16 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AttachmentViewSet
+from .views import AttachmentViewSet, SignedImageView, UploadSessionViewSet
 
 app_name = "attachments"
 
 router = DefaultRouter()
+# 需注册在 r"" 之前，否则 uploads/ 会被当作附件 ID 匹配
+router.register(r"uploads", UploadSessionViewSet, basename="upload")
 router.register(r"", AttachmentViewSet, basename="attachment")
 
 urlpatterns = [
+    path("image/<str:token>/", SignedImageView.as_view(), name="image"),
     path("", include(router.urls)),
 ]
@@ -2,17 +2,32 @@
 附件视图模块
 """
 
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
 from utils.permissions import IsOwnerOrReadOnly
 
-from .models import Attachment
+from .blobs import delete_attachments
+from .downloads import download_response, unsign_image
+from .models import Attachment, UploadSession
 from .serializers import (
     AttachmentSerializer,
     AttachmentListSerializer,
     AttachmentCreateSerializer,
+    UploadSessionSerializer,
+    UploadSessionCreateSerializer,
+)
+from .uploads import (
+    UploadConflict,
+    UploadError,
+    UploadGone,
+    complete_session,
+    create_session,
+    discard_session,
+    write_chunk,
 )
 
 
@@ -102,10 +117,7 @@ class AttachmentViewSet(viewsets.ModelViewSet):
         """删除附件"""
         instance = self.get_object()
 
-        # 删除文件
-        if instance.file:
-            instance.file.delete(save=False)
-
+        # 文件由 post_delete 信号释放（共享 Blob 的最后一个引用删除时才删除文件）
         instance.delete()
         return Response(
             {
@@ -115,6 +127,23 @@ class AttachmentViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(detail=True, methods=["get"])
+    def download(self, request, id=None):
+        """
+        下载附件文件
+
+        支持 Range / If-Range 断点与拖动播放、ETag / Last-Modified 条件请求；
+        ?download=1 时强制作为下载；?w=320 / ?w=full 返回图片衍生图（见 srcset）
+        """
+        attachment = self.get_object()
+        as_attachment = request.query_params.get("download") in ("1", "true")
+        return download_response(
+            request,
+            attachment,
+            as_attachment=as_attachment,
+            variant=request.query_params.get("w") or None,
+        )
+
     @action(detail=False, methods=["get"])
     def recent(self, request):
         """获取最近附件"""
@@ -143,16 +172,156 @@ class AttachmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        attachments = self.get_queryset().filter(id__in=ids)
+        # 单条 DELETE + 合并的引用计数更新，文件在事务提交后删除
+        deleted = delete_attachments(self.get_queryset().filter(id__in=ids))
+
+        return Response(
+            {
+                "code": 200,
+                "message": f"成功删除 {deleted} 个附件",
+                "data": {"deleted": deleted},
+            }
+        )
+
+
+class SignedImageView(APIView):
+    """
+    签名图片视图
+
+    GET /api/attachments/image/{token}/
+
+    令牌由附件序列化器的 srcset 签发，<img> 标签无法携带 JWT，因此不要求登录；
+    令牌过期或无效时返回 404。
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, token):
+        attachment_id, variant = unsign_image(token)
+        attachment = get_object_or_404(Attachment, id=attachment_id)
+        return download_response(request, attachment, variant=variant)
+
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    分块上传视图集
+
+    - POST /api/attachments/uploads/ - 创建上传会话
+    - GET /api/attachments/uploads/{id}/ - 查询已接收字节数（断点续传）
+    - PUT /api/attachments/uploads/{id}/chunk/?offset=N - 上传分块
+      （请求体为原始字节，X-Chunk-SHA256 头为该块的 SHA-256）
+    - POST /api/attachments/uploads/{id}/complete/ - 完成上传并生成附件
+    - DELETE /api/attachments/uploads/{id}/ - 取消上传
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+    lookup_field = "id"
+
+    def get_queryset(self):
+        """获取当前用户的上传会话"""
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """创建上传会话"""
+        serializer = UploadSessionCreateSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+
+        session = create_session(request.user, **serializer.validated_data)
+        return Response(
+            {
+                "code": 201,
+                "message": "上传会话已创建",
+                "data": UploadSessionSerializer(session).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """查询上传进度"""
+        session = self.get_object()
+        return Response(
+            {
+                "code": 200,
+                "message": "获取成功",
+                "data": UploadSessionSerializer(session).data,
+            }
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        """取消上传"""
+        discard_session(self.get_object())
+        return Response({"code": 200, "message": "上传已取消"})
 
-        for attachment in attachments:
-            if attachment.file:
-                attachment.file.delete(save=False)
-            attachment.delete()
+    @action(detail=True, methods=["put"])
+    def chunk(self, request, id=None):
+        """上传分块（请求体直接流式写入临时文件，不经过 DRF 解析器）"""
+        session = self.get_object()
+        try:
+            offset = int(request.query_params.get("offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response(
+                {"code": 400, "message": "请提供有效的 offset 与 Content-Length"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        checksum = request.headers.get("X-Chunk-SHA256", "")
+        if not checksum:
+            return Response(
+                {"code": 400, "message": "缺少分块校验和（X-Chunk-SHA256）"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            received = write_chunk(session, offset, request.stream, length, checksum)
+        except UploadConflict as e:
+            return Response(
+                {"code": 409, "message": str(e), "data": {"offset": e.offset}},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except UploadError as e:
+            return Response(
+                {"code": 400, "message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return Response(
             {
                 "code": 200,
-                "message": f"成功删除 {len(ids)} 个附件",
+                "message": "分块已接收",
+                "data": {"offset": received, "total_size": session.total_size},
             }
         )
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, id=None):
+        """完成上传，生成附件"""
+        session = self.get_object()
+        try:
+            attachment = complete_session(session)
+        except UploadGone as e:
+            return Response(
+                {"code": 410, "message": str(e)},
+                status=status.HTTP_410_GONE,
+            )
+        except UploadError as e:
+            return Response(
+                {
+                    "code": 400,
+                    "message": str(e),
+                    "data": {"offset": session.received_bytes},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "code": 201,
+                "message": "上传成功",
+                "data": AttachmentSerializer(attachment).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
@@ -91,6 +91,9 @@ class Category(MPTTModel):
         verbose_name = "分类"
         verbose_name_plural = "分类"
         ordering = ["sort_order", "name"]
+        indexes = [
+            models.Index(fields=["owner", "updated_at"]),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["slug", "owner"],
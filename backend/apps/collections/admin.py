@@ -3,7 +3,7 @@
 """
 
 from django.contrib import admin
-from .models import Collection
+from .models import BookmarkImport, Collection
 
 
 @admin.register(Collection)
@@ -27,11 +27,15 @@ class CollectionAdmin(admin.ModelAdmin):
         "domain",
         "created_at",
     ]
-    search_fields = ["title", "description", "content", "owner__username", "url"]
+    search_fields = ["title", "description", "owner__username", "url"]
     ordering = ["-created_at"]
     raw_id_fields = ["owner"]
     readonly_fields = [
         "domain",
+        "text_hash",
+        "text_size",
+        "html_hash",
+        "html_size",
         "word_count",
         "view_count",
         "created_at",
@@ -40,8 +44,28 @@ class CollectionAdmin(admin.ModelAdmin):
     fieldsets = (
         (None, {"fields": ("title", "url", "owner")}),
         ("来源", {"fields": ("domain", "favicon", "image")}),
-        ("内容", {"fields": ("description", "content", "html_content")}),
+        ("内容", {"fields": ("description",)}),
+        ("存储", {"fields": ("text_hash", "text_size", "html_hash", "html_size")}),
         ("状态", {"fields": ("is_processed",)}),
         ("统计", {"fields": ("word_count", "view_count")}),
         ("时间", {"fields": ("created_at", "updated_at")}),
     )
+
+
+@admin.register(BookmarkImport)
+class BookmarkImportAdmin(admin.ModelAdmin):
+    """
+    书签导入管理后台
+    """
+
+    list_display = [
+        "id",
+        "owner",
+        "total",
+        "created_count",
+        "skipped_count",
+        "metadata_only",
+        "created_at",
+    ]
+    ordering = ["-created_at"]
+    raw_id_fields = ["owner"]
@@ -0,0 +1,14 @@
+"""
+Collections app configuration.
+"""
+
+from django.apps import AppConfig
+
+
+class CollectionsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.collections"
+    verbose_name = "收藏"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,155 @@
+"""
+收藏正文 Blob 服务模块
+
+抓取得到的正文与原始 HTML 存入内容寻址 Blob 存储（utils.blob_store），
+收藏表只保存哈希与大小。相同内容（例如多个用户收藏同一页面）只存一份，
+ContentBlob 记录引用计数，计数归零时删除数据。正文开头的
+COLLECTION_SEARCH_TEXT_MAX_CHARS 个字符同时写入 ContentBlob.search_text，
+收藏列表按正文搜索时与其关联查询。
+
+计数归零的记录保留到事务提交后，在行锁下删除数据文件与记录；并发写入同一内容时
+先递增计数（等待该行锁），发现记录已删除则重新建行并补写数据文件。
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from utils.blob_store import get_blob_store
+from .models import ContentBlob
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_text(text: str, searchable: bool = False) -> tuple[str, int]:
+    """
+    写入文本并增加引用计数
+
+    Args:
+        text: 文本
+        searchable: 是否保存检索文本（收藏正文；原始 HTML 不需要）
+
+    Returns:
+        (哈希, 原始字节数)，空文本返回 ("", 0)
+    """
+    if not text:
+        return "", 0
+
+    data = text.encode("utf-8")
+    search_text = search_excerpt(text) if searchable else ""
+    store = get_blob_store()
+    stored = store.put(data)
+    created = False
+    for _ in range(2):
+        updated = ContentBlob.objects.filter(hash=stored.hash).update(
+            refcount=F("refcount") + 1
+        )
+        if updated:
+            break
+        try:
+            with transaction.atomic():
+                ContentBlob.objects.create(
+                    hash=stored.hash,
+                    size=stored.size,
+                    stored_size=stored.stored_size,
+                    codec=stored.codec,
+                    refcount=1,
+                    search_text=search_text,
+                )
+            created = True
+            break
+        except IntegrityError:
+            # 并发写入同一内容：对方已建行，回到计数递增
+            continue
+    if searchable and not created:
+        # 已有记录可能来自不需要检索文本的引用
+        ContentBlob.objects.filter(hash=stored.hash, search_text="").update(
+            search_text=search_text
+        )
+    # 写入数据后、递增计数前，旧记录的数据文件可能刚被删除，补写一次
+    if not store.exists(stored.hash):
+        store.put(data)
+    return stored.hash, stored.size
+
+
+def search_excerpt(text: str) -> str:
+    """检索文本：正文开头的有限长度片段，避免为长正文保存完整的未压缩副本"""
+    return text[: settings.COLLECTION_SEARCH_TEXT_MAX_CHARS]
+
+
+def matching_text_hashes(search: str):
+    """检索文本包含 search 的正文哈希（用作收藏查询的子查询）"""
+    return ContentBlob.objects.filter(search_text__icontains=search).values("hash")
+
+
+def _delete_unreferenced(hashes) -> None:
+    """在行锁下删除仍未被引用的数据文件与记录（事务提交后调用）"""
+    store = get_blob_store()
+    with transaction.atomic():
+        # 提交前可能已被重新引用
+        doomed = list(
+            ContentBlob.objects.select_for_update()
+            .filter(hash__in=list(hashes), refcount=0)
+            .values_list("hash", flat=True)
+        )
+        for blob_hash in doomed:
+            store.delete(blob_hash)
+        ContentBlob.objects.filter(hash__in=doomed).delete()
+
+
+def release_text(blob_hash: str) -> None:
+    """减少引用计数，归零时在事务提交后删除数据文件与记录"""
+    if not blob_hash:
+        return
+
+    updated = ContentBlob.objects.filter(hash=blob_hash, refcount__gt=0).update(
+        refcount=F("refcount") - 1
+    )
+    if updated:
+        transaction.on_commit(lambda: _delete_unreferenced([blob_hash]))
+
+
+def release_texts(counts: dict) -> None:
+    """
+    批量减少引用计数（批量删除收藏时使用）
+
+    Args:
+        counts: {哈希: 释放的引用数}；计数相同的 Blob 合并为一条 UPDATE，
+            归零的数据文件与记录在事务提交后删除
+    """
+    counts = {blob_hash: count for blob_hash, count in counts.items() if blob_hash}
+    if not counts:
+        return
+
+    by_count = defaultdict(list)
+    for blob_hash, count in counts.items():
+        by_count[count].append(blob_hash)
+
+    with transaction.atomic():
+        for count, hashes in by_count.items():
+            ContentBlob.objects.filter(hash__in=hashes).update(
+                refcount=Greatest(F("refcount") - count, 0)
+            )
+        hashes = list(
+            ContentBlob.objects.filter(
+                hash__in=list(counts), refcount=0
+            ).values_list("hash", flat=True)
+        )
+
+    if hashes:
+        transaction.on_commit(lambda: _delete_unreferenced(hashes))
+
+
+def read_text(blob_hash: str) -> str:
+    """读取并解压文本，数据缺失时返回空字符串"""
+    if not blob_hash:
+        return ""
+    try:
+        return get_blob_store().get(blob_hash).decode("utf-8")
+    except FileNotFoundError:
+        logger.warning("收藏正文 Blob 缺失: %s", blob_hash)
+        return ""
@@ -0,0 +1,171 @@
+"""
+浏览器书签导入模块
+
+解析浏览器导出的 Netscape 书签文件（bookmarks.html）：
+
+    <DT><H3>文件夹</H3>
+    <DL><p>
+        <DT><A HREF="https://example.com" ADD_DATE="1700000000">标题</A>
+    </DL><p>
+"""
+
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+
+from django.db import transaction
+
+# 单次导入的书签数量上限
+MAX_BOOKMARKS = 10000
+
+# 书签文件大小上限（字节）
+MAX_FILE_SIZE = 20 * 1024 * 1024
+
+# 与 Collection 字段长度保持一致
+MAX_URL_LENGTH = 2000
+MAX_TITLE_LENGTH = 500
+
+
+class Bookmark(NamedTuple):
+    """解析出的书签"""
+
+    url: str
+    title: str
+    folder: str
+    added_at: Optional[datetime]
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    """Netscape 书签文件解析器（记录所在文件夹路径）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bookmarks = []
+        self._folders = []
+        self._pending_folder = None
+        self._in_folder_title = False
+        self._folder_title = []
+        self._link = None
+        self._link_text = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {name.lower(): value or "" for name, value in attrs}
+        if tag == "h3":
+            self._in_folder_title = True
+            self._folder_title = []
+        elif tag == "dl":
+            # 紧随 <H3> 的 <DL> 是该文件夹的内容
+            self._folders.append(self._pending_folder or "")
+            self._pending_folder = None
+        elif tag == "a":
+            self._link = attributes
+            self._link_text = []
+
+    def handle_endtag(self, tag):
+        if tag == "h3":
+            self._in_folder_title = False
+            self._pending_folder = "".join(self._folder_title).strip()
+        elif tag == "dl" and self._folders:
+            self._folders.pop()
+        elif tag == "a" and self._link is not None:
+            self._add_bookmark(self._link, "".join(self._link_text).strip())
+            self._link = None
+
+    def handle_data(self, data):
+        if self._in_folder_title:
+            self._folder_title.append(data)
+        elif self._link is not None:
+            self._link_text.append(data)
+
+    def _add_bookmark(self, attributes: dict[str, str], title: str) -> None:
+        url = attributes.get("href", "").strip()
+        added_at = None
+        add_date = attributes.get("add_date", "")
+        if add_date.isdigit():
+            try:
+                added_at = datetime.fromtimestamp(int(add_date), tz=timezone.utc)
+            except (OverflowError, OSError, ValueError):
+                added_at = None
+        folder = "/".join(name for name in self._folders if name)
+        self.bookmarks.append(Bookmark(url, title, folder, added_at))
+
+
+def parse_bookmarks(html: str) -> list[Bookmark]:
+    """
+    解析书签文件
+
+    Returns:
+        按文件中出现顺序排列的书签列表（未去重、未校验）
+    """
+    parser = NetscapeBookmarkParser()
+    parser.feed(html)
+    parser.close()
+    return parser.bookmarks
+
+
+def is_importable_url(url: str) -> bool:
+    """只导入 http(s) 链接（跳过 javascript:、place: 等）"""
+    if not url or len(url) > MAX_URL_LENGTH:
+        return False
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+def import_bookmarks(owner, html: str, metadata_only: bool = False):
+    """
+    导入书签：批量创建收藏并把抓取任务交给后台执行器
+
+    跳过非 http(s) 链接、文件内重复链接及用户已收藏的链接；
+    只处理前 MAX_BOOKMARKS 条，超出部分计入 truncated_count。
+
+    Returns:
+        BookmarkImport 导入任务
+    """
+    from apps.users.storage import adjust_usage
+    from .models import BookmarkImport, Collection
+    from .tasks import enqueue_scrapes
+
+    parsed = parse_bookmarks(html)
+    bookmarks = parsed[:MAX_BOOKMARKS]
+
+    existing = set(
+        Collection.objects.filter(owner=owner).values_list("url", flat=True)
+    )
+    seen = set()
+    rows = []
+    for bookmark in bookmarks:
+        if not is_importable_url(bookmark.url):
+            continue
+        if bookmark.url in seen or bookmark.url in existing:
+            continue
+        seen.add(bookmark.url)
+        rows.append(bookmark)
+
+    with transaction.atomic():
+        job = BookmarkImport.objects.create(
+            owner=owner,
+            total=len(parsed),
+            created_count=len(rows),
+            skipped_count=len(bookmarks) - len(rows),
+            truncated_count=len(parsed) - len(bookmarks),
+            metadata_only=metadata_only,
+        )
+        collections = Collection.objects.bulk_create(
+            [
+                Collection(
+                    owner=owner,
+                    import_job=job,
+                    url=bookmark.url,
+                    title=(bookmark.title or bookmark.url)[:MAX_TITLE_LENGTH],
+                    domain=urlparse(bookmark.url).netloc,
+                )
+                for bookmark in rows
+            ],
+            batch_size=500,
+        )
+        # bulk_create 不触发 post_save，手动计入用量台账
+        adjust_usage(owner.id, collections_count=len(collections))
+        enqueue_scrapes(collections, metadata_only=metadata_only)
+
+    return job
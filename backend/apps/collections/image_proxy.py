@@ -0,0 +1,160 @@
+"""
+收藏图片代理模块
+
+收藏列表中的网站图标与封面图不再由浏览器直接访问第三方站点，而是经后端代理：
+- 代理 URL 携带签名（django.core.signing），只能访问后端生成过的图片地址
+- 经 SSRF 安全抓取层下载（utils.http_client.validated_get），限制类型与大小
+- 用 Pillow 缩小为固定尺寸，结果写入按磁盘预算 LRU 淘汰的本地缓存
+- 同一图片的并发请求只下载一次
+"""
+
+import hashlib
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+from utils.file_cache import LRUFileCache
+from utils.http_client import validated_get
+from utils.images import ImageError, make_thumbnail
+from utils.ssrf_validator import is_url_safe, validate_url
+from utils.url_normalizer import normalize_url
+from .scrape_cache import SingleFlight
+
+# 缩略图尺寸（最长边像素）
+IMAGE_SIZES = {
+    "icon": 64,
+    "thumb": 480,
+}
+
+# 原图下载大小上限（字节）
+DEFAULT_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# 缓存目录默认磁盘预算（字节）
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+CONTENT_TYPES = {
+    ".webp": "image/webp",
+    ".png": "image/png",
+}
+SUFFIXES = {content_type: suffix for suffix, content_type in CONTENT_TYPES.items()}
+
+SIGNING_SALT = "collections.image-proxy"
+
+FETCH_TIMEOUT = 10
+
+
+class ImageProxyError(Exception):
+    """图片无法代理（签名无效、下载失败或不是图片）"""
+
+
+class ProxiedImage(NamedTuple):
+    """代理结果"""
+
+    path: str
+    content_type: str
+    etag: str
+
+
+_signer = signing.Signer(salt=SIGNING_SALT)
+_flight = SingleFlight()
+_cache = None
+
+
+def get_image_cache() -> LRUFileCache:
+    """按 settings.IMAGE_PROXY_ROOT / IMAGE_PROXY_MAX_BYTES 获取共享缓存"""
+    global _cache
+    root = Path(settings.IMAGE_PROXY_ROOT)
+    if _cache is None or _cache.root != root:
+        _cache = LRUFileCache(
+            root, getattr(settings, "IMAGE_PROXY_MAX_BYTES", DEFAULT_CACHE_BYTES)
+        )
+    return _cache
+
+
+def sign_image(url: str, size: str) -> str:
+    """生成代理令牌（不含时间戳，同一图片的代理 URL 固定不变，便于浏览器缓存）"""
+    return _signer.sign_object([url, size], compress=True)
+
+
+def unsign_image(token: str) -> tuple[str, str]:
+    """校验代理令牌，返回 (图片 URL, 尺寸名)"""
+    try:
+        url, size = _signer.unsign_object(token)
+    except (signing.BadSignature, ValueError, TypeError) as e:
+        raise ImageProxyError("无效的图片地址") from e
+    if size not in IMAGE_SIZES:
+        raise ImageProxyError("无效的图片尺寸")
+    return url, size
+
+
+def proxied_image_url(url: Optional[str], size: str, request=None) -> Optional[str]:
+    """
+    远程图片对应的代理 URL
+
+    未通过 SSRF 校验（非 http(s)、内网、不在白名单）的地址原样返回，
+    前端仍可直接加载；空值返回 None。
+    """
+    if not url:
+        return None
+    if not is_url_safe(url):
+        return url
+    path = reverse("collections:image-proxy", args=[sign_image(url, size)])
+    return request.build_absolute_uri(path) if request is not None else path
+
+
+def _download(url: str) -> bytes:
+    max_bytes = getattr(
+        settings, "IMAGE_PROXY_MAX_IMAGE_BYTES", DEFAULT_MAX_IMAGE_BYTES
+    )
+    try:
+        with validated_get(
+            url, validate=validate_url, timeout=FETCH_TIMEOUT, stream=True
+        ) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "").lower()
+            if content_type and not content_type.startswith(
+                ("image/", "application/octet-stream")
+            ):
+                raise ImageProxyError(f"不是图片：{content_type}")
+
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageProxyError(f"图片过大：超过 {max_bytes} 字节")
+                chunks.append(chunk)
+    except ImageProxyError:
+        raise
+    except Exception as e:
+        raise ImageProxyError(f"图片下载失败：{e}") from e
+    return b"".join(chunks)
+
+
+def get_proxied_image(url: str, size: str) -> ProxiedImage:
+    """
+    获取缩略图（优先读取本地缓存）
+
+    Raises:
+        ImageProxyError: 下载失败或不是可识别的图片
+    """
+    # 缓存按规范化 URL 区分，下载仍使用原始 URL（签名 CDN 地址不能改写参数）
+    key = hashlib.sha256(f"{size}:{normalize_url(url)}".encode("utf-8")).hexdigest()
+    cache = get_image_cache()
+
+    def load():
+        path = cache.get(key)
+        if path is None:
+            try:
+                thumbnail = make_thumbnail(_download(url), IMAGE_SIZES[size])
+            except ImageError as e:
+                raise ImageProxyError(str(e)) from e
+            path = cache.put(key, thumbnail.data, SUFFIXES[thumbnail.content_type])
+        return ProxiedImage(str(path), CONTENT_TYPES[path.suffix], path.stem)
+
+    hit = cache.get(key)
+    if hit is not None:
+        return ProxiedImage(str(hit), CONTENT_TYPES[hit.suffix], hit.stem)
+    return _flight.do(key, load)
@@ -0,0 +1,55 @@
+"""
+重新抓取未完成的收藏
+
+进程重启时线程池中排队的任务会丢失，可用该命令补抓。
+--all 会对已处理的收藏发送条件请求（ETag / Last-Modified / 内容哈希），
+未变化的页面只消耗一次响应头往返。
+
+用法:
+    python manage.py scrape_pending
+    python manage.py scrape_pending --include-failed --user 1
+    python manage.py scrape_pending --all
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.collections.models import Collection
+from apps.collections.tasks import get_scrape_executor
+
+
+class Command(BaseCommand):
+    help = "通过抓取执行器补抓等待中（可选：失败）的收藏"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="仅处理指定用户 ID")
+        parser.add_argument(
+            "--include-failed", action="store_true", help="同时重试抓取失败的收藏"
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="刷新全部收藏（已处理的使用条件请求）"
+        )
+
+    def handle(self, *args, **options):
+        statuses = [Collection.SCRAPE_PENDING, Collection.SCRAPE_RUNNING]
+        if options["include_failed"]:
+            statuses.append(Collection.SCRAPE_FAILED)
+
+        queryset = Collection.objects.all()
+        if not options["all"]:
+            queryset = queryset.filter(scrape_status__in=statuses)
+        if options["user"]:
+            queryset = queryset.filter(owner_id=options["user"])
+
+        executor = get_scrape_executor()
+        started = time.monotonic()
+        count = 0
+        for collection_id, url in queryset.values_list("id", "url").iterator():
+            executor.submit(url, collection_id)
+            count += 1
+
+        executor.wait()
+        self.stdout.write(
+            f"已抓取 {count} 条收藏，耗时 {time.monotonic() - started:.2f}s"
+        )
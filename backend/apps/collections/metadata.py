@@ -0,0 +1,133 @@
+"""
+网页元信息模块
+
+- PageMetadata：按优先级汇总 <title>/<meta>/<link> 中的元信息，
+  供流式 <head> 解析器和各 HTML 解析后端共用
+- HeadMetadataParser：基于标准库 HTMLParser 的流式解析器，只关心 <head>，
+  遇到 </head> 或 <body> 即结束，因此只需元信息的抓取不必下载、解析正文
+"""
+
+from html.parser import HTMLParser
+from typing import Mapping, Optional
+from urllib.parse import urljoin, urlparse
+
+
+# 元信息候选键（按优先级排列）
+TITLE_KEYS = ("og:title", "twitter:title")
+DESCRIPTION_KEYS = ("og:description", "description", "twitter:description")
+IMAGE_KEYS = ("og:image", "twitter:image")
+
+
+class PageMetadata:
+    """
+    网页元信息收集器
+
+    解析器遍历到 <meta>/<link>/<title> 时调用 add_*()，最后读取属性。
+    """
+
+    def __init__(self):
+        self.meta = {}
+        self.icons = []
+        self.charset = None
+        self.title_text = ""
+
+    def add_meta(self, attributes: Mapping[str, str]) -> None:
+        """处理 <meta>（属性名需为小写）"""
+        if attributes.get("charset") and not self.charset:
+            self.charset = attributes["charset"].strip()
+            return
+
+        if (attributes.get("http-equiv") or "").lower() == "content-type":
+            _, _, charset = (attributes.get("content") or "").partition("charset=")
+            if charset and not self.charset:
+                self.charset = charset.strip(" ;\"'")
+            return
+
+        key = (attributes.get("property") or attributes.get("name") or "").lower()
+        content = (attributes.get("content") or "").strip()
+        if key and content and key not in self.meta:
+            self.meta[key] = content
+
+    def add_link(self, attributes: Mapping[str, str]) -> None:
+        """处理 <link>，收集 rel 含 icon 的图标地址"""
+        rel = attributes.get("rel") or ""
+        if not isinstance(rel, str):
+            rel = " ".join(rel)
+        href = (attributes.get("href") or "").strip()
+        if "icon" in rel.lower() and href:
+            self.icons.append(href)
+
+    def add_title(self, text: str) -> None:
+        """处理 <title>，只保留第一个"""
+        if not self.title_text:
+            self.title_text = text.strip()
+
+    def _first_meta(self, keys: tuple[str, ...]) -> str:
+        for key in keys:
+            if self.meta.get(key):
+                return self.meta[key]
+        return ""
+
+    @property
+    def title(self) -> str:
+        """标题：og:title > twitter:title > <title>"""
+        return self._first_meta(TITLE_KEYS) or self.title_text
+
+    @property
+    def description(self) -> str:
+        """描述：og:description > description > twitter:description"""
+        return self._first_meta(DESCRIPTION_KEYS)
+
+    @property
+    def image(self) -> Optional[str]:
+        """封面图：og:image > twitter:image"""
+        return self._first_meta(IMAGE_KEYS) or None
+
+    def favicon(self, page_url: str) -> str:
+        """网站图标绝对地址，页面未声明时回退到 /favicon.ico"""
+        if self.icons:
+            return urljoin(page_url, self.icons[0])
+        parsed = urlparse(page_url)
+        return f"{parsed.scheme}://{parsed.netloc}/favicon.ico"
+
+
+class HeadMetadataParser(PageMetadata, HTMLParser):
+    """
+    <head> 元信息增量解析器
+
+    用法：多次调用 feed()，done 为真后即可读取 title / description 等属性。
+    """
+
+    def __init__(self):
+        PageMetadata.__init__(self)
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.done = False
+        self._title_parts = []
+        self._in_title = False
+
+    def feed(self, data: str) -> None:
+        if not self.done:
+            super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            self.add_meta({name.lower(): value or "" for name, value in attrs})
+        elif tag == "link":
+            self.add_link({name.lower(): value or "" for name, value in attrs})
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.add_title("".join(self._title_parts))
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title and not self.done:
+            self._title_parts.append(data)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='scrape_error',
+            field=models.CharField(blank=True, default='', max_length=500, verbose_name='抓取错误'),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='scrape_status',
+            field=models.CharField(choices=[('pending', '等待抓取'), ('running', '抓取中'), ('done', '抓取完成'), ('failed', '抓取失败')], default='pending', max_length=20, verbose_name='抓取状态'),
+        ),
+    ]
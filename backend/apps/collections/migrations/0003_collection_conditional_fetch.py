@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0002_collection_scrape_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text='原始响应正文的 SHA-256', max_length=64, verbose_name='内容哈希'),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='etag',
+            field=models.CharField(blank=True, default='', help_text='源站响应的 ETag，用于条件请求', max_length=255, verbose_name='ETag'),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='last_modified',
+            field=models.CharField(blank=True, default='', help_text='源站响应的 Last-Modified，用于条件请求', max_length=64, verbose_name='Last-Modified'),
+        ),
+    ]
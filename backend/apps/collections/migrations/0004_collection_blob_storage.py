@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:22
+
+from django.db import migrations, models
+from django.db.models import F
+
+# 收藏文本字段 -> (哈希字段, 大小字段)
+BLOB_FIELDS = {
+    "content": ("text_hash", "text_size"),
+    "html_content": ("html_hash", "html_size"),
+}
+
+
+def move_content_to_blobs(apps, schema_editor):
+    """把已有收藏的正文/HTML 写入 Blob 存储，表内只留哈希与大小"""
+    from utils.blob_store import get_blob_store
+
+    Collection = apps.get_model("collections", "Collection")
+    ContentBlob = apps.get_model("collections", "ContentBlob")
+    store = get_blob_store()
+
+    batch = []
+    queryset = Collection.objects.only("id", *BLOB_FIELDS).order_by("id")
+    for collection in queryset.iterator(chunk_size=200):
+        for name, (hash_field, size_field) in BLOB_FIELDS.items():
+            text = getattr(collection, name)
+            if not text:
+                continue
+            stored = store.put(text.encode("utf-8"))
+            blob, created = ContentBlob.objects.get_or_create(
+                hash=stored.hash,
+                defaults={
+                    "size": stored.size,
+                    "stored_size": stored.stored_size,
+                    "codec": stored.codec,
+                    "refcount": 1,
+                },
+            )
+            if not created:
+                ContentBlob.objects.filter(hash=blob.hash).update(
+                    refcount=F("refcount") + 1
+                )
+            setattr(collection, hash_field, stored.hash)
+            setattr(collection, size_field, stored.size)
+        batch.append(collection)
+        if len(batch) >= 200:
+            Collection.objects.bulk_update(
+                batch, [f for pair in BLOB_FIELDS.values() for f in pair]
+            )
+            batch = []
+    if batch:
+        Collection.objects.bulk_update(
+            batch, [f for pair in BLOB_FIELDS.values() for f in pair]
+        )
+
+
+def restore_content_from_blobs(apps, schema_editor):
+    """回滚：把 Blob 中的正文/HTML 写回表内"""
+    from utils.blob_store import get_blob_store
+
+    Collection = apps.get_model("collections", "Collection")
+    store = get_blob_store()
+
+    for collection in Collection.objects.order_by("id").iterator(chunk_size=200):
+        for name, (hash_field, _) in BLOB_FIELDS.items():
+            blob_hash = getattr(collection, hash_field)
+            if blob_hash and store.exists(blob_hash):
+                setattr(collection, name, store.get(blob_hash).decode("utf-8"))
+        collection.save(update_fields=list(BLOB_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0003_collection_conditional_fetch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='内容哈希')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='原始大小')),
+                ('stored_size', models.PositiveIntegerField(default=0, verbose_name='压缩后大小')),
+                ('codec', models.CharField(max_length=10, verbose_name='压缩编码')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='引用计数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '正文 Blob',
+                'verbose_name_plural': '正文 Blob',
+            },
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='html_hash',
+            field=models.CharField(blank=True, default='', help_text='原始 HTML 内容（Blob 存储键），用于二次处理', max_length=64, verbose_name='原始HTML Blob'),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='html_size',
+            field=models.PositiveIntegerField(default=0, help_text='原始 HTML UTF-8 字节数', verbose_name='原始HTML大小'),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='text_hash',
+            field=models.CharField(blank=True, default='', help_text='抓取的网页正文（Blob 存储键）', max_length=64, verbose_name='正文 Blob'),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='text_size',
+            field=models.PositiveIntegerField(default=0, help_text='正文 UTF-8 字节数', verbose_name='正文大小'),
+        ),
+        migrations.RunPython(move_content_to_blobs, restore_content_from_blobs),
+        migrations.RemoveField(
+            model_name='collection',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='collection',
+            name='html_content',
+        ),
+    ]
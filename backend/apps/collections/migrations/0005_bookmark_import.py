@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0004_collection_blob_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookmarkImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(default=0, help_text='书签文件中解析出的链接数', verbose_name='书签总数')),
+                ('created_count', models.PositiveIntegerField(default=0, help_text='新建的收藏数', verbose_name='新建数')),
+                ('skipped_count', models.PositiveIntegerField(default=0, help_text='非 http(s)、重复或已收藏而跳过的链接数', verbose_name='跳过数')),
+                ('metadata_only', models.BooleanField(default=False, verbose_name='仅抓取元信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookmark_imports', to=settings.AUTH_USER_MODEL, verbose_name='所属用户')),
+            ],
+            options={
+                'verbose_name': '书签导入',
+                'verbose_name_plural': '书签导入',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='import_job',
+            field=models.ForeignKey(blank=True, help_text='通过书签导入创建时所属的导入任务', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='collections', to='collections.bookmarkimport', verbose_name='导入任务'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+def fill_search_text(apps, schema_editor):
+    """为已有收藏正文的 Blob 写入检索文本"""
+    from utils.blob_store import get_blob_store
+
+    Collection = apps.get_model("collections", "Collection")
+    ContentBlob = apps.get_model("collections", "ContentBlob")
+    store = get_blob_store()
+
+    hashes = (
+        Collection.objects.exclude(text_hash="")
+        .values_list("text_hash", flat=True)
+        .distinct()
+    )
+    for blob_hash in hashes.iterator(chunk_size=200):
+        if store.exists(blob_hash):
+            ContentBlob.objects.filter(hash=blob_hash).update(
+                search_text=store.get(blob_hash).decode("utf-8")
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0006_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentblob',
+            name='search_text',
+            field=models.TextField(blank=True, default='', verbose_name='检索文本'),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+    ]
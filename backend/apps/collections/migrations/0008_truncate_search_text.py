@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models.functions import Substr
+
+
+def truncate_search_text(apps, schema_editor):
+    """已有检索文本截断为正文开头的片段"""
+    ContentBlob = apps.get_model("collections", "ContentBlob")
+    ContentBlob.objects.exclude(search_text="").update(
+        search_text=Substr("search_text", 1, settings.COLLECTION_SEARCH_TEXT_MAX_CHARS)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0007_contentblob_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(truncate_search_text, migrations.RunPython.noop),
+    ]
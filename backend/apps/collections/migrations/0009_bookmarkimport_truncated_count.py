@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0008_truncate_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookmarkimport',
+            name='truncated_count',
+            field=models.PositiveIntegerField(default=0, help_text='超出单次导入上限而未处理的链接数', verbose_name='超限未导入数'),
+        ),
+    ]
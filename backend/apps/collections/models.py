@@ -14,6 +14,23 @@ class Collection(models.Model):
     用于保存用户收藏的网页链接，支持抓取网页标题、描述和正文内容
     """
 
+    SCRAPE_PENDING = "pending"
+    SCRAPE_RUNNING = "running"
+    SCRAPE_DONE = "done"
+    SCRAPE_FAILED = "failed"
+    SCRAPE_STATUS_CHOICES = [
+        (SCRAPE_PENDING, "等待抓取"),
+        (SCRAPE_RUNNING, "抓取中"),
+        (SCRAPE_DONE, "抓取完成"),
+        (SCRAPE_FAILED, "抓取失败"),
+    ]
+
+    # 存放在 Blob 存储中的文本属性 -> (哈希字段, 大小字段)
+    BLOB_FIELDS = {
+        "content": ("text_hash", "text_size"),
+        "html_content": ("html_hash", "html_size"),
+    }
+
     title = models.CharField(
         max_length=500,
         verbose_name="标题",
@@ -46,17 +63,30 @@ class Collection(models.Model):
         null=True,
         verbose_name="封面图片",
     )
-    content = models.TextField(
+    # 正文与原始 HTML 存放在 Blob 存储中，表内只保存哈希与大小
+    text_hash = models.CharField(
+        max_length=64,
         blank=True,
         default="",
-        verbose_name="正文内容",
-        help_text="抓取的网页正文内容",
+        verbose_name="正文 Blob",
+        help_text="抓取的网页正文（Blob 存储键）",
+    )
+    text_size = models.PositiveIntegerField(
+        default=0,
+        verbose_name="正文大小",
+        help_text="正文 UTF-8 字节数",
     )
-    html_content = models.TextField(
+    html_hash = models.CharField(
+        max_length=64,
         blank=True,
         default="",
-        verbose_name="原始HTML",
-        help_text="原始 HTML 内容，用于二次处理",
+        verbose_name="原始HTML Blob",
+        help_text="原始 HTML 内容（Blob 存储键），用于二次处理",
+    )
+    html_size = models.PositiveIntegerField(
+        default=0,
+        verbose_name="原始HTML大小",
+        help_text="原始 HTML UTF-8 字节数",
     )
     owner = models.ForeignKey(
         "users.User",
@@ -64,11 +94,53 @@ class Collection(models.Model):
         related_name="collections",
         verbose_name="所属用户",
     )
+    import_job = models.ForeignKey(
+        "BookmarkImport",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="collections",
+        verbose_name="导入任务",
+        help_text="通过书签导入创建时所属的导入任务",
+    )
     is_processed = models.BooleanField(
         default=False,
         verbose_name="是否已处理",
         help_text="标记内容是否已成功抓取和处理",
     )
+    scrape_status = models.CharField(
+        max_length=20,
+        choices=SCRAPE_STATUS_CHOICES,
+        default=SCRAPE_PENDING,
+        verbose_name="抓取状态",
+    )
+    scrape_error = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        verbose_name="抓取错误",
+    )
+    etag = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        verbose_name="ETag",
+        help_text="源站响应的 ETag，用于条件请求",
+    )
+    last_modified = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        verbose_name="Last-Modified",
+        help_text="源站响应的 Last-Modified，用于条件请求",
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        verbose_name="内容哈希",
+        help_text="原始响应正文的 SHA-256",
+    )
     word_count = models.PositiveIntegerField(
         default=0,
         verbose_name="字数",
@@ -94,13 +166,14 @@ class Collection(models.Model):
         indexes = [
             models.Index(fields=["owner", "created_at"]),
             models.Index(fields=["owner", "is_processed"]),
+            models.Index(fields=["owner", "updated_at"]),
         ]
 
     def __str__(self):
         return self.title[:50]
 
     def save(self, *args, **kwargs):
-        """保存时提取域名和统计字数"""
+        """保存时提取域名、写入正文 Blob 并统计字数"""
         if not self.domain:
             # 从 URL 提取域名
             from urllib.parse import urlparse
@@ -108,10 +181,67 @@ class Collection(models.Model):
             parsed = urlparse(self.url)
             self.domain = parsed.netloc
 
-        if self.content:
-            self.word_count = len(self.content.split())
+        from .blobs import acquire_text, release_text
+
+        dirty = self.__dict__.get("_dirty_blobs", set())
+        cache = self.__dict__.get("_blob_cache", {})
+        acquired, replaced = [], []
+        for name in dirty:
+            hash_field, size_field = self.BLOB_FIELDS[name]
+            blob_hash, size = acquire_text(cache[name], searchable=name == "content")
+            acquired.append(blob_hash)
+            replaced.append(getattr(self, hash_field))
+            setattr(self, hash_field, blob_hash)
+            setattr(self, size_field, size)
+
+        if "content" in dirty:
+            self.word_count = len(cache["content"].split())
+
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            for blob_hash in acquired:
+                release_text(blob_hash)
+            raise
+
+        dirty.clear()
+        for blob_hash in replaced:
+            release_text(blob_hash)
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop("_blob_cache", None)
+        self.__dict__.pop("_dirty_blobs", None)
+        super().refresh_from_db(*args, **kwargs)
+
+    def _get_blob_text(self, name: str) -> str:
+        cache = self.__dict__.setdefault("_blob_cache", {})
+        if name not in cache:
+            from .blobs import read_text
+
+            cache[name] = read_text(getattr(self, self.BLOB_FIELDS[name][0]))
+        return cache[name]
+
+    def _set_blob_text(self, name: str, value: str) -> None:
+        self.__dict__.setdefault("_blob_cache", {})[name] = value or ""
+        self.__dict__.setdefault("_dirty_blobs", set()).add(name)
+
+    @property
+    def content(self) -> str:
+        """网页正文（首次访问时从 Blob 存储读取并解压）"""
+        return self._get_blob_text("content")
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._set_blob_text("content", value)
 
-        super().save(*args, **kwargs)
+    @property
+    def html_content(self) -> str:
+        """原始 HTML（首次访问时从 Blob 存储读取并解压）"""
+        return self._get_blob_text("html_content")
+
+    @html_content.setter
+    def html_content(self, value: str) -> None:
+        self._set_blob_text("html_content", value)
 
     @property
     def reading_time(self):
@@ -119,3 +249,138 @@ class Collection(models.Model):
         words_per_minute = 200
         minutes = max(1, self.word_count // words_per_minute)
         return minutes
+
+
+class ContentBlob(models.Model):
+    """
+    收藏正文 Blob 引用计数
+
+    数据本体存放在 Blob 存储（settings.BLOB_STORE_ROOT）中，
+    相同内容只存一份，引用计数归零时删除。收藏正文开头的片段另存于
+    search_text 供列表搜索（同样按内容去重，不占用收藏表）。
+    """
+
+    hash = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name="内容哈希",
+    )
+    size = models.PositiveIntegerField(
+        default=0,
+        verbose_name="原始大小",
+    )
+    stored_size = models.PositiveIntegerField(
+        default=0,
+        verbose_name="压缩后大小",
+    )
+    codec = models.CharField(
+        max_length=10,
+        verbose_name="压缩编码",
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name="引用计数",
+    )
+    search_text = models.TextField(
+        blank=True,
+        default="",
+        verbose_name="检索文本",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="创建时间",
+    )
+
+    class Meta:
+        verbose_name = "正文 Blob"
+        verbose_name_plural = "正文 Blob"
+
+    def __str__(self):
+        return f"{self.hash[:12]} ({self.refcount})"
+
+
+class BookmarkImport(models.Model):
+    """
+    书签导入任务
+
+    记录一次书签文件导入的解析结果；抓取进度由所属收藏的抓取状态汇总得出。
+    """
+
+    owner = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="bookmark_imports",
+        verbose_name="所属用户",
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="书签总数",
+        help_text="书签文件中解析出的链接数",
+    )
+    created_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="新建数",
+        help_text="新建的收藏数",
+    )
+    skipped_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="跳过数",
+        help_text="非 http(s)、重复或已收藏而跳过的链接数",
+    )
+    truncated_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="超限未导入数",
+        help_text="超出单次导入上限而未处理的链接数",
+    )
+    metadata_only = models.BooleanField(
+        default=False,
+        verbose_name="仅抓取元信息",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="创建时间",
+    )
+
+    class Meta:
+        verbose_name = "书签导入"
+        verbose_name_plural = "书签导入"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.owner} 导入 {self.created_count}/{self.total}"
+
+    def progress(self, failure_limit: int = 100) -> dict:
+        """
+        汇总抓取进度
+
+        Args:
+            failure_limit: 返回的失败明细条数上限
+        """
+        counts = dict(
+            self.collections.values_list("scrape_status")
+            .annotate(count=models.Count("id"))
+            .order_by()
+        )
+        pending = counts.get(Collection.SCRAPE_PENDING, 0)
+        running = counts.get(Collection.SCRAPE_RUNNING, 0)
+        failures = self.collections.filter(
+            scrape_status=Collection.SCRAPE_FAILED
+        ).values("id", "url", "scrape_error")[:failure_limit]
+
+        return {
+            "id": self.id,
+            "total": self.total,
+            "created": self.created_count,
+            "skipped": self.skipped_count,
+            "truncated": self.truncated_count,
+            "pending": pending,
+            "running": running,
+            "done": counts.get(Collection.SCRAPE_DONE, 0),
+            "failed": counts.get(Collection.SCRAPE_FAILED, 0),
+            "finished": not (pending or running),
+            "failures": [
+                {"id": row["id"], "url": row["url"], "error": row["scrape_error"]}
+                for row in failures
+            ],
+            "created_at": self.created_at,
+        }
@@ -0,0 +1,141 @@
+"""
+HTML 解析后端模块
+
+正文提取阶段的可插拔解析后端：
+- lxml：C 实现，安装了 lxml 时默认使用
+- html.parser：BeautifulSoup + 标准库解析器，纯 Python 兜底
+
+两个后端都在一次文档遍历中收集标题、描述、图标与封面图，
+再删除脚本、导航等非正文节点并提取正文。
+"""
+
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup
+
+from .metadata import PageMetadata
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml 为可选依赖
+    lxml = None
+
+
+# 提取正文前移除的非正文节点
+NON_CONTENT_TAGS = ("script", "style", "nav", "header", "footer", "aside", "noscript")
+
+
+class ParserBackend:
+    """解析后端基类"""
+
+    name = ""
+
+    def parse(self, html: str, url: str) -> Dict[str, object]:
+        """
+        解析完整 HTML
+
+        Returns:
+            {"title", "description", "favicon", "image", "content"}
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _result(metadata: PageMetadata, url: str, content: str) -> Dict[str, object]:
+        return {
+            "title": metadata.title,
+            "description": metadata.description,
+            "favicon": metadata.favicon(url),
+            "image": metadata.image,
+            "content": content,
+        }
+
+
+class SoupParserBackend(ParserBackend):
+    """BeautifulSoup + html.parser 后端"""
+
+    name = "html.parser"
+
+    def parse(self, html: str, url: str) -> Dict[str, object]:
+        soup = BeautifulSoup(html, "html.parser")
+
+        metadata = PageMetadata()
+        for tag in soup.find_all(["title", "meta", "link"]):
+            if tag.name == "meta":
+                metadata.add_meta({k.lower(): v for k, v in tag.attrs.items()})
+            elif tag.name == "link":
+                metadata.add_link({k.lower(): v for k, v in tag.attrs.items()})
+            else:
+                metadata.add_title(tag.get_text())
+
+        for tag in soup(list(NON_CONTENT_TAGS)):
+            tag.decompose()
+
+        root = soup.find("article") or soup.find("main") or soup.find("body")
+        content = root.get_text(separator="\n", strip=True) if root else ""
+        return self._result(metadata, url, content)
+
+
+class LxmlParserBackend(ParserBackend):
+    """lxml 后端"""
+
+    name = "lxml"
+
+    def parse(self, html: str, url: str) -> Dict[str, object]:
+        try:
+            document = lxml.html.document_fromstring(html)
+        except (etree.ParserError, ValueError):
+            # 空文档或带编码声明的 str（lxml 不接受）时交给兜底后端
+            return SoupParserBackend().parse(html, url)
+
+        metadata = PageMetadata()
+        for element in document.iter("title", "meta", "link"):
+            if element.tag == "meta":
+                metadata.add_meta({k.lower(): v for k, v in element.attrib.items()})
+            elif element.tag == "link":
+                metadata.add_link({k.lower(): v for k, v in element.attrib.items()})
+            else:
+                metadata.add_title(element.text_content())
+
+        etree.strip_elements(document, *NON_CONTENT_TAGS, with_tail=False)
+
+        root = None
+        for tag in ("article", "main", "body"):
+            root = document.find(f".//{tag}")
+            if root is not None:
+                break
+
+        content = ""
+        if root is not None:
+            content = "\n".join(
+                text.strip() for text in root.itertext() if text.strip()
+            )
+        return self._result(metadata, url, content)
+
+
+PARSER_BACKENDS = {
+    SoupParserBackend.name: SoupParserBackend,
+    LxmlParserBackend.name: LxmlParserBackend,
+}
+
+
+def get_parser_backend(name: Optional[str] = None) -> ParserBackend:
+    """
+    按名称获取解析后端
+
+    Args:
+        name: "lxml" / "html.parser" / "auto"，默认读取 settings.SCRAPE_PARSER_BACKEND；
+            auto 时优先使用 lxml，未安装则回退 html.parser
+    """
+    if name is None:
+        from django.conf import settings
+
+        name = getattr(settings, "SCRAPE_PARSER_BACKEND", "auto")
+
+    if name == "auto":
+        name = LxmlParserBackend.name if lxml else SoupParserBackend.name
+    if name == LxmlParserBackend.name and lxml is None:
+        raise ValueError("lxml 未安装，无法使用 lxml 解析后端")
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"未知的解析后端：{name}")
+    return PARSER_BACKENDS[name]()
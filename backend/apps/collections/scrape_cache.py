@@ -0,0 +1,142 @@
+"""
+抓取结果缓存模块
+
+不同用户收藏同一热门页面时共享抓取结果：
+- 以规范化 URL（utils.url_normalizer）为键，结果在 Django 缓存中保存
+  SCRAPE_CACHE_TTL 秒
+- 单飞（single-flight）：同一进程内对同一 URL 的并发抓取只发起一次请求，
+  其余调用等待并复用该结果
+- 只缓存成功的完整抓取；完整结果也可满足只需元信息的请求
+- 正文超过 SCRAPE_CACHE_MAX_ENTRY_BYTES 的结果只缓存元信息，
+  避免大页面占满缓存后端；之后的完整抓取仍会请求源站
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from utils.url_normalizer import normalize_url
+
+# 元信息抓取结果中不返回的字段（见 URLScraperService.scrape）
+VALIDATOR_FIELDS = ("etag", "last_modified", "content_hash")
+
+
+class SingleFlight:
+    """对同一键的并发调用只执行一次，其余调用等待并共享结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, fn: Callable[[], object]) -> object:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_flight = SingleFlight()
+
+
+def _cache():
+    return caches[getattr(settings, "SCRAPE_CACHE_ALIAS", "default")]
+
+
+def cache_key(url: str, metadata_only: bool = False) -> str:
+    """规范化 URL 对应的缓存键"""
+    digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+    return f"scrape:{'meta' if metadata_only else 'full'}:{digest}"
+
+
+def _metadata(result: Dict) -> Dict:
+    """去掉正文与校验字段，得到只含元信息的结果"""
+    result = {
+        key: value for key, value in result.items() if key not in VALIDATOR_FIELDS
+    }
+    result.update(content="", html_content="")
+    return result
+
+
+def _body_size(result: Dict) -> int:
+    return sum(
+        len((result.get(field) or "").encode("utf-8"))
+        for field in ("content", "html_content")
+    )
+
+
+def _store(url: str, metadata_only: bool, result: Dict, ttl: int) -> None:
+    """写入缓存；正文过大的完整结果降级为元信息条目"""
+    max_bytes = getattr(settings, "SCRAPE_CACHE_MAX_ENTRY_BYTES", 256 * 1024)
+    if not metadata_only and _body_size(result) > max_bytes:
+        metadata_only, result = True, _metadata(result)
+    _cache().set(cache_key(url, metadata_only), result, ttl)
+
+
+def _lookup(url: str, metadata_only: bool) -> Optional[Dict]:
+    cache = _cache()
+    result = cache.get(cache_key(url))
+    if result is not None and metadata_only:
+        result = _metadata(result)
+    elif result is None and metadata_only:
+        result = cache.get(cache_key(url, metadata_only=True))
+    if result is None:
+        return None
+    return {**result, "cached": True}
+
+
+def cached_scrape(url: str, metadata_only: bool = False, scraper=None) -> Dict:
+    """
+    带共享缓存的抓取
+
+    Args:
+        url: 网页 URL
+        metadata_only: 只抓取元信息
+        scraper: 抓取服务实例，默认新建 URLScraperService
+
+    Returns:
+        与 URLScraperService.scrape() 相同的结果；命中缓存时带 cached=True
+    """
+    ttl = getattr(settings, "SCRAPE_CACHE_TTL", 0)
+    if ttl > 0:
+        cached = _lookup(url, metadata_only)
+        if cached is not None:
+            return cached
+
+    def fetch():
+        if ttl > 0:
+            # 等待单飞期间其他进程可能已写入缓存
+            cached = _lookup(url, metadata_only)
+            if cached is not None:
+                return cached
+
+        from .services import URLScraperService
+
+        result = (scraper or URLScraperService()).scrape(
+            url, metadata_only=metadata_only
+        )
+        if ttl > 0 and result["success"] and not result.get("not_modified"):
+            _store(url, metadata_only, result, ttl)
+        return result
+
+    # 跟随者与发起者拿到的是同一个结果，各自复制一份
+    return dict(_flight.do(cache_key(url, metadata_only), fetch))
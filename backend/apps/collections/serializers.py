@@ -3,6 +3,7 @@
 """
 
 from rest_framework import serializers
+from .image_proxy import proxied_image_url
 from .models import Collection
 
 
@@ -11,6 +12,8 @@ class CollectionSerializer(serializers.ModelSerializer):
 
     reading_time = serializers.ReadOnlyField()
     domain = serializers.ReadOnlyField()
+    # 正文存放在 Blob 存储中，序列化时才读取解压（列表序列化器不包含该字段）
+    content = serializers.CharField(required=False, allow_blank=True)
 
     class Meta:
         model = Collection
@@ -24,6 +27,8 @@ class CollectionSerializer(serializers.ModelSerializer):
             "image",
             "content",
             "is_processed",
+            "scrape_status",
+            "scrape_error",
             "word_count",
             "reading_time",
             "view_count",
@@ -33,6 +38,8 @@ class CollectionSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "domain",
             "is_processed",
+            "scrape_status",
+            "scrape_error",
             "word_count",
             "reading_time",
             "view_count",
@@ -45,6 +52,9 @@ class CollectionListSerializer(serializers.ModelSerializer):
     """收藏列表序列化器（精简版）"""
 
     reading_time = serializers.ReadOnlyField()
+    # 图标与封面图返回经后端代理的缩略图地址，浏览器不直接访问第三方站点
+    favicon = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
 
     class Meta:
         model = Collection
@@ -57,15 +67,29 @@ class CollectionListSerializer(serializers.ModelSerializer):
             "favicon",
             "image",
             "is_processed",
+            "scrape_status",
             "word_count",
             "reading_time",
             "created_at",
         ]
 
+    def get_favicon(self, obj):
+        return proxied_image_url(obj.favicon, "icon", self.context.get("request"))
+
+    def get_image(self, obj):
+        return proxied_image_url(obj.image, "thumb", self.context.get("request"))
+
 
 class CollectionCreateSerializer(serializers.ModelSerializer):
     """收藏创建序列化器"""
 
+    metadata_only = serializers.BooleanField(
+        write_only=True,
+        required=False,
+        default=False,
+        help_text="只抓取标题、描述、图标等元信息，不下载正文",
+    )
+
     class Meta:
         model = Collection
         fields = [
@@ -74,6 +98,7 @@ class CollectionCreateSerializer(serializers.ModelSerializer):
             "url",
             "favicon",
             "image",
+            "metadata_only",
         ]
 
     def validate_url(self, value):
@@ -93,3 +118,24 @@ class CollectionCreateSerializer(serializers.ModelSerializer):
         """创建收藏"""
         validated_data["owner"] = self.context["request"].user
         return super().create(validated_data)
+
+
+class BookmarkImportSerializer(serializers.Serializer):
+    """书签导入序列化器"""
+
+    file = serializers.FileField(help_text="浏览器导出的书签文件（Netscape HTML 格式）")
+    metadata_only = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="只抓取标题、描述、图标等元信息，不下载正文",
+    )
+
+    def validate_file(self, value):
+        """校验文件大小并解码为文本"""
+        from .bookmarks import MAX_FILE_SIZE
+
+        if value.size > MAX_FILE_SIZE:
+            raise serializers.ValidationError(
+                f"书签文件不能超过 {MAX_FILE_SIZE // (1024 * 1024)}MB"
+            )
+        return value.read().decode("utf-8", errors="replace")
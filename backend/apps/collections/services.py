@@ -1,17 +1,39 @@
 """
 URL抓取服务模块
 
-提供网页内容抓取功能，使用 BeautifulSoup 解析 HTML
+提供网页内容抓取功能：
+- 流式下载，限制响应大小与内容类型
+- 下载过程中增量解析 <head> 元信息，仅需元信息时不下载正文
+- 正文提取为独立阶段，使用可插拔解析后端（lxml / html.parser）
 """
 
-import re
+import codecs
+import hashlib
 from typing import Dict, Optional
-from urllib.parse import urlparse, urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from requests.compat import chardet
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError
 
+from utils.http_client import DEFAULT_MAX_REDIRECTS, get_session, validated_get
 from utils.ssrf_validator import validate_url
+from .metadata import HeadMetadataParser
+from .parsers import ParserBackend, get_parser_backend
+
+
+# 允许抓取的内容类型（未声明 Content-Type 时也允许）
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# 默认响应体大小上限（字节，按解压后计算）
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+# 流式读取的块大小
+CHUNK_SIZE = 16 * 1024
+
+
+class ScrapeRejected(Exception):
+    """响应不符合抓取条件（内容类型不支持、页面过大）"""
 
 
 class URLScraperService:
@@ -21,14 +43,33 @@ class URLScraperService:
     提供网页标题、描述、正文、图片等信息的提取功能
     """
 
-    def __init__(self, timeout: int = 30):
+    def __init__(
+        self,
+        timeout: int = 30,
+        session: Optional[requests.Session] = None,
+        max_bytes: Optional[int] = None,
+        parser: Optional[ParserBackend] = None,
+    ):
         """
         初始化抓取服务
 
         Args:
             timeout: 请求超时时间（秒）
+            session: HTTP 会话，默认使用当前线程共享的 keep-alive 会话
+            max_bytes: 响应体大小上限，默认读取 settings.SCRAPE_MAX_BYTES
+            parser: HTML 解析后端，默认按 settings.SCRAPE_PARSER_BACKEND 选择
         """
+        from django.conf import settings
+
         self.timeout = timeout
+        self.session = session or get_session()
+        self.parser = parser or get_parser_backend()
+        self.max_bytes = max_bytes or getattr(
+            settings, "SCRAPE_MAX_BYTES", DEFAULT_MAX_BYTES
+        )
+        self.max_redirects = getattr(
+            settings, "SCRAPE_MAX_REDIRECTS", DEFAULT_MAX_REDIRECTS
+        )
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
             "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -37,64 +78,111 @@ class URLScraperService:
             "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
         }
 
-    def scrape(self, url: str) -> Dict:
+    def scrape(
+        self,
+        url: str,
+        etag: str = "",
+        last_modified: str = "",
+        previous_hash: str = "",
+        metadata_only: bool = False,
+    ) -> Dict:
         """
         抓取网页内容
 
+        传入上次抓取保存的校验信息时发送条件请求；源站返回 304
+        或正文哈希未变化时直接返回 not_modified，跳过解析。
+
         Args:
             url: 要抓取的网页 URL
+            etag: 上次响应的 ETag
+            last_modified: 上次响应的 Last-Modified
+            previous_hash: 上次响应正文的 SHA-256
+            metadata_only: 只提取 <head> 元信息，读到 </head> 即停止下载
 
         Returns:
             包含抓取结果的字典，包含以下键：
             - success: 是否成功
+            - not_modified: 内容是否未变化（为真时不含解析字段）
             - title: 网页标题
             - description: 网页描述
-            - content: 网页正文内容
-            - html_content: 原始 HTML 内容
+            - content: 网页正文内容（metadata_only 时为空）
+            - html_content: 原始 HTML 内容（metadata_only 时为空）
             - favicon: 网站图标 URL
             - image: Open Graph 图片 URL
+            - etag / last_modified / content_hash: 本次响应的校验信息
+              （metadata_only 时不返回，避免后续条件请求跳过正文抓取）
             - error: 错误信息（失败时）
         """
         try:
-            # SSRF 防护：验证 URL 是否安全
-            validate_url(url)
-
-            response = requests.get(
-                url, headers=self.headers, timeout=self.timeout, allow_redirects=True
-            )
-            response.raise_for_status()
-
-            # 设置编码
-            if response.encoding == "ISO-8859-1":
-                response.encoding = response.apparent_encoding
-
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # 提取标题
-            title = self._extract_title(soup)
-
-            # 提取描述
-            description = self._extract_description(soup)
-
-            # 提取正文内容
-            content = self._extract_content(soup)
-
-            # 提取 favicon
-            favicon = self._extract_favicon(soup, url)
-
-            # 提取 Open Graph 图片
-            image = self._extract_og_image(soup)
-
+            headers = dict(self.headers)
+            if etag and not metadata_only:
+                headers["If-None-Match"] = etag
+            if last_modified and not metadata_only:
+                headers["If-Modified-Since"] = last_modified
+
+            # SSRF 防护：每一跳重定向都校验 URL，建连使用校验过的 IP
+            with validated_get(
+                url,
+                session=self.session,
+                validate=validate_url,
+                max_redirects=self.max_redirects,
+                headers=headers,
+                timeout=self.timeout,
+                stream=True,
+            ) as response:
+                validators = {
+                    "etag": response.headers.get("ETag", etag)[:255],
+                    "last_modified": response.headers.get(
+                        "Last-Modified", last_modified
+                    )[:64],
+                }
+                if response.status_code == 304:
+                    return {"success": True, "not_modified": True, **validators}
+
+                response.raise_for_status()
+                self._check_response(response)
+                declared = self._declared_encoding(response)
+                body, head = self._read_body(response, declared, metadata_only)
+
+            metadata = {
+                "title": head.title,
+                "description": head.description,
+                "favicon": head.favicon(url),
+                "image": head.image,
+            }
+            if metadata_only:
+                return {
+                    "success": True,
+                    "not_modified": False,
+                    "content": "",
+                    "html_content": "",
+                    **metadata,
+                }
+
+            content_hash = hashlib.sha256(body).hexdigest()
+            if previous_hash and content_hash == previous_hash:
+                return {
+                    "success": True,
+                    "not_modified": True,
+                    "content_hash": content_hash,
+                    **validators,
+                }
+
+            html = self._decode(body, declared or head.charset)
+            result = self.extract(html, url, metadata)
             return {
                 "success": True,
-                "title": title,
-                "description": description,
-                "content": content,
-                "html_content": response.text,
-                "favicon": favicon,
-                "image": image,
+                "not_modified": False,
+                "html_content": html,
+                "content_hash": content_hash,
+                **result,
+                **validators,
             }
 
+        except ScrapeRejected as e:
+            return {"success": False, "error": str(e)}
+        except ValidationError as e:
+            return {"success": False, "error": f"URL 不安全：{'；'.join(e.messages)}"}
         except requests.exceptions.Timeout:
             return {"success": False, "error": "请求超时"}
         except requests.exceptions.HTTPError as e:
@@ -104,140 +192,212 @@ class URLScraperService:
         except Exception as e:
             return {"success": False, "error": f"解析失败：{str(e)}"}
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        """提取网页标题"""
-        # 优先尝试 Open Graph 标题
-        og_title = soup.find("meta", property="og:title")
-        if og_title and og_title.get("content"):
-            return og_title["content"].strip()
-
-        # 其次尝试 Twitter 标题
-        twitter_title = soup.find("meta", attrs={"name": "twitter:title"})
-        if twitter_title and twitter_title.get("content"):
-            return twitter_title["content"].strip()
-
-        # 最后使用 HTML 标题
-        title_tag = soup.find("title")
-        if title_tag:
-            return title_tag.get_text().strip()
-
-        return ""
-
-    def _extract_description(self, soup: BeautifulSoup) -> str:
-        """提取网页描述"""
-        # 优先尝试 Open Graph 描述
-        og_desc = soup.find("meta", property="og:description")
-        if og_desc and og_desc.get("content"):
-            return og_desc["content"].strip()
-
-        # 其次尝试 Meta description
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        if meta_desc and meta_desc.get("content"):
-            return meta_desc["content"].strip()
-
-        # 最后尝试 Twitter 描述
-        twitter_desc = soup.find("meta", attrs={"name": "twitter:description"})
-        if twitter_desc and twitter_desc.get("content"):
-            return twitter_desc["content"].strip()
-
-        return ""
-
-    def _extract_content(self, soup: BeautifulSoup) -> str:
+    def extract(self, html: str, url: str, metadata: Optional[Dict] = None) -> Dict:
         """
-        提取网页正文内容
-
-        尝试移除脚本、样式、导航等非正文内容
-        """
-        # 移除不需要的元素
-        for tag in soup(
-            ["script", "style", "nav", "header", "footer", "aside", "noscript"]
-        ):
-            tag.decompose()
-
-        # 尝试查找文章主体
-        article = soup.find("article")
-        if article:
-            return article.get_text(separator="\n", strip=True)
-
-        # 尝试查找 main 内容区域
-        main = soup.find("main")
-        if main:
-            return main.get_text(separator="\n", strip=True)
-
-        # 使用 body
-        body = soup.find("body")
-        if body:
-            text = body.get_text(separator="\n", strip=True)
-
-            # 清理多余空白
-            lines = (line.strip() for line in text.splitlines())
-            non_empty_lines = [line for line in lines if line]
+        正文提取阶段：用解析后端解析完整 HTML，提取正文
 
-            return "\n".join(non_empty_lines)
+        已有 <head> 元信息时优先沿用，缺失的字段取自文档树。
 
-        return ""
-
-    def _extract_favicon(self, soup: BeautifulSoup, original_url: str) -> Optional[str]:
+        Returns:
+            {"title", "description", "content", "favicon", "image"}
         """
-        提取网站图标
+        page = self.parser.parse(html, url)
+        for key, value in (metadata or {}).items():
+            if value:
+                page[key] = value
+        return page
+
+    def _check_response(self, response: requests.Response) -> None:
+        """在读取响应体之前按响应头拒绝不支持的类型与超大页面"""
+        content_type = response.headers.get("Content-Type", "")
+        mime_type = content_type.split(";", 1)[0].strip().lower()
+        if mime_type and mime_type not in ALLOWED_CONTENT_TYPES:
+            raise ScrapeRejected(f"不支持的内容类型：{mime_type}")
+
+        content_length = response.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise ScrapeRejected(f"页面过大：超过 {self.max_bytes} 字节")
+
+    def _declared_encoding(self, response: requests.Response) -> Optional[str]:
+        """响应头中显式声明的字符集（requests 对 text/* 的 ISO-8859-1 兜底不算）"""
+        if "charset" in response.headers.get("Content-Type", "").lower():
+            return response.encoding
+        return None
 
-        尝试多种方法获取 favicon
+    def _read_body(
+        self, response: requests.Response, encoding: Optional[str], metadata_only: bool
+    ) -> tuple[bytes, HeadMetadataParser]:
         """
-        base_url = urlparse(original_url)
-
-        # 方法1：查找 rel="icon" 或 rel="shortcut icon"
-        icon = soup.find("link", rel=re.compile(r"icon", re.I))
-        if icon and icon.get("href"):
-            href = icon["href"]
-            return self._resolve_url(href, original_url)
-
-        # 方法2：查找 rel="apple-touch-icon"
-        apple_icon = soup.find("link", rel=re.compile(r"apple-touch-icon", re.I))
-        if apple_icon and apple_icon.get("href"):
-            href = apple_icon["href"]
-            return self._resolve_url(href, original_url)
-
-        # 方法3：默认查找 /favicon.ico
-        return f"{base_url.scheme}://{base_url.netloc}/favicon.ico"
+        流式读取响应体，同时增量解析 <head>
 
-    def _extract_og_image(self, soup: BeautifulSoup) -> Optional[str]:
+        超过大小上限时抛出 ScrapeRejected；metadata_only 时 <head> 结束即停止读取。
         """
-        提取 Open Graph 图片
-        """
-        og_image = soup.find("meta", property="og:image")
-        if og_image and og_image.get("content"):
-            return og_image["content"]
-
-        twitter_image = soup.find("meta", attrs={"name": "twitter:image"})
-        if twitter_image and twitter_image.get("content"):
-            return twitter_image["content"]
-
-        return None
+        chunks = []
+        size = 0
+        head = HeadMetadataParser()
+        head_encoding = encoding or "utf-8"
+        decoder = codecs.getincrementaldecoder(head_encoding)(errors="replace")
+
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ScrapeRejected(f"页面过大：超过 {self.max_bytes} 字节")
+            chunks.append(chunk)
+
+            if head.done:
+                continue
+            head.feed(decoder.decode(chunk))
+
+            # 页面在 <meta charset> 中声明了其他编码：按新编码重新解析已读内容
+            if not encoding and head.charset and _codec_name(head.charset) not in (
+                None,
+                _codec_name(head_encoding),
+            ):
+                head_encoding = head.charset
+                charset = head.charset
+                head = HeadMetadataParser()
+                head.charset = charset
+                decoder = codecs.getincrementaldecoder(head_encoding)(errors="replace")
+                head.feed(decoder.decode(b"".join(chunks)))
+
+            if metadata_only and head.done:
+                break
+
+        return b"".join(chunks), head
+
+    def _decode(self, body: bytes, encoding: Optional[str]) -> str:
+        """按声明编码解码正文，未声明时自动检测"""
+        if not encoding or _codec_name(encoding) is None:
+            detected = chardet.detect(body)["encoding"] if chardet else None
+            encoding = detected or "utf-8"
+        return body.decode(encoding, errors="replace")
+
+
+# 抓取结果写回时更新的字段
+SCRAPE_RESULT_FIELDS = [
+    "title",
+    "description",
+    "text_hash",
+    "text_size",
+    "html_hash",
+    "html_size",
+    "favicon",
+    "image",
+    "is_processed",
+    "scrape_status",
+    "scrape_error",
+    "etag",
+    "last_modified",
+    "content_hash",
+    "word_count",
+    "updated_at",
+]
+
+
+def apply_scrape_result(collection, result: Dict, keep_media: bool = False) -> None:
+    """
+    把抓取结果写入收藏（不保存）
 
-    def _resolve_url(self, href: str, original_url: str) -> str:
-        """
-        解析相对 URL 为绝对 URL
+    Args:
+        collection: 收藏实例
+        result: URLScraperService.scrape() 的成功结果
+        keep_media: 结果中没有图标/封面时保留原值
+    """
+    collection.title = result["title"] or collection.title
+    collection.description = result.get("description", "")[:500]
+    collection.content = result.get("content", "")
+    collection.html_content = result.get("html_content", "")
+    if keep_media:
+        collection.favicon = result.get("favicon") or collection.favicon
+        collection.image = result.get("image") or collection.image
+    else:
+        collection.favicon = result.get("favicon")
+        collection.image = result.get("image")
+    collection.etag = result.get("etag", "")
+    collection.last_modified = result.get("last_modified", "")
+    collection.content_hash = result.get("content_hash", "")
+    collection.is_processed = True
+    collection.scrape_status = collection.SCRAPE_DONE
+    collection.scrape_error = ""
+
+
+def conditional_scrape(
+    collection,
+    scraper: Optional[URLScraperService] = None,
+    metadata_only: bool = False,
+) -> Dict:
+    """
+    使用收藏保存的 ETag / Last-Modified / 内容哈希重新抓取
 
-        Args:
-            href: 相对或绝对 URL
-            original_url: 原始 URL（用于解析相对路径）
+    已处理过的收藏才发送条件请求；未处理的收藏完整抓取，
+    优先复用其他用户抓取同一页面的缓存结果（见 scrape_cache）。
+    """
+    from .scrape_cache import cached_scrape
+
+    scraper = scraper or URLScraperService()
+    if metadata_only or not collection.is_processed:
+        return cached_scrape(collection.url, metadata_only, scraper=scraper)
+    return scraper.scrape(
+        collection.url,
+        etag=collection.etag,
+        last_modified=collection.last_modified,
+        previous_hash=collection.content_hash,
+    )
+
+
+def scrape_collection(
+    collection_id: int, metadata_only: bool = False
+) -> Optional[bool]:
+    """
+    抓取单条收藏并写回结果（后台执行器的任务入口）
 
-        Returns:
-            绝对 URL
-        """
-        if not href:
-            return ""
+    Args:
+        collection_id: 收藏 ID
+        metadata_only: 只抓取标题、描述、图标等元信息，不下载正文
 
-        parsed = urlparse(original_url)
+    Returns:
+        是否抓取成功，收藏已被删除时返回 None
+    """
+    from .models import Collection
 
-        if href.startswith("//"):
-            return f"{parsed.scheme}:{href}"
+    updated = Collection.objects.filter(id=collection_id).update(
+        scrape_status=Collection.SCRAPE_RUNNING
+    )
+    if not updated:
+        return None
 
-        if href.startswith("/"):
-            return f"{parsed.scheme}://{parsed.netloc}{href}"
+    collection = Collection.objects.get(id=collection_id)
+    try:
+        result = conditional_scrape(collection, metadata_only=metadata_only)
+    except Exception as e:
+        result = {"success": False, "error": f"抓取异常：{str(e)}"}
+
+    if not result["success"]:
+        Collection.objects.filter(id=collection_id).update(
+            scrape_status=Collection.SCRAPE_FAILED,
+            scrape_error=result.get("error", "未知错误")[:500],
+        )
+        return False
+
+    if result.get("not_modified"):
+        # 内容未变化：只恢复状态，不写入正文
+        Collection.objects.filter(id=collection_id).update(
+            scrape_status=Collection.SCRAPE_DONE, scrape_error=""
+        )
+        return True
+
+    apply_scrape_result(collection, result)
+    try:
+        # 只更新抓取字段；抓取期间收藏被删除时不会被重新插入
+        collection.save(update_fields=SCRAPE_RESULT_FIELDS)
+    except DatabaseError:
+        return None
+    return True
 
-        if href.startswith("http://") or href.startswith("https://"):
-            return href
 
-        # 相对路径
-        return urljoin(original_url, href)
+def _codec_name(encoding: str) -> Optional[str]:
+    """规范化编码名称，未知编码返回 None"""
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
@@ -0,0 +1,68 @@
+"""
+Collections signals.
+
+Release content blobs when a collection is deleted, and keep the owner's
+storage usage ledger in step with scraped body sizes.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.users.storage import adjust_usage
+from .blobs import release_text
+from .models import Collection
+
+SIZE_FIELDS = ("text_size", "html_size")
+
+
+def _body_size(collection) -> int:
+    return collection.text_size + collection.html_size
+
+
+@receiver(post_delete, sender=Collection)
+def release_collection_blobs(sender, instance, **kwargs):
+    """Drop this collection's references to its text/HTML blobs."""
+    release_text(instance.text_hash)
+    release_text(instance.html_hash)
+
+
+@receiver(pre_save, sender=Collection)
+def remember_stored_body_size(sender, instance, **kwargs):
+    """Read the stored body sizes before a save that may replace them."""
+    update_fields = kwargs.get("update_fields")
+    if not instance.pk or (
+        update_fields is not None and not set(SIZE_FIELDS) & set(update_fields)
+    ):
+        return
+    sizes = (
+        Collection.objects.filter(pk=instance.pk).values_list(*SIZE_FIELDS).first()
+    )
+    instance._stored_body_size = sum(sizes) if sizes else None
+
+
+@receiver(post_save, sender=Collection)
+def update_collection_storage_usage(sender, instance, created, **kwargs):
+    """Count the collection and track body size changes in the usage ledger."""
+    if created:
+        adjust_usage(
+            instance.owner_id,
+            collections_count=1,
+            collections_bytes=_body_size(instance),
+        )
+        return
+
+    previous = instance.__dict__.pop("_stored_body_size", None)
+    if previous is not None:
+        adjust_usage(
+            instance.owner_id, collections_bytes=_body_size(instance) - previous
+        )
+
+
+@receiver(post_delete, sender=Collection)
+def release_collection_storage_usage(sender, instance, **kwargs):
+    """Remove the collection from the usage ledger."""
+    adjust_usage(
+        instance.owner_id,
+        collections_count=-1,
+        collections_bytes=-_body_size(instance),
+    )
@@ -0,0 +1,197 @@
+"""
+收藏抓取任务模块
+
+网页抓取不再占用请求线程，而是交给进程内的有界线程池执行：
+- 全局并发上限：线程池大小
+- 单域名并发上限：同一域名同时进行的抓取数
+- 单域名请求速率：同一域名两次抓取之间的最小间隔
+
+等待中的任务按域名排队，不会占用线程池的工作线程。
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeExecutor:
+    """
+    带域名限流的抓取执行器
+
+    Args:
+        handler: 任务处理函数，接收 submit() 传入的参数
+        max_workers: 全局并发上限
+        per_domain_concurrency: 单域名并发上限
+        per_domain_rate: 单域名每秒最多发起的请求数（<= 0 表示不限速）
+    """
+
+    def __init__(
+        self,
+        handler: Callable[..., object],
+        max_workers: int = 8,
+        per_domain_concurrency: int = 2,
+        per_domain_rate: float = 1.0,
+    ):
+        self.handler = handler
+        self.per_domain_concurrency = max(1, per_domain_concurrency)
+        self.min_interval = 1.0 / per_domain_rate if per_domain_rate > 0 else 0.0
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="scrape"
+        )
+        self._lock = threading.Lock()
+        self._pending = defaultdict(deque)
+        self._active = defaultdict(int)
+        self._next_start = defaultdict(float)
+        self._timers = {}
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+
+    def submit(self, url: str, *args) -> None:
+        """按 URL 的域名排队提交任务"""
+        domain = urlparse(url).netloc.lower()
+        with self._lock:
+            self._pending[domain].append(args)
+            self._outstanding += 1
+            self._dispatch(domain)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """等待所有已提交任务完成，返回是否在超时前完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._outstanding:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def shutdown(self) -> None:
+        """取消限速定时器并关闭线程池"""
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+        self._pool.shutdown(wait=True)
+
+    def _dispatch(self, domain: str) -> None:
+        """在域名配额允许时把排队任务交给线程池（调用方需持有锁）"""
+        queue = self._pending[domain]
+        while queue and self._active[domain] < self.per_domain_concurrency:
+            now = time.monotonic()
+            delay = self._next_start[domain] - now
+            if delay > 0:
+                if domain not in self._timers:
+                    timer = threading.Timer(delay, self._on_timer, args=(domain,))
+                    timer.daemon = True
+                    self._timers[domain] = timer
+                    timer.start()
+                return
+
+            args = queue.popleft()
+            self._active[domain] += 1
+            self._next_start[domain] = now + self.min_interval
+            self._pool.submit(self._run, domain, args)
+
+        if not queue:
+            self._pending.pop(domain, None)
+
+    def _on_timer(self, domain: str) -> None:
+        with self._lock:
+            self._timers.pop(domain, None)
+            self._dispatch(domain)
+
+    def _run(self, domain: str, args: tuple) -> None:
+        close_old_connections()
+        try:
+            self.handler(*args)
+        except Exception:
+            # 处理函数自行记录失败状态，这里只保证调度不中断
+            logger.exception("抓取任务执行失败: %s %r", domain, args)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._active[domain] -= 1
+                if not self._active[domain]:
+                    del self._active[domain]
+                    if (
+                        domain not in self._pending
+                        and self._next_start[domain] <= time.monotonic()
+                    ):
+                        del self._next_start[domain]
+                self._outstanding -= 1
+                self._dispatch(domain)
+                if not self._outstanding:
+                    self._idle.notify_all()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_scrape_executor() -> ScrapeExecutor:
+    """获取进程内共享的抓取执行器（按 settings 配置创建）"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from .services import scrape_collection
+
+                _executor = ScrapeExecutor(
+                    scrape_collection,
+                    max_workers=settings.SCRAPE_MAX_WORKERS,
+                    per_domain_concurrency=settings.SCRAPE_PER_DOMAIN_CONCURRENCY,
+                    per_domain_rate=settings.SCRAPE_PER_DOMAIN_RATE,
+                )
+    return _executor
+
+
+def enqueue_scrape(collection, metadata_only: bool = False) -> None:
+    """
+    提交收藏抓取任务
+
+    SCRAPE_EAGER 为真时在当前线程同步执行（测试/本地调试），
+    否则在事务提交后交给后台执行器。
+    """
+    from .services import scrape_collection
+
+    if settings.SCRAPE_EAGER:
+        scrape_collection(collection.id, metadata_only)
+        return
+
+    url, collection_id = collection.url, collection.id
+    transaction.on_commit(
+        lambda: get_scrape_executor().submit(url, collection_id, metadata_only)
+    )
+
+
+def enqueue_scrapes(collections, metadata_only: bool = False) -> None:
+    """
+    批量提交收藏抓取任务（书签导入）
+
+    全部任务在事务提交后一次性交给执行器，由执行器按域名限流并发抓取。
+    """
+    from .services import scrape_collection
+
+    if settings.SCRAPE_EAGER:
+        for collection in collections:
+            scrape_collection(collection.id, metadata_only)
+        return
+
+    jobs = [(collection.url, collection.id) for collection in collections]
+
+    def submit_all():
+        executor = get_scrape_executor()
+        for url, collection_id in jobs:
+            executor.submit(url, collection_id, metadata_only)
+
+    transaction.on_commit(submit_all)
@@ -4,7 +4,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CollectionViewSet
+from .views import CollectionViewSet, ImageProxyView
 
 app_name = "collections"
 
@@ -12,5 +12,6 @@ router = DefaultRouter()
 router.register(r"", CollectionViewSet, basename="collection")
 
 urlpatterns = [
+    path("image/<str:token>/", ImageProxyView.as_view(), name="image-proxy"),
     path("", include(router.urls)),
 ]
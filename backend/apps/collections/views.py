@@ -5,24 +5,36 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
 from django.db import models
+from django.http import FileResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
 from utils.permissions import IsOwnerOrReadOnly
+from apps.dedupe.services import find_duplicates
 
-from .models import Collection
+from .blobs import matching_text_hashes
+from .bookmarks import import_bookmarks
+from .image_proxy import ImageProxyError, get_proxied_image, unsign_image
+from .models import BookmarkImport, Collection
 from .serializers import (
+    BookmarkImportSerializer,
     CollectionSerializer,
     CollectionListSerializer,
     CollectionCreateSerializer,
 )
-from .services import URLScraperService
+from .services import apply_scrape_result, conditional_scrape
+from .tasks import enqueue_scrape
 
 
 class CollectionViewSet(viewsets.ModelViewSet):
     """
     收藏视图集
 
-    提供收藏的 CRUD 操作
+    提供收藏的 CRUD 操作，创建后网页内容在后台抓取：
+    - GET /api/collections/{id}/status/ - 查询抓取状态
+    - POST /api/collections/import/ - 导入浏览器书签文件
+    - GET /api/collections/imports/{import_id}/ - 查询导入进度
     """
 
     serializer_class = CollectionSerializer
@@ -45,26 +57,14 @@ class CollectionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        metadata_only = serializer.validated_data.pop("metadata_only", False)
+
         # 创建收藏记录
         collection = serializer.save()
 
-        # 异步抓取网页内容（可选，这里使用同步方式）
-        try:
-            scraper = URLScraperService()
-            result = scraper.scrape(collection.url)
-
-            if result["success"]:
-                collection.title = result["title"]
-                collection.description = result.get("description", "")[:500]
-                collection.content = result.get("content", "")
-                collection.html_content = result.get("html_content", "")
-                collection.favicon = result.get("favicon")
-                collection.image = result.get("image")
-                collection.is_processed = True
-                collection.save()
-        except Exception:
-            # 抓取失败不影响收藏创建
-            pass
+        # 网页抓取交给后台执行器，接口立即返回（is_processed=False）
+        enqueue_scrape(collection, metadata_only=metadata_only)
+        collection.refresh_from_db()
 
         output_serializer = CollectionSerializer(collection)
         return Response(
@@ -102,10 +102,11 @@ class CollectionViewSet(viewsets.ModelViewSet):
         # 搜索过滤
         search = request.query_params.get("search")
         if search:
+            # 正文存放在 Blob 存储中，按 ContentBlob 的检索文本匹配
             queryset = queryset.filter(
                 models.Q(title__icontains=search)
                 | models.Q(description__icontains=search)
-                | models.Q(content__icontains=search)
+                | models.Q(text_hash__in=matching_text_hashes(search))
             )
 
         # 处理状态过滤
@@ -113,6 +114,11 @@ class CollectionViewSet(viewsets.ModelViewSet):
         if processed is not None:
             queryset = queryset.filter(is_processed=processed.lower() == "true")
 
+        # 抓取状态过滤
+        scrape_status = request.query_params.get("status")
+        if scrape_status:
+            queryset = queryset.filter(scrape_status=scrape_status)
+
         # 排序
         order = request.query_params.get("order", "-created_at")
         allowed_orders = ["created_at", "-created_at", "title", "-title"]
@@ -160,21 +166,27 @@ class CollectionViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def refresh(self, request, pk=None):
-        """刷新收藏内容"""
+        """
+        刷新收藏内容
+
+        使用 ETag / Last-Modified 条件请求；内容未变化时不解析、不写库
+        """
         collection = self.get_object()
 
         try:
-            scraper = URLScraperService()
-            result = scraper.scrape(collection.url)
-
-            if result["success"]:
-                collection.title = result["title"]
-                collection.description = result.get("description", "")[:500]
-                collection.content = result.get("content", "")
-                collection.html_content = result.get("html_content", "")
-                collection.favicon = result.get("favicon") or collection.favicon
-                collection.image = result.get("image") or collection.image
-                collection.is_processed = True
+            result = conditional_scrape(collection)
+
+            if result["success"] and result.get("not_modified"):
+                serializer = CollectionSerializer(collection)
+                return Response(
+                    {
+                        "code": 200,
+                        "message": "内容未变化",
+                        "data": serializer.data,
+                    }
+                )
+            elif result["success"]:
+                apply_scrape_result(collection, result, keep_media=True)
                 collection.save()
 
                 serializer = CollectionSerializer(collection)
@@ -199,6 +211,78 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @action(detail=True, methods=["get"], url_path="status")
+    def scrape_status(self, request, pk=None):
+        """
+        查询抓取状态（供前端轮询）
+
+        GET /api/collections/{id}/status/
+
+        抓取完成后正文才有指纹，近似重复提示（duplicates）在此返回
+        """
+        collection = self.get_object()
+        data = {
+            "id": collection.id,
+            "status": collection.scrape_status,
+            "error": collection.scrape_error,
+            "is_processed": collection.is_processed,
+        }
+        if collection.scrape_status == Collection.SCRAPE_DONE:
+            data["duplicates"] = find_duplicates(
+                request.user.id, "collection", collection.id
+            )
+        return Response({"code": 200, "message": "获取成功", "data": data})
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_bookmarks(self, request):
+        """
+        导入浏览器书签文件
+
+        POST /api/collections/import/（multipart：file, metadata_only）
+
+        批量创建收藏后立即返回，抓取由后台执行器按域名限流并发进行，
+        通过 imports/{import_id}/ 查询进度与失败明细。
+        """
+        serializer = BookmarkImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        job = import_bookmarks(
+            request.user,
+            serializer.validated_data["file"],
+            metadata_only=serializer.validated_data["metadata_only"],
+        )
+        message = f"已导入 {job.created_count} 条书签"
+        if job.truncated_count:
+            message += f"，超出单次导入上限的 {job.truncated_count} 条未导入"
+        return Response(
+            {
+                "code": 201,
+                "message": message,
+                "data": job.progress(),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"imports/(?P<import_id>\d+)",
+    )
+    def import_progress(self, request, import_id=None):
+        """
+        查询书签导入进度
+
+        GET /api/collections/imports/{import_id}/
+        """
+        job = get_object_or_404(BookmarkImport, id=import_id, owner=request.user)
+        return Response(
+            {
+                "code": 200,
+                "message": "获取成功",
+                "data": job.progress(),
+            }
+        )
+
     @action(detail=False, methods=["get"])
     def recent(self, request):
         """获取最近收藏"""
@@ -207,7 +291,9 @@ class CollectionViewSet(viewsets.ModelViewSet):
         except (ValueError, TypeError):
             limit = 5
         collections = self.get_queryset()[:limit]
-        serializer = CollectionListSerializer(collections, many=True)
+        serializer = CollectionListSerializer(
+            collections, many=True, context=self.get_serializer_context()
+        )
         return Response(
             {
                 "code": 200,
@@ -215,3 +301,45 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 "data": serializer.data,
             }
         )
+
+
+class ImageProxyView(APIView):
+    """
+    收藏图片代理视图
+
+    GET /api/collections/image/{token}/
+
+    令牌由列表接口签发，<img> 标签无法携带 JWT，因此不要求登录；
+    缩略图内容不变，响应可被浏览器与 CDN 长期缓存。
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    # 缩略图按内容寻址，同一令牌的结果不会改变
+    CACHE_CONTROL = "public, max-age=31536000, immutable"
+    # 失败结果只短暂缓存，避免源站恢复后仍然不可用
+    ERROR_CACHE_CONTROL = "public, max-age=300"
+
+    def get(self, request, token):
+        try:
+            url, size = unsign_image(token)
+            image = get_proxied_image(url, size)
+            etag = f'"{image.etag}"'
+            if request.headers.get("If-None-Match") == etag:
+                response = HttpResponseNotModified()
+            else:
+                response = FileResponse(
+                    open(image.path, "rb"), content_type=image.content_type
+                )
+        except (ImageProxyError, FileNotFoundError) as e:
+            response = Response(
+                {"code": 404, "message": f"图片不可用：{e}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+            response["Cache-Control"] = self.ERROR_CACHE_CONTROL
+            return response
+
+        response["ETag"] = etag
+        response["Cache-Control"] = self.CACHE_CONTROL
+        return response
@@ -0,0 +1,14 @@
+"""
+Dedupe app configuration.
+"""
+
+from django.apps import AppConfig
+
+
+class DedupeConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.dedupe"
+    verbose_name = "内容去重"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,32 @@
+"""
+补齐内容指纹
+
+为指纹功能上线前已存在的笔记与收藏，以及批量导入等绕过保存信号写入的数据
+计算 SimHash 指纹，已有指纹的对象不重复计算。
+
+用法:
+    python manage.py backfill_signatures
+    python manage.py backfill_signatures --user 42 --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.dedupe.services import backfill_signatures
+
+
+class Command(BaseCommand):
+    help = "为缺少内容指纹的笔记与收藏补齐指纹"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="只处理指定用户 ID（可重复）",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = backfill_signatures(options["users"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"已补齐 {count} 条内容指纹"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('note', '笔记'), ('collection', '收藏')], max_length=20, verbose_name='来源类型')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='来源ID')),
+                ('simhash', models.BigIntegerField(help_text='64 位有符号整数形式存储', verbose_name='SimHash 指纹')),
+                ('band_0', models.IntegerField(verbose_name='分段0')),
+                ('band_1', models.IntegerField(verbose_name='分段1')),
+                ('band_2', models.IntegerField(verbose_name='分段2')),
+                ('band_3', models.IntegerField(verbose_name='分段3')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_signatures', to=settings.AUTH_USER_MODEL, verbose_name='所属用户')),
+            ],
+            options={
+                'verbose_name': '内容指纹',
+                'verbose_name_plural': '内容指纹',
+                'indexes': [models.Index(fields=['owner', 'band_0'], name='dedupe_cont_owner_i_841af8_idx'), models.Index(fields=['owner', 'band_1'], name='dedupe_cont_owner_i_4a38b5_idx'), models.Index(fields=['owner', 'band_2'], name='dedupe_cont_owner_i_866cd4_idx'), models.Index(fields=['owner', 'band_3'], name='dedupe_cont_owner_i_812ae1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source_type', 'object_id'), name='unique_signature_per_object')],
+            },
+        ),
+    ]
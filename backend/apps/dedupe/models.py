@@ -0,0 +1,68 @@
+"""
+内容去重模型模块
+
+保存笔记与收藏正文的 SimHash 指纹，用于近似重复检测。
+"""
+
+from django.db import models
+
+
+class ContentSignature(models.Model):
+    """
+    内容指纹模型
+
+    64 位 SimHash 拆分为 4 个 16 位分段（LSH banding），
+    汉明距离不超过 3 的两段内容至少有一个分段完全相同，
+    因此候选查询只需按分段做等值索引查找。
+    """
+
+    SOURCE_TYPE_CHOICES = [
+        ("note", "笔记"),
+        ("collection", "收藏"),
+    ]
+
+    owner = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="content_signatures",
+        verbose_name="所属用户",
+    )
+    source_type = models.CharField(
+        max_length=20,
+        choices=SOURCE_TYPE_CHOICES,
+        verbose_name="来源类型",
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name="来源ID",
+    )
+    simhash = models.BigIntegerField(
+        verbose_name="SimHash 指纹",
+        help_text="64 位有符号整数形式存储",
+    )
+    band_0 = models.IntegerField(verbose_name="分段0")
+    band_1 = models.IntegerField(verbose_name="分段1")
+    band_2 = models.IntegerField(verbose_name="分段2")
+    band_3 = models.IntegerField(verbose_name="分段3")
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="更新时间",
+    )
+
+    class Meta:
+        verbose_name = "内容指纹"
+        verbose_name_plural = "内容指纹"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_type", "object_id"],
+                name="unique_signature_per_object",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["owner", "band_0"]),
+            models.Index(fields=["owner", "band_1"]),
+            models.Index(fields=["owner", "band_2"]),
+            models.Index(fields=["owner", "band_3"]),
+        ]
+
+    def __str__(self):
+        return f"{self.source_type}:{self.object_id}"
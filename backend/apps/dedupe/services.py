@@ -0,0 +1,346 @@
+"""
+近似重复检测服务模块
+
+基于 SimHash 指纹与 LSH 分段索引：
+- 指纹：对分词后的 3-gram 片段做加权 SimHash，得到 64 位指纹
+- 候选：4 个 16 位分段任一相同即为候选（按索引等值查找，亚线性）
+- 判定：候选与目标指纹的汉明距离不超过阈值即视为近似重复
+"""
+
+from collections import Counter, defaultdict
+from hashlib import blake2b
+
+import numpy as np
+from django.db.models import Exists, OuterRef, Q
+
+from apps.notes.similarity import tokenize
+from .models import ContentSignature
+
+
+# 片段长度（词数）
+SHINGLE_SIZE = 3
+
+# 少于该词数的文本不计算指纹，避免短文本大量误报
+MIN_TOKENS = 10
+
+# 判定为近似重复的最大汉明距离（需小于分段数，保证分段检索不漏召回）
+MAX_DISTANCE = 3
+
+BAND_COUNT = 4
+BAND_BITS = 64 // BAND_COUNT
+BAND_MASK = (1 << BAND_BITS) - 1
+
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+def compute_simhash(text: str) -> int | None:
+    """
+    计算文本的 64 位 SimHash 指纹（无符号整数）
+
+    Returns:
+        指纹，文本过短时返回 None
+    """
+    tokens = tokenize(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+
+    shingles = Counter(
+        " ".join(tokens[i : i + SHINGLE_SIZE])
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    )
+    hashes = np.fromiter(
+        (
+            int.from_bytes(blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    weights = np.fromiter(shingles.values(), dtype=np.int64, count=len(shingles))
+
+    bits = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).astype(np.int64)
+    totals = ((bits * 2 - 1) * weights[:, None]).sum(axis=0)
+
+    fingerprint = 0
+    for position in np.flatnonzero(totals > 0):
+        fingerprint |= 1 << int(position)
+    return fingerprint
+
+
+def to_signed(value: int) -> int:
+    """无符号 64 位整数转为有符号（BigIntegerField 存储）"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value: int) -> int:
+    """有符号 64 位整数还原为无符号"""
+    return value + (1 << 64) if value < 0 else value
+
+
+def split_bands(fingerprint: int) -> list[int]:
+    """把指纹拆分为 LSH 分段"""
+    return [(fingerprint >> (BAND_BITS * i)) & BAND_MASK for i in range(BAND_COUNT)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹之间的汉明距离"""
+    return (to_unsigned(a) ^ to_unsigned(b)).bit_count()
+
+
+def update_signature(owner_id: int, source_type: str, object_id: int, text: str):
+    """
+    保存时更新内容指纹
+
+    Returns:
+        指纹记录，文本过短时删除旧指纹并返回 None
+    """
+    fingerprint = compute_simhash(text)
+    if fingerprint is None:
+        remove_signature(source_type, object_id)
+        return None
+
+    bands = split_bands(fingerprint)
+    signature, _ = ContentSignature.objects.update_or_create(
+        source_type=source_type,
+        object_id=object_id,
+        defaults={
+            "owner_id": owner_id,
+            "simhash": to_signed(fingerprint),
+            **{f"band_{i}": band for i, band in enumerate(bands)},
+        },
+    )
+    return signature
+
+
+def build_signature(owner_id: int, source_type: str, object_id: int, text: str):
+    """
+    计算内容指纹记录（不保存），供批量写入使用
+
+    Returns:
+        未保存的指纹记录，文本过短时返回 None
+    """
+    fingerprint = compute_simhash(text)
+    if fingerprint is None:
+        return None
+    return ContentSignature(
+        owner_id=owner_id,
+        source_type=source_type,
+        object_id=object_id,
+        simhash=to_signed(fingerprint),
+        **{f"band_{i}": band for i, band in enumerate(split_bands(fingerprint))},
+    )
+
+
+def backfill_signatures(user_ids=None, batch_size: int = 500) -> int:
+    """
+    为缺少指纹的笔记与收藏批量补齐指纹
+
+    用于指纹功能上线前的存量数据，以及 bulk_create 等绕过保存信号的写入。
+    文本过短的对象不生成指纹，重复执行时会再次计算但不会写入。
+
+    Args:
+        user_ids: 只处理这些用户；None 表示全部用户
+        batch_size: 每批读取与写入的对象数
+
+    Returns:
+        新建的指纹数量
+    """
+    from apps.collections.models import Collection
+    from apps.notes.models import Note
+
+    sources = (
+        ("note", Note.objects.only("id", "owner_id", "plain_text"), "plain_text"),
+        (
+            "collection",
+            Collection.objects.filter(is_processed=True).only(
+                "id", "owner_id", "text_hash"
+            ),
+            "content",
+        ),
+    )
+    created = 0
+    for source_type, queryset, text_field in sources:
+        if user_ids is not None:
+            queryset = queryset.filter(owner_id__in=user_ids)
+        queryset = queryset.filter(
+            ~Exists(
+                ContentSignature.objects.filter(
+                    source_type=source_type, object_id=OuterRef("pk")
+                )
+            )
+        )
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            signature = build_signature(
+                obj.owner_id, source_type, obj.id, getattr(obj, text_field)
+            )
+            if signature is not None:
+                batch.append(signature)
+            if len(batch) >= batch_size:
+                ContentSignature.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+        if batch:
+            ContentSignature.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+    return created
+
+
+def remove_signature(source_type: str, object_id: int) -> None:
+    """删除内容指纹"""
+    ContentSignature.objects.filter(
+        source_type=source_type, object_id=object_id
+    ).delete()
+
+
+def owns_object(owner_id: int, source_type: str, object_id: int) -> bool:
+    """对象是否存在且属于该用户"""
+    from apps.collections.models import Collection
+    from apps.notes.models import Note
+
+    model = Note if source_type == "note" else Collection
+    return model.objects.filter(id=object_id, owner_id=owner_id).exists()
+
+
+def find_duplicates(
+    owner_id: int,
+    source_type: str,
+    object_id: int,
+    max_distance: int = MAX_DISTANCE,
+) -> list[dict[str, object]]:
+    """
+    查找与指定对象近似重复的内容
+
+    Returns:
+        [{"type", "id", "title", "distance"}, ...]，按距离升序
+    """
+    signature = ContentSignature.objects.filter(
+        owner_id=owner_id, source_type=source_type, object_id=object_id
+    ).first()
+    if signature is None:
+        return []
+
+    band_filter = Q()
+    for i in range(BAND_COUNT):
+        band_filter |= Q(**{f"band_{i}": getattr(signature, f"band_{i}")})
+
+    candidates = (
+        ContentSignature.objects.filter(owner_id=owner_id)
+        .filter(band_filter)
+        .exclude(id=signature.id)
+        .values_list("source_type", "object_id", "simhash")
+    )
+
+    matches = []
+    for candidate_type, candidate_id, candidate_hash in candidates:
+        distance = hamming_distance(signature.simhash, candidate_hash)
+        if distance <= max_distance:
+            matches.append((candidate_type, candidate_id, distance))
+
+    titles = _load_titles((t, i) for t, i, _ in matches)
+    return [
+        {
+            "type": candidate_type,
+            "id": candidate_id,
+            "title": titles.get((candidate_type, candidate_id), ""),
+            "distance": distance,
+        }
+        for candidate_type, candidate_id, distance in sorted(
+            matches, key=lambda item: item[2]
+        )
+    ]
+
+
+def build_duplicate_report(
+    owner_id: int,
+    source_type: str | None = None,
+    max_distance: int = MAX_DISTANCE,
+) -> list[dict[str, object]]:
+    """
+    生成用户的重复内容报告
+
+    按分段值分桶，只在同桶内两两比较，再用并查集合并为重复组。
+
+    Returns:
+        [{"items": [...], "size": n}, ...]，按组大小降序
+    """
+    signatures = ContentSignature.objects.filter(owner_id=owner_id)
+    if source_type:
+        signatures = signatures.filter(source_type=source_type)
+
+    band_fields = [f"band_{i}" for i in range(BAND_COUNT)]
+    rows = list(
+        signatures.values_list("source_type", "object_id", "simhash", *band_fields)
+    )
+
+    buckets = defaultdict(list)
+    for position, row in enumerate(rows):
+        for band_index, band in enumerate(row[3:]):
+            buckets[(band_index, band)].append(position)
+
+    parent = list(range(len(rows)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1 :]:
+                if find(a) == find(b):
+                    continue
+                if hamming_distance(rows[a][2], rows[b][2]) <= max_distance:
+                    parent[find(a)] = find(b)
+
+    groups = defaultdict(list)
+    for position in range(len(rows)):
+        groups[find(position)].append(position)
+
+    duplicate_groups = [members for members in groups.values() if len(members) > 1]
+    titles = _load_titles(
+        (rows[p][0], rows[p][1]) for members in duplicate_groups for p in members
+    )
+
+    report = [
+        {
+            "size": len(members),
+            "items": [
+                {
+                    "type": rows[p][0],
+                    "id": rows[p][1],
+                    "title": titles.get((rows[p][0], rows[p][1]), ""),
+                }
+                for p in sorted(members, key=lambda p: (rows[p][0], rows[p][1]))
+            ],
+        }
+        for members in duplicate_groups
+    ]
+    report.sort(key=lambda group: -group["size"])
+    return report
+
+
+def _load_titles(keys) -> dict[tuple[str, int], str]:
+    """批量加载笔记/收藏标题"""
+    from apps.collections.models import Collection
+    from apps.notes.models import Note
+
+    ids = defaultdict(set)
+    for source_type, object_id in keys:
+        ids[source_type].add(object_id)
+
+    titles = {}
+    if ids["note"]:
+        for note_id, title in Note.objects.filter(id__in=ids["note"]).values_list(
+            "id", "title"
+        ):
+            titles[("note", note_id)] = title
+    if ids["collection"]:
+        for collection_id, title in Collection.objects.filter(
+            id__in=ids["collection"]
+        ).values_list("id", "title"):
+            titles[("collection", collection_id)] = title
+    return titles
@@ -0,0 +1,42 @@
+"""
+Dedupe signals.
+
+Keep ContentSignature in sync with Note and Collection text.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.collections.models import Collection
+from apps.notes.models import Note
+from .services import remove_signature, update_signature
+
+
+@receiver(post_save, sender=Note)
+def sync_note_signature(sender, instance, **kwargs):
+    """Recompute the SimHash when the note text changes."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "plain_text" not in update_fields:
+        return
+    update_signature(instance.owner_id, "note", instance.id, instance.plain_text)
+
+
+@receiver(post_delete, sender=Note)
+def remove_note_signature(sender, instance, **kwargs):
+    """Drop the SimHash when the note is deleted."""
+    remove_signature("note", instance.id)
+
+
+@receiver(post_save, sender=Collection)
+def sync_collection_signature(sender, instance, **kwargs):
+    """Recompute the SimHash when scraped content changes."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "text_hash" not in update_fields:
+        return
+    update_signature(instance.owner_id, "collection", instance.id, instance.content)
+
+
+@receiver(post_delete, sender=Collection)
+def remove_collection_signature(sender, instance, **kwargs):
+    """Drop the SimHash when the collection is deleted."""
+    remove_signature("collection", instance.id)
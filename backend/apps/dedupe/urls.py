@@ -0,0 +1,21 @@
+"""
+内容去重模块 URL 配置
+
+API Endpoints:
+- GET /api/dedupe/report/        - 重复内容报告
+- GET /api/dedupe/{type}/{id}/   - 指定笔记/收藏的近似重复内容
+"""
+
+from django.urls import path
+from .views import DuplicateLookupView, DuplicateReportView
+
+app_name = "dedupe"
+
+urlpatterns = [
+    path("report/", DuplicateReportView.as_view(), name="report"),
+    path(
+        "<str:source_type>/<int:object_id>/",
+        DuplicateLookupView.as_view(),
+        name="lookup",
+    ),
+]
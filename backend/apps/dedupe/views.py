@@ -0,0 +1,68 @@
+"""
+内容去重视图模块
+"""
+
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from utils.responses import ResponseModel
+from .services import build_duplicate_report, find_duplicates, owns_object
+
+
+class DuplicateReportView(APIView):
+    """
+    重复内容报告视图
+
+    GET /api/dedupe/report/
+    GET /api/dedupe/report/?type=note        # 仅笔记
+    GET /api/dedupe/report/?type=collection  # 仅收藏
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        source_type = request.query_params.get("type")
+        if source_type not in (None, "note", "collection"):
+            return Response(
+                ResponseModel.error(message="无效的类型参数").to_dict(),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        groups = build_duplicate_report(request.user.id, source_type)
+        return Response(
+            ResponseModel.success(
+                data={"count": len(groups), "groups": groups}
+            ).to_dict(),
+            status=status.HTTP_200_OK,
+        )
+
+
+class DuplicateLookupView(APIView):
+    """
+    单个对象的近似重复查询视图
+
+    GET /api/dedupe/{type}/{id}/
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, source_type, object_id):
+        if source_type not in ("note", "collection"):
+            return Response(
+                ResponseModel.error(message="无效的类型参数").to_dict(),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not owns_object(request.user.id, source_type, object_id):
+            return Response(
+                ResponseModel.not_found(message="对象不存在").to_dict(),
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        duplicates = find_duplicates(request.user.id, source_type, object_id)
+        return Response(
+            ResponseModel.success(data=duplicates).to_dict(),
+            status=status.HTTP_200_OK,
+        )
@@ -4,19 +4,14 @@
 提供图谱数据组装与相关节点查询等服务。
 """
 
-import re
 from django.db.models import Q
 
 from .models import GraphNode, GraphLink
-from apps.notes.models import Note
+from apps.notes.models import Note, NoteReference
 from apps.categories.models import Category
 from apps.tags.models import Tag
 
 
-# 正则表达式匹配笔记链接格式: [标题](/notes/123)
-NOTE_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\\(/notes/(\d+)\\)')
-
-
 def _serialize_node(node: object) -> dict[str, object]:
     raw_data = getattr(node, "data", {}) or {}
     data = raw_data if isinstance(raw_data, dict) else {}
@@ -212,32 +207,27 @@ def get_hybrid_graph_data(user: object, mode: str = "hybrid") -> dict[str, list[
                         })()
                         links.append(link)
 
-        # 笔记 -> 笔记链接（解析笔记内容中的内部链接）
-        all_notes = Note.objects.filter(owner=user, is_archived=False)
-        for note in all_notes:
-            note_node_id = id_mapping.get(("note", note.id))
-            if not note_node_id:
-                continue
-
-            # 解析内容中的链接
-            content = note.content or ""
-            matches = NOTE_LINK_PATTERN.findall(content)
-
-            for matched_title, linked_note_id in matches:
-                linked_note_id = int(linked_note_id)
-                linked_node_id = id_mapping.get(("note", linked_note_id))
-
-                if linked_node_id:
-                    # 避免重复链接
-                    link_id = f"note-{note.id}-note-{linked_note_id}"
-                    if not any(getattr(lnk, "id", None) == link_id for lnk in links):
-                        link = type("Link", (), {
-                            "id": link_id,
-                            "source_id": note_node_id,
-                            "target_id": linked_node_id,
-                            "link_type": "references",
-                        })()
-                        links.append(link)
+        # 笔记 -> 笔记链接（读取保存时维护的出链索引，不再解析内容）
+        references = (
+            NoteReference.objects.filter(
+                source__owner=user,
+                source__is_archived=False,
+                target__is_archived=False,
+            )
+            .values_list("source_id", "target_id")
+            .distinct()
+        )
+        for source_id, target_id in references:
+            note_node_id = id_mapping.get(("note", source_id))
+            linked_node_id = id_mapping.get(("note", target_id))
+            if note_node_id and linked_node_id:
+                link = type("Link", (), {
+                    "id": f"note-{source_id}-note-{target_id}",
+                    "source_id": note_node_id,
+                    "target_id": linked_node_id,
+                    "link_type": "references",
+                })()
+                links.append(link)
 
         # 笔记 -> 笔记链接（通过 related_notes 手动关联）
         related_notes = Note.objects.filter(owner=user, is_archived=False).prefetch_related("related_notes")
@@ -0,0 +1,161 @@
+"""
+笔记内部链接模块
+
+统一的内部链接解析与反向链接（backlinks）索引维护：
+- Markdown 链接：[标题](/notes/123)
+- Wiki 链接：[[note:123]] 或 [[123]]
+
+笔记内容变化时解析一次，结果写入 NoteReference 表，
+反向链接查询与图谱构建直接读表，不再对笔记内容重复做正则扫描。
+"""
+
+import re
+from typing import NamedTuple
+
+from django.db import transaction
+
+from .models import Note, NoteReference
+
+
+MARKDOWN_LINK_PATTERN = re.compile(r"(?<!!)\[([^\]]+)\]\(/notes/(\d+)/?\)")
+WIKI_LINK_PATTERN = re.compile(r"\[\[(?:note:)?(\d+)\]\]")
+
+ANCHOR_MAX_LENGTH = 200
+
+
+class ExtractedLink(NamedTuple):
+    """解析出的内部链接"""
+
+    target_id: int
+    anchor_text: str
+    syntax: str
+
+
+def extract_note_links(content: str | None) -> list[ExtractedLink]:
+    """
+    从 Markdown 内容中提取内部笔记链接
+
+    同一目标、同一语法只保留第一次出现的链接。
+
+    Returns:
+        按出现顺序排列的 ExtractedLink 列表
+    """
+    if not content:
+        return []
+
+    found = []
+    for match in MARKDOWN_LINK_PATTERN.finditer(content):
+        found.append(
+            (
+                match.start(),
+                ExtractedLink(
+                    int(match.group(2)),
+                    match.group(1).strip()[:ANCHOR_MAX_LENGTH],
+                    NoteReference.SYNTAX_MARKDOWN,
+                ),
+            )
+        )
+    for match in WIKI_LINK_PATTERN.finditer(content):
+        found.append(
+            (
+                match.start(),
+                ExtractedLink(int(match.group(1)), "", NoteReference.SYNTAX_WIKI),
+            )
+        )
+
+    links = []
+    seen = set()
+    for _, link in sorted(found, key=lambda item: item[0]):
+        key = (link.target_id, link.syntax)
+        if key in seen:
+            continue
+        seen.add(key)
+        links.append(link)
+    return links
+
+
+def rewrite_note_links(content: str, id_map: dict) -> str:
+    """
+    把内容中的内部链接改写为新 ID（导入时使用）
+
+    Args:
+        content: Markdown 内容
+        id_map: 旧笔记 ID -> 新笔记 ID；不在映射中的链接保持不变
+    """
+    if not content:
+        return content
+
+    def markdown(match):
+        target = id_map.get(int(match.group(2)))
+        if target is None:
+            return match.group(0)
+        return f"[{match.group(1)}](/notes/{target})"
+
+    def wiki(match):
+        target = id_map.get(int(match.group(1)))
+        if target is None:
+            return match.group(0)
+        prefix = "note:" if match.group(0).startswith("[[note:") else ""
+        return f"[[{prefix}{target}]]"
+
+    content = MARKDOWN_LINK_PATTERN.sub(markdown, content)
+    return WIKI_LINK_PATTERN.sub(wiki, content)
+
+
+def has_note_links(content: str | None) -> bool:
+    """内容是否包含内部链接"""
+    return bool(
+        content
+        and (MARKDOWN_LINK_PATTERN.search(content) or WIKI_LINK_PATTERN.search(content))
+    )
+
+
+def sync_note_references(note: Note) -> list[int]:
+    """
+    重建单条笔记的出链索引
+
+    只保留指向同一用户其他笔记的链接。
+
+    Returns:
+        当前有效的目标笔记 ID 列表（去重，按出现顺序）
+    """
+    links = [
+        link for link in extract_note_links(note.content) if link.target_id != note.id
+    ]
+    valid_ids = set(
+        Note.objects.filter(
+            owner_id=note.owner_id, id__in={link.target_id for link in links}
+        ).values_list("id", flat=True)
+    )
+    links = [link for link in links if link.target_id in valid_ids]
+
+    wanted = {(link.target_id, link.syntax): link.anchor_text for link in links}
+    existing = {
+        (ref.target_id, ref.syntax): ref
+        for ref in NoteReference.objects.filter(source_id=note.id)
+    }
+
+    with transaction.atomic():
+        stale = [
+            ref.id
+            for key, ref in existing.items()
+            if key not in wanted or ref.anchor_text != wanted[key]
+        ]
+        if stale:
+            NoteReference.objects.filter(id__in=stale).delete()
+
+        NoteReference.objects.bulk_create(
+            [
+                NoteReference(
+                    source_id=note.id,
+                    target_id=target_id,
+                    anchor_text=anchor_text,
+                    syntax=syntax,
+                )
+                for (target_id, syntax), anchor_text in wanted.items()
+                if (target_id, syntax) not in existing
+                or existing[(target_id, syntax)].id in stale
+            ]
+        )
+
+    return list(dict.fromkeys(link.target_id for link in links))
@@ -0,0 +1,51 @@
+"""
+批量重建相似笔记
+
+用法:
+    python manage.py build_note_similarity
+    python manage.py build_note_similarity --user 1 --top-k 20 --emit-graph
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notes.models import Note
+from apps.notes.similarity import BATCH_SIZE, DEFAULT_TOP_K, rebuild_user_similarities
+
+
+class Command(BaseCommand):
+    help = "基于 TF-IDF 向量批量重建每个用户的相似笔记"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="仅处理指定用户 ID")
+        parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--emit-graph",
+            action="store_true",
+            help='同时写入 "similar" 类型的图谱链接',
+        )
+
+    def handle(self, *args, **options):
+        if options["user"]:
+            user_ids = [options["user"]]
+        else:
+            user_ids = (
+                Note.objects.values_list("owner_id", flat=True)
+                .order_by("owner_id")
+                .distinct()
+            )
+
+        for user_id in user_ids:
+            started = time.monotonic()
+            count = rebuild_user_similarities(
+                user_id,
+                k=options["top_k"],
+                emit_graph_links=options["emit_graph"],
+                batch_size=options["batch_size"],
+            )
+            self.stdout.write(
+                f"user {user_id}: {count} 条相似记录，"
+                f"耗时 {time.monotonic() - started:.2f}s"
+            )
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_related_notes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteVector',
+            fields=[
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='vector', serialize=False, to='notes.note', verbose_name='笔记')),
+                ('indices', models.JSONField(default=list, verbose_name='词项下标')),
+                ('counts', models.JSONField(default=list, verbose_name='词频')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='note_vectors', to=settings.AUTH_USER_MODEL, verbose_name='所属用户')),
+            ],
+            options={
+                'verbose_name': '笔记向量',
+                'verbose_name_plural': '笔记向量',
+            },
+        ),
+        migrations.CreateModel(
+            name='NoteSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='相似度')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='notes.note', verbose_name='笔记')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.note', verbose_name='相似笔记')),
+            ],
+            options={
+                'verbose_name': '相似笔记',
+                'verbose_name_plural': '相似笔记',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['note', '-score'], name='notes_notes_note_id_3c3da2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('note', 'similar'), name='unique_note_similarity')],
+            },
+        ),
+    ]
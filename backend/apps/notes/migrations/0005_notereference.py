@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_note_references(apps, schema_editor):
+    """为已有笔记解析一次内部链接，建立反向链接索引"""
+    from apps.notes.links import extract_note_links
+
+    Note = apps.get_model("notes", "Note")
+    NoteReference = apps.get_model("notes", "NoteReference")
+
+    owner_by_id = dict(Note.objects.values_list("id", "owner_id"))
+    batch = []
+    for note_id, owner_id, content in Note.objects.values_list(
+        "id", "owner_id", "content"
+    ).iterator(chunk_size=500):
+        for link in extract_note_links(content):
+            if link.target_id == note_id or owner_by_id.get(link.target_id) != owner_id:
+                continue
+            batch.append(
+                NoteReference(
+                    source_id=note_id,
+                    target_id=link.target_id,
+                    anchor_text=link.anchor_text,
+                    syntax=link.syntax,
+                )
+            )
+        if len(batch) >= 1000:
+            NoteReference.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        NoteReference.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_notevector_notesimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anchor_text', models.CharField(blank=True, default='', max_length=200, verbose_name='链接文本')),
+                ('syntax', models.CharField(choices=[('markdown', 'Markdown 链接'), ('wiki', 'Wiki 链接')], default='markdown', max_length=20, verbose_name='链接语法')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_references', to='notes.note', verbose_name='来源笔记')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_references', to='notes.note', verbose_name='目标笔记')),
+            ],
+            options={
+                'verbose_name': '笔记引用',
+                'verbose_name_plural': '笔记引用',
+                'indexes': [models.Index(fields=['target', 'source'], name='notes_noter_target__364deb_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'target', 'syntax'), name='unique_note_reference')],
+            },
+        ),
+        migrations.RunPython(backfill_note_references, migrations.RunPython.noop),
+    ]
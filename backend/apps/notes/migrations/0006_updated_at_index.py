@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_updated_at_index'),
+        ('notes', '0005_notereference'),
+        ('tags', '0002_updated_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['owner', 'updated_at'], name='notes_note_owner_i_3399aa_idx'),
+        ),
+    ]
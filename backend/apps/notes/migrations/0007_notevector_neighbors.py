@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notevector',
+            name='neighbors_k',
+            field=models.PositiveIntegerField(default=0, verbose_name='已保存近邻数'),
+        ),
+        migrations.AddField(
+            model_name='notevector',
+            name='neighbors_stale',
+            field=models.BooleanField(default=True, verbose_name='近邻待更新'),
+        ),
+    ]
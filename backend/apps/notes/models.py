@@ -104,11 +104,29 @@ class Note(models.Model):
             models.Index(fields=["owner", "created_at"]),
             models.Index(fields=["owner", "is_archived"]),
             models.Index(fields=["owner", "is_pinned"]),
+            models.Index(fields=["owner", "updated_at"]),
         ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """记录从数据库加载时的内容与归档状态，用于判断保存时是否变化"""
+        instance = super().from_db(db, field_names, values)
+        if "content" in field_names:
+            instance._loaded_content = values[field_names.index("content")]
+        if "is_archived" in field_names:
+            instance._loaded_is_archived = values[field_names.index("is_archived")]
+        return instance
+
+    @property
+    def content_changed(self):
+        """内容是否相对数据库中的版本发生变化（新建笔记视为已变化）"""
+        if not hasattr(self, "_loaded_content"):
+            return True
+        return self._normalize_content(self.content) != self._loaded_content
+
     def save(self, *args, **kwargs):
         """保存时自动生成 slug 和纯文本"""
         if not self.slug:
@@ -124,6 +142,12 @@ class Note(models.Model):
 
         super().save(*args, **kwargs)
 
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self._loaded_content = self.content
+        if update_fields is None or "is_archived" in update_fields:
+            self._loaded_is_archived = self.is_archived
+
     def _normalize_content(self, content):
         if content is None:
             return ""
@@ -197,3 +221,160 @@ class Note(models.Model):
         """增加浏览次数"""
         self.view_count += 1
         self.save(update_fields=["view_count"])
+
+
+class NoteReference(models.Model):
+    """
+    笔记内部链接（反向链接索引）
+
+    由笔记内容解析得到，内容变化时重建，
+    source 为包含链接的笔记，target 为被引用的笔记。
+    """
+
+    SYNTAX_MARKDOWN = "markdown"
+    SYNTAX_WIKI = "wiki"
+    SYNTAX_CHOICES = [
+        (SYNTAX_MARKDOWN, "Markdown 链接"),
+        (SYNTAX_WIKI, "Wiki 链接"),
+    ]
+
+    source = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name="outgoing_references",
+        verbose_name="来源笔记",
+    )
+    target = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name="incoming_references",
+        verbose_name="目标笔记",
+    )
+    anchor_text = models.CharField(
+        max_length=200,
+        blank=True,
+        default="",
+        verbose_name="链接文本",
+    )
+    syntax = models.CharField(
+        max_length=20,
+        choices=SYNTAX_CHOICES,
+        default=SYNTAX_MARKDOWN,
+        verbose_name="链接语法",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="创建时间",
+    )
+
+    class Meta:
+        verbose_name = "笔记引用"
+        verbose_name_plural = "笔记引用"
+        indexes = [
+            models.Index(fields=["target", "source"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "target", "syntax"],
+                name="unique_note_reference",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.target_id} ({self.syntax})"
+
+
+class NoteVector(models.Model):
+    """
+    笔记词频向量
+
+    以特征哈希后的 (下标, 词频) 稀疏形式存储，用于相似笔记计算。
+    笔记内容变化时增量更新。neighbors_k / neighbors_stale 记录该笔记
+    已保存的相似笔记（NoteSimilarity）数量及是否需要重新计算。
+    """
+
+    note = models.OneToOneField(
+        Note,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="vector",
+        verbose_name="笔记",
+    )
+    owner = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="note_vectors",
+        verbose_name="所属用户",
+    )
+    indices = models.JSONField(
+        default=list,
+        verbose_name="词项下标",
+    )
+    counts = models.JSONField(
+        default=list,
+        verbose_name="词频",
+    )
+    neighbors_k = models.PositiveIntegerField(
+        default=0,
+        verbose_name="已保存近邻数",
+    )
+    neighbors_stale = models.BooleanField(
+        default=True,
+        verbose_name="近邻待更新",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="更新时间",
+    )
+
+    class Meta:
+        verbose_name = "笔记向量"
+        verbose_name_plural = "笔记向量"
+
+    def __str__(self):
+        return f"vector: {self.note_id}"
+
+
+class NoteSimilarity(models.Model):
+    """
+    相似笔记
+
+    保存每条笔记的 top-k 相似笔记及余弦相似度分数。
+    """
+
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name="similarities",
+        verbose_name="笔记",
+    )
+    similar = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="相似笔记",
+    )
+    score = models.FloatField(
+        verbose_name="相似度",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="创建时间",
+    )
+
+    class Meta:
+        verbose_name = "相似笔记"
+        verbose_name_plural = "相似笔记"
+        ordering = ["-score"]
+        indexes = [
+            models.Index(fields=["note", "-score"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["note", "similar"],
+                name="unique_note_similarity",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.note_id} ~ {self.similar_id} ({self.score:.2f})"
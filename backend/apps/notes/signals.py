@@ -3,17 +3,31 @@ Notes signals.
 
 Keep GraphNode in sync with Note lifecycle.
 Create GraphLinks between notes and categories/tags.
-Detect internal references in note content.
+Index internal references (NoteReference) when note content changes.
+Maintain the TF-IDF vector used by similar-note lookup, and refresh the
+similar-note lists that included a deleted note.
+Keep the owner's storage usage ledger in step with note content.
+Bump updated_at on tag changes so incremental exports see them.
 """
 
-import re
 from django.db import models
-from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
 from apps.graph.models import GraphNode, GraphLink
-from .models import Note
+from apps.users.storage import adjust_usage, note_size_expression, text_size
+from .links import sync_note_references
+from .models import Note, NoteReference
+from .similarity import invalidate_similar_lists, update_note_vector
+from .tasks import enqueue_similarity_refresh
 
 
 def _generate_unique_slug(title: str, current_note_id: int | None = None) -> str:
@@ -63,24 +77,6 @@ def _build_note_data(note: object) -> dict[str, object]:
     }
 
 
-def _extract_referenced_note_ids(plain_text: str) -> list[int]:
-    """从纯文本中提取引用的笔记 ID。
-
-    支持格式：
-    - [[note:123]]
-    - [[123]]
-    """
-    ids = set()
-    # Match [[note:123]] or [[123]]
-    pattern = r"\[\[(?:note:)?(\d+)\]\]"
-    for match in re.finditer(pattern, plain_text):
-        try:
-            ids.add(int(match.group(1)))
-        except ValueError:
-            pass
-    return list(ids)
-
-
 @receiver(post_save, sender=Note)
 def sync_note_node(sender, instance, created, **kwargs):
     """Create or update GraphNode when note is saved."""
@@ -109,7 +105,19 @@ def sync_note_node(sender, instance, created, **kwargs):
     # Update links to category and tags
     _sync_note_category_link(instance)
     _sync_note_tags_links(instance)
-    _sync_note_reference_links(instance)
+
+    update_fields = kwargs.get("update_fields")
+
+    # Re-index internal links once per content change
+    if (update_fields is None or "content" in update_fields) and (
+        instance.content_changed
+    ):
+        sync_note_references(instance)
+        _sync_note_reference_links(instance)
+
+    # Keep the similarity vector in step with the text
+    if update_fields is None or "plain_text" in update_fields:
+        update_note_vector(instance)
 
 
 @receiver(post_delete, sender=Note)
@@ -237,7 +245,7 @@ def _sync_note_tags_links(note: Note):
 
 
 def _sync_note_reference_links(note: Note):
-    """Create links to other notes referenced in content."""
+    """Mirror the NoteReference index as reference links in the graph."""
     note_node = GraphNode.objects.filter(
         owner=note.owner,
         node_type="note",
@@ -247,59 +255,125 @@ def _sync_note_reference_links(note: Note):
     if not note_node:
         return
 
-    # Extract referenced note IDs from plain text
-    referenced_ids = _extract_referenced_note_ids(note.plain_text)
-
-    if not referenced_ids:
-        # Remove existing reference links if no references
-        GraphLink.objects.filter(
-            owner=note.owner,
-            source=note_node,
-            link_type="reference",
-        ).delete()
-        return
-
-    # Get referenced note nodes - query each note separately to avoid JSONB type issues
-    referenced_nodes = []
-    for ref_id in referenced_ids:
-        node = GraphNode.objects.filter(
-            owner=note.owner,
-            node_type="note",
-            data__note_id=str(ref_id),
-        ).first()
-        if node:
-            referenced_nodes.append(node)
+    referenced_ids = set(
+        NoteReference.objects.filter(source_id=note.id).values_list(
+            "target_id", flat=True
+        )
+    )
 
-    # Get existing reference links
-    existing_links = list(
-        GraphLink.objects.filter(
-            owner=note.owner,
-            source=note_node,
-            link_type="reference",
+    new_target_ids = set()
+    if referenced_ids:
+        new_target_ids = set(
+            GraphNode.objects.filter(
+                owner=note.owner,
+                node_type="note",
+                data__note_id__in=list(referenced_ids),
+            ).values_list("id", flat=True)
         )
+
+    existing_links = GraphLink.objects.filter(
+        owner=note.owner,
+        source=note_node,
+        link_type="reference",
     )
+    existing_target_ids = set(existing_links.values_list("target_id", flat=True))
 
     # Remove links for notes that are no longer referenced
-    existing_target_ids = {link.target_id for link in existing_links}
-    new_target_ids = {node.id for node in referenced_nodes}
-
-    for link in existing_links:
-        if link.target_id not in new_target_ids:
-            link.delete()
+    existing_links.exclude(target_id__in=new_target_ids).delete()
 
     # Create links for new references
-    for ref_node in referenced_nodes:
-        if ref_node.id not in existing_target_ids:
-            GraphLink.objects.create(
+    GraphLink.objects.bulk_create(
+        [
+            GraphLink(
                 owner=note.owner,
                 source=note_node,
-                target=ref_node,
+                target_id=target_id,
                 link_type="reference",
             )
+            for target_id in new_target_ids - existing_target_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _changed_notes(instance, reverse, pk_set) -> list[Note]:
+    """Notes whose tag set changed (tag.notes.add() passes the tag as instance)."""
+    if not reverse:
+        return [instance]
+    return list(Note.objects.filter(pk__in=pk_set or ()))
 
 
 @receiver(m2m_changed, sender=Note.tags.through)
-def note_tags_changed(sender, instance, action, **kwargs):
+def note_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
     """Handle many-to-many changes on note tags."""
-    if action in ("post_add", "post_remove", "post_clear"):
-        _sync_note_tags_links(instance)
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    notes = _changed_notes(instance, reverse, pk_set)
+    for note in notes:
+        _sync_note_tags_links(note)
+    # Bump updated_at so incremental exports pick up the new tag set
+    Note.objects.filter(pk__in=[note.pk for note in notes]).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=Note)
+def remember_stored_content_size(sender, instance, **kwargs):
+    """Look up the stored content size when the note wasn't loaded with it."""
+    update_fields = kwargs.get("update_fields")
+    if (
+        instance.pk
+        and not hasattr(instance, "_loaded_content")
+        and (update_fields is None or "content" in update_fields)
+    ):
+        instance._stored_content_size = (
+            Note.objects.filter(pk=instance.pk)
+            .annotate(size=note_size_expression())
+            .values_list("size", flat=True)
+            .first()
+            or 0
+        )
+
+
+@receiver(post_save, sender=Note)
+def update_note_storage_usage(sender, instance, created, **kwargs):
+    """Count the note and track content size changes in the usage ledger."""
+    if created:
+        adjust_usage(
+            instance.owner_id, notes_count=1, notes_bytes=text_size(instance.content)
+        )
+        return
+
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "content" not in update_fields:
+        return
+    # Note.save() refreshes _loaded_content only after post_save has run
+    if hasattr(instance, "_loaded_content"):
+        previous = text_size(instance._loaded_content)
+    else:
+        previous = instance.__dict__.pop("_stored_content_size", None)
+        if previous is None:
+            return
+    adjust_usage(
+        instance.owner_id, notes_bytes=text_size(instance.content) - previous
+    )
+
+
+@receiver(post_delete, sender=Note)
+def release_note_storage_usage(sender, instance, **kwargs):
+    """Remove the note from the usage ledger."""
+    size = 0
+    if "content" not in instance.get_deferred_fields():
+        size = text_size(instance.content)
+    adjust_usage(instance.owner_id, notes_count=-1, notes_bytes=-size)
+
+
+@receiver(pre_delete, sender=Note)
+def invalidate_lists_with_note(sender, instance, **kwargs):
+    """Lists that included the note need a replacement neighbour."""
+    invalidate_similar_lists(instance.id)
+
+
+@receiver(post_delete, sender=Note)
+def refresh_similarities_after_delete(sender, instance, **kwargs):
+    enqueue_similarity_refresh(instance.owner_id)
@@ -0,0 +1,627 @@
+"""
+笔记相似度计算模块
+
+基于 TF-IDF 向量（稀疏矩阵）计算同一用户笔记之间的相似度：
+- 分词：英文/数字按单词切分，中日韩文字按相邻二元组（bigram）切分
+- 向量：使用特征哈希把词项映射到固定维度，避免维护全局词表
+- 检索：分批做稀疏矩阵乘法得到余弦相似度，取 top-k 近邻
+- 缓存：近邻结果持久化为 NoteSimilarity。笔记变化时该笔记及收录了它的笔记
+  标记为待更新，后台任务重建索引后重新计算这些笔记，并把变化笔记补进
+  应当收录它的其他笔记；请求中只使用已构建的索引，索引过期时返回已保存的结果
+"""
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from itertools import chain
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from .models import Note, NoteSimilarity, NoteVector
+
+
+# 特征哈希维度（2^20），冲突率足够低且矩阵列数固定
+HASH_DIMENSIONS = 1 << 20
+
+# 默认返回的近邻数量
+DEFAULT_TOP_K = 10
+
+# 低于该分数的近邻视为不相似
+MIN_SCORE = 0.05
+
+# 文档频率上限：出现在超过该比例笔记中的词项视为语料内停用词，
+# 这类词对区分度贡献极小，却会让稀疏矩阵乘积接近稠密
+MAX_DOC_FREQ = 0.05
+
+# 笔记数量达到该值后才启用文档频率上限，避免小语料误删有效词项
+MAX_DOC_FREQ_MIN_ROWS = 1000
+
+# 批量计算时每批处理的行数，控制稠密中间结果的内存占用
+BATCH_SIZE = 256
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+CJK_PATTERN = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+
+STOP_WORDS = frozenset(
+    [
+        "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from",
+        "has", "have", "in", "is", "it", "its", "of", "on", "or", "that", "the",
+        "this", "to", "was", "were", "will", "with",
+    ]
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    文本分词
+
+    英文与数字按单词切分（忽略停用词和单字符），
+    中日韩文字连续片段切分为重叠的二元组，单字片段保留原字。
+    """
+    if not text:
+        return []
+
+    text = text.lower()
+    tokens = [
+        word
+        for word in WORD_PATTERN.findall(CJK_PATTERN.sub(" ", text))
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+
+    return tokens
+
+
+def _hash_token(token: str) -> int:
+    """把词项映射为稳定的列下标（跨进程一致）"""
+    return zlib.crc32(token.encode("utf-8")) % HASH_DIMENSIONS
+
+
+def term_vector(text: str) -> tuple[list[int], list[int]]:
+    """
+    计算文本的词频向量
+
+    Returns:
+        (indices, counts) 两个等长列表，indices 升序排列
+    """
+    counts: dict[int, int] = {}
+    for token in tokenize(text):
+        index = _hash_token(token)
+        counts[index] = counts.get(index, 0) + 1
+
+    indices = sorted(counts)
+    return indices, [counts[index] for index in indices]
+
+
+def update_note_vector(note: Note) -> bool:
+    """
+    增量更新单条笔记的词频向量
+
+    仅当词频发生变化时写库，清理该笔记相关的相似度结果并提交后台刷新。
+
+    Returns:
+        向量是否发生变化
+    """
+    from .tasks import enqueue_similarity_refresh
+
+    indices, counts = term_vector(note.plain_text)
+
+    vector = NoteVector.objects.filter(note_id=note.id).first()
+    if vector and vector.indices == indices and vector.counts == counts:
+        return False
+
+    with transaction.atomic():
+        NoteVector.objects.update_or_create(
+            note_id=note.id,
+            defaults={
+                "owner_id": note.owner_id,
+                "indices": indices,
+                "counts": counts,
+                "neighbors_stale": True,
+            },
+        )
+        NoteSimilarity.objects.filter(note_id=note.id).delete()
+        invalidate_similar_lists(note.id)
+
+    enqueue_similarity_refresh(note.owner_id)
+    return True
+
+
+def invalidate_similar_lists(note_id: int) -> None:
+    """
+    把收录了该笔记的其他笔记标记为待更新，并删除指向它的过期记录
+
+    其余记录保留，后台刷新完成前仍可返回。
+    """
+    listed = NoteSimilarity.objects.filter(similar_id=note_id)
+    NoteVector.objects.filter(note_id__in=listed.values("note_id")).update(
+        neighbors_stale=True
+    )
+    listed.delete()
+
+
+class SimilarityIndex:
+    """
+    单个用户的 TF-IDF 相似度索引
+
+    行为 L2 归一化后的 TF-IDF 向量，行与行的点积即余弦相似度。
+    """
+
+    def __init__(self, note_ids: list[int], rows: list[tuple[list[int], list[int]]]):
+        # 构建时向量的最近更新时间，之后更新的向量不在索引中
+        self.latest = None
+        self.note_ids = np.asarray(note_ids, dtype=np.int64)
+        self.positions = {note_id: i for i, note_id in enumerate(note_ids)}
+        self.idf = np.zeros(HASH_DIMENSIONS, dtype=np.float32)
+        self.matrix = self._build_matrix(rows)
+        self._transposed = self.matrix.T.tocsr()
+
+    @classmethod
+    def for_user(cls, user_id: int) -> "SimilarityIndex":
+        """从 NoteVector 表构建用户索引"""
+        note_ids = []
+        rows = []
+        vectors = (
+            NoteVector.objects.filter(owner_id=user_id)
+            .order_by("note_id")
+            .values_list("note_id", "indices", "counts")
+        )
+        for note_id, indices, counts in vectors.iterator(chunk_size=2000):
+            note_ids.append(note_id)
+            rows.append((indices, counts))
+        return cls(note_ids, rows)
+
+    def __len__(self):
+        return len(self.note_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """索引占用的内存（字节，估算值），用于限制进程内缓存大小"""
+        total = self.note_ids.nbytes + self.idf.nbytes
+        for matrix in (self.matrix, self._transposed):
+            total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        # 字典每项约 100 字节
+        return total + 100 * len(self.positions)
+
+    def _build_matrix(self, rows) -> sparse.csr_matrix:
+        n_rows = len(rows)
+        if n_rows == 0:
+            return sparse.csr_matrix((0, HASH_DIMENSIONS), dtype=np.float32)
+
+        lengths = np.fromiter((len(indices) for indices, _ in rows), np.int64, n_rows)
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        total = int(indptr[-1])
+        indices = np.fromiter(
+            chain.from_iterable(indices for indices, _ in rows), np.int64, total
+        )
+        counts = np.fromiter(
+            chain.from_iterable(counts for _, counts in rows), np.float32, total
+        )
+
+        # 次线性词频
+        data = 1.0 + np.log(counts, dtype=np.float32)
+
+        # 平滑 IDF：每个词项出现在多少篇笔记中
+        doc_freq = np.bincount(indices, minlength=HASH_DIMENSIONS)
+        idf = np.log((1.0 + n_rows) / (1.0 + doc_freq)).astype(np.float32) + 1.0
+        if n_rows >= MAX_DOC_FREQ_MIN_ROWS:
+            idf[doc_freq > MAX_DOC_FREQ * n_rows] = 0.0
+        self.idf = idf
+        return self._weigh(data, indices, indptr, n_rows)
+
+    def _weigh(self, data, indices, indptr, n_rows: int) -> sparse.csr_matrix:
+        """乘以 IDF 并做行 L2 归一化"""
+        data *= self.idf[indices]
+        matrix = sparse.csr_matrix(
+            (data, indices, indptr), shape=(n_rows, HASH_DIMENSIONS), dtype=np.float32
+        )
+        matrix.eliminate_zeros()
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix, dtype=np.float32)
+
+    def _top_k_for_rows(self, positions, k: int, min_score: float):
+        """计算指定行的 top-k 近邻"""
+        positions = np.asarray(positions, dtype=np.int64)
+        scores = (self.matrix[positions] @ self._transposed).tocsr()
+        return self._select(scores, positions, k, min_score)
+
+    def _select(self, scores, excluded, k: int, min_score: float):
+        """从每行得分中选出 top-k，excluded 为每行需排除的列（自身，-1 表示无）"""
+        results = []
+        for row in range(scores.shape[0]):
+            begin, end = scores.indptr[row], scores.indptr[row + 1]
+            columns = scores.indices[begin:end]
+            values = scores.data[begin:end]
+
+            # 排除自身与低分项
+            mask = (columns != excluded[row]) & (values >= min_score)
+            columns, values = columns[mask], values[mask]
+
+            if len(values) > k:
+                top = np.argpartition(-values, k - 1)[:k]
+                columns, values = columns[top], values[top]
+
+            order = np.argsort(-values, kind="stable")
+            results.append(
+                [(int(self.note_ids[columns[i]]), float(values[i])) for i in order]
+            )
+        return results
+
+    def neighbors(
+        self, note_id: int, k: int = DEFAULT_TOP_K, min_score: float = MIN_SCORE
+    ) -> list[tuple[int, float]]:
+        """获取单条笔记的 top-k 近邻 [(note_id, score), ...]"""
+        position = self.positions.get(note_id)
+        if position is None:
+            return []
+        return self._top_k_for_rows([position], k, min_score)[0]
+
+    def query(
+        self,
+        indices: list[int],
+        counts: list[int],
+        k: int = DEFAULT_TOP_K,
+        min_score: float = MIN_SCORE,
+    ) -> list[tuple[int, float]]:
+        """获取不在索引中的词频向量的 top-k 近邻，沿用索引的 IDF"""
+        if not indices or not len(self.note_ids):
+            return []
+        indices = np.asarray(indices, dtype=np.int64)
+        data = 1.0 + np.log(np.asarray(counts, dtype=np.float32))
+        indptr = np.array([0, len(indices)], dtype=np.int64)
+        row = self._weigh(data, indices, indptr, 1)
+        scores = (row @ self._transposed).tocsr()
+        return self._select(scores, [-1], k, min_score)[0]
+
+    def neighbors_for(
+        self,
+        note_ids,
+        k: int = DEFAULT_TOP_K,
+        min_score: float = MIN_SCORE,
+        batch_size: int = BATCH_SIZE,
+    ) -> dict[int, list[tuple[int, float]]]:
+        """分批计算多条笔记的 top-k 近邻，不在索引中的笔记被忽略"""
+        positions = sorted(
+            self.positions[note_id] for note_id in note_ids if note_id in self.positions
+        )
+        results = {}
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start : start + batch_size]
+            for position, neighbors in zip(
+                batch, self._top_k_for_rows(batch, k, min_score)
+            ):
+                results[int(self.note_ids[position])] = neighbors
+        return results
+
+    def all_neighbors(
+        self,
+        k: int = DEFAULT_TOP_K,
+        min_score: float = MIN_SCORE,
+        batch_size: int = BATCH_SIZE,
+    ):
+        """
+        分批计算所有笔记的 top-k 近邻
+
+        Yields:
+            (note_id, [(similar_id, score), ...])
+        """
+        for start in range(0, len(self.note_ids), batch_size):
+            stop = min(start + batch_size, len(self.note_ids))
+            for offset, neighbors in enumerate(
+                self._top_k_for_rows(np.arange(start, stop), k, min_score)
+            ):
+                yield int(self.note_ids[start + offset]), neighbors
+
+
+# 按最近使用排序，总大小超过 NOTE_SIMILARITY_INDEX_CACHE_BYTES 时淘汰最久未用的索引
+_index_cache: OrderedDict[int, tuple[tuple, SimilarityIndex]] = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def _index_stamp(user_id: int) -> tuple:
+    """以向量数量和最近更新时间作为索引版本戳"""
+    return tuple(
+        NoteVector.objects.filter(owner_id=user_id)
+        .aggregate(count=Count("note_id"), latest=Max("updated_at"))
+        .values()
+    )
+
+
+def get_user_index(user_id: int) -> SimilarityIndex | None:
+    """
+    获取与当前向量一致的用户索引（进程内缓存）
+
+    索引不存在或已过期时返回 None，不在调用方线程中重建。
+    """
+    stamp = _index_stamp(user_id)
+    with _index_lock:
+        cached = _index_cache.get(user_id)
+        if cached:
+            _index_cache.move_to_end(user_id)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    return None
+
+
+def build_user_index(user_id: int) -> SimilarityIndex:
+    """重建用户索引并放入进程内缓存"""
+    stamp = _index_stamp(user_id)
+    index = SimilarityIndex.for_user(user_id)
+    index.latest = stamp[1]
+    with _index_lock:
+        _index_cache[user_id] = (stamp, index)
+        _index_cache.move_to_end(user_id)
+        _evict_indexes()
+    return index
+
+
+def _evict_indexes() -> None:
+    """淘汰最久未用的索引直到总大小不超过上限（调用方持有 _index_lock）"""
+    budget = settings.NOTE_SIMILARITY_INDEX_CACHE_BYTES
+    total = sum(index.nbytes for _, index in _index_cache.values())
+    while total > budget and _index_cache:
+        _, (_, index) = _index_cache.popitem(last=False)
+        total -= index.nbytes
+
+
+def _stored_similarities(note: Note, k: int) -> list[NoteSimilarity]:
+    return list(
+        NoteSimilarity.objects.filter(note=note)
+        .select_related("similar")
+        .order_by("-score")[:k]
+    )
+
+
+def _save_neighbors(
+    index: SimilarityIndex, results: dict[int, list[tuple[int, float]]], k: int
+) -> None:
+    """
+    替换这些笔记的相似度记录，并记录已保存的近邻数
+
+    索引构建后又变化的笔记保持待更新，由下一次刷新重新计算。
+    """
+    vectors = NoteVector.objects.filter(note_id__in=list(results))
+    if index.latest is not None:
+        vectors = vectors.filter(updated_at__lte=index.latest)
+    with transaction.atomic():
+        NoteSimilarity.objects.filter(note_id__in=list(results)).delete()
+        NoteSimilarity.objects.bulk_create(
+            [
+                NoteSimilarity(note_id=note_id, similar_id=similar_id, score=score)
+                for note_id, neighbors in results.items()
+                for similar_id, score in neighbors
+            ],
+            batch_size=2000,
+            ignore_conflicts=True,
+        )
+        vectors.update(neighbors_k=k, neighbors_stale=False)
+
+
+def get_similar_notes(note: Note, k: int = DEFAULT_TOP_K) -> list[NoteSimilarity]:
+    """
+    获取相似笔记
+
+    已保存的结果足够 k 条且未过期时直接读取；否则在索引有效时即时计算
+    单条笔记并持久化，索引过期时提交后台刷新并返回已保存的结果。
+    笔记尚无向量（如批量导入）时不在请求中写入向量：在内存中计算并查询索引，
+    返回未保存的结果，向量由后台刷新补齐。
+    """
+    from .tasks import enqueue_similarity_refresh
+
+    vector = (
+        NoteVector.objects.filter(note_id=note.id)
+        .only("neighbors_k", "neighbors_stale")
+        .first()
+    )
+    if vector is None:
+        enqueue_similarity_refresh(note.owner_id)
+        return _unsaved_similarities(note, k)
+    if not vector.neighbors_stale and vector.neighbors_k >= k:
+        return _stored_similarities(note, k)
+
+    index = get_user_index(note.owner_id)
+    if index is None:
+        enqueue_similarity_refresh(note.owner_id)
+        return _stored_similarities(note, k)
+
+    _save_neighbors(index, {note.id: index.neighbors(note.id, k)}, k)
+    return _stored_similarities(note, k)
+
+
+def _unsaved_similarities(note: Note, k: int) -> list[NoteSimilarity]:
+    """用内存中的向量查询当前索引，索引过期时返回空列表"""
+    index = get_user_index(note.owner_id)
+    if index is None:
+        return []
+    neighbors = index.query(*term_vector(note.plain_text), k=k)
+    notes = Note.objects.in_bulk([similar_id for similar_id, _ in neighbors])
+    return [
+        NoteSimilarity(note=note, similar=notes[similar_id], score=score)
+        for similar_id, score in neighbors
+        if similar_id in notes
+    ]
+
+
+def create_missing_vectors(user_id: int) -> int:
+    """
+    批量补齐用户缺失的词频向量（如批量导入绕过了保存信号的笔记）
+
+    新向量标记为待更新，由调用方随后重建索引并计算近邻。
+
+    Returns:
+        新建的向量数量
+    """
+    missing = Note.objects.filter(owner_id=user_id, vector__isnull=True).only(
+        "id", "owner_id", "plain_text"
+    )
+    created = 0
+    batch = []
+    for note in missing.iterator(chunk_size=500):
+        indices, counts = term_vector(note.plain_text)
+        batch.append(
+            NoteVector(
+                note_id=note.id,
+                owner_id=note.owner_id,
+                indices=indices,
+                counts=counts,
+                neighbors_stale=True,
+            )
+        )
+        if len(batch) >= 500:
+            created += len(
+                NoteVector.objects.bulk_create(batch, ignore_conflicts=True)
+            )
+            batch = []
+    if batch:
+        created += len(NoteVector.objects.bulk_create(batch, ignore_conflicts=True))
+    return created
+
+
+def refresh_user_similarities(user_id: int) -> int:
+    """
+    后台刷新：补齐缺失的向量，重建用户索引并重新计算待更新笔记的相似笔记
+
+    变化的笔记可能应当进入其他笔记的近邻列表：余弦相似度对称，
+    对其近邻中列表未满或最低分低于该分数的笔记一并重新计算。
+
+    Returns:
+        重新计算的笔记数量
+    """
+    create_missing_vectors(user_id)
+    index = build_user_index(user_id)
+    stale = dict(
+        NoteVector.objects.filter(owner_id=user_id, neighbors_stale=True).values_list(
+            "note_id", "neighbors_k"
+        )
+    )
+    if not stale:
+        return 0
+
+    k = max(DEFAULT_TOP_K, *stale.values())
+    results = index.neighbors_for(stale, k)
+    _save_neighbors(index, results, k)
+
+    best = {}
+    for neighbors in results.values():
+        for similar_id, score in neighbors:
+            if similar_id not in stale:
+                best[similar_id] = max(score, best.get(similar_id, 0.0))
+    lists = (
+        NoteVector.objects.filter(note_id__in=list(best), neighbors_k__gt=0)
+        .annotate(stored=Count("note__similarities"))
+        .annotate(lowest=Min("note__similarities__score"))
+        .values_list("note_id", "neighbors_k", "stored", "lowest")
+    )
+    outdated = {}
+    for note_id, depth, stored, lowest in lists:
+        if stored < depth or lowest is None or lowest < best[note_id]:
+            outdated.setdefault(depth, []).append(note_id)
+    for depth, note_ids in outdated.items():
+        _save_neighbors(index, index.neighbors_for(note_ids, depth), depth)
+
+    return len(results) + sum(len(note_ids) for note_ids in outdated.values())
+
+
+def rebuild_user_similarities(
+    user_id: int,
+    k: int = DEFAULT_TOP_K,
+    emit_graph_links: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    批量重建用户的全部相似度结果
+
+    Args:
+        user_id: 用户 ID
+        k: 每条笔记保留的近邻数量
+        emit_graph_links: 是否同步写入 "similar" 类型的图谱链接
+        batch_size: 每批矩阵乘法处理的行数
+
+    Returns:
+        写入的相似度记录数量
+    """
+    create_missing_vectors(user_id)
+    index = build_user_index(user_id)
+    pairs = []
+    for note_id, neighbors in index.all_neighbors(k, batch_size=batch_size):
+        pairs.extend(
+            NoteSimilarity(note_id=note_id, similar_id=similar_id, score=score)
+            for similar_id, score in neighbors
+        )
+
+    with transaction.atomic():
+        NoteSimilarity.objects.filter(note__owner_id=user_id).delete()
+        NoteSimilarity.objects.bulk_create(pairs, batch_size=2000)
+        NoteVector.objects.filter(owner_id=user_id).update(
+            neighbors_k=k, neighbors_stale=False
+        )
+
+    if emit_graph_links:
+        emit_similar_links(user_id, [(p.note_id, p.similar_id) for p in pairs])
+
+    return len(pairs)
+
+
+def emit_similar_links(user_id: int, pairs: list[tuple[int, int]]) -> int:
+    """
+    把相似笔记对写入图谱（link_type="similar"）
+
+    已存在任意类型链接的节点对会被跳过，避免覆盖引用等更强的关系。
+
+    Returns:
+        新建的链接数量
+    """
+    from apps.graph.models import GraphLink, GraphNode
+
+    nodes = GraphNode.objects.filter(owner_id=user_id, node_type="note").values_list(
+        "id", "data"
+    )
+    node_by_note = {
+        int(data["note_id"]): node_id
+        for node_id, data in nodes
+        if isinstance(data, dict) and data.get("note_id") is not None
+    }
+
+    GraphLink.objects.filter(owner_id=user_id, link_type="similar").delete()
+    existing = set(
+        GraphLink.objects.filter(owner_id=user_id).values_list("source_id", "target_id")
+    )
+
+    links = []
+    seen = set()
+    for note_id, similar_id in pairs:
+        source = node_by_note.get(note_id)
+        target = node_by_note.get(similar_id)
+        if source is None or target is None:
+            continue
+        key = (min(source, target), max(source, target))
+        if key in seen or (source, target) in existing or (target, source) in existing:
+            continue
+        seen.add(key)
+        links.append(
+            GraphLink(
+                owner_id=user_id,
+                source_id=key[0],
+                target_id=key[1],
+                link_type="similar",
+            )
+        )
+
+    GraphLink.objects.bulk_create(links, batch_size=2000, ignore_conflicts=True)
+    return len(links)
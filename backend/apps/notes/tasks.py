@@ -0,0 +1,73 @@
+"""
+笔记后台任务模块
+
+笔记内容变化后，用户的相似度索引（TF-IDF 稀疏矩阵）在请求结束后由进程内
+单线程执行器重建，并重新计算受影响笔记的相似笔记；相似笔记接口不在请求中
+重建索引。同一用户已排队的刷新任务不会重复提交。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# 已排队、尚未开始执行的用户
+_pending: set[int] = set()
+_pending_lock = threading.Lock()
+
+
+def get_similarity_executor() -> ThreadPoolExecutor:
+    """获取进程内共享的相似度执行器（单线程，避免同时构建多个大矩阵）"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="note-similarity"
+                )
+    return _executor
+
+
+def _run(user_id) -> None:
+    from .similarity import refresh_user_similarities
+
+    with _pending_lock:
+        _pending.discard(user_id)
+    close_old_connections()
+    try:
+        refresh_user_similarities(user_id)
+    except Exception:
+        logger.exception("相似度刷新任务执行失败: %s", user_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(user_id) -> None:
+    with _pending_lock:
+        if user_id in _pending:
+            return
+        _pending.add(user_id)
+    get_similarity_executor().submit(_run, user_id)
+
+
+def enqueue_similarity_refresh(user_id) -> None:
+    """
+    提交相似度刷新任务
+
+    NOTE_SIMILARITY_EAGER 为真时在当前线程同步执行（测试/本地调试），
+    否则在事务提交后交给后台执行器。
+    """
+    from .similarity import refresh_user_similarities
+
+    if settings.NOTE_SIMILARITY_EAGER:
+        refresh_user_similarities(user_id)
+        return
+
+    transaction.on_commit(lambda: _submit(user_id))
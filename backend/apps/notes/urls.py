@@ -14,6 +14,8 @@ API Endpoints:
 - GET    /api/notes/recent/         - 最近笔记
 - GET    /api/notes/archived/       - 已归档笔记
 - GET    /api/notes/{id}/content/   - 获取笔记内容
+- GET    /api/notes/{id}/similar/   - 相似笔记
+- GET    /api/notes/{id}/backlinks/ - 反向链接
 """
 
 from django.urls import path, include
@@ -4,7 +4,6 @@
 Markdown 编辑器内容管理
 """
 
-import re
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -12,7 +11,8 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from django.utils import timezone
 
-from .models import Note
+from .models import Note, NoteReference
+from .similarity import get_similar_notes
 from .serializers import (
     NoteSerializer,
     NoteListSerializer,
@@ -22,28 +22,7 @@ from .serializers import (
 from utils.permissions import IsOwnerOrReadOnly
 from utils.pagination import NotePagination
 from apps.graph.models import GraphNode, GraphLink
-
-
-def extract_note_links(content):
-    """
-    从 Markdown 内容中提取笔记链接
-    返回链接到的笔记 ID 列表
-    """
-    if not content:
-        return []
-
-    # 匹配 [Note Title](/notes/{id}) 格式
-    pattern = r"\[([^\]]+)\]\(/notes/(\d+)\)"
-    matches = re.findall(pattern, content)
-
-    note_ids = []
-    for title, note_id in matches:
-        try:
-            note_ids.append(int(note_id))
-        except ValueError:
-            continue
-
-    return note_ids
+from apps.dedupe.services import find_duplicates
 
 
 class NoteViewSet(viewsets.ModelViewSet):
@@ -60,6 +39,8 @@ class NoteViewSet(viewsets.ModelViewSet):
     - POST /api/notes/{id}/unarchive/ - 取消归档
     - GET /api/notes/search/ - 搜索笔记
     - GET /api/notes/recent/ - 最近笔记
+    - GET /api/notes/{id}/similar/ - 相似笔记
+    - GET /api/notes/{id}/backlinks/ - 反向链接
     """
 
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
@@ -126,26 +107,19 @@ class NoteViewSet(viewsets.ModelViewSet):
         self._update_related_notes(note)
 
     def _update_related_notes(self, note):
-        """从笔记内容中提取链接并更新关联关系"""
-        content = note.content
-        if not content:
+        """根据出链索引（保存时由信号维护）更新关联关系"""
+        if not note.content:
             # 清空关联时也需要清理图谱数据
             self._sync_graph_data(note, [])
             return
 
-        # 提取内容中的笔记链接
-        linked_note_ids = extract_note_links(content)
-
-        # 获取用户的所有笔记
-        user_notes = Note.objects.filter(owner=note.owner)
-
-        # 过滤出有效的笔记 ID
+        # 出链索引中的目标已校验过归属且不含自身
         valid_note_ids = list(
-            user_notes.filter(id__in=linked_note_ids).values_list("id", flat=True)
+            note.outgoing_references.values_list("target_id", flat=True).distinct()
         )
 
-        # 移除指向自己的链接
-        valid_note_ids = [id for id in valid_note_ids if id != note.id]
+        # 获取用户的所有笔记
+        user_notes = Note.objects.filter(owner=note.owner)
 
         # 更新关联关系
         note.related_notes.set(valid_note_ids)
@@ -250,14 +224,18 @@ class NoteViewSet(viewsets.ModelViewSet):
         note = Note.objects.get(id=serializer.instance.id)
         response_serializer = NoteSerializer(note)
 
-        return Response(
-            {
-                "code": 200,
-                "message": "创建成功",
-                "data": response_serializer.data,
-            },
-            status=status.HTTP_201_CREATED,
-        )
+        payload = {
+            "code": 200,
+            "message": "创建成功",
+            "data": response_serializer.data,
+        }
+
+        # 近似重复提示（不阻止创建）
+        duplicates = find_duplicates(request.user.id, "note", note.id)
+        if duplicates:
+            payload["duplicates"] = duplicates
+
+        return Response(payload, status=status.HTTP_201_CREATED)
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -551,6 +529,70 @@ class NoteViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(detail=True, methods=["get"])
+    def similar(self, request, id=None):
+        """
+        获取相似笔记（基于 TF-IDF 余弦相似度）
+
+        GET /api/notes/{id}/similar/?limit=10
+        """
+        note = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except (ValueError, TypeError):
+            limit = 10
+
+        similarities = get_similar_notes(note, k=limit)
+        data = [
+            {
+                "id": item.similar_id,
+                "title": item.similar.title,
+                "slug": item.similar.slug,
+                "score": round(item.score, 4),
+            }
+            for item in similarities
+        ]
+        return Response(
+            {
+                "code": 200,
+                "message": "获取成功",
+                "data": data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["get"])
+    def backlinks(self, request, id=None):
+        """
+        获取反向链接（引用了当前笔记的笔记）
+
+        GET /api/notes/{id}/backlinks/
+        """
+        note = self.get_object()
+        references = (
+            NoteReference.objects.filter(target=note)
+            .select_related("source")
+            .order_by("-source__updated_at", "id")
+        )
+        data = [
+            {
+                "id": reference.source_id,
+                "title": reference.source.title,
+                "slug": reference.source.slug,
+                "anchor_text": reference.anchor_text,
+                "syntax": reference.syntax,
+            }
+            for reference in references
+        ]
+        return Response(
+            {
+                "code": 200,
+                "message": "获取成功",
+                "data": data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["post"], url_path="increment-view")
     def increment_view(self, request, id=None):
         """
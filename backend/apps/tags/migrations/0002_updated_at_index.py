@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['owner', 'updated_at'], name='tags_tag_owner_i_a11dfd_idx'),
+        ),
+    ]
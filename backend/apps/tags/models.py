@@ -57,6 +57,9 @@ class Tag(models.Model):
         verbose_name = "标签"
         verbose_name_plural = "标签"
         ordering = ["-usage_count", "name"]
+        indexes = [
+            models.Index(fields=["owner", "updated_at"]),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["slug", "owner"],
@@ -4,7 +4,7 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import AccountPurge, User
 
 
 @admin.register(User)
@@ -65,3 +65,39 @@ class UserAdmin(BaseUserAdmin):
             },
         ),
     )
+
+
+@admin.register(AccountPurge)
+class AccountPurgeAdmin(admin.ModelAdmin):
+    """
+    账号清除管理后台（只读，进度由后台任务写入）
+    """
+
+    list_display = [
+        "id",
+        "username",
+        "user_id",
+        "status",
+        "stage",
+        "deleted_files",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status"]
+    search_fields = ["username"]
+    ordering = ["-created_at"]
+    readonly_fields = [
+        "user_id",
+        "username",
+        "status",
+        "stage",
+        "deleted_rows",
+        "deleted_files",
+        "error",
+        "created_at",
+        "started_at",
+        "finished_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
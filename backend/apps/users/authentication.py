@@ -0,0 +1,186 @@
+"""
+JWT 认证（带用户缓存）
+
+simplejwt 的 JWTAuthentication 每个请求都按主键查询一次用户，
+不少接口随后还会访问 user.profile。CachedJWTAuthentication 把用户与偏好设置
+的常用字段缓存起来，命中时认证不查询数据库：
+- 缓存键由用户 ID 与该用户的版本号组成；版本号本身也存放在缓存中，
+  用户或资料保存、删除、修改密码、登出时递增版本号，旧记录随之失效
+- 只缓存 USER_FIELDS / PROFILE_FIELDS，其余字段以延迟字段的形式留空，
+  访问时由 Django 按需查询；保存时也只写入已加载的字段
+- 版本号丢失（缓存淘汰或重启）时以当前时间重新初始化，不会读到更早的记录
+
+版本号只在处理写请求的进程所见的缓存中递增，因此只有 AUTH_USER_CACHE_ALIAS
+指向多进程共享的缓存（如 Redis）时才启用缓存；未配置或指向进程内缓存
+（LocMemCache / DummyCache）时按 simplejwt 原有方式每次查询数据库，
+单进程部署可用 AUTH_USER_CACHE_ALLOW_LOCAL 显式允许进程内缓存。
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Profile, User
+
+# 缓存的用户字段（认证、权限判断与用户信息接口用到的字段）
+USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "avatar",
+    "avatar_url",
+    "bio",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "last_login",
+    "created_at",
+    "updated_at",
+)
+
+# 缓存的资料字段（偏好设置）；统计计数变化频繁，不缓存
+PROFILE_FIELDS = ("id", "user_id", "theme", "language", "timezone")
+
+
+def _in_model_order(model, names) -> tuple:
+    """Model.from_db 按模型字段顺序对应取值，字段名需按同样顺序排列"""
+    return tuple(
+        field.attname for field in model._meta.concrete_fields if field.attname in names
+    )
+
+
+def _user_fields() -> tuple:
+    return _in_model_order(User, USER_FIELDS)
+
+
+def _profile_fields() -> tuple:
+    return _in_model_order(Profile, PROFILE_FIELDS)
+
+
+# 只在当前进程内可见的缓存后端，其他进程看不到版本号的变化
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+def _cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_cache_enabled() -> bool:
+    """是否配置了可用于用户缓存的共享缓存"""
+    if not settings.AUTH_USER_CACHE_ALIAS:
+        return False
+    if settings.AUTH_USER_CACHE_ALLOW_LOCAL:
+        return True
+    return not isinstance(_cache(), LOCAL_CACHE_BACKENDS)
+
+
+def _version_key(user_id) -> str:
+    return f"auth:user-version:{user_id}"
+
+
+def _record_key(user_id, version) -> str:
+    return f"auth:user:{user_id}:{version}"
+
+
+def get_token_version(user_id) -> int:
+    """当前版本号；不存在时以当前时间初始化"""
+    cache = _cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cached_user(user_id) -> None:
+    """递增版本号，使该用户已缓存的记录失效"""
+    if not user_cache_enabled():
+        return
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def _load_record(user_id):
+    """从数据库读取缓存记录；用户不存在时返回 None"""
+    user = User.objects.filter(pk=user_id).values_list(*_user_fields()).first()
+    if user is None:
+        return None
+    profile = Profile.objects.filter(user_id=user_id)
+    profile = profile.values_list(*_profile_fields())
+    return {"user": user, "profile": profile.first()}
+
+
+def _build_user(record) -> User:
+    """由缓存记录构造用户实例（未缓存的字段为延迟字段）"""
+    user = User.from_db("default", _user_fields(), record["user"])
+    profile = None
+    if record["profile"] is not None:
+        profile = Profile.from_db("default", _profile_fields(), record["profile"])
+        profile.user = user
+    # 预置反向一对一缓存：访问 user.profile 不再查询，没有资料时照常抛出异常
+    Profile.user.field.remote_field.set_cached_value(user, profile)
+    return user
+
+
+def get_cached_user(user_id):
+    """按用户 ID 读取（必要时填充）缓存并构造用户；用户不存在时返回 None"""
+    cache = _cache()
+    key = _record_key(user_id, get_token_version(user_id))
+    record = cache.get(key)
+    if record is None:
+        record = _load_record(user_id)
+        if record is None:
+            return None
+        cache.set(key, record, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+    return _build_user(record)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    带用户缓存的 JWT 认证
+
+    可直接替换 REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"] 中的
+    rest_framework_simplejwt.authentication.JWTAuthentication，
+    校验逻辑与其 get_user 相同；未启用用户缓存时直接使用父类实现。
+    """
+
+    def get_user(self, validated_token):
+        if not user_cache_enabled():
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # 密码哈希不缓存，开启该检查时会按需读取一次
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,420 @@
+"""
+增量备份与恢复模块
+
+增量导出（导出接口的 since 参数）：
+- 各表按 (owner, updated_at) 索引做范围扫描，只输出水位之后新建或修改的行
+- 删除由 Tombstone 记录，增量导出一并输出，恢复时据此删除
+- 文件头的 watermark 是本次导出开始的时间，作为下一次增量导出的 since；
+  查询时 since 再回退 WATERMARK_OVERLAP，覆盖导出开始时尚未提交的写入
+  （恢复按 ID 覆盖写入，重复输出无害）
+
+恢复（restore_export 命令）：按顺序应用一次全量导出及其后的增量导出链，
+按原 ID 覆盖写入，用于同一实例的灾难恢复或整库迁移。
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import Counter
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .authentication import invalidate_cached_user
+from .models import Profile, Tombstone, User
+
+logger = logging.getLogger(__name__)
+
+# 记录删除的模型（记录类型 -> 模型标签），按恢复时的依赖顺序排列
+TOMBSTONE_MODELS = {
+    "category": "categories.Category",
+    "tag": "tags.Tag",
+    "note": "notes.Note",
+    "collection": "collections.Collection",
+    "attachment": "attachments.Attachment",
+}
+
+# 增量导出时 since 向前回退的时长
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# JSON 导出中的数组键 -> 记录类型
+JSON_SECTIONS = {
+    "categories": "category",
+    "tags": "tag",
+    "notes": "note",
+    "collections": "collection",
+    "attachments": "attachment",
+    "deleted": "tombstone",
+}
+
+
+class RestoreError(Exception):
+    """导出文件无法恢复（格式错误、增量链不连续或 ID 冲突）"""
+
+
+def deleted_with_owner(origin) -> bool:
+    """删除是否由删除用户本身级联触发（此时不记录删除）"""
+    if isinstance(origin, QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+
+def record_deletions(object_type: str, rows) -> None:
+    """
+    记录删除
+
+    Args:
+        object_type: 记录类型（TOMBSTONE_MODELS 的键）
+        rows: [(所属用户 ID, 对象 ID)]
+    """
+    now = timezone.now()
+    Tombstone.objects.bulk_create(
+        [
+            Tombstone(
+                owner_id=owner_id,
+                object_type=object_type,
+                object_id=object_id,
+                deleted_at=now,
+            )
+            for owner_id, object_id in rows
+        ]
+    )
+
+
+def tombstone_cutoff(now=None):
+    """早于该时间的删除记录会被清理"""
+    now = now or timezone.now()
+    return now - timedelta(days=settings.EXPORT_TOMBSTONE_RETENTION_DAYS)
+
+
+def expire_tombstones(now=None) -> int:
+    """删除超过保留期的删除记录，返回删除条数"""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=tombstone_cutoff(now)).delete()
+    return deleted
+
+
+def changed_since(queryset, since, field: str = "updated_at"):
+    """只保留 since（回退 WATERMARK_OVERLAP）之后新建或修改的行"""
+    if since is None:
+        return queryset
+    return queryset.filter(**{f"{field}__gt": since - WATERMARK_OVERLAP})
+
+
+def parse_watermark(value) -> Optional[object]:
+    """解析文件头或请求参数中的时间，无法解析时抛出 ValueError"""
+    if value in (None, ""):
+        return None
+    parsed = parse_datetime(value) if isinstance(value, str) else value
+    if parsed is None:
+        raise ValueError(f"无效的时间: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _checked_record(data, where: str) -> dict:
+    if not isinstance(data, dict):
+        raise RestoreError(f"{where}: 记录数据不是对象")
+    return data
+
+
+class ExportReader:
+    """
+    读取导出文件（zip / ndjson / json）
+
+    zip 与 ndjson 逐行读取记录；json 为单个文档，需整体载入。
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.archive = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        try:
+            first = next(self._lines(), "")
+            document = json.loads(first) if first.strip() else {}
+        except (KeyError, ValueError):
+            self.close()
+            raise RestoreError(f"{self.path}: 不是有效的导出文件")
+
+        if not isinstance(document, dict):
+            self.close()
+            raise RestoreError(f"{self.path}: 不是有效的导出文件")
+        if document.get("type") == "header":
+            self.header, self._document = document["data"], None
+        else:
+            self.header, self._document = document, document
+        if self.header.get("format") != "knowledge-ai-export":
+            self.close()
+            raise RestoreError(f"{self.path}: 不是有效的导出文件")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        if self.archive is not None:
+            self.archive.close()
+
+    def _lines(self):
+        if self.archive is not None:
+            with self.archive.open("export.ndjson") as raw:
+                yield from io.TextIOWrapper(raw, encoding="utf-8")
+        else:
+            with open(self.path, encoding="utf-8") as f:
+                yield from f
+
+    def records(self):
+        """
+        逐条产出 (记录类型, 数据)，不含文件头
+
+        Raises:
+            RestoreError: 记录不是有效的 JSON 对象
+        """
+        if self._document is not None:
+            for key, record_type in JSON_SECTIONS.items():
+                rows = self._document.get(key, [])
+                if not isinstance(rows, list):
+                    raise RestoreError(f"{self.path}: {key} 不是记录列表")
+                for data in rows:
+                    yield record_type, _checked_record(data, key)
+            return
+
+        lines = self._lines()
+        next(lines, None)
+        for number, line in enumerate(lines, start=2):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                record_type, data = record["type"], record["data"]
+            except (KeyError, TypeError, ValueError):
+                raise RestoreError(f"{self.path}: 第 {number} 行不是有效的记录")
+            yield record_type, _checked_record(data, f"第 {number} 行")
+
+    def open_file(self, archive_path: str):
+        """打开压缩包中的附件文件；非压缩包或文件不存在时返回 None"""
+        if self.archive is None:
+            return None
+        try:
+            return self.archive.open(archive_path)
+        except KeyError:
+            return None
+
+
+def check_chain(headers: list[dict]) -> None:
+    """
+    检查导出链：第一个为全量导出，每个增量导出的起点不晚于上一个的水位，
+    且全部来自同一账号
+
+    Raises:
+        RestoreError: 导出链不可用
+    """
+    if not headers:
+        raise RestoreError("没有要恢复的导出文件")
+    if headers[0].get("since"):
+        raise RestoreError("导出链的第一个文件必须是全量导出")
+
+    user_id = headers[0]["user"]["id"]
+    for previous, current in zip(headers, headers[1:]):
+        if current["user"]["id"] != user_id:
+            raise RestoreError("导出链中的文件来自不同账号")
+        since = parse_watermark(current.get("since"))
+        if since is not None and since > parse_watermark(previous["watermark"]):
+            raise RestoreError(
+                f"增量导出不连续：起点 {current['since']} 晚于上一次导出的水位 "
+                f"{previous['watermark']}"
+            )
+
+
+def _model(record_type: str):
+    from django.apps import apps
+
+    return apps.get_model(TOMBSTONE_MODELS[record_type])
+
+
+def _keep_timestamps(model, pk, data) -> None:
+    """保存会刷新 created_at / updated_at，写回导出时的值"""
+    timestamps = {
+        field: data[field] for field in ("created_at", "updated_at") if data.get(field)
+    }
+    if timestamps:
+        model.objects.filter(pk=pk).update(**timestamps)
+
+
+def _upsert(record_type: str, user, data: dict, fields):
+    """按原 ID 创建或覆盖对象（不保存），ID 属于其他用户时报错"""
+    model = _model(record_type)
+    instance = model.objects.filter(pk=data["id"]).first()
+    if instance is None:
+        instance = model(pk=data["id"], owner=user)
+    elif instance.owner_id != user.id:
+        raise RestoreError(f"{record_type} {data['id']} 属于其他用户，无法按原 ID 恢复")
+    for field in fields:
+        if field in data:
+            setattr(instance, field, data[field])
+    return instance
+
+
+def _existing_id(record_type: str, user, object_id):
+    if object_id is None:
+        return None
+    exists = _model(record_type).objects.filter(pk=object_id, owner=user).exists()
+    return object_id if exists else None
+
+
+def _restore_category(user, data, reader):
+    data = dict(data, parent_id=_existing_id("category", user, data.get("parent_id")))
+    category = _upsert(
+        "category",
+        user,
+        data,
+        [
+            "name",
+            "slug",
+            "description",
+            "color",
+            "icon",
+            "parent_id",
+            "is_active",
+            "sort_order",
+        ],
+    )
+    category.save()
+    return category
+
+
+def _restore_tag(user, data, reader):
+    tag = _upsert("tag", user, data, ["name", "slug", "color", "description"])
+    tag.save()
+    return tag
+
+
+def _restore_note(user, data, reader):
+    from apps.tags.models import Tag
+
+    data = dict(
+        data, category_id=_existing_id("category", user, data.get("category_id"))
+    )
+    note = _upsert(
+        "note",
+        user,
+        data,
+        [
+            "title",
+            "slug",
+            "content",
+            "cover_image",
+            "category_id",
+            "is_pinned",
+            "is_archived",
+            "archived_at",
+        ],
+    )
+    note.save()
+    tag_ids = Tag.objects.filter(owner=user, id__in=data.get("tag_ids", []))
+    note.tags.set(tag_ids.values_list("id", flat=True))
+    return note
+
+
+def _restore_collection(user, data, reader):
+    collection = _upsert(
+        "collection",
+        user,
+        data,
+        [
+            "title",
+            "description",
+            "url",
+            "domain",
+            "favicon",
+            "image",
+            "word_count",
+            "is_processed",
+            "scrape_status",
+        ],
+    )
+    collection.content = data.get("content", "")
+    collection.save()
+    return collection
+
+
+def _restore_attachment(user, data, reader):
+    from apps.attachments.blobs import acquire_path
+
+    data = dict(data, note_id=_existing_id("note", user, data.get("note_id")))
+    attachment = _upsert("attachment", user, data, ["name", "note_id"])
+    if attachment.file:
+        # 文件内容不会变化，已存在的附件只更新元数据
+        attachment.save()
+        return attachment
+
+    source = reader.open_file(data.get("archive_path", ""))
+    if source is None:
+        logger.warning("恢复时附件文件缺失: %s", data["id"])
+        return None
+
+    settings.UPLOAD_TEMP_ROOT.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=settings.UPLOAD_TEMP_ROOT, suffix=".restore")
+    with source, os.fdopen(fd, "wb") as target:
+        shutil.copyfileobj(source, target)
+
+    filename = data["name"] + os.path.splitext(data["file"])[1]
+    blob, _ = acquire_path(user, path, filename)
+    attachment.blob = blob
+    attachment.file = blob.file.name
+    attachment.mime_type = data.get("mime_type", "")
+    attachment.size = blob.size
+    attachment.save()
+    return attachment
+
+
+RESTORERS = {
+    "category": _restore_category,
+    "tag": _restore_tag,
+    "note": _restore_note,
+    "collection": _restore_collection,
+    "attachment": _restore_attachment,
+}
+
+
+def apply_export(user, reader: ExportReader) -> Counter:
+    """
+    把一个导出文件应用到用户（单个事务）
+
+    Returns:
+        各记录类型的应用条数；跳过的附件计入 "skipped"
+    """
+    applied = Counter()
+    with transaction.atomic():
+        for record_type, data in reader.records():
+            if record_type == "tombstone":
+                model = _model(data["type"])
+                model.objects.filter(pk=data["id"], owner=user).delete()
+                applied["deleted"] += 1
+                continue
+
+            restorer = RESTORERS.get(record_type)
+            if restorer is None:
+                continue
+            instance = restorer(user, data, reader)
+            if instance is None:
+                applied["skipped"] += 1
+                continue
+            _keep_timestamps(type(instance), instance.pk, data)
+            applied[record_type] += 1
+
+        preferences = reader.header.get("preferences")
+        if preferences:
+            Profile.objects.filter(user=user).update(**preferences)
+            invalidate_cached_user(user.pk)
+    return applied
@@ -0,0 +1,93 @@
+"""
+用户资料统计计数模块
+
+Profile 的 notes_count / categories_count / tags_count：
+- 增量维护：笔记、分类、标签的保存/删除信号调用 adjust_counters，
+  以 F() 表达式原子地加减（Greatest 保证不低于 0），并发写入不会丢失更新
+- notes_count 只统计未归档的笔记，归档 / 取消归档时相应减一 / 加一
+- 资料行不存在时增量被忽略；资料创建时按聚合结果初始化
+- 绕过信号的批量操作（bulk_create、QuerySet.update 修改归档状态等）
+  需在完成后调用 reconcile_counters；reconcile_profile_counts 命令定期对账，
+  每个模型一条 GROUP BY 聚合查询覆盖全部用户
+"""
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Profile
+
+COUNTER_FIELDS = ["notes_count", "categories_count", "tags_count"]
+
+
+def adjust_counters(user_id, **deltas) -> None:
+    """
+    原子地增减用户资料的统计计数
+
+    Args:
+        user_id: 用户 ID
+        **deltas: 字段名 -> 增量（可为负），0 被忽略
+    """
+    changes = {
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+        if delta
+    }
+    if not user_id or not changes:
+        return
+    Profile.objects.filter(user_id=user_id).update(
+        **changes, updated_at=timezone.now()
+    )
+
+
+def _aggregate_counters(user_ids=None) -> dict:
+    """每个模型一条聚合查询，返回 {用户 ID: {字段: 值}}"""
+    from apps.categories.models import Category
+    from apps.notes.models import Note
+    from apps.tags.models import Tag
+
+    sources = (
+        ("notes_count", Note.objects, Count("id", filter=Q(is_archived=False))),
+        ("categories_count", Category.objects, Count("id")),
+        ("tags_count", Tag.objects, Count("id")),
+    )
+    counts = {}
+    for field, queryset, total in sources:
+        if user_ids is not None:
+            queryset = queryset.filter(owner_id__in=user_ids)
+        rows = queryset.order_by().values("owner_id").annotate(total=total)
+        for row in rows:
+            counts.setdefault(row["owner_id"], {})[field] = row["total"]
+    return counts
+
+
+def reconcile_counters(user_ids=None) -> int:
+    """
+    按当前数据重新计算资料统计计数，只写入有偏差的资料行
+
+    Args:
+        user_ids: 只处理这些用户；None 表示全部用户
+
+    Returns:
+        修正的资料行数
+    """
+    counts = _aggregate_counters(user_ids)
+    profiles = Profile.objects.only("id", "user_id", *COUNTER_FIELDS)
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    drifted = []
+    now = timezone.now()
+    for profile in profiles.iterator(chunk_size=1000):
+        actual = counts.get(profile.user_id, {})
+        values = {field: actual.get(field, 0) for field in COUNTER_FIELDS}
+        if any(getattr(profile, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(profile, field, value)
+            profile.updated_at = now
+            drifted.append(profile)
+
+    Profile.objects.bulk_update(
+        drifted, COUNTER_FIELDS + ["updated_at"], batch_size=1000
+    )
+    return len(drifted)
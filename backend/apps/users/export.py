@@ -0,0 +1,394 @@
+"""
+用户数据导出模块
+
+导出以生成器逐块产出，配合 StreamingHttpResponse 使用，
+内存占用与账号数据量无关：
+- 每张表用 .iterator(chunk_size=CHUNK_SIZE) 分批读取
+  （PostgreSQL 下为服务端游标），笔记的标签按批预取
+- 产出的文本按 WRITE_BUFFER_SIZE 合并后交给响应，避免过多小块写入
+- 附件文件按块从存储读出直接写入压缩包，不整体读入内存
+
+支持三种格式：
+- json: 单个 JSON 文档，文件头字段之后依次为 categories / tags / notes /
+  collections / attachments 数组
+- ndjson: 每行一条记录 {"type": ..., "data": {...}}，首行为 header
+- zip: export.ndjson（完整数据，可用于恢复）+ notes/*.md（带 front matter 的
+  Markdown）+ attachments/*（附件原文件）
+
+传入 since 时为增量导出：只包含之后新建或修改的行，并在 deleted 中列出
+之后删除的对象（见 backup 模块）。
+"""
+
+import json
+import logging
+import os
+import re
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .backup import changed_since
+
+logger = logging.getLogger(__name__)
+
+EXPORT_VERSION = 1
+
+# 每次从数据库读取的行数
+CHUNK_SIZE = 500
+
+# 合并后交给响应的最小块大小
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# 复制附件文件时每次读取的字节数
+FILE_CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "zip": "application/zip",
+}
+
+# 压缩包内文件名中不允许的字符
+UNSAFE_NAME_CHARS = re.compile(r'[\x00-\x1f\\/:*?"<>|]+')
+
+CATEGORY_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "description",
+    "color",
+    "icon",
+    "parent_id",
+    "is_active",
+    "sort_order",
+    "created_at",
+    "updated_at",
+)
+TAG_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "color",
+    "description",
+    "created_at",
+    "updated_at",
+)
+NOTE_FIELDS = (
+    "id",
+    "title",
+    "slug",
+    "content",
+    "cover_image",
+    "category_id",
+    "is_pinned",
+    "is_archived",
+    "archived_at",
+    "created_at",
+    "updated_at",
+)
+COLLECTION_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "url",
+    "domain",
+    "favicon",
+    "image",
+    "word_count",
+    "is_processed",
+    "scrape_status",
+    "created_at",
+    "updated_at",
+)
+ATTACHMENT_FIELDS = (
+    "id",
+    "note_id",
+    "name",
+    "file",
+    "mime_type",
+    "file_type",
+    "size",
+    "width",
+    "height",
+    "created_at",
+    "updated_at",
+)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _safe_name(name: str, limit: int = 80) -> str:
+    return UNSAFE_NAME_CHARS.sub("_", name).strip(" .")[:limit] or "untitled"
+
+
+def attachment_archive_name(row: dict) -> str:
+    """附件在压缩包中的路径"""
+    extension = os.path.splitext(row["file"])[1].lower()
+    name = _safe_name(row["name"])
+    if not name.lower().endswith(extension):
+        name += extension
+    return f"attachments/{row['id']}-{name}"
+
+
+def note_archive_name(row: dict) -> str:
+    """笔记 Markdown 文件在压缩包中的路径"""
+    return f"notes/{row['id']}-{_safe_name(row['title'])}.md"
+
+
+def export_header(user, since=None) -> dict:
+    """
+    导出文件头：格式版本、导出时间、增量起点与水位、账号信息与偏好设置
+
+    watermark 在读取任何数据之前取得，作为下一次增量导出的 since。
+    """
+    from .models import Profile
+
+    now = timezone.now()
+    profile = Profile.objects.filter(user=user).first()
+    return {
+        "format": "knowledge-ai-export",
+        "version": EXPORT_VERSION,
+        "exported_at": now,
+        "since": since,
+        "watermark": now,
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "bio": user.bio,
+            "avatar": user.avatar.name if user.avatar else None,
+            "avatar_url": user.avatar_url,
+            "created_at": user.created_at,
+        },
+        "preferences": (
+            {
+                "theme": profile.theme,
+                "language": profile.language,
+                "timezone": profile.timezone,
+            }
+            if profile
+            else None
+        ),
+    }
+
+
+def _categories(user, since=None):
+    from apps.categories.models import Category
+
+    # 按树序输出，父分类总在子分类之前，便于恢复时直接建树
+    queryset = changed_since(Category.objects.filter(owner=user), since)
+    queryset = queryset.order_by("tree_id", "lft")
+    return queryset.values(*CATEGORY_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _tags(user, since=None):
+    from apps.tags.models import Tag
+
+    queryset = changed_since(Tag.objects.filter(owner=user), since).order_by("id")
+    return queryset.values(*TAG_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _notes(user, since=None):
+    from apps.notes.models import Note
+    from apps.tags.models import Tag
+
+    queryset = (
+        changed_since(Note.objects.filter(owner=user), since)
+        .order_by("id")
+        .only(*NOTE_FIELDS)
+        .prefetch_related(Prefetch("tags", queryset=Tag.objects.only("id")))
+    )
+    for note in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row = {field: getattr(note, field) for field in NOTE_FIELDS}
+        row["tag_ids"] = [tag.id for tag in note.tags.all()]
+        yield row
+
+
+def _collections(user, since=None):
+    from apps.collections.models import Collection
+
+    queryset = (
+        changed_since(Collection.objects.filter(owner=user), since)
+        .order_by("id")
+        .only(*COLLECTION_FIELDS, "text_hash")
+    )
+    for collection in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row = {field: getattr(collection, field) for field in COLLECTION_FIELDS}
+        # 正文从 Blob 存储读取；原始 HTML 可重新抓取，不导出
+        row["content"] = collection.content
+        yield row
+
+
+def _attachments(user, since=None):
+    from apps.attachments.models import Attachment
+
+    queryset = changed_since(Attachment.objects.filter(owner=user), since)
+    queryset = queryset.order_by("id")
+    for row in queryset.values(*ATTACHMENT_FIELDS).iterator(chunk_size=CHUNK_SIZE):
+        row["archive_path"] = attachment_archive_name(row)
+        yield row
+
+
+def _tombstones(user, since=None):
+    from .models import Tombstone
+
+    if since is None:
+        # 全量导出本身就是完整状态，不需要删除记录
+        return
+    queryset = changed_since(Tombstone.objects.filter(owner=user), since, "deleted_at")
+    rows = queryset.order_by("id").values_list("object_type", "object_id", "deleted_at")
+    for object_type, object_id, deleted_at in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield {"type": object_type, "id": object_id, "deleted_at": deleted_at}
+
+
+# (JSON 键, NDJSON 记录类型, 行生成函数)，按恢复时的依赖顺序排列
+SECTIONS = (
+    ("categories", "category", _categories),
+    ("tags", "tag", _tags),
+    ("notes", "note", _notes),
+    ("collections", "collection", _collections),
+    ("attachments", "attachment", _attachments),
+    ("deleted", "tombstone", _tombstones),
+)
+
+
+def _buffered(pieces):
+    """把小段文本合并为不小于 WRITE_BUFFER_SIZE 的字节块"""
+    buffer, size = [], 0
+    for piece in pieces:
+        data = piece.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= WRITE_BUFFER_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _json_pieces(user, since):
+    header = _dumps(export_header(user, since))
+    yield header[:-1]
+    for key, _, rows in SECTIONS:
+        yield f", {_dumps(key)}: ["
+        for index, row in enumerate(rows(user, since)):
+            yield (", " if index else "") + _dumps(row)
+        yield "]"
+    yield "}\n"
+
+
+def _ndjson_pieces(user, since):
+    yield _dumps({"type": "header", "data": export_header(user, since)}) + "\n"
+    for _, record_type, rows in SECTIONS:
+        for row in rows(user, since):
+            yield _dumps({"type": record_type, "data": row}) + "\n"
+
+
+def stream_json(user, since=None):
+    """以单个 JSON 文档导出"""
+    return _buffered(_json_pieces(user, since))
+
+
+def stream_ndjson(user, since=None):
+    """以 NDJSON 导出，每行一条记录"""
+    return _buffered(_ndjson_pieces(user, since))
+
+
+class _ZipStream:
+    """
+    zipfile 的只写输出
+
+    不支持 tell/seek，zipfile 因此改用数据描述符写出条目，
+    不回写文件头；生成器每写完一段就取走已写入的字节。
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _front_matter(row: dict, categories: dict, tags: dict) -> str:
+    fields = {
+        "title": row["title"],
+        "category": categories.get(row["category_id"]),
+        "tags": [tags[tag_id] for tag_id in row["tag_ids"] if tag_id in tags],
+        "pinned": row["is_pinned"],
+        "archived": row["is_archived"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+    # JSON 值同时是合法的 YAML
+    lines = [f"{key}: {_dumps(value)}" for key, value in fields.items()]
+    return "---\n" + "\n".join(lines) + "\n---\n\n"
+
+
+def _write_zip(user, archive, since):
+    """向压缩包逐条写入，每写完一段让出一次控制权"""
+    from apps.attachments.models import Attachment
+    from apps.categories.models import Category
+    from apps.tags.models import Tag
+
+    with archive.open("export.ndjson", "w", force_zip64=True) as entry:
+        for chunk in stream_ndjson(user, since):
+            entry.write(chunk)
+            yield
+
+    # 分类、标签名称只用于 front matter，数量远小于笔记
+    categories = dict(Category.objects.filter(owner=user).values_list("id", "name"))
+    tags = dict(Tag.objects.filter(owner=user).values_list("id", "name"))
+    for row in _notes(user, since):
+        document = _front_matter(row, categories, tags) + row["content"]
+        archive.writestr(note_archive_name(row), document)
+        yield
+
+    storage = Attachment._meta.get_field("file").storage
+    for row in _attachments(user, since):
+        try:
+            source = storage.open(row["file"], "rb")
+        except FileNotFoundError:
+            logger.warning("导出时附件文件缺失: %s %s", row["id"], row["file"])
+            continue
+        info = zipfile.ZipInfo(row["archive_path"], row["created_at"].timetuple()[:6])
+        # 附件多为已压缩格式，原样存储
+        info.compress_type = zipfile.ZIP_STORED
+        force_zip64 = row["size"] >= zipfile.ZIP64_LIMIT
+        with source, archive.open(info, "w", force_zip64=force_zip64) as entry:
+            for chunk in source.chunks(FILE_CHUNK_SIZE):
+                entry.write(chunk)
+                yield
+
+
+def stream_zip(user, since=None):
+    """以 ZIP 导出：export.ndjson + 每条笔记一个 Markdown 文件 + 附件原文件"""
+    output = _ZipStream()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        for _ in _write_zip(user, archive, since):
+            data = output.pop()
+            if data:
+                yield data
+    # 中央目录在关闭压缩包时写出
+    yield output.pop()
+
+
+STREAMS = {"json": stream_json, "ndjson": stream_ndjson, "zip": stream_zip}
+
+
+def export_filename(export_format: str, since=None) -> str:
+    extension = {"ndjson": "ndjson", "zip": "zip"}.get(export_format, "json")
+    kind = "incremental" if since else "export"
+    return f"knowledge-ai-{kind}-{timezone.localdate().isoformat()}.{extension}"
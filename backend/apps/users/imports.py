@@ -0,0 +1,576 @@
+"""
+用户数据导入模块
+
+把全量导出文件（zip / ndjson / json）作为新数据导入到某个账号，
+所有对象获得新 ID，导出中的旧 ID 只用于建立对应关系：
+- 分类：一次读入（数量很少），按层级批量插入，每棵新树插入后
+  partial_rebuild 一次，不逐条维护 MPTT 树
+- 标签：与账号已有标签同名的合并，其余批量插入
+- 笔记：按 IMPORT_BATCH_SIZE 分批插入并同时插入标签关联；全部插入后
+  把正文中的 [标题](/notes/旧ID) 与 [[note:旧ID]] 改写为新 ID
+- 收藏：正文写入 Blob 存储后批量插入
+- 附件：文件只能从 zip 导出中导入，逐个按内容哈希入库
+
+批量插入不触发 post_save / m2m_changed 信号，图谱节点与链接、反向链接索引、
+相似度向量、内容指纹和存储用量在最后统一批量生成。整个导入在一个事务中完成。
+"""
+
+import os
+import shutil
+import tempfile
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils.text import slugify
+
+from .backup import ExportReader, RestoreError
+
+# 每批插入的行数
+IMPORT_BATCH_SIZE = 500
+
+# 分类最大层级（与 Category.save 的校验一致）
+MAX_CATEGORY_LEVEL = 2
+
+
+def _chunks(items, size: int = IMPORT_BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def unique_slugs(model, bases: list[str], max_length: int) -> list[str]:
+    """
+    为一批对象分配全局唯一的 slug
+
+    与已有 slug 或同批其他对象冲突时追加 -1、-2……；
+    每轮一次查询，直到没有冲突。
+    """
+    bases = [base[:max_length] for base in bases]
+    slugs = list(bases)
+    suffixes = [0] * len(bases)
+    while True:
+        taken = set(
+            model.objects.filter(slug__in=set(slugs)).values_list("slug", flat=True)
+        )
+        used, changed = set(), False
+        for index, slug in enumerate(slugs):
+            while slug in taken or slug in used:
+                suffixes[index] += 1
+                tail = f"-{suffixes[index]}"
+                slug = bases[index][: max_length - len(tail)] + tail
+                changed = True
+            slugs[index] = slug
+            used.add(slug)
+        if not changed:
+            return slugs
+
+
+def _keep_timestamps(model, objects, rows) -> None:
+    """批量插入会把 created_at / updated_at 设为当前时间，写回导出时的值"""
+    changed = []
+    for obj, row in zip(objects, rows):
+        if row.get("created_at") and row.get("updated_at"):
+            obj.created_at = row["created_at"]
+            obj.updated_at = row["updated_at"]
+            changed.append(obj)
+    if changed:
+        model.objects.bulk_update(changed, ["created_at", "updated_at"])
+
+
+class ExportImporter:
+    """把一个导出文件导入为用户的新数据"""
+
+    def __init__(self, user, reader: ExportReader):
+        self.user = user
+        self.reader = reader
+        self.counts = Counter()
+        # 旧 ID -> 新 ID
+        self.category_ids = {}
+        self.tag_ids = {}
+        self.note_ids = {}
+        # 新建对象（图谱节点只为它们生成）
+        self.new_categories = {}
+        self.new_tag_ids = []
+        self.new_collection_ids = []
+        self.linked_note_ids = []
+
+    def run(self) -> Counter:
+        """
+        执行导入
+
+        Returns:
+            各记录类型的导入条数；缺少文件而跳过的附件计入 "skipped"
+
+        Raises:
+            RestoreError: 导出文件不是全量导出，或记录缺少必需字段、字段值无效
+        """
+        if self.reader.header.get("since"):
+            raise RestoreError("只能导入全量导出")
+
+        handlers = {
+            "category": self._import_categories,
+            "tag": self._import_tags,
+            "note": self._import_notes,
+            "collection": self._import_collections,
+            "attachment": self._import_attachments,
+        }
+        # 分类与标签依赖完整集合（父子关系、按 slug 合并），整体处理
+        buffered = {"category", "tag"}
+
+        with transaction.atomic():
+            batch, batch_type = [], None
+            for record_type, data in self.reader.records():
+                if record_type not in handlers:
+                    continue
+                if record_type != batch_type or (
+                    record_type not in buffered and len(batch) >= IMPORT_BATCH_SIZE
+                ):
+                    if batch:
+                        self._handle(handlers[batch_type], batch_type, batch)
+                    batch, batch_type = [], record_type
+                batch.append(data)
+            if batch:
+                self._handle(handlers[batch_type], batch_type, batch)
+
+            self._rewrite_links()
+            self._build_derived_data()
+        return self.counts
+
+    @staticmethod
+    def _handle(handler, record_type: str, batch: list[dict]) -> None:
+        """导入一批记录，把字段缺失或类型不符转换为 RestoreError"""
+        try:
+            handler(batch)
+        except KeyError as e:
+            raise RestoreError(f"{record_type} 记录缺少字段 {e}") from e
+        except (TypeError, ValueError, ValidationError) as e:
+            raise RestoreError(f"{record_type} 记录字段无效：{e}") from e
+
+    # ------------------------------------------------------------------
+    # 分类与标签
+    # ------------------------------------------------------------------
+
+    def _import_categories(self, rows) -> None:
+        from apps.categories.models import Category
+
+        next_tree_id = (Category.objects.aggregate(top=Max("tree_id"))["top"] or 0) + 1
+        slugs = iter(
+            unique_slugs(
+                Category,
+                [row.get("slug") or slugify(row["name"]) or "category" for row in rows],
+                Category._meta.get_field("slug").max_length,
+            )
+        )
+        slug_by_id = {row["id"]: next(slugs) for row in rows}
+
+        # 导出按树序排列；逐层插入，父分类总是已有新 ID
+        levels = defaultdict(list)
+        level_of, tree_of, path_of = {}, {}, {}
+        for row in rows:
+            parent = row.get("parent_id")
+            level = level_of[parent] + 1 if parent in level_of else 0
+            level_of[row["id"]] = min(level, MAX_CATEGORY_LEVEL)
+            levels[level_of[row["id"]]].append(row)
+
+        for level in sorted(levels):
+            objects = []
+            for row in levels[level]:
+                parent = self.category_ids.get(row.get("parent_id")) if level else None
+                if parent is None:
+                    tree_id, next_tree_id = next_tree_id, next_tree_id + 1
+                else:
+                    tree_id = tree_of[parent]
+                objects.append(
+                    Category(
+                        owner=self.user,
+                        parent_id=parent,
+                        name=row["name"],
+                        slug=slug_by_id[row["id"]],
+                        description=row.get("description") or "",
+                        color=row.get("color") or "#3498db",
+                        icon=row.get("icon") or "",
+                        is_active=row.get("is_active", True),
+                        sort_order=row.get("sort_order") or 0,
+                        tree_id=tree_id,
+                        level=level if parent else 0,
+                        lft=1,
+                        rght=2,
+                    )
+                )
+            Category.objects.bulk_create(objects)
+            for obj, row in zip(objects, levels[level]):
+                self.category_ids[row["id"]] = obj.id
+                tree_of[obj.id] = obj.tree_id
+                path_of[obj.id] = obj.name
+                if obj.parent_id:
+                    path_of[obj.id] = f"{path_of[obj.parent_id]}/{obj.name}"
+                self.new_categories[obj.id] = (obj.name, obj.color, path_of[obj.id])
+            _keep_timestamps(Category, objects, levels[level])
+
+        # 每棵新树按 order_insertion_by 计算一次 lft / rght
+        for tree_id in sorted(set(tree_of.values())):
+            Category.objects.partial_rebuild(tree_id)
+        self.counts["category"] += len(rows)
+
+    def _import_tags(self, rows) -> None:
+        from apps.tags.models import Tag
+
+        # slug 全局唯一，导出中的 slug 在同一实例上必然已被占用，按名称合并
+        existing = dict(Tag.objects.filter(owner=self.user).values_list("name", "id"))
+        created_rows = []
+        for row in rows:
+            if row["name"] in existing:
+                self.tag_ids[row["id"]] = existing[row["name"]]
+            else:
+                created_rows.append(row)
+
+        slugs = unique_slugs(
+            Tag,
+            [row.get("slug") or slugify(row["name"]) or "tag" for row in created_rows],
+            Tag._meta.get_field("slug").max_length,
+        )
+        objects = [
+            Tag(
+                owner=self.user,
+                name=row["name"],
+                slug=slug,
+                color=row.get("color") or "#1890ff",
+                description=row.get("description"),
+            )
+            for row, slug in zip(created_rows, slugs)
+        ]
+        Tag.objects.bulk_create(objects)
+        for obj, row in zip(objects, created_rows):
+            self.tag_ids[row["id"]] = obj.id
+            self.new_tag_ids.append(obj.id)
+        _keep_timestamps(Tag, objects, created_rows)
+        self.counts["tag"] += len(rows)
+
+    # ------------------------------------------------------------------
+    # 笔记、收藏、附件
+    # ------------------------------------------------------------------
+
+    def _import_notes(self, rows) -> None:
+        from apps.notes.links import has_note_links
+        from apps.notes.models import Note
+
+        slugs = unique_slugs(
+            Note,
+            [row.get("slug") or slugify(row["title"]) or "note" for row in rows],
+            Note._meta.get_field("slug").max_length,
+        )
+        objects = []
+        for row, slug in zip(rows, slugs):
+            note = Note(
+                owner=self.user,
+                title=row["title"],
+                slug=slug,
+                cover_image=row.get("cover_image"),
+                category_id=self.category_ids.get(row.get("category_id")),
+                is_pinned=row.get("is_pinned", False),
+                is_archived=row.get("is_archived", False),
+                archived_at=row.get("archived_at"),
+            )
+            note.content = note._normalize_content(row.get("content"))
+            note.plain_text = note._extract_text_from_markdown(note.content)
+            objects.append(note)
+        Note.objects.bulk_create(objects)
+
+        through = []
+        for note, row in zip(objects, rows):
+            self.note_ids[row["id"]] = note.id
+            if has_note_links(note.content):
+                self.linked_note_ids.append(note.id)
+            through.extend(
+                Note.tags.through(note_id=note.id, tag_id=self.tag_ids[tag_id])
+                for tag_id in row.get("tag_ids", [])
+                if tag_id in self.tag_ids
+            )
+        Note.tags.through.objects.bulk_create(through, ignore_conflicts=True)
+        _keep_timestamps(Note, objects, rows)
+        self.counts["note"] += len(rows)
+
+    def _import_collections(self, rows) -> None:
+        from apps.collections.blobs import acquire_text
+        from apps.collections.models import Collection
+
+        objects = []
+        for row in rows:
+            text_hash, text_size = acquire_text(row.get("content") or "", searchable=True)
+            objects.append(
+                Collection(
+                    owner=self.user,
+                    title=row["title"],
+                    description=row.get("description") or "",
+                    url=row["url"],
+                    domain=row.get("domain") or urlparse(row["url"]).netloc,
+                    favicon=row.get("favicon"),
+                    image=row.get("image"),
+                    text_hash=text_hash,
+                    text_size=text_size,
+                    word_count=row.get("word_count") or 0,
+                    is_processed=row.get("is_processed", False),
+                    scrape_status=row.get("scrape_status") or "pending",
+                )
+            )
+        Collection.objects.bulk_create(objects)
+        self.new_collection_ids.extend(obj.id for obj in objects)
+        _keep_timestamps(Collection, objects, rows)
+        self.counts["collection"] += len(rows)
+
+    def _import_attachments(self, rows) -> None:
+        from apps.attachments.blobs import acquire_path
+        from apps.attachments.models import Attachment
+
+        settings.UPLOAD_TEMP_ROOT.mkdir(parents=True, exist_ok=True)
+        for row in rows:
+            source = self.reader.open_file(row.get("archive_path", ""))
+            if source is None:
+                self.counts["skipped"] += 1
+                continue
+
+            fd, path = tempfile.mkstemp(dir=settings.UPLOAD_TEMP_ROOT, suffix=".import")
+            with source, os.fdopen(fd, "wb") as target:
+                shutil.copyfileobj(source, target)
+            filename = row["name"] + os.path.splitext(row["file"])[1]
+            blob, _ = acquire_path(self.user, path, filename)
+            Attachment.objects.create(
+                owner=self.user,
+                note_id=self.note_ids.get(row.get("note_id")),
+                name=row["name"],
+                mime_type=row.get("mime_type") or "",
+                size=blob.size,
+                blob=blob,
+                file=blob.file.name,
+            )
+            self.counts["attachment"] += 1
+
+    # ------------------------------------------------------------------
+    # 收尾：改写链接并生成派生数据
+    # ------------------------------------------------------------------
+
+    def _rewrite_links(self) -> None:
+        from apps.notes.links import rewrite_note_links
+        from apps.notes.models import Note
+
+        for chunk in _chunks(self.linked_note_ids):
+            notes = list(Note.objects.filter(id__in=chunk).only("id", "content"))
+            for note in notes:
+                note.content = rewrite_note_links(note.content, self.note_ids)
+                note.plain_text = note._extract_text_from_markdown(note.content)
+            Note.objects.bulk_update(notes, ["content", "plain_text"])
+
+    def _build_derived_data(self) -> None:
+        from .counters import reconcile_counters
+        from .storage import reconcile_usage
+
+        references = self._build_references()
+        self._build_graph(references)
+        self._build_vectors()
+        self._build_signatures()
+        reconcile_usage([self.user.id])
+        reconcile_counters([self.user.id])
+
+    def _build_references(self) -> set[tuple[int, int]]:
+        """为含内部链接的新笔记建立反向链接索引，返回 (源笔记, 目标笔记) 集合"""
+        from apps.notes.links import extract_note_links
+        from apps.notes.models import Note, NoteReference
+
+        imported = set(self.note_ids.values())
+        pairs = set()
+        for chunk in _chunks(self.linked_note_ids):
+            references = []
+            for note_id, content in Note.objects.filter(id__in=chunk).values_list(
+                "id", "content"
+            ):
+                for link in extract_note_links(content):
+                    if link.target_id in imported and link.target_id != note_id:
+                        references.append(
+                            NoteReference(
+                                source_id=note_id,
+                                target_id=link.target_id,
+                                anchor_text=link.anchor_text,
+                                syntax=link.syntax,
+                            )
+                        )
+                        pairs.add((note_id, link.target_id))
+            NoteReference.objects.bulk_create(references, ignore_conflicts=True)
+        return pairs
+
+    def _build_graph(self, references) -> None:
+        """为新建的分类、标签、笔记批量生成图谱节点与链接"""
+        from apps.graph.models import GraphLink, GraphNode
+        from apps.notes.models import Note
+        from apps.tags.models import Tag
+
+        owner = self.user
+        category_nodes = GraphNode.objects.bulk_create(
+            [
+                GraphNode(
+                    owner=owner,
+                    node_type="category",
+                    title=name,
+                    label=name,
+                    data={"path": path, "color": color, "category_id": category_id},
+                )
+                for category_id, (name, color, path) in self.new_categories.items()
+            ]
+        )
+        node_by_category = {
+            node.data["category_id"]: node.id for node in category_nodes
+        }
+
+        GraphNode.objects.bulk_create(
+            [
+                GraphNode(
+                    owner=owner,
+                    node_type="tag",
+                    title=tag.name,
+                    label=tag.name,
+                    data={
+                        "color": tag.color,
+                        "usage_count": tag.usage_count,
+                        "tag_id": tag.id,
+                    },
+                )
+                for tag in Tag.objects.filter(id__in=self.new_tag_ids)
+            ]
+        )
+        # 合并到已有标签的笔记同样链接到已有节点
+        node_by_tag = {}
+        for node_id, data in GraphNode.objects.filter(
+            owner=owner, node_type="tag"
+        ).values_list("id", "data"):
+            if isinstance(data, dict) and data.get("tag_id") is not None:
+                node_by_tag[int(data["tag_id"])] = node_id
+
+        node_by_note = {}
+        for chunk in _chunks(self.note_ids.values()):
+            notes = (
+                Note.objects.filter(id__in=chunk)
+                .select_related("category")
+                .prefetch_related("tags")
+                .only("id", "title", "is_pinned", "is_archived", "category__name")
+            )
+            nodes, links = [], []
+            for note in notes:
+                tags = list(note.tags.all())
+                node = GraphNode(
+                    owner=owner,
+                    node_type="note",
+                    title=note.title,
+                    label=note.title,
+                    data={
+                        "note_id": note.id,
+                        "category": note.category.name if note.category else None,
+                        "tags": [tag.name for tag in tags],
+                        "is_pinned": note.is_pinned,
+                        "is_archived": note.is_archived,
+                    },
+                )
+                nodes.append((note, tags, node))
+            GraphNode.objects.bulk_create([node for _, _, node in nodes])
+
+            for note, tags, node in nodes:
+                node_by_note[note.id] = node.id
+                if note.category_id in node_by_category:
+                    links.append(
+                        GraphLink(
+                            owner=owner,
+                            source_id=node.id,
+                            target_id=node_by_category[note.category_id],
+                            link_type="parent",
+                        )
+                    )
+                links.extend(
+                    GraphLink(
+                        owner=owner,
+                        source_id=node.id,
+                        target_id=node_by_tag[tag.id],
+                        link_type="tagged",
+                    )
+                    for tag in tags
+                    if tag.id in node_by_tag
+                )
+            GraphLink.objects.bulk_create(links, ignore_conflicts=True)
+
+        GraphLink.objects.bulk_create(
+            [
+                GraphLink(
+                    owner=owner,
+                    source_id=node_by_note[source],
+                    target_id=node_by_note[target],
+                    link_type="reference",
+                )
+                for source, target in references
+            ],
+            batch_size=IMPORT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    def _build_vectors(self) -> None:
+        """为新笔记批量写入相似度向量（相似度结果按需计算）"""
+        from apps.notes.models import Note, NoteVector
+        from apps.notes.similarity import term_vector
+        from apps.notes.tasks import enqueue_similarity_refresh
+
+        for chunk in _chunks(self.note_ids.values()):
+            vectors = []
+            for note_id, plain_text in Note.objects.filter(id__in=chunk).values_list(
+                "id", "plain_text"
+            ):
+                indices, counts = term_vector(plain_text)
+                vectors.append(
+                    NoteVector(
+                        note_id=note_id,
+                        owner=self.user,
+                        indices=indices,
+                        counts=counts,
+                    )
+                )
+            NoteVector.objects.bulk_create(vectors)
+        enqueue_similarity_refresh(self.user.id)
+
+    def _build_signatures(self) -> None:
+        """为新笔记与收藏批量写入近似重复检测的内容指纹"""
+        from apps.collections.models import Collection
+        from apps.dedupe.models import ContentSignature
+        from apps.dedupe.services import build_signature
+        from apps.notes.models import Note
+
+        for chunk in _chunks(self.note_ids.values()):
+            signatures = [
+                build_signature(self.user.id, "note", note_id, plain_text)
+                for note_id, plain_text in Note.objects.filter(
+                    id__in=chunk
+                ).values_list("id", "plain_text")
+            ]
+            ContentSignature.objects.bulk_create(
+                [signature for signature in signatures if signature is not None]
+            )
+
+        for chunk in _chunks(self.new_collection_ids):
+            signatures = [
+                build_signature(self.user.id, "collection", obj.id, obj.content)
+                for obj in Collection.objects.filter(id__in=chunk).only(
+                    "id", "text_hash"
+                )
+            ]
+            ContentSignature.objects.bulk_create(
+                [signature for signature in signatures if signature is not None]
+            )
+
+
+def import_export(user, path) -> Counter:
+    """
+    把导出文件导入为用户的新数据
+
+    Raises:
+        RestoreError: 文件不是有效的全量导出
+    """
+    with ExportReader(path) as reader:
+        return ExportImporter(user, reader).run()
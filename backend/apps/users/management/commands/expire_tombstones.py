@@ -0,0 +1,23 @@
+"""
+清理过期的删除记录
+
+删除超过保留期（settings.EXPORT_TOMBSTONE_RETENTION_DAYS）的删除记录。
+起点早于保留期的增量导出会被拒绝，需要重新全量导出。建议每天执行一次：
+
+    0 4 * * * cd /app/backend && python manage.py expire_tombstones
+
+用法:
+    python manage.py expire_tombstones
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.users.backup import expire_tombstones
+
+
+class Command(BaseCommand):
+    help = "删除超过保留期的删除记录"
+
+    def handle(self, *args, **options):
+        deleted = expire_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"已清理 {deleted} 条删除记录"))
@@ -0,0 +1,37 @@
+"""
+导入用户数据导出文件
+
+把一个全量导出（zip / ndjson / json）作为新数据导入到指定账号，
+所有对象获得新 ID，笔记正文中的内部链接随之改写。
+与 restore_export 不同，导入不覆盖已有数据，可用于跨实例迁移或合并账号。
+
+用法:
+    python manage.py import_data --user alice export.zip
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.backup import RestoreError
+from apps.users.imports import import_export
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "把全量导出作为新数据导入到用户账号"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="全量导出文件")
+        parser.add_argument("--user", required=True, help="导入到的用户名")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"用户不存在: {options['user']}")
+
+        try:
+            counts = import_export(user, options["file"])
+        except (RestoreError, OSError) as e:
+            raise CommandError(str(e))
+
+        summary = "，".join(f"{key} {count}" for key, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"导入完成: {summary or '无数据'}"))
@@ -0,0 +1,46 @@
+"""
+账号清除任务
+
+查看已删除账号的清除进度，或继续执行未完成的清除任务
+（进程重启会中断后台执行器中的任务；已删除的行不会重复处理）。
+
+用法:
+    python manage.py purge_accounts            # 执行所有未完成的任务
+    python manage.py purge_accounts --list     # 只列出任务进度
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.users.models import AccountPurge
+from apps.users.purge import run_purge
+
+
+class Command(BaseCommand):
+    help = "执行未完成的账号清除任务"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="只列出清除任务进度，不执行",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for purge in AccountPurge.objects.all():
+                progress = purge.progress()
+                self.stdout.write(
+                    f"#{purge.id} {purge.username}: {purge.get_status_display()} "
+                    f"{purge.stage} 已删除 {progress['deleted_total']} 行、"
+                    f"{purge.deleted_files} 个文件"
+                )
+            return
+
+        unfinished = AccountPurge.objects.exclude(status=AccountPurge.STATUS_DONE)
+        for purge_id in unfinished.order_by("id").values_list("id", flat=True):
+            purge = run_purge(purge_id)
+            if purge.status == AccountPurge.STATUS_FAILED:
+                self.stderr.write(f"#{purge.id} {purge.username} 失败: {purge.error}")
+            else:
+                self.stdout.write(f"#{purge.id} {purge.username} 已清除")
+        self.stdout.write(self.style.SUCCESS("清除任务已处理"))
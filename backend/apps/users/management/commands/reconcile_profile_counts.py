@@ -0,0 +1,31 @@
+"""
+资料统计计数对账
+
+按当前数据重新计算用户资料中的笔记、分类、标签数量，修正增量维护产生的偏差
+（如批量操作绕过信号、直接改库或异常中断）。每个模型只执行一条聚合查询。
+
+用法:
+    python manage.py reconcile_profile_counts
+    python manage.py reconcile_profile_counts --user 42
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.users.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "重新计算用户资料的统计计数"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="只处理指定用户 ID（可重复）",
+        )
+
+    def handle(self, *args, **options):
+        count = reconcile_counters(options["users"])
+        self.stdout.write(self.style.SUCCESS(f"已修正 {count} 个用户的统计计数"))
@@ -0,0 +1,31 @@
+"""
+存储用量对账
+
+按当前数据重新计算用户的存储用量台账，修正增量维护产生的偏差
+（如直接改库、批量导入或异常中断）。每张表只执行一条聚合查询。
+
+用法:
+    python manage.py reconcile_storage
+    python manage.py reconcile_storage --user 42
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.users.storage import reconcile_usage
+
+
+class Command(BaseCommand):
+    help = "重新计算用户的存储用量台账"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="只处理指定用户 ID（可重复）",
+        )
+
+    def handle(self, *args, **options):
+        count = reconcile_usage(options["users"])
+        self.stdout.write(self.style.SUCCESS(f"已对账 {count} 个用户的存储用量"))
@@ -0,0 +1,47 @@
+"""
+从导出文件恢复用户数据
+
+按顺序应用一次全量导出及其后的增量导出（导出接口的 since 参数），
+对象按原 ID 覆盖写入，增量导出中的删除记录会删除对应对象。
+每个文件在一个事务中应用；附件文件只能从 zip 导出中恢复。
+
+用法:
+    python manage.py restore_export --user alice full.zip
+    python manage.py restore_export --user alice full.zip inc-0601.ndjson inc-0608.zip
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.backup import ExportReader, RestoreError, apply_export, check_chain
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "按顺序应用全量导出与增量导出，恢复用户数据"
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="导出文件，全量导出在前")
+        parser.add_argument("--user", required=True, help="恢复到的用户名")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"用户不存在: {options['user']}")
+
+        readers = []
+        try:
+            for path in options["files"]:
+                readers.append(ExportReader(path))
+            check_chain([reader.header for reader in readers])
+
+            for path, reader in zip(options["files"], readers):
+                applied = apply_export(user, reader)
+                summary = "，".join(f"{key} {count}" for key, count in applied.items())
+                self.stdout.write(f"{path}: {summary or '无变化'}")
+        except (RestoreError, OSError) as e:
+            raise CommandError(str(e))
+        finally:
+            for reader in readers:
+                reader.close()
+
+        self.stdout.write(self.style.SUCCESS(f"已恢复 {len(readers)} 个导出文件"))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_avatar_url_alter_user_avatar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='storage_usage', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+                ('notes_count', models.BigIntegerField(default=0, verbose_name='笔记数量')),
+                ('notes_bytes', models.BigIntegerField(default=0, help_text='正文的 UTF-8 字节数', verbose_name='笔记字节数')),
+                ('attachments_count', models.BigIntegerField(default=0, verbose_name='附件数量')),
+                ('attachments_bytes', models.BigIntegerField(default=0, help_text='各附件大小之和（逻辑大小）', verbose_name='附件字节数')),
+                ('attachments_stored_bytes', models.BigIntegerField(default=0, help_text='去重后实际存储的文件大小', verbose_name='附件占用字节数')),
+                ('collections_count', models.BigIntegerField(default=0, verbose_name='收藏数量')),
+                ('collections_bytes', models.BigIntegerField(default=0, help_text='抓取的正文与原始 HTML 字节数（未压缩）', verbose_name='收藏正文字节数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '存储用量',
+                'verbose_name_plural': '存储用量',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_storage_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('category', '分类'), ('tag', '标签'), ('note', '笔记'), ('collection', '收藏'), ('attachment', '附件')], max_length=20, verbose_name='对象类型')),
+                ('object_id', models.BigIntegerField(verbose_name='对象 ID')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='删除时间')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to=settings.AUTH_USER_MODEL, verbose_name='所属用户')),
+            ],
+            options={
+                'verbose_name': '删除记录',
+                'verbose_name_plural': '删除记录',
+                'indexes': [models.Index(fields=['owner', 'deleted_at'], name='users_tombs_owner_i_6599e4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(db_index=True, verbose_name='用户 ID')),
+                ('username', models.CharField(max_length=150, verbose_name='用户名')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '进行中'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('stage', models.CharField(blank=True, help_text='正在清除的表', max_length=100, verbose_name='当前阶段')),
+                ('deleted_rows', models.JSONField(blank=True, default=dict, help_text='按表统计的已删除行数', verbose_name='已删除行数')),
+                ('deleted_files', models.PositiveIntegerField(default=0, verbose_name='已删除文件数')),
+                ('error', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '账号清除',
+                'verbose_name_plural': '账号清除',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
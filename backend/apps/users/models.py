@@ -131,19 +131,12 @@ class Profile(models.Model):
     def __str__(self):
         return f"{self.user.username}的资料"
 
-    def update_stats(self, notes=0, categories=0, tags=0):
-        """更新统计信息"""
-        self.notes_count = notes
-        self.categories_count = categories
-        self.tags_count = tags
-        self.save(
-            update_fields=[
-                "notes_count",
-                "categories_count",
-                "tags_count",
-                "updated_at",
-            ]
-        )
+    def refresh_stats(self):
+        """按当前数据重新计算统计信息（平时由信号增量维护）"""
+        from .counters import COUNTER_FIELDS, reconcile_counters
+
+        reconcile_counters([self.user_id])
+        self.refresh_from_db(fields=COUNTER_FIELDS)
 
     def record_login(self):
         """记录登录"""
@@ -156,3 +149,209 @@ class Profile(models.Model):
         if theme in ["light", "dark", "auto"]:
             self.theme = theme
             self.save(update_fields=["theme", "updated_at"])
+
+
+class StorageUsage(models.Model):
+    """
+    用户存储用量台账
+
+    由笔记、附件、收藏的保存/删除信号以 F() 表达式增量维护，
+    存储统计接口只读取这一行；绕过信号的批量操作造成的偏差
+    由 reconcile_storage 命令按聚合查询重新计算。
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="storage_usage",
+        verbose_name="用户",
+    )
+    notes_count = models.BigIntegerField(
+        default=0,
+        verbose_name="笔记数量",
+    )
+    notes_bytes = models.BigIntegerField(
+        default=0,
+        verbose_name="笔记字节数",
+        help_text="正文的 UTF-8 字节数",
+    )
+    attachments_count = models.BigIntegerField(
+        default=0,
+        verbose_name="附件数量",
+    )
+    attachments_bytes = models.BigIntegerField(
+        default=0,
+        verbose_name="附件字节数",
+        help_text="各附件大小之和（逻辑大小）",
+    )
+    attachments_stored_bytes = models.BigIntegerField(
+        default=0,
+        verbose_name="附件占用字节数",
+        help_text="去重后实际存储的文件大小",
+    )
+    collections_count = models.BigIntegerField(
+        default=0,
+        verbose_name="收藏数量",
+    )
+    collections_bytes = models.BigIntegerField(
+        default=0,
+        verbose_name="收藏正文字节数",
+        help_text="抓取的正文与原始 HTML 字节数（未压缩）",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="更新时间",
+    )
+
+    class Meta:
+        verbose_name = "存储用量"
+        verbose_name_plural = "存储用量"
+
+    def __str__(self):
+        return f"{self.user_id} 的存储用量"
+
+    @property
+    def total_bytes(self) -> int:
+        return self.notes_bytes + self.attachments_stored_bytes + self.collections_bytes
+
+
+class Tombstone(models.Model):
+    """
+    删除记录
+
+    笔记、分类、标签、收藏、附件删除时各写一条，增量导出据此输出
+    自上次导出以来删除的对象；保留 EXPORT_TOMBSTONE_RETENTION_DAYS 天，
+    由 expire_tombstones 命令清理。随账号一起删除的对象不记录。
+    """
+
+    TYPE_CHOICES = [
+        ("category", "分类"),
+        ("tag", "标签"),
+        ("note", "笔记"),
+        ("collection", "收藏"),
+        ("attachment", "附件"),
+    ]
+
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="tombstones",
+        verbose_name="所属用户",
+    )
+    object_type = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        verbose_name="对象类型",
+    )
+    object_id = models.BigIntegerField(
+        verbose_name="对象 ID",
+    )
+    deleted_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="删除时间",
+    )
+
+    class Meta:
+        verbose_name = "删除记录"
+        verbose_name_plural = "删除记录"
+        indexes = [
+            models.Index(fields=["owner", "deleted_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type}:{self.object_id}"
+
+
+class AccountPurge(models.Model):
+    """
+    账号清除任务
+
+    删除账号时用户立即停用，数据由后台任务按表分批删除（见 purge 模块），
+    进度逐批写入本表。任务记录不关联用户外键，用户行删除后仍可查看。
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "等待中"),
+        (STATUS_RUNNING, "进行中"),
+        (STATUS_DONE, "已完成"),
+        (STATUS_FAILED, "失败"),
+    ]
+
+    user_id = models.BigIntegerField(
+        db_index=True,
+        verbose_name="用户 ID",
+    )
+    username = models.CharField(
+        max_length=150,
+        verbose_name="用户名",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="状态",
+    )
+    stage = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="当前阶段",
+        help_text="正在清除的表",
+    )
+    deleted_rows = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="已删除行数",
+        help_text="按表统计的已删除行数",
+    )
+    deleted_files = models.PositiveIntegerField(
+        default=0,
+        verbose_name="已删除文件数",
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="错误信息",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="创建时间",
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="开始时间",
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="完成时间",
+    )
+
+    class Meta:
+        verbose_name = "账号清除"
+        verbose_name_plural = "账号清除"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.username} 清除 {self.get_status_display()}"
+
+    def progress(self) -> dict:
+        """汇总清除进度"""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "username": self.username,
+            "status": self.status,
+            "stage": self.stage,
+            "deleted_rows": self.deleted_rows,
+            "deleted_total": sum(self.deleted_rows.values()),
+            "deleted_files": self.deleted_files,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
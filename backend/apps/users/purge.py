@@ -0,0 +1,237 @@
+"""
+账号清除模块
+
+删除账号时不在请求中执行 user.delete()（Django 会把全部关联行读入内存
+并逐行发送 post_delete 信号），而是：
+- 请求中停用用户并创建 AccountPurge 任务，交给后台线程池执行
+- 任务按 PURGE_STEPS 的顺序逐表删除，子表在前；每批先按主键取
+  PURGE_BATCH_SIZE 个 ID（键集分页），再以 delete_without_signals 一条 DELETE 删除，
+  不收集级联对象、不发送信号，每批单独提交，锁只持有一批的时间
+- 绕过信号后需要的收尾在批内完成：收藏正文 Blob 按哈希批量释放，
+  附件与上传临时文件在每批提交后批量删除
+- 全部表清空后删除用户行本身（此时剩余关联行很少，正常级联即可）
+
+每批之后把进度写入 AccountPurge；任务中断后可重新执行，已删除的行不会重复处理。
+"""
+
+import logging
+from collections import Counter
+from pathlib import Path
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+
+from utils.bulk_delete import delete_without_signals
+from .authentication import invalidate_cached_user
+from .models import AccountPurge, User
+
+logger = logging.getLogger(__name__)
+
+# 每批删除的行数
+PURGE_BATCH_SIZE = 1000
+
+
+# PURGE_STEPS 查询条件中代表被清除用户 ID 的占位值
+OWNER = object()
+
+# (进度键, 模型或 (模型, 多对多字段), 查询条件)，按删除顺序排列：
+# 引用其他表的行先于被引用的行删除，分类从最深一层开始删除
+PURGE_STEPS = (
+    ("upload_sessions", "attachments.UploadSession", {"owner_id": OWNER}),
+    ("attachments", "attachments.Attachment", {"owner_id": OWNER}),
+    ("attachment_blobs", "attachments.AttachmentBlob", {"owner_id": OWNER}),
+    ("note_references", "notes.NoteReference", {"source__owner_id": OWNER}),
+    ("note_references", "notes.NoteReference", {"target__owner_id": OWNER}),
+    ("note_similarities", "notes.NoteSimilarity", {"note__owner_id": OWNER}),
+    ("note_similarities", "notes.NoteSimilarity", {"similar__owner_id": OWNER}),
+    ("note_vectors", "notes.NoteVector", {"owner_id": OWNER}),
+    ("note_tags", ("notes.Note", "tags"), {"note__owner_id": OWNER}),
+    ("related_notes", ("notes.Note", "related_notes"), {"from_note__owner_id": OWNER}),
+    ("related_notes", ("notes.Note", "related_notes"), {"to_note__owner_id": OWNER}),
+    ("notes", "notes.Note", {"owner_id": OWNER}),
+    ("graph_links", "graph.GraphLink", {"owner_id": OWNER}),
+    ("graph_nodes", "graph.GraphNode", {"owner_id": OWNER}),
+    ("collections", "collections.Collection", {"owner_id": OWNER}),
+    ("bookmark_imports", "collections.BookmarkImport", {"owner_id": OWNER}),
+    ("categories", "categories.Category", {"owner_id": OWNER, "level": 2}),
+    ("categories", "categories.Category", {"owner_id": OWNER, "level": 1}),
+    ("categories", "categories.Category", {"owner_id": OWNER, "level": 0}),
+    ("tags", "tags.Tag", {"owner_id": OWNER}),
+    ("content_signatures", "dedupe.ContentSignature", {"owner_id": OWNER}),
+    ("tombstones", "users.Tombstone", {"owner_id": OWNER}),
+)
+
+
+def _resolve(model, conditions: dict, user_id):
+    """把 PURGE_STEPS 中的一步转换为 (模型, filter() 参数)"""
+    if isinstance(model, tuple):
+        label, field = model
+        model = apps.get_model(label)._meta.get_field(field).remote_field.through
+    else:
+        model = apps.get_model(model)
+    filters = {
+        field: user_id if value is OWNER else value
+        for field, value in conditions.items()
+    }
+    return model, filters
+
+
+# ----------------------------------------------------------------------
+# 批内收尾：被删除的行不再触发信号，需要手动释放的外部资源
+# ----------------------------------------------------------------------
+
+
+def _remove_files(storage, names) -> int:
+    """在事务提交后删除存储文件及其衍生图，返回文件数"""
+    from apps.attachments.derivatives import derivative_names
+
+    names = [name for name in names if name]
+
+    def delete_files():
+        for name in names:
+            storage.delete(name)
+            for derivative in derivative_names(name):
+                storage.delete(derivative)
+
+    if names:
+        transaction.on_commit(delete_files)
+    return len(names)
+
+
+def _release_upload_sessions(model, ids) -> int:
+    paths = [model(id=session_id).temp_path for session_id in ids]
+
+    def delete_parts():
+        for path in paths:
+            Path(path).unlink(missing_ok=True)
+
+    transaction.on_commit(delete_parts)
+    return 0
+
+
+def _release_attachments(model, ids) -> int:
+    # 引用 Blob 的附件文件随 Blob 删除，这里只删除旧附件独占的文件
+    rows = model.objects.filter(id__in=ids, blob__isnull=True)
+    names = rows.values_list("file", flat=True)
+    return _remove_files(model._meta.get_field("file").storage, list(names))
+
+
+def _release_attachment_blobs(model, ids) -> int:
+    names = model.objects.filter(id__in=ids).values_list("file", flat=True)
+    return _remove_files(model._meta.get_field("file").storage, list(names))
+
+
+def _release_collections(model, ids) -> int:
+    from apps.collections.blobs import release_texts
+
+    references = Counter()
+    for text_hash, html_hash in model.objects.filter(id__in=ids).values_list(
+        "text_hash", "html_hash"
+    ):
+        references.update([text_hash, html_hash])
+    release_texts(references)
+    return 0
+
+
+RELEASERS = {
+    "attachments.UploadSession": _release_upload_sessions,
+    "attachments.Attachment": _release_attachments,
+    "attachments.AttachmentBlob": _release_attachment_blobs,
+    "collections.Collection": _release_collections,
+}
+
+
+# ----------------------------------------------------------------------
+# 任务
+# ----------------------------------------------------------------------
+
+
+def request_purge(user) -> AccountPurge:
+    """
+    停用用户并创建清除任务
+
+    停用后 Token 认证与登录都会拒绝该用户；数据由 enqueue_purge 在后台删除。
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        user.is_active = False
+        purge = AccountPurge.objects.create(user_id=user.pk, username=user.username)
+    # update() 不发送 post_save，手动使认证缓存失效
+    invalidate_cached_user(user.pk)
+    return purge
+
+
+def _delete_batches(purge, key, model, filters) -> None:
+    """按主键键集分页逐批删除，每批一个事务并记录进度"""
+    releaser = RELEASERS.get(model._meta.label)
+    last_pk = None
+    while True:
+        queryset = model.objects.filter(**filters)
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        ids = list(
+            queryset.order_by("pk").values_list("pk", flat=True)[:PURGE_BATCH_SIZE]
+        )
+        if not ids:
+            return
+
+        with transaction.atomic():
+            files = releaser(model, ids) if releaser else 0
+            deleted = delete_without_signals(model.objects.filter(pk__in=ids))
+            purge.deleted_rows[key] = purge.deleted_rows.get(key, 0) + deleted
+            purge.deleted_files += files
+            purge.save(update_fields=["deleted_rows", "deleted_files"])
+        last_pk = ids[-1]
+
+
+def run_purge(purge_id) -> AccountPurge:
+    """
+    执行（或继续执行）清除任务
+
+    失败时记录错误并把状态置为 failed，重新执行会从剩余数据继续。
+    """
+    purge = AccountPurge.objects.get(pk=purge_id)
+    if purge.status == AccountPurge.STATUS_DONE:
+        return purge
+
+    purge.status = AccountPurge.STATUS_RUNNING
+    purge.started_at = purge.started_at or timezone.now()
+    purge.error = ""
+    purge.save(update_fields=["status", "started_at", "error"])
+
+    try:
+        for key, model, conditions in PURGE_STEPS:
+            model, filters = _resolve(model, conditions, purge.user_id)
+            if purge.stage != key:
+                purge.stage = key
+                purge.save(update_fields=["stage"])
+            _delete_batches(purge, key, model, filters)
+
+        purge.stage = "user"
+        purge.save(update_fields=["stage"])
+        user = User.objects.filter(pk=purge.user_id).first()
+        if user is not None:
+            if user.avatar:
+                user.avatar.delete(save=False)
+                purge.deleted_files += 1
+            # 剩余的资料、用量台账等少量关联行由正常级联删除
+            user.delete()
+    except Exception as e:
+        logger.exception("账号清除失败: %s", purge.user_id)
+        purge.status = AccountPurge.STATUS_FAILED
+        purge.error = str(e)
+        purge.save(update_fields=["status", "error"])
+        return purge
+
+    purge.status = AccountPurge.STATUS_DONE
+    purge.stage = ""
+    purge.finished_at = timezone.now()
+    purge.save(update_fields=["status", "stage", "deleted_files", "finished_at"])
+    logger.info(
+        "账号清除完成: %s，删除 %s 行、%s 个文件",
+        purge.username,
+        sum(purge.deleted_rows.values()),
+        purge.deleted_files,
+    )
+    return purge
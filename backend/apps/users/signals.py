@@ -0,0 +1,115 @@
+"""
+Users signals.
+
+Record a tombstone whenever exportable user content is deleted, so that
+incremental exports can tell restores what to remove. Drop the cached
+authentication record whenever a user or profile changes. Keep the profile
+note/category/tag counters in step with creates, deletes and archive toggles.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.categories.models import Category
+from apps.notes.models import Note
+from apps.tags.models import Tag
+from .authentication import invalidate_cached_user
+from .backup import TOMBSTONE_MODELS, deleted_with_owner, record_deletions
+from .counters import adjust_counters, reconcile_counters
+from .models import Profile, User
+
+
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """Remember the deleted object unless the whole account is going away."""
+    if deleted_with_owner(origin):
+        return
+    record_deletions(sender._meta.model_name, [(instance.owner_id, instance.pk)])
+
+
+for model in TOMBSTONE_MODELS.values():
+    post_delete.connect(
+        record_tombstone, sender=model, dispatch_uid=f"tombstone:{model}"
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Saving a user (including password changes) invalidates its cached record."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    """Preferences are cached alongside the user."""
+    invalidate_cached_user(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def seed_profile_counters(sender, instance, created, **kwargs):
+    """Profiles are created lazily, so start them from the current totals."""
+    if created:
+        reconcile_counters([instance.user_id])
+
+
+@receiver(pre_save, sender=Note)
+def remember_stored_archive_state(sender, instance, **kwargs):
+    """Look up the stored archive flag when the note wasn't loaded with it."""
+    update_fields = kwargs.get("update_fields")
+    if (
+        instance.pk
+        and not hasattr(instance, "_loaded_is_archived")
+        and (update_fields is None or "is_archived" in update_fields)
+    ):
+        instance._stored_is_archived = (
+            Note.objects.filter(pk=instance.pk)
+            .values_list("is_archived", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Note)
+def count_saved_note(sender, instance, created, **kwargs):
+    """Only unarchived notes count; archiving or restoring moves the counter."""
+    if created:
+        if not instance.is_archived:
+            adjust_counters(instance.owner_id, notes_count=1)
+        return
+
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "is_archived" not in update_fields:
+        return
+    # Note.save() refreshes _loaded_is_archived only after post_save has run
+    if hasattr(instance, "_loaded_is_archived"):
+        previous = instance._loaded_is_archived
+    else:
+        previous = instance.__dict__.pop("_stored_is_archived", None)
+        if previous is None:
+            return
+    if previous != instance.is_archived:
+        delta = -1 if instance.is_archived else 1
+        adjust_counters(instance.owner_id, notes_count=delta)
+
+
+@receiver(post_delete, sender=Note)
+def uncount_deleted_note(sender, instance, **kwargs):
+    """An unknown (deferred) archive flag is treated as counted."""
+    if "is_archived" in instance.get_deferred_fields() or not instance.is_archived:
+        adjust_counters(instance.owner_id, notes_count=-1)
+
+
+COUNTER_FOR_MODEL = {Category: "categories_count", Tag: "tags_count"}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def count_created_object(sender, instance, created, **kwargs):
+    if created:
+        adjust_counters(instance.owner_id, **{COUNTER_FOR_MODEL[sender]: 1})
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def uncount_deleted_object(sender, instance, **kwargs):
+    adjust_counters(instance.owner_id, **{COUNTER_FOR_MODEL[sender]: -1})
@@ -0,0 +1,166 @@
+"""
+存储用量台账模块
+
+每个用户一行 StorageUsage：
+- 增量维护：笔记、附件、收藏的保存/删除信号调用 adjust_usage，
+  以 F() 表达式原子地加减，并发写入不会丢失更新
+- 按需建行：台账行不存在时增量被忽略，首次读取时按聚合结果建行
+  （避免在删除用户的级联过程中为该用户重新建行）
+- 对账：reconcile_usage 每张表一条 GROUP BY 聚合查询重新计算全部用户
+"""
+
+from collections import defaultdict
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StorageUsage, User
+
+USAGE_FIELDS = [
+    "notes_count",
+    "notes_bytes",
+    "attachments_count",
+    "attachments_bytes",
+    "attachments_stored_bytes",
+    "collections_count",
+    "collections_bytes",
+]
+
+
+class ByteLength(models.Func):
+    """文本的 UTF-8 字节数（PostgreSQL / MySQL 的 OCTET_LENGTH）"""
+
+    function = "OCTET_LENGTH"
+    output_field = models.BigIntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="LENGTH(CAST(%(expressions)s AS BLOB))",
+            **extra_context,
+        )
+
+
+def text_size(text) -> int:
+    """文本的 UTF-8 字节数（笔记占用按正文计算）"""
+    return len((text or "").encode("utf-8"))
+
+
+def note_size_expression():
+    """与 text_size(note.content) 一致的数据库表达式"""
+    return Coalesce(ByteLength("content"), Value(0))
+
+
+def adjust_usage(user_id, **deltas) -> None:
+    """
+    原子地增减用户的用量计数
+
+    Args:
+        user_id: 用户 ID
+        **deltas: 字段名 -> 增量（可为负），0 被忽略
+    """
+    changes = {
+        field: F(field) + delta for field, delta in deltas.items() if delta
+    }
+    if not user_id or not changes:
+        return
+    StorageUsage.objects.filter(user_id=user_id).update(
+        **changes, updated_at=timezone.now()
+    )
+
+
+def _aggregate_usage(user_ids=None) -> dict:
+    """每张表一条聚合查询，返回 {用户 ID: {字段: 值}}"""
+    from apps.attachments.models import Attachment, AttachmentBlob
+    from apps.collections.models import Collection
+    from apps.notes.models import Note
+
+    def scoped(queryset):
+        if user_ids is not None:
+            queryset = queryset.filter(owner_id__in=user_ids)
+        return queryset.order_by().values("owner_id")
+
+    usage = defaultdict(dict)
+    for row in scoped(Note.objects).annotate(
+        total=Count("id"), bytes=Sum(note_size_expression())
+    ):
+        usage[row["owner_id"]].update(
+            notes_count=row["total"], notes_bytes=row["bytes"] or 0
+        )
+    for row in scoped(Attachment.objects).annotate(
+        total=Count("id"),
+        bytes=Sum("size"),
+        owned=Sum("size", filter=Q(blob__isnull=True)),
+    ):
+        usage[row["owner_id"]].update(
+            attachments_count=row["total"],
+            attachments_bytes=row["bytes"] or 0,
+            attachments_stored_bytes=row["owned"] or 0,
+        )
+    for row in scoped(AttachmentBlob.objects).annotate(bytes=Sum("size")):
+        stored = usage[row["owner_id"]].get("attachments_stored_bytes", 0)
+        usage[row["owner_id"]]["attachments_stored_bytes"] = stored + (
+            row["bytes"] or 0
+        )
+    for row in scoped(Collection.objects).annotate(
+        total=Count("id"), bytes=Sum(F("text_size") + F("html_size"))
+    ):
+        usage[row["owner_id"]].update(
+            collections_count=row["total"], collections_bytes=row["bytes"] or 0
+        )
+    return usage
+
+
+def _build_rows(user_ids, usage) -> list[StorageUsage]:
+    rows = []
+    for user_id in user_ids:
+        values = {field: 0 for field in USAGE_FIELDS}
+        values.update(usage.get(user_id, {}))
+        rows.append(StorageUsage(user_id=user_id, **values))
+    return rows
+
+
+def reconcile_usage(user_ids=None) -> int:
+    """
+    按当前数据重新计算用量台账（不存在的行会被创建）
+
+    Args:
+        user_ids: 只处理这些用户；None 表示全部用户
+
+    Returns:
+        写入的台账行数
+    """
+    users = User.objects.order_by("id")
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+    ids = list(users.values_list("id", flat=True))
+    if not ids:
+        return 0
+
+    rows = _build_rows(ids, _aggregate_usage(user_ids))
+    StorageUsage.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=USAGE_FIELDS + ["updated_at"],
+    )
+    return len(rows)
+
+
+def get_usage(user) -> StorageUsage:
+    """读取用户的用量台账，不存在时按聚合结果创建"""
+    usage = StorageUsage.objects.filter(user=user).first()
+    if usage is not None:
+        return usage
+
+    row = _build_rows([user.id], _aggregate_usage([user.id]))[0]
+    try:
+        with transaction.atomic():
+            row.save(force_insert=True)
+    except IntegrityError:
+        # 并发请求已建行
+        return StorageUsage.objects.get(user=user)
+    return row
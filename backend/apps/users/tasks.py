@@ -0,0 +1,59 @@
+"""
+用户后台任务模块
+
+账号清除在请求结束后由进程内单线程执行器完成，删除账号的请求只停用用户
+并创建任务。进程重启导致中断的任务由 purge_accounts 命令继续执行。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_purge_executor() -> ThreadPoolExecutor:
+    """获取进程内共享的清除执行器（单线程，任务依次执行，避免同时占用数据库）"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="account-purge"
+                )
+    return _executor
+
+
+def _run(purge_id) -> None:
+    from .purge import run_purge
+
+    close_old_connections()
+    try:
+        run_purge(purge_id)
+    except Exception:
+        logger.exception("账号清除任务执行失败: %s", purge_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_purge(purge) -> None:
+    """
+    提交账号清除任务
+
+    ACCOUNT_PURGE_EAGER 为真时在当前线程同步执行（测试/本地调试），
+    否则在事务提交后交给后台执行器。
+    """
+    from .purge import run_purge
+
+    if settings.ACCOUNT_PURGE_EAGER:
+        run_purge(purge.id)
+        return
+
+    purge_id = purge.id
+    transaction.on_commit(lambda: get_purge_executor().submit(_run, purge_id))
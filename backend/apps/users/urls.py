@@ -16,6 +16,7 @@ API Endpoints:
 - DELETE /api/auth/sessions/{id}/  - 退出指定设备
 - GET    /api/auth/storage/        - 获取存储统计
 - GET    /api/auth/export/         - 导出用户数据
+- POST   /api/auth/import/         - 导入用户数据
 - DELETE /api/auth/account/        - 删除账户
 """
 
@@ -32,6 +33,7 @@ from .views import (
     SessionsView,
     StorageView,
     ExportView,
+    ImportView,
     DeleteAccountView,
 )
 
@@ -55,6 +57,8 @@ urlpatterns = [
     path("storage/", StorageView.as_view(), name="storage"),
     # 数据导出
     path("export/", ExportView.as_view(), name="export"),
+    # 数据导入
+    path("import/", ImportView.as_view(), name="import"),
     # 账户删除
     path("account/", DeleteAccountView.as_view(), name="delete-account"),
     # 用户详情
@@ -9,7 +9,10 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from .authentication import invalidate_cached_user
 from .serializers import (
     UserCreateSerializer,
     UserSerializer,
@@ -165,6 +168,7 @@ class LogoutView(APIView):
         """
         处理用户登出
         """
+        invalidate_cached_user(request.user.pk)
         try:
             refresh_token = request.data.get("refresh")
             if refresh_token:
@@ -515,43 +519,24 @@ class StorageView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        """获取用户存储使用统计"""
-        from .models import Profile
-        from apps.notes.models import Note
-        from apps.attachments.models import Attachment
-
-        # 获取用户统计数据
-        try:
-            profile = Profile.objects.get(user=request.user)
-            notes_count = profile.notes_count
-        except Profile.DoesNotExist:
-            notes_count = Note.objects.filter(user=request.user).count()
-
-        # 统计附件大小
-        attachments = Attachment.objects.filter(user=request.user)
-        attachments_size = (
-            attachments.aggregate(total_size=Count("file"))["total_size"] or 0
-        )
-
-        # 统计笔记中的图片（简化处理）
-        notes_with_images = Note.objects.filter(
-            user=request.user, content__contains="<img"
-        ).count()
+        """获取用户存储使用统计（读取增量维护的用量台账，不扫描内容表）"""
+        from .storage import get_usage
 
+        usage = get_usage(request.user)
         return Response(
             {
                 "code": 200,
                 "message": "获取成功",
                 "data": {
-                    "notes_count": notes_count,
-                    "notes_size": notes_count * 2,  # 估算：每条笔记约 2KB
-                    "attachments_count": attachments.count(),
-                    "attachments_size": attachments_size,
-                    "images_count": notes_with_images,
-                    "images_size": notes_with_images * 100,  # 估算
-                    "total_size": (notes_count * 2)
-                    + attachments_size
-                    + (notes_with_images * 100),
+                    "notes_count": usage.notes_count,
+                    "notes_size": usage.notes_bytes,
+                    "attachments_count": usage.attachments_count,
+                    "attachments_size": usage.attachments_bytes,
+                    "attachments_stored_size": usage.attachments_stored_bytes,
+                    "collections_count": usage.collections_count,
+                    "collections_size": usage.collections_bytes,
+                    "total_size": usage.total_bytes,
+                    "updated_at": usage.updated_at,
                 },
             },
             status=status.HTTP_200_OK,
@@ -562,102 +547,100 @@ class ExportView(APIView):
     """
     数据导出视图
 
-    GET /api/auth/export/ - 导出用户数据
+    GET /api/auth/export/?type=json|ndjson|zip - 流式导出用户数据
+    GET /api/auth/export/?since=<上次导出的 watermark> - 增量导出
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        """导出用户的所有数据"""
-        from apps.notes.models import Note
-        from apps.categories.models import Category
-        from apps.tags.models import Tag
-
-        user = request.user
+        """以流式响应导出用户的数据（type 默认为 json，不带 since 为全量导出）"""
+        from .backup import parse_watermark, tombstone_cutoff
+        from .export import CONTENT_TYPES, STREAMS, export_filename
 
-        # 收集用户数据
-        data = {
-            "exported_at": timezone.now().isoformat(),
-            "user": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "bio": user.bio,
-                "avatar": str(user.avatar) if user.avatar else None,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-            },
-            "preferences": None,
-            "notes": [],
-            "categories": [],
-            "tags": [],
-        }
+        # 不使用 format 参数：DRF 会把它当作渲染器选择
+        export_format = request.query_params.get("type", "json")
+        if export_format not in STREAMS:
+            return Response(
+                {"code": 400, "message": "不支持的导出格式"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # 获取偏好设置
         try:
-            profile = getattr(user, "profile", None)
-            if profile:
-                data["preferences"] = {
-                    "theme": profile.theme,
-                    "language": profile.language,
-                    "timezone": profile.timezone,
-                }
-        except Exception:
-            pass
+            since = parse_watermark(request.query_params.get("since"))
+        except ValueError:
+            return Response(
+                {"code": 400, "message": "since 必须是 ISO 8601 时间"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if since is not None and since < tombstone_cutoff():
+            # 更早的删除记录已被清理，增量导出会漏掉删除
+            return Response(
+                {"code": 400, "message": "增量导出的起点超出删除记录保留期，请重新全量导出"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # 获取笔记
-        notes = Note.objects.filter(user=user).values(
-            "id",
-            "title",
-            "content",
-            "is_archived",
-            "is_pinned",
-            "category_id",
-            "created_at",
-            "updated_at",
+        response = StreamingHttpResponse(
+            STREAMS[export_format](request.user, since),
+            content_type=CONTENT_TYPES[export_format],
         )
-        data["notes"] = list(notes)
-
-        # 获取分类
-        categories = Category.objects.filter(user=user).values(
-            "id",
-            "name",
-            "description",
-            "parent_id",
-            "tree_id",
-            "level",
-            "created_at",
-            "updated_at",
+        response["Content-Disposition"] = content_disposition_header(
+            True, export_filename(export_format, since)
         )
-        data["categories"] = list(categories)
+        response["Cache-Control"] = "no-store"
+        return response
 
-        # 获取标签
-        tags = Tag.objects.filter(user=user).values("id", "name", "color", "created_at")
-        data["tags"] = list(tags)
 
-        # 计算笔记中引用的标签（需要反查关联表）
-        from apps.notes.models import NoteTags
+class ImportView(APIView):
+    """
+    数据导入视图
 
-        note_tags = NoteTags.objects.filter(
-            note_id__in=[n["id"] for n in notes]
-        ).values("note_id", "tag_id")
+    POST /api/auth/import/ - 上传全量导出文件（multipart 字段 file），作为新数据导入
+    """
 
-        data["note_tags"] = list(note_tags)
+    permission_classes = [IsAuthenticated]
 
-        return Response(
-            {
-                "code": 200,
-                "message": "导出成功",
-                "data": data,
-            },
-            status=status.HTTP_200_OK,
-        )
+    def post(self, request):
+        """导入导出文件，所有对象获得新 ID，返回各类记录的导入条数"""
+        import os
+        import tempfile
+
+        from django.conf import settings
+
+        from .backup import RestoreError
+        from .imports import import_export
+
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"code": 400, "message": "请上传导出文件"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # ExportReader 需要可重复打开的路径，先按块写入临时文件
+        settings.UPLOAD_TEMP_ROOT.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=settings.UPLOAD_TEMP_ROOT, suffix=".import")
+        try:
+            with os.fdopen(fd, "wb") as target:
+                for chunk in upload.chunks():
+                    target.write(chunk)
+            counts = import_export(request.user, path)
+        except RestoreError as e:
+            return Response(
+                {"code": 400, "message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        finally:
+            os.unlink(path)
+
+        return Response({"code": 200, "message": "导入成功", "data": dict(counts)})
 
 
 class DeleteAccountView(APIView):
     """
     账户删除视图
 
-    DELETE /api/auth/account/ - 删除账户
+    DELETE /api/auth/account/ - 删除账户（立即停用，数据在后台清除）
     """
 
     permission_classes = [IsAuthenticated]
@@ -690,10 +673,18 @@ class DeleteAccountView(APIView):
         except Exception:
             pass
 
-        # 删除用户数据（级联删除由模型定义处理）
-        user.delete()
+        # 立即停用；数据量可能很大，由后台任务分批删除
+        from .purge import request_purge
+        from .tasks import enqueue_purge
+
+        purge = request_purge(user)
+        enqueue_purge(purge)
 
         return Response(
-            {"code": 200, "message": "账户已成功删除"},
+            {
+                "code": 200,
+                "message": "账户已成功删除",
+                "data": {"purge_id": purge.id},
+            },
             status=status.HTTP_200_OK,
         )
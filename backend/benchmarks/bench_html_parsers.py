@@ -0,0 +1,79 @@
+"""
+HTML 解析后端基准
+
+对 corpus 目录中的页面分别用各解析后端执行正文提取（apps.collections.parsers），
+输出每页耗时，并校验各后端提取的元信息一致。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_html_parsers
+    python -m benchmarks.bench_html_parsers --corpus /path/to/saved/pages -n 20
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from apps.collections.parsers import PARSER_BACKENDS, get_parser_backend
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+PAGE_URL = "https://example.com/page"
+
+
+def _available_backends():
+    backends = []
+    for name in PARSER_BACKENDS:
+        try:
+            backends.append(get_parser_backend(name))
+        except ValueError as e:
+            print(f"跳过 {name}：{e}")
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", type=Path, default=CORPUS_DIR)
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    pages = sorted(args.corpus.glob("*.html"))
+    if not pages:
+        raise SystemExit(f"{args.corpus} 中没有 HTML 页面，请先生成语料")
+
+    backends = _available_backends()
+    totals = {backend.name: 0.0 for backend in backends}
+
+    print(f"{'page':<24} {'KB':>6} " + " ".join(f"{b.name:>14}" for b in backends))
+    for path in pages:
+        html = path.read_text(encoding="utf-8", errors="replace")
+        timings = []
+        results = {}
+        for backend in backends:
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                results[backend.name] = backend.parse(html, PAGE_URL)
+            elapsed = (time.perf_counter() - started) / args.iterations
+            totals[backend.name] += elapsed
+            timings.append(elapsed)
+
+        metadata = {
+            name: {k: v for k, v in result.items() if k != "content"}
+            for name, result in results.items()
+        }
+        consistent = len({repr(m) for m in metadata.values()}) <= 1
+        mismatch = "" if consistent else "  元信息不一致"
+        print(
+            f"{path.name:<24} {len(html.encode('utf-8')) // 1024:>6} "
+            + " ".join(f"{t * 1000:>11.2f} ms" for t in timings)
+            + mismatch
+        )
+
+    baseline = totals.get("html.parser")
+    for name, total in totals.items():
+        speedup = ""
+        if baseline and name != "html.parser":
+            speedup = f"  ({baseline / total:.1f}x)"
+        print(f"{name:<14} 合计 {total * 1000:8.2f} ms/轮{speedup}")
+
+
+if __name__ == "__main__":
+    main()
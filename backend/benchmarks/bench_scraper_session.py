@@ -0,0 +1,110 @@
+"""
+抓取会话连接复用基准
+
+在本地启动一个 keep-alive HTTP 服务，对比：
+- 每次 requests.get（每次新建连接）
+- utils.http_client.build_session() 会话（复用连接池）
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_scraper_session
+    python -m benchmarks.bench_scraper_session --requests 500 --latency 0.002
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils.dns_cache import DNSCache
+from utils.http_client import build_session
+
+PAGE = b"<html><head><title>bench</title></head><body>%s</body></html>" % (
+    b"x" * 20_000
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 避免响应头/响应体分两次发送时触发 Nagle + 延迟 ACK 的 40ms 停顿
+    disable_nagle_algorithm = True
+    # 模拟建连开销（TCP 握手 + TLS），每条新连接只付一次
+    handshake_latency = 0.0
+
+    def setup(self):
+        super().setup()
+        if self.handshake_latency:
+            time.sleep(self.handshake_latency)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+def _run(label, fetch, url, count, server):
+    server.connections = 0
+    started = time.perf_counter()
+    for _ in range(count):
+        fetch(url).raise_for_status()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<18} {count} 次请求  {elapsed:7.3f}s  "
+        f"{elapsed / count * 1000:6.2f} ms/次  新建连接 {server.connections}"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--latency", type=float, default=0.001, help="模拟每条新连接的握手耗时（秒）"
+    )
+    args = parser.parse_args()
+
+    _Handler.handshake_latency = args.latency
+    server = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+
+    try:
+        bare = _run(
+            "requests.get",
+            lambda u: requests.get(u, timeout=5),
+            url,
+            args.requests,
+            server,
+        )
+        # 基准服务在回环地址上，跳过建连时的内网地址校验
+        session = build_session(resolve_host=DNSCache().resolve)
+        pooled = _run(
+            "pooled session",
+            lambda u: session.get(u, timeout=5),
+            url,
+            args.requests,
+            server,
+        )
+        print(f"加速比 {bare / pooled:.2f}x")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+生成 HTML 解析基准语料
+
+语料为确定性合成页面，结构模仿常见的三类收藏来源：
+博客文章、带大型侧边栏的文档页、脚本与广告密集的资讯门户。
+也可以把自己保存的真实页面（*.html）放进 corpus 目录一起测。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.make_corpus
+"""
+
+import random
+from pathlib import Path
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+
+WORDS = (
+    "knowledge graph note link search index cache query parser token vector "
+    "python django request response session stream buffer thread worker pool "
+    "知识 管理 笔记 收藏 标签 分类 图谱 检索 解析 缓存 性能 并发"
+).split()
+
+
+def _sentence(rng, length=14):
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def _paragraphs(rng, count):
+    return "\n".join(
+        f"<p>{' '.join(_sentence(rng) for _ in range(5))} "
+        f'<a href="/post/{rng.randint(1, 9999)}">{rng.choice(WORDS)}</a></p>'
+        for _ in range(count)
+    )
+
+
+def _head(title, rng, scripts=0, styles=0):
+    extra = "\n".join(
+        f"<script>window.__data{i} = {{{', '.join(f'k{j}: {j}' for j in range(40))}}};"
+        "</script>"
+        for i in range(scripts)
+    )
+    extra += "\n".join(
+        f"<style>.c{i} {{ margin: {i}px; padding: {i % 7}px; "
+        f"color: #{i:06x}; }}</style>"
+        for i in range(styles)
+    )
+    return f"""<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<meta name="description" content="{_sentence(rng)}">
+<meta property="og:title" content="{title}">
+<meta property="og:description" content="{_sentence(rng)}">
+<meta property="og:image" content="https://cdn.example.com/{rng.randint(1, 999)}.png">
+<meta name="twitter:card" content="summary_large_image">
+<link rel="stylesheet" href="/static/site.css">
+<link rel="icon" href="/static/favicon.png">
+{extra}
+</head>"""
+
+
+def blog_article(rng):
+    return f"""<!DOCTYPE html><html lang="zh-CN">{_head("博客文章：缓存设计", rng, 6, 4)}
+<body><header><nav>{"".join(f'<a href="/c/{i}">分类 {i}</a>' for i in range(20))}</nav>
+</header><article><h1>缓存设计</h1>{_paragraphs(rng, 60)}</article>
+<aside>{_paragraphs(rng, 5)}</aside><footer>© example</footer></body></html>"""
+
+
+def docs_page(rng):
+    sidebar = "".join(
+        f'<li><a href="/docs/{i}">{_sentence(rng, 3)}</a></li>' for i in range(1500)
+    )
+    code = "\n".join(
+        f"<pre><code>def f{i}(x):\n    return x * {i}\n</code></pre>" for i in range(80)
+    )
+    return f"""<!DOCTYPE html><html>{_head("API Reference", rng, 10, 20)}
+<body><nav class="sidebar"><ul>{sidebar}</ul></nav>
+<main><h1>API Reference</h1>{_paragraphs(rng, 120)}{code}</main>
+<footer>{_paragraphs(rng, 3)}</footer></body></html>"""
+
+
+def news_portal(rng):
+    blocks = "".join(
+        f'<div class="card"><h3>{_sentence(rng, 6)}</h3>{_paragraphs(rng, 2)}'
+        f'<aside class="ad"><script>loadAd({i})</script>{_sentence(rng)}</aside></div>'
+        for i in range(250)
+    )
+    return f"""<!DOCTYPE html><html>{_head("今日资讯", rng, 60, 40)}
+<body><header>{_paragraphs(rng, 2)}</header><div id="root">{blocks}</div>
+<noscript>enable js</noscript><footer>{_paragraphs(rng, 4)}</footer></body></html>"""
+
+
+def main():
+    CORPUS_DIR.mkdir(exist_ok=True)
+    for name, build in (
+        ("blog_article", blog_article),
+        ("docs_page", docs_page),
+        ("news_portal", news_portal),
+    ):
+        html = build(random.Random(name))
+        path = CORPUS_DIR / f"{name}.html"
+        path.write_text(html, encoding="utf-8")
+        print(f"{path.name}: {len(html.encode('utf-8')) // 1024} KB")
+
+
+if __name__ == "__main__":
+    main()
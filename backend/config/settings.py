@@ -140,6 +140,7 @@ INSTALLED_APPS = [
     "apps.graph",
     "apps.collections",
     "apps.attachments",
+    "apps.dedupe",
 ]
 
 MIDDLEWARE = [
@@ -226,6 +227,44 @@ CACHES = {
     }
 }
 
+# JWT 认证缓存用户记录（apps.users.authentication）。需指向多进程共享的缓存
+# （如 Redis）；为空或指向进程内缓存时不缓存，除非显式允许（仅限单进程部署）
+AUTH_USER_CACHE_ALIAS = os.getenv("AUTH_USER_CACHE_ALIAS", "")
+AUTH_USER_CACHE_ALLOW_LOCAL = os.getenv(
+    "AUTH_USER_CACHE_ALLOW_LOCAL", "False"
+).lower() in ("true", "1", "yes")
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", "300"))  # 秒
+
+# URL scraping worker pool
+# 收藏创建后在进程内线程池中抓取网页；SCRAPE_EAGER 为真时同步执行（测试/调试）
+SCRAPE_EAGER = os.getenv("SCRAPE_EAGER", "False").lower() in ("true", "1", "yes")
+SCRAPE_MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "8"))
+SCRAPE_PER_DOMAIN_CONCURRENCY = int(os.getenv("SCRAPE_PER_DOMAIN_CONCURRENCY", "2"))
+SCRAPE_PER_DOMAIN_RATE = float(os.getenv("SCRAPE_PER_DOMAIN_RATE", "1.0"))  # 次/秒
+# 单个页面响应体上限（字节，按解压后计算）
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(5 * 1024 * 1024)))
+# 正文解析后端：auto（安装 lxml 时用 lxml）/ lxml / html.parser
+SCRAPE_PARSER_BACKEND = os.getenv("SCRAPE_PARSER_BACKEND", "auto")
+# 抓取会话连接池：缓存的主机数 / 每主机保留的连接数
+SCRAPER_POOL_CONNECTIONS = int(os.getenv("SCRAPER_POOL_CONNECTIONS", "32"))
+SCRAPER_POOL_MAXSIZE = int(os.getenv("SCRAPER_POOL_MAXSIZE", "4"))
+# 抓取结果共享缓存：按规范化 URL 缓存成功的抓取结果（秒，0 表示不缓存）
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", "3600"))
+SCRAPE_CACHE_ALIAS = "default"
+# 单条缓存结果的正文上限（字节），超过时只缓存元信息
+SCRAPE_CACHE_MAX_ENTRY_BYTES = int(
+    os.getenv("SCRAPE_CACHE_MAX_ENTRY_BYTES", str(256 * 1024))
+)
+# 收藏图标/封面图代理：缩略图本地缓存目录与磁盘预算（字节）
+IMAGE_PROXY_ROOT = Path(
+    os.getenv("IMAGE_PROXY_ROOT", BASE_DIR / "data" / "image_cache")
+)
+IMAGE_PROXY_MAX_BYTES = int(os.getenv("IMAGE_PROXY_MAX_BYTES", str(256 * 1024 * 1024)))
+# 抓取时 DNS 解析缓存有效期（秒）；建连直接使用缓存中校验过的 IP
+SCRAPE_DNS_TTL = float(os.getenv("SCRAPE_DNS_TTL", "60"))
+# 抓取时最多跟随的重定向次数（每一跳都重新做 SSRF 校验）
+SCRAPE_MAX_REDIRECTS = int(os.getenv("SCRAPE_MAX_REDIRECTS", "5"))
+
 # Internationalization
 LANGUAGE_CODE = "zh-hans"
 
@@ -242,13 +281,68 @@ STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Content-addressed blob store (scraped page text / HTML)
+BLOB_STORE_ROOT = Path(os.getenv("BLOB_STORE_ROOT", BASE_DIR / "data" / "blobs"))
+# 收藏正文检索文本只保留开头的字符数（列表搜索只匹配这一段）
+COLLECTION_SEARCH_TEXT_MAX_CHARS = int(
+    os.getenv("COLLECTION_SEARCH_TEXT_MAX_CHARS", "20000")
+)
+
+# 附件分块上传：临时文件目录、分块大小、单文件上限与未完成会话的有效期
+UPLOAD_TEMP_ROOT = Path(os.getenv("UPLOAD_TEMP_ROOT", BASE_DIR / "data" / "uploads"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", str(1024 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 60 * 60)))  # 秒
+
+# 相似笔记的索引在后台重建；NOTE_SIMILARITY_EAGER 为真时同步执行（测试/调试）
+NOTE_SIMILARITY_EAGER = os.getenv("NOTE_SIMILARITY_EAGER", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+# 进程内缓存的相似度索引总大小上限（字节），超过时淘汰最久未用的用户索引
+NOTE_SIMILARITY_INDEX_CACHE_BYTES = int(
+    os.getenv("NOTE_SIMILARITY_INDEX_CACHE_BYTES", str(256 * 1024 * 1024))
+)
+
+# 图片附件衍生图在后台线程池生成；ATTACHMENT_DERIVATIVES_EAGER 为真时同步执行（测试/调试）
+ATTACHMENT_DERIVATIVES_EAGER = os.getenv(
+    "ATTACHMENT_DERIVATIVES_EAGER", "False"
+).lower() in ("true", "1", "yes")
+ATTACHMENT_DERIVATIVE_WORKERS = int(os.getenv("ATTACHMENT_DERIVATIVE_WORKERS", "2"))
+
+# 附件下载交给前端代理发送（nginx X-Accel-Redirect 的 internal location 前缀），
+# 为空时由 Django 直接返回文件
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = os.getenv("ATTACHMENT_ACCEL_REDIRECT_PREFIX", "")
+
+# srcset 中签名图片地址的有效期（秒），<img> 无法携带 JWT，凭签名访问
+ATTACHMENT_IMAGE_URL_MAX_AGE = int(
+    os.getenv("ATTACHMENT_IMAGE_URL_MAX_AGE", str(24 * 60 * 60))
+)
+
+# 接收上传文件时顺带计算 SHA-256，用于附件内容去重
+FILE_UPLOAD_HANDLERS = [
+    "apps.attachments.blobs.HashingMemoryFileUploadHandler",
+    "apps.attachments.blobs.HashingTemporaryFileUploadHandler",
+]
+
+# 删除记录保留天数：增量导出的起点不能早于该期限，超过后需重新全量导出
+EXPORT_TOMBSTONE_RETENTION_DAYS = int(os.getenv("EXPORT_TOMBSTONE_RETENTION_DAYS", "90"))
+
+# 删除账号时数据在后台分批清除；ACCOUNT_PURGE_EAGER 为真时同步执行（测试/调试）
+ACCOUNT_PURGE_EAGER = os.getenv("ACCOUNT_PURGE_EAGER", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_PAGINATION_CLASS": "utils.pagination.StandardPagination",
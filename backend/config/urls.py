@@ -9,6 +9,7 @@ API Structure:
 - /api/graph/ - Knowledge graph
 - /api/collections/ - Content collections
 - /api/attachments/ - File attachments
+- /api/dedupe/ - Near-duplicate detection
 """
 
 from django.contrib import admin
@@ -34,6 +35,8 @@ urlpatterns = [
     path("api/collections/", include("apps.collections.urls")),
     # API Attachments
     path("api/attachments/", include("apps.attachments.urls")),
+    # API Near-duplicate detection
+    path("api/dedupe/", include("apps.dedupe.urls")),
     # Health check
     path("api/health/", lambda request: JsonResponse({"status": "ok"}), name="health"),
 ]
@@ -9,6 +9,75 @@ from rest_framework.test import APIClient
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def eager_scraping(settings):
+    """Run collection scrapes inline instead of on the background pool."""
+    settings.SCRAPE_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def eager_derivatives(settings):
+    """Generate attachment thumbnails inline instead of on the background pool."""
+    settings.ATTACHMENT_DERIVATIVES_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def eager_similarity(settings):
+    """Refresh note similarity indexes inline instead of on the background executor."""
+    settings.NOTE_SIMILARITY_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def eager_account_purge(settings):
+    """Purge deleted accounts inline instead of on the background executor."""
+    settings.ACCOUNT_PURGE_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def blob_store_root(settings, tmp_path):
+    """Keep content blobs written by a test inside its temp directory."""
+    settings.BLOB_STORE_ROOT = tmp_path / "blobs"
+    return settings.BLOB_STORE_ROOT
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Keep uploaded attachments and partial uploads inside the temp directory."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.UPLOAD_TEMP_ROOT = tmp_path / "uploads"
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def image_proxy_root(settings, tmp_path):
+    """Keep proxied thumbnails written by a test inside its temp directory."""
+    settings.IMAGE_PROXY_ROOT = tmp_path / "image_cache"
+    return settings.IMAGE_PROXY_ROOT
+
+
+@pytest.fixture(autouse=True)
+def clear_scrape_cache():
+    """Scrape results are cached per URL; start every test cold."""
+    from django.core.cache import cache
+
+    cache.clear()
+
+
+@pytest.fixture
+def allow_local_urls(monkeypatch):
+    """Let scrapes reach stub servers on 127.0.0.1 past the SSRF guard."""
+    monkeypatch.setattr("apps.collections.services.validate_url", lambda url: url)
+    monkeypatch.setattr("apps.collections.image_proxy.validate_url", lambda url: url)
+    monkeypatch.setattr("utils.ssrf_validator.is_public_address", lambda ip: True)
+
+
+@pytest.fixture
+def user_cache(settings):
+    """Enable the authenticated-user cache on the test's local-memory cache."""
+    settings.AUTH_USER_CACHE_ALIAS = "default"
+    settings.AUTH_USER_CACHE_ALLOW_LOCAL = True
+
+
 @pytest.fixture
 def test_user(db):
     """Create a test user."""
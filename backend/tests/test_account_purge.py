@@ -0,0 +1,180 @@
+"""
+Tests for deactivating deleted accounts and purging their data in batches.
+"""
+
+import os
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+from rest_framework import status
+
+from apps.attachments.models import Attachment, AttachmentBlob
+from apps.categories.models import Category
+from apps.collections.models import Collection, ContentBlob
+from apps.graph.models import GraphLink, GraphNode
+from apps.notes.models import Note, NoteReference
+from apps.tags.models import Tag
+from apps.users import purge as purge_module
+from apps.users.models import AccountPurge, Profile, User
+from apps.users.purge import request_purge, run_purge
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _delete_account(client):
+    return client.delete(
+        "/api/auth/account/", {"password": "testpass123"}, format="json"
+    )
+
+
+@pytest.fixture
+def account(authenticated_client, test_user, test_note, test_category):
+    """An account with a category tree, linked notes, a collection and a file."""
+    child = Category.objects.create(
+        name="Child", slug="child", parent=test_category, owner=test_user
+    )
+    Category.objects.create(name="Leaf", slug="leaf", parent=child, owner=test_user)
+    Note.objects.create(
+        title="Linked",
+        content=f"[back](/notes/{test_note.id})",
+        category=child,
+        owner=test_user,
+    )
+    Collection.objects.create(
+        title="Article",
+        url="https://example.com/a",
+        content="shared body",
+        owner=test_user,
+    )
+    response = authenticated_client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile(
+                "doc.txt", b"file body", content_type="text/plain"
+            ),
+            "name": "doc",
+            "note": test_note.id,
+        },
+        format="multipart",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return test_user
+
+
+def test_delete_account_deactivates_immediately(
+    authenticated_client, account, settings
+):
+    settings.ACCOUNT_PURGE_EAGER = False
+
+    response = _delete_account(authenticated_client)
+
+    assert response.status_code == status.HTTP_200_OK
+    purge = AccountPurge.objects.get(id=response.data["data"]["purge_id"])
+    assert purge.status == AccountPurge.STATUS_PENDING
+    assert purge.username == "testuser"
+    assert not User.objects.get(id=account.id).is_active
+    # Data is still there until the purge runs, but the account is locked out
+    assert Note.objects.filter(owner=account).count() == 2
+    assert authenticated_client.get("/api/auth/profile/").status_code == 401
+
+
+def test_purge_removes_all_account_data_without_signals(
+    authenticated_client, account, django_capture_on_commit_callbacks
+):
+    other = User.objects.create_user(username="other", password="pass12345")
+    other_note = Note.objects.create(title="Other", content="kept", owner=other)
+    Collection.objects.create(
+        title="Same page",
+        url="https://example.com/a",
+        content="shared body",
+        owner=other,
+    )
+    attachment = Attachment.objects.get(owner=account)
+    blob_path = attachment.blob.file.path
+    deleted_notes = []
+
+    def spy(sender, instance, **kwargs):
+        deleted_notes.append(instance.id)
+
+    post_delete.connect(spy, sender=Note)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            response = _delete_account(authenticated_client)
+    finally:
+        post_delete.disconnect(spy, sender=Note)
+
+    purge = AccountPurge.objects.get(id=response.data["data"]["purge_id"])
+    assert purge.status == AccountPurge.STATUS_DONE
+    assert purge.finished_at is not None
+    assert purge.deleted_rows["notes"] == 2
+    assert purge.deleted_rows["categories"] == 3
+    assert purge.deleted_files == 1
+    assert deleted_notes == []
+
+    assert not User.objects.filter(id=account.id).exists()
+    assert not Profile.objects.filter(user_id=account.id).exists()
+    for model in (Note, Category, Tag, Collection, Attachment, AttachmentBlob):
+        assert not model.objects.filter(owner_id=account.id).exists()
+    assert not GraphNode.objects.filter(owner_id=account.id).exists()
+    assert not GraphLink.objects.filter(owner_id=account.id).exists()
+    assert not NoteReference.objects.exists()
+    assert not Note.tags.through.objects.exists()
+
+    # Other accounts are untouched and shared collection text keeps one reference
+    assert Note.objects.get(id=other_note.id).content == "kept"
+    assert Collection.objects.get(owner=other).content == "shared body"
+    assert list(ContentBlob.objects.values_list("refcount", flat=True)) == [1]
+    # The attachment file was removed after the batch committed
+    assert not os.path.exists(blob_path)
+
+
+def test_purge_deletes_in_keyed_batches(
+    account, monkeypatch, django_assert_max_num_queries
+):
+    monkeypatch.setattr(purge_module, "PURGE_BATCH_SIZE", 2)
+    for i in range(7):
+        Note.objects.create(title=f"Bulk {i}", content="x", owner=account)
+    purge = request_purge(account)
+
+    with django_assert_max_num_queries(500) as queries:
+        run_purge(purge.id)
+
+    note_deletes = [
+        query["sql"]
+        for query in queries.captured_queries
+        if query["sql"].startswith('DELETE FROM "notes_note" ')
+    ]
+    assert len(note_deletes) == 5
+    purge.refresh_from_db()
+    assert purge.status == AccountPurge.STATUS_DONE
+    assert purge.deleted_rows["notes"] == 9
+    assert not Note.objects.filter(owner_id=account.id).exists()
+
+
+def test_failed_purge_resumes_from_command(account, monkeypatch):
+    purge = request_purge(account)
+
+    def broken(model, ids):
+        raise RuntimeError("storage offline")
+
+    monkeypatch.setitem(purge_module.RELEASERS, "collections.Collection", broken)
+    run_purge(purge.id)
+
+    purge.refresh_from_db()
+    assert purge.status == AccountPurge.STATUS_FAILED
+    assert purge.stage == "collections"
+    assert "storage offline" in purge.error
+    # Tables before the failing step are already empty
+    assert not Note.objects.filter(owner_id=account.id).exists()
+    assert Collection.objects.filter(owner_id=account.id).exists()
+
+    monkeypatch.undo()
+    call_command("purge_accounts")
+
+    purge.refresh_from_db()
+    assert purge.status == AccountPurge.STATUS_DONE
+    assert purge.error == ""
+    assert not User.objects.filter(id=account.id).exists()
@@ -0,0 +1,151 @@
+"""
+Tests for content-hash deduplicated attachment storage.
+"""
+
+import hashlib
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.attachments.models import Attachment, AttachmentBlob
+
+
+pytestmark = pytest.mark.django_db
+
+SCREENSHOT = b"\x89PNG fake screenshot " * 100
+
+
+def _upload(client, data=SCREENSHOT, name="shot.png"):
+    response = client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile(name, data, content_type="image/png"),
+            "name": name.rsplit(".", 1)[0],
+        },
+        format="multipart",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return Attachment.objects.get(id=response.data["data"]["id"])
+
+
+def test_identical_uploads_share_one_file(
+    authenticated_client, media_root, monkeypatch
+):
+    # The hash is computed while the request body streams in, not re-read afterwards
+    monkeypatch.setattr(
+        "apps.attachments.blobs.hash_file",
+        lambda file: pytest.fail("upload was hashed a second time"),
+    )
+
+    first = _upload(authenticated_client)
+    second = _upload(authenticated_client, name="again.png")
+
+    blob = AttachmentBlob.objects.get()
+    assert blob.sha256 == hashlib.sha256(SCREENSHOT).hexdigest()
+    assert blob.refcount == 2
+    assert first.blob == second.blob == blob
+    assert first.file.name == second.file.name
+    assert second.name == "again"
+    assert len([p for p in media_root.rglob("*") if p.is_file()]) == 1
+
+
+def test_file_removed_with_last_reference(
+    authenticated_client, django_capture_on_commit_callbacks
+):
+    first = _upload(authenticated_client)
+    second = _upload(authenticated_client)
+    path = first.file.path
+
+    with django_capture_on_commit_callbacks(execute=True):
+        authenticated_client.delete(f"/api/attachments/{first.id}/")
+    assert AttachmentBlob.objects.get().refcount == 1
+    with open(path, "rb") as f:
+        assert f.read() == SCREENSHOT
+
+    with django_capture_on_commit_callbacks(execute=True):
+        authenticated_client.delete(f"/api/attachments/{second.id}/")
+    assert not AttachmentBlob.objects.exists()
+    with pytest.raises(FileNotFoundError):
+        open(path, "rb")
+
+
+def test_blobs_are_per_user(authenticated_client, django_user_model):
+    other = django_user_model.objects.create_user(
+        username="other", email="other@example.com", password="testpass123"
+    )
+    other_client = APIClient()
+    other_client.force_authenticate(user=other)
+
+    mine = _upload(authenticated_client)
+    theirs = _upload(other_client)
+
+    assert mine.blob != theirs.blob
+    assert AttachmentBlob.objects.count() == 2
+
+
+def test_chunked_upload_reuses_existing_blob(authenticated_client, settings):
+    existing = _upload(authenticated_client)
+    session = authenticated_client.post(
+        "/api/attachments/uploads/",
+        {"name": "big.png", "mime_type": "image/png", "total_size": len(SCREENSHOT)},
+        format="json",
+    ).data["data"]
+    authenticated_client.put(
+        f"/api/attachments/uploads/{session['id']}/chunk/?offset=0",
+        data=SCREENSHOT,
+        content_type="application/octet-stream",
+        HTTP_X_CHUNK_SHA256=hashlib.sha256(SCREENSHOT).hexdigest(),
+    )
+
+    response = authenticated_client.post(
+        f"/api/attachments/uploads/{session['id']}/complete/"
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    attachment = Attachment.objects.get(id=response.data["data"]["id"])
+    assert attachment.blob == existing.blob
+    assert AttachmentBlob.objects.get().refcount == 2
+
+
+def test_storage_reports_logical_and_physical_bytes(authenticated_client):
+    _upload(authenticated_client)
+    _upload(authenticated_client)
+    _upload(authenticated_client, data=b"other file", name="b.png")
+
+    data = authenticated_client.get("/api/auth/storage/").data["data"]
+
+    assert data["attachments_count"] == 3
+    assert data["attachments_size"] == 2 * len(SCREENSHOT) + 10
+    assert data["attachments_stored_size"] == len(SCREENSHOT) + 10
+
+
+def test_dedupe_command_merges_legacy_attachments(test_user):
+    legacy = [
+        Attachment.objects.create(
+            owner=test_user,
+            name=f"old{i}",
+            file=ContentFile(SCREENSHOT, name="old.png"),
+            mime_type="image/png",
+        )
+        for i in range(3)
+    ]
+    paths = [attachment.file.path for attachment in legacy]
+
+    call_command("dedupe_attachments")
+
+    blob = AttachmentBlob.objects.get()
+    assert blob.refcount == 3
+    assert set(Attachment.objects.values_list("blob", flat=True)) == {blob.id}
+    assert sum(1 for path in paths if open_or_none(path)) == 1
+
+
+def open_or_none(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,158 @@
+"""
+Tests for background image thumbnails and derivatives of attachments.
+"""
+
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.attachments.models import Attachment
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _image(size, image_format="PNG"):
+    output = io.BytesIO()
+    Image.new("RGB", size, (20, 120, 200)).save(output, image_format)
+    return output.getvalue()
+
+
+def _upload(client, data, name="shot.png", content_type="image/png"):
+    response = client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile(name, data, content_type=content_type),
+            "name": name,
+        },
+        format="multipart",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return Attachment.objects.get(id=response.data["data"]["id"])
+
+
+def test_upload_generates_width_derivatives(authenticated_client):
+    attachment = _upload(authenticated_client, _image((2000, 1000)))
+
+    assert (attachment.width, attachment.height) == (2000, 1000)
+    assert set(attachment.derivatives) == {"320", "640", "1280", "full"}
+    storage = attachment.file.storage
+    with storage.open(attachment.derivatives["640"]) as f:
+        thumb = Image.open(f)
+        assert thumb.size == (640, 320)
+        assert thumb.format == "WEBP"
+
+    data = authenticated_client.get(f"/api/attachments/{attachment.id}/").data["data"]
+    assert list(data["srcset"]) == ["320w", "640w", "1280w", "2000w"]
+    assert "/api/attachments/image/" in data["srcset"]["2000w"]
+
+    # Browsers fetch srcset images without the Authorization header
+    response = APIClient().get(data["srcset"]["640w"])
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "image/webp"
+    with storage.open(attachment.derivatives["640"]) as f:
+        assert b"".join(response.streaming_content) == f.read()
+    assert (
+        authenticated_client.get(
+            f"/api/attachments/{attachment.id}/download/?w=999"
+        ).status_code
+        == status.HTTP_404_NOT_FOUND
+    )
+
+
+def test_signed_image_urls_expire_and_reject_tampering(authenticated_client, settings):
+    attachment = _upload(authenticated_client, _image((2000, 1000)))
+    url = authenticated_client.get(f"/api/attachments/{attachment.id}/").data["data"][
+        "srcset"
+    ]["320w"]
+
+    assert APIClient().get(url.replace("/image/", "/image/x")).status_code == 404
+    settings.ATTACHMENT_IMAGE_URL_MAX_AGE = -1
+    assert APIClient().get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_small_and_webp_images_skip_redundant_derivatives(authenticated_client):
+    small = _upload(authenticated_client, _image((200, 100)))
+    webp = _upload(
+        authenticated_client,
+        _image((800, 400), "WEBP"),
+        name="pic.webp",
+        content_type="image/webp",
+    )
+
+    assert set(small.derivatives) == {"full"}
+    assert set(webp.derivatives) == {"320", "640"}
+    srcset = authenticated_client.get(f"/api/attachments/{webp.id}/").data["data"][
+        "srcset"
+    ]
+    # The original WebP is the full-size candidate
+    assert APIClient().get(srcset["800w"])["Content-Type"] == "image/webp"
+
+
+def test_generation_runs_after_commit_off_request(
+    authenticated_client, settings, monkeypatch, django_capture_on_commit_callbacks
+):
+    settings.ATTACHMENT_DERIVATIVES_EAGER = False
+    submitted = []
+
+    class FakeExecutor:
+        def submit(self, fn, attachment_id):
+            submitted.append(attachment_id)
+
+    monkeypatch.setattr(
+        "apps.attachments.tasks.get_derivative_executor", lambda: FakeExecutor()
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        attachment = _upload(authenticated_client, _image((1000, 500)))
+
+    assert attachment.derivatives == {}
+    assert submitted == [attachment.id]
+
+
+def test_unreadable_image_is_left_without_derivatives(authenticated_client):
+    attachment = _upload(authenticated_client, b"not really a png")
+
+    assert attachment.derivatives == {}
+    assert attachment.width is None
+
+
+def test_derivatives_deleted_with_last_reference(
+    authenticated_client, django_capture_on_commit_callbacks
+):
+    attachment = _upload(authenticated_client, _image((1000, 500)))
+    storage = attachment.file.storage
+    names = list(attachment.derivatives.values())
+    assert all(storage.exists(name) for name in names)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        authenticated_client.delete(f"/api/attachments/{attachment.id}/")
+
+    assert not any(storage.exists(name) for name in names)
+
+
+def test_backfill_command_uses_process_pool(test_user, settings):
+    settings.ATTACHMENT_DERIVATIVES_EAGER = False
+    first = Attachment.objects.create(
+        owner=test_user,
+        name="old",
+        file=ContentFile(_image((1500, 1500)), name="old.png"),
+        mime_type="image/png",
+    )
+    # A second row sharing the same file is filled in from one render
+    shared = Attachment.objects.create(
+        owner=test_user, name="copy", file=first.file.name, mime_type="image/png"
+    )
+
+    call_command("generate_derivatives", workers=2)
+
+    for attachment in (first, shared):
+        attachment.refresh_from_db()
+        assert (attachment.width, attachment.height) == (1500, 1500)
+        assert set(attachment.derivatives) == {"320", "640", "1280", "full"}
@@ -0,0 +1,158 @@
+"""
+Tests for the attachment download endpoint (Range, conditional requests, sendfile).
+"""
+
+import os
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.attachments.downloads import parse_range
+from apps.attachments.models import Attachment
+
+
+pytestmark = pytest.mark.django_db
+
+VIDEO = os.urandom(300 * 1024)
+
+
+@pytest.fixture
+def video(authenticated_client):
+    response = authenticated_client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile("clip.mp4", VIDEO, content_type="video/mp4"),
+            "name": "clip",
+        },
+        format="multipart",
+    )
+    return Attachment.objects.get(id=response.data["data"]["id"])
+
+
+def _get(client, attachment, **headers):
+    return client.get(f"/api/attachments/{attachment.id}/download/", **headers)
+
+
+def _body(response):
+    content = b"".join(response.streaming_content)
+    response.close()
+    return content
+
+
+def test_full_download_with_validators(authenticated_client, video):
+    response = _get(authenticated_client, video)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert _body(response) == VIDEO
+    assert response["Content-Type"] == "video/mp4"
+    assert response["Content-Length"] == str(len(VIDEO))
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["ETag"] == f'"{video.blob.sha256}"'
+    assert response["Last-Modified"]
+    assert response["Content-Disposition"].startswith("inline")
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [
+        ("bytes=100-199", 100, 199),
+        ("bytes=-500", len(VIDEO) - 500, len(VIDEO) - 1),
+        ("bytes=300000-", 300000, len(VIDEO) - 1),
+        ("bytes=307000-999999", 307000, len(VIDEO) - 1),
+    ],
+)
+def test_range_request_returns_partial_content(
+    authenticated_client, video, header, start, end
+):
+    response = _get(authenticated_client, video, HTTP_RANGE=header)
+
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response["Content-Range"] == f"bytes {start}-{end}/{len(VIDEO)}"
+    assert response["Content-Length"] == str(end - start + 1)
+    assert _body(response) == VIDEO[start : end + 1]
+
+
+def test_unsatisfiable_range(authenticated_client, video):
+    response = _get(authenticated_client, video, HTTP_RANGE="bytes=999999-")
+
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response["Content-Range"] == f"bytes */{len(VIDEO)}"
+
+
+def test_if_range_mismatch_returns_whole_file(authenticated_client, video):
+    etag = _get(authenticated_client, video)["ETag"]
+
+    stale = _get(
+        authenticated_client, video, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"'
+    )
+    fresh = _get(
+        authenticated_client, video, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag
+    )
+
+    assert stale.status_code == status.HTTP_200_OK
+    assert len(_body(stale)) == len(VIDEO)
+    assert fresh.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert _body(fresh) == VIDEO[:10]
+
+
+def test_conditional_request_not_modified(authenticated_client, video):
+    first = _get(authenticated_client, video)
+
+    by_etag = _get(authenticated_client, video, HTTP_IF_NONE_MATCH=first["ETag"])
+    by_date = _get(
+        authenticated_client, video, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+    )
+
+    assert by_etag.status_code == status.HTTP_304_NOT_MODIFIED
+    assert by_date.status_code == status.HTTP_304_NOT_MODIFIED
+    assert by_etag["ETag"] == first["ETag"]
+
+
+def test_accel_redirect_hands_off_to_proxy(authenticated_client, video, settings):
+    settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
+    response = _get(authenticated_client, video, HTTP_RANGE="bytes=0-9")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["X-Accel-Redirect"] == f"/protected-media/{video.file.name}"
+    assert response.content == b""
+
+
+def test_download_is_private(video, django_user_model):
+    other = django_user_model.objects.create_user(
+        username="other", email="other@example.com", password="testpass123"
+    )
+    client = APIClient()
+
+    assert _get(client, video).status_code == status.HTTP_401_UNAUTHORIZED
+    client.force_authenticate(user=other)
+    assert _get(client, video).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_non_media_types_are_served_as_downloads(authenticated_client):
+    response = authenticated_client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile(
+                "sheet.xlsx", b"PK\x03\x04", content_type="application/vnd.ms-excel"
+            ),
+            "name": "sheet.xlsx",
+        },
+        format="multipart",
+    )
+    attachment = Attachment.objects.get(id=response.data["data"]["id"])
+
+    download = _get(authenticated_client, attachment)
+
+    assert download["Content-Disposition"] == 'attachment; filename="sheet.xlsx"'
+    assert download["X-Content-Type-Options"] == "nosniff"
+    download.close()
+
+
+def test_parse_range_ignores_multipart_and_malformed_ranges():
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=abc", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=9-3", 100) is None
@@ -0,0 +1,118 @@
+"""
+Tests for batched attachment deletion and the orphan file collector.
+"""
+
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+
+from apps.attachments.models import Attachment, AttachmentBlob
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _upload(client, data, name="doc.txt"):
+    response = client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile(name, data, content_type="text/plain"),
+            "name": name,
+        },
+        format="multipart",
+    )
+    return Attachment.objects.get(id=response.data["data"]["id"])
+
+
+def _bulk_delete(client, ids):
+    return client.delete("/api/attachments/bulk_delete/", {"ids": ids}, format="json")
+
+
+def test_bulk_delete_reports_actual_count_and_releases_references(
+    authenticated_client, django_capture_on_commit_callbacks
+):
+    shared = [_upload(authenticated_client, b"same") for _ in range(3)]
+    unique = _upload(authenticated_client, b"unique")
+    unique_path = unique.file.path
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = _bulk_delete(
+            authenticated_client, [shared[0].id, shared[1].id, unique.id, 999999]
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"]["deleted"] == 3
+    assert list(Attachment.objects.values_list("id", flat=True)) == [shared[2].id]
+    assert AttachmentBlob.objects.get().refcount == 1
+    assert os.path.exists(shared[2].file.path)
+    assert not os.path.exists(unique_path)
+
+
+def test_bulk_delete_query_count_is_constant(
+    authenticated_client, django_assert_max_num_queries
+):
+    ids = [_upload(authenticated_client, f"file {i}".encode()).id for i in range(30)]
+
+    # Constant cost: one DELETE, one refcount UPDATE, one ledger UPDATE, one
+    # tombstone INSERT, no matter how many attachments are removed
+    with django_assert_max_num_queries(16):
+        response = _bulk_delete(authenticated_client, ids)
+
+    assert response.data["data"]["deleted"] == 30
+    assert not AttachmentBlob.objects.exists()
+
+
+def test_note_delete_removes_cascaded_attachment_files(
+    test_user, test_note, django_capture_on_commit_callbacks
+):
+    legacy = Attachment.objects.create(
+        owner=test_user,
+        note=test_note,
+        name="old",
+        file=ContentFile(b"legacy", name="old.txt"),
+        mime_type="text/plain",
+    )
+    path = legacy.file.path
+
+    with django_capture_on_commit_callbacks(execute=True):
+        test_note.delete()
+
+    assert not os.path.exists(path)
+
+
+def _stale(path):
+    os.utime(path, (1, 1))
+    return path
+
+
+def test_gc_reclaims_only_old_unreferenced_files(authenticated_client, media_root):
+    kept = _upload(authenticated_client, b"kept")
+    user_dir = media_root / "attachments" / str(kept.owner_id)
+    _stale(kept.file.path)
+    kept_derivative = os.path.splitext(kept.file.path)[0] + ".w320.webp"
+    open(kept_derivative, "wb").close()
+    _stale(kept_derivative)
+
+    orphan = user_dir / "orphan.png"
+    orphan.write_bytes(b"x" * 100)
+    orphan_derivative = user_dir / "orphan.w320.webp"
+    orphan_derivative.write_bytes(b"y" * 10)
+    for path in (orphan, orphan_derivative):
+        _stale(path)
+    recent = user_dir / "uploading.png"
+    recent.write_bytes(b"z")
+
+    call_command("gc_attachments", dry_run=True)
+    assert orphan.exists() and orphan_derivative.exists()
+
+    call_command("gc_attachments")
+
+    assert not orphan.exists()
+    assert not orphan_derivative.exists()
+    assert recent.exists()
+    assert os.path.exists(kept.file.path)
+    assert os.path.exists(kept_derivative)
@@ -0,0 +1,136 @@
+"""
+Tests for the cached JWT authentication class.
+"""
+
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.users.authentication import get_cached_user, user_cache_enabled
+from apps.users.models import Profile, User
+
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("user_cache")]
+
+
+def _user_queries(queries):
+    return [
+        query["sql"]
+        for query in queries.captured_queries
+        if '"users_user"' in query["sql"] or '"users_profile"' in query["sql"]
+    ]
+
+
+def test_cached_request_does_not_query_user_or_profile(
+    authenticated_client, test_user, django_assert_max_num_queries
+):
+    Profile.objects.create(user=test_user, theme="dark")
+    authenticated_client.get("/api/auth/preferences/")
+
+    with django_assert_max_num_queries(10) as queries:
+        response = authenticated_client.get("/api/auth/preferences/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"]["theme"] == "dark"
+    assert _user_queries(queries) == []
+
+
+def test_profile_and_user_saves_invalidate(authenticated_client, test_user):
+    authenticated_client.get("/api/auth/preferences/")
+
+    authenticated_client.put("/api/auth/preferences/", {"theme": "dark"}, format="json")
+    authenticated_client.put("/api/auth/profile/", {"bio": "hello"}, format="json")
+
+    assert (
+        authenticated_client.get("/api/auth/preferences/").data["data"]["theme"]
+        == "dark"
+    )
+    assert authenticated_client.get("/api/auth/profile/").data["data"]["bio"] == (
+        "hello"
+    )
+
+
+def test_saving_cached_user_keeps_uncached_fields(authenticated_client, test_user):
+    authenticated_client.get("/api/auth/profile/")
+
+    authenticated_client.put("/api/auth/profile/", {"bio": "hi"}, format="json")
+
+    user = User.objects.get(id=test_user.id)
+    assert user.bio == "hi"
+    assert user.check_password("testpass123")
+    assert user.email == "test@example.com"
+
+
+def test_password_change_through_cached_user(authenticated_client, test_user):
+    authenticated_client.get("/api/auth/profile/")
+
+    response = authenticated_client.post(
+        "/api/auth/password/",
+        {
+            "old_password": "testpass123",
+            "new_password": "N3w-secret-pass",
+            "new_password_confirm": "N3w-secret-pass",
+        },
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert User.objects.get(id=test_user.id).check_password("N3w-secret-pass")
+
+
+def test_deactivated_user_is_rejected_immediately(authenticated_client, test_user):
+    assert authenticated_client.get("/api/auth/profile/").status_code == 200
+
+    test_user.is_active = False
+    test_user.save(update_fields=["is_active"])
+
+    assert authenticated_client.get("/api/auth/profile/").status_code == 401
+
+
+def test_logout_invalidates_cached_record(authenticated_client, test_user):
+    get_cached_user(test_user.id)
+    User.objects.filter(id=test_user.id).update(bio="changed behind the cache")
+    assert get_cached_user(test_user.id).bio == test_user.bio
+
+    refresh = str(RefreshToken.for_user(test_user))
+    authenticated_client.post("/api/auth/logout/", {"refresh": refresh}, format="json")
+
+    assert get_cached_user(test_user.id).bio == "changed behind the cache"
+
+
+def test_lost_version_reloads_record(test_user, django_assert_num_queries):
+    get_cached_user(test_user.id)
+    User.objects.filter(id=test_user.id).update(bio="changed")
+
+    cache.delete(f"auth:user-version:{test_user.id}")
+
+    with django_assert_num_queries(2):
+        assert get_cached_user(test_user.id).bio == "changed"
+    with django_assert_num_queries(0):
+        get_cached_user(test_user.id)
+
+
+def test_missing_profile_still_raises(test_user):
+    user = get_cached_user(test_user.id)
+
+    with pytest.raises(Profile.DoesNotExist):
+        user.profile
+
+
+@pytest.mark.parametrize("alias", ["", "default"])
+def test_uncached_without_shared_cache(
+    authenticated_client, test_user, settings, alias, django_assert_max_num_queries
+):
+    settings.AUTH_USER_CACHE_ALIAS = alias
+    settings.AUTH_USER_CACHE_ALLOW_LOCAL = False
+    assert not user_cache_enabled()
+
+    authenticated_client.get("/api/auth/profile/")
+    with django_assert_max_num_queries(10) as queries:
+        authenticated_client.get("/api/auth/profile/")
+    assert _user_queries(queries)
+
+    # Another worker deactivating the account takes effect on the next request
+    User.objects.filter(id=test_user.id).update(is_active=False)
+    assert authenticated_client.get("/api/auth/profile/").status_code == 401
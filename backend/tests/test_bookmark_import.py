@@ -0,0 +1,228 @@
+"""
+Tests for browser bookmark import.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+
+from apps.collections import bookmarks, tasks
+from apps.collections.bookmarks import parse_bookmarks
+from apps.collections.models import BookmarkImport, Collection
+from apps.collections.services import URLScraperService
+from apps.collections.tasks import ScrapeExecutor
+
+
+pytestmark = pytest.mark.django_db
+
+PAGE = (
+    b"<html><head><title>Imported page</title></head>"
+    b"<body><article>Bookmarked content.</article></body></html>"
+)
+
+# Simulated origin latency for the throughput test
+LATENCY = 0.05
+
+
+class LatencyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/slow"):
+            time.sleep(LATENCY)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_port():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LatencyHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _bookmark_file(urls, folder="Reading"):
+    links = "\n".join(
+        f'        <DT><A HREF="{url}" ADD_DATE="1700000000">Title {i}</A>'
+        for i, url in enumerate(urls)
+    )
+    return (
+        "<!DOCTYPE NETSCAPE-Bookmark-file-1>\n"
+        '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+        "<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n"
+        f"    <DT><H3>{folder}</H3>\n    <DL><p>\n{links}\n    </DL><p>\n"
+        "</DL><p>\n"
+    )
+
+
+def _upload(client, html, **data):
+    upload = SimpleUploadedFile(
+        "bookmarks.html", html.encode("utf-8"), content_type="text/html"
+    )
+    return client.post(
+        "/api/collections/import/", {"file": upload, **data}, format="multipart"
+    )
+
+
+def test_parse_bookmarks_tracks_folders():
+    html = (
+        "<DL><p><DT><H3>Dev</H3><DL><p>"
+        "<DT><H3>Python</H3><DL><p>"
+        '<DT><A HREF="https://docs.python.org/" ADD_DATE="1700000000">Docs</A>'
+        "</DL><p>"
+        '<DT><A HREF="https://github.com/">GitHub &amp; co</A>'
+        "</DL><p>"
+        '<DT><A HREF="javascript:void(0)">Bookmarklet</A>'
+        "</DL><p>"
+    )
+
+    bookmarks = parse_bookmarks(html)
+
+    assert [(b.url, b.title, b.folder) for b in bookmarks] == [
+        ("https://docs.python.org/", "Docs", "Dev/Python"),
+        ("https://github.com/", "GitHub & co", "Dev"),
+        ("javascript:void(0)", "Bookmarklet", ""),
+    ]
+    assert bookmarks[0].added_at.year == 2023
+    assert bookmarks[1].added_at is None
+
+
+def test_import_creates_and_scrapes_collections(
+    authenticated_client, test_user, stub_port, allow_local_urls
+):
+    base = f"http://127.0.0.1:{stub_port}"
+    Collection.objects.create(title="Old", url=f"{base}/known", owner=test_user)
+    html = _bookmark_file(
+        [
+            f"{base}/a",
+            f"{base}/b",
+            f"{base}/a",
+            f"{base}/known",
+            f"{base}/missing",
+            "place:sort=8",
+        ]
+    )
+
+    response = _upload(authenticated_client, html)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.data["data"]
+    assert data["total"] == 6
+    assert data["created"] == 3
+    assert data["skipped"] == 3
+
+    progress = authenticated_client.get(
+        f"/api/collections/imports/{data['id']}/"
+    ).data["data"]
+    assert progress["finished"] is True
+    assert progress["done"] == 2
+    assert progress["failed"] == 1
+    assert progress["failures"][0]["url"] == f"{base}/missing"
+    assert "404" in progress["failures"][0]["error"]
+
+    imported = Collection.objects.filter(import_job_id=data["id"])
+    assert imported.count() == 3
+    assert imported.get(url=f"{base}/a").title == "Imported page"
+
+
+def test_import_returns_before_scraping(
+    authenticated_client, settings, monkeypatch, django_capture_on_commit_callbacks
+):
+    settings.SCRAPE_EAGER = False
+    submitted = []
+    monkeypatch.setattr(
+        tasks,
+        "get_scrape_executor",
+        lambda: type("Recorder", (), {"submit": lambda *a: submitted.append(a)}),
+    )
+    urls = [f"https://site{i % 3}.example.com/{i}" for i in range(9)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = _upload(
+            authenticated_client, _bookmark_file(urls), metadata_only=True
+        )
+
+    data = response.data["data"]
+    assert data["pending"] == 9
+    assert data["finished"] is False
+    assert sorted(url for url, _, _ in submitted) == sorted(urls)
+    assert all(metadata_only is True for _, _, metadata_only in submitted)
+    assert BookmarkImport.objects.get(id=data["id"]).metadata_only
+
+
+def test_import_reports_bookmarks_over_the_limit(
+    authenticated_client, settings, monkeypatch
+):
+    settings.SCRAPE_EAGER = False
+    monkeypatch.setattr(bookmarks, "MAX_BOOKMARKS", 3)
+    urls = [f"https://example.com/{i}" for i in range(5)]
+
+    response = _upload(authenticated_client, _bookmark_file(urls))
+
+    data = response.data["data"]
+    assert data["total"] == 5
+    assert data["created"] == 3
+    assert data["skipped"] == 0
+    assert data["truncated"] == 2
+    assert "2 条未导入" in response.data["message"]
+
+
+def test_import_progress_is_private(authenticated_client, django_user_model):
+    other = django_user_model.objects.create_user(
+        username="other", email="other@example.com", password="testpass123"
+    )
+    job = BookmarkImport.objects.create(owner=other)
+
+    response = authenticated_client.get(f"/api/collections/imports/{job.id}/")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_concurrent_fetch_throughput(stub_port, allow_local_urls):
+    """Fan-out through the executor beats a sequential fetch of the same file."""
+    urls = [
+        f"http://{host}:{stub_port}/slow/{i}"
+        for i in range(12)
+        for host in ("127.0.0.1", "localhost")
+    ]
+    bookmarks = parse_bookmarks(_bookmark_file(urls))
+    results = []
+
+    def fetch(url):
+        results.append(URLScraperService(timeout=5).scrape(url)["success"])
+
+    executor = ScrapeExecutor(
+        fetch, max_workers=4, per_domain_concurrency=2, per_domain_rate=0
+    )
+    started = time.monotonic()
+    for bookmark in bookmarks:
+        executor.submit(bookmark.url, bookmark.url)
+    assert executor.wait(timeout=10)
+    elapsed = time.monotonic() - started
+    executor.shutdown()
+
+    sequential = len(urls) * LATENCY
+    print(f"\n{len(urls)} pages in {elapsed:.3f}s ({len(urls) / elapsed:.1f} pages/s)")
+    assert results == [True] * len(urls)
+    # 4 in flight (2 per host) -> roughly a quarter of the sequential time
+    assert elapsed < sequential * 0.6
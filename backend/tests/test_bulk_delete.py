@@ -0,0 +1,44 @@
+"""
+Pins the Django behaviour that utils.bulk_delete relies on.
+"""
+
+import pytest
+from django.db.models.signals import post_delete, pre_delete
+
+from apps.tags.models import Tag
+from utils.bulk_delete import delete_without_signals
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_deletes_rows_in_one_query_without_signals(
+    test_user, django_assert_num_queries
+):
+    tags = [
+        Tag.objects.create(name=f"t{i}", slug=f"t{i}", owner=test_user)
+        for i in range(3)
+    ]
+    sent = []
+
+    def receiver(sender, **kwargs):
+        sent.append(sender)
+
+    pre_delete.connect(receiver, sender=Tag)
+    post_delete.connect(receiver, sender=Tag)
+    try:
+        with django_assert_num_queries(1):
+            deleted = delete_without_signals(
+                Tag.objects.filter(pk__in=[tag.pk for tag in tags[:2]])
+            )
+    finally:
+        pre_delete.disconnect(receiver, sender=Tag)
+        post_delete.disconnect(receiver, sender=Tag)
+
+    assert deleted == 2
+    assert sent == []
+    assert list(Tag.objects.values_list("pk", flat=True)) == [tags[2].pk]
+
+
+def test_empty_queryset_deletes_nothing(test_user):
+    assert delete_without_signals(Tag.objects.none()) == 0
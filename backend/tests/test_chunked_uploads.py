@@ -0,0 +1,227 @@
+"""
+Tests for chunked, resumable attachment uploads.
+"""
+
+import hashlib
+import io
+import os
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+
+from apps.attachments.models import Attachment, UploadSession
+from apps.attachments.uploads import UploadConflict, complete_session, write_chunk
+
+
+pytestmark = pytest.mark.django_db
+
+DATA = os.urandom(2500)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(settings):
+    settings.UPLOAD_CHUNK_SIZE = 1024
+
+
+def _start(client, size=len(DATA), **extra):
+    response = client.post(
+        "/api/attachments/uploads/",
+        {
+            "name": "report.pdf",
+            "mime_type": "application/pdf",
+            "total_size": size,
+            **extra,
+        },
+        format="json",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.data["data"]
+
+
+def _put(client, session_id, offset, chunk, checksum=None):
+    return client.put(
+        f"/api/attachments/uploads/{session_id}/chunk/?offset={offset}",
+        data=chunk,
+        content_type="application/octet-stream",
+        HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(chunk).hexdigest(),
+    )
+
+
+def test_chunked_upload_assembles_attachment(authenticated_client):
+    session = _start(authenticated_client)
+    assert session["chunk_size"] == 1024
+    assert session["offset"] == 0
+
+    for offset in range(0, len(DATA), 1024):
+        response = _put(
+            authenticated_client, session["id"], offset, DATA[offset : offset + 1024]
+        )
+        assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"]["offset"] == len(DATA)
+
+    response = authenticated_client.post(
+        f"/api/attachments/uploads/{session['id']}/complete/"
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    attachment = Attachment.objects.get(id=response.data["data"]["id"])
+    assert attachment.name == "report"
+    assert attachment.size == len(DATA)
+    assert attachment.file_type == "document"
+    with attachment.file.open("rb") as f:
+        assert f.read() == DATA
+    upload = UploadSession.objects.get(id=session["id"])
+    assert upload.status == UploadSession.STATUS_COMPLETED
+    assert not upload.temp_path.exists()
+
+
+def _upload_all(client):
+    session = _start(client)
+    for offset in range(0, len(DATA), 1024):
+        _put(client, session["id"], offset, DATA[offset : offset + 1024])
+    return session
+
+
+def test_repeated_complete_returns_same_attachment(authenticated_client):
+    session = _upload_all(authenticated_client)
+    # Loaded before the first request completes, as a concurrent request would be
+    stale = UploadSession.objects.get(id=session["id"])
+
+    first = authenticated_client.post(
+        f"/api/attachments/uploads/{session['id']}/complete/"
+    )
+    attachment = complete_session(stale)
+
+    assert attachment.id == first.data["data"]["id"]
+    assert Attachment.objects.count() == 1
+
+
+def test_complete_after_attachment_deleted_is_gone(authenticated_client):
+    session = _upload_all(authenticated_client)
+    url = f"/api/attachments/uploads/{session['id']}/complete/"
+    attachment_id = authenticated_client.post(url).data["data"]["id"]
+    authenticated_client.delete(f"/api/attachments/{attachment_id}/")
+
+    response = authenticated_client.post(url)
+
+    assert response.status_code == status.HTTP_410_GONE
+    assert not Attachment.objects.exists()
+
+
+def test_corrupt_chunk_is_discarded_and_resumable(authenticated_client):
+    session = _start(authenticated_client)
+    _put(authenticated_client, session["id"], 0, DATA[:1024])
+
+    bad = _put(authenticated_client, session["id"], 1024, DATA[1024:2048], "0" * 64)
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
+
+    # A client reconnecting asks where to resume from
+    progress = authenticated_client.get(f"/api/attachments/uploads/{session['id']}/")
+    assert progress.data["data"]["offset"] == 1024
+    assert UploadSession.objects.get(id=session["id"]).temp_path.stat().st_size == 1024
+
+    retry = _put(authenticated_client, session["id"], 1024, DATA[1024:2048])
+    assert retry.data["data"]["offset"] == 2048
+
+
+def test_out_of_order_chunk_conflicts(authenticated_client):
+    session = _start(authenticated_client)
+
+    response = _put(authenticated_client, session["id"], 1024, DATA[1024:2048])
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.data["data"]["offset"] == 0
+
+
+def test_stale_offset_is_rechecked_under_lock(authenticated_client):
+    session = _start(authenticated_client)
+    # Loaded before the first chunk lands, as a racing request would be
+    stale = UploadSession.objects.get(id=session["id"])
+    _put(authenticated_client, session["id"], 0, DATA[:1024])
+
+    with pytest.raises(UploadConflict) as conflict:
+        write_chunk(stale, 0, io.BytesIO(b"x" * 1024), 1024, "bad")
+
+    assert conflict.value.offset == 1024
+    with open(stale.temp_path, "rb") as f:
+        assert f.read() == DATA[:1024]
+
+
+def test_oversized_chunk_is_rejected(authenticated_client):
+    session = _start(authenticated_client)
+
+    response = _put(authenticated_client, session["id"], 0, DATA[:2000])
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_complete_requires_all_bytes(authenticated_client):
+    session = _start(authenticated_client)
+    _put(authenticated_client, session["id"], 0, DATA[:1024])
+
+    response = authenticated_client.post(
+        f"/api/attachments/uploads/{session['id']}/complete/"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["data"]["offset"] == 1024
+    assert not Attachment.objects.exists()
+
+
+def test_rejects_disallowed_type_and_size(authenticated_client, settings):
+    settings.UPLOAD_MAX_SIZE = 2000
+    response = authenticated_client.post(
+        "/api/attachments/uploads/",
+        {"name": "x.svg", "mime_type": "image/svg+xml", "total_size": 5000},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not UploadSession.objects.exists()
+
+
+def test_sessions_are_private(authenticated_client, django_user_model):
+    other = django_user_model.objects.create_user(
+        username="other", email="other@example.com", password="testpass123"
+    )
+    session = UploadSession.objects.create(
+        owner=other,
+        name="a.pdf",
+        total_size=10,
+        chunk_size=1024,
+        expires_at=timezone.now() + timedelta(hours=1),
+    )
+
+    response = _put(authenticated_client, session.id, 0, b"0123456789")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_expire_uploads_removes_stale_sessions(authenticated_client):
+    stale = _start(authenticated_client)
+    fresh = _start(authenticated_client)
+    UploadSession.objects.filter(id=stale["id"]).update(
+        expires_at=timezone.now() - timedelta(minutes=1)
+    )
+    stale_path = UploadSession.objects.get(id=stale["id"]).temp_path
+
+    call_command("expire_uploads")
+
+    assert not UploadSession.objects.filter(id=stale["id"]).exists()
+    assert not stale_path.exists()
+    assert UploadSession.objects.get(id=fresh["id"]).temp_path.exists()
+
+
+def test_single_request_upload_still_works(authenticated_client):
+    upload = SimpleUploadedFile("notes.txt", b"hello", content_type="text/plain")
+
+    response = authenticated_client.post(
+        "/api/attachments/", {"file": upload, "name": "notes"}, format="multipart"
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert Attachment.objects.get().mime_type == "text/plain"
@@ -0,0 +1,358 @@
+"""
+Tests for background collection scraping.
+"""
+
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from rest_framework import status
+
+from apps.collections import tasks
+from apps.collections.models import Collection
+from apps.collections.services import URLScraperService
+from apps.collections.tasks import ScrapeExecutor
+from utils.http_client import build_session
+
+
+pytestmark = pytest.mark.django_db
+
+PAGE = (
+    b"<html><head><title>Stub page</title>"
+    b'<meta name="description" content="Served locally"></head>'
+    b"<body><article>Hello from the stub server.</article></body></html>"
+)
+
+HUGE_HEAD = (
+    b"<html><head><title>Big page</title>"
+    b'<meta property="og:image" content="https://cdn.example.com/cover.png">'
+    b'<link rel="icon" href="/static/icon.png"></head><body>'
+)
+GBK_PAGE = (
+    '<html><head><meta charset="gbk"><title>中文标题</title></head>'
+    "<body><p>正文内容</p></body></html>"
+).encode("gbk")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves a fixed page and tracks concurrent requests per Host."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    lock = threading.Lock()
+    active = Counter()
+    peak = Counter()
+    total_active = 0
+    total_peak = 0
+
+    def do_GET(self):
+        if self.path == "/error":
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+            return
+
+        if self.path == "/pdf":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+            return
+
+        if self.path == "/huge":
+            # Streamed without Content-Length: head first, then a large body
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                self.wfile.write(HUGE_HEAD)
+                for _ in range(64):
+                    self.wfile.write(b"<p>" + b"x" * 16_384 + b"</p>")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+
+        if self.path == "/gbk":
+            body = GBK_PAGE
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path == "/slow":
+            cls = type(self)
+            host = self.headers["Host"].split(":")[0]
+            with cls.lock:
+                cls.active[host] += 1
+                cls.peak[host] = max(cls.peak[host], cls.active[host])
+                cls.total_active += 1
+                cls.total_peak = max(cls.total_peak, cls.total_active)
+            time.sleep(0.05)
+            with cls.lock:
+                cls.active[host] -= 1
+                cls.total_active -= 1
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Counts accepted TCP connections."""
+
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+@pytest.fixture
+def stub_http():
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_server(stub_http):
+    return stub_http.server_address[1]
+
+
+def test_create_returns_before_scraping(
+    authenticated_client, settings, monkeypatch, django_capture_on_commit_callbacks
+):
+    settings.SCRAPE_EAGER = False
+    submitted = []
+    monkeypatch.setattr(
+        tasks,
+        "get_scrape_executor",
+        lambda: type("Recorder", (), {"submit": lambda *a: submitted.append(a)}),
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_client.post(
+            "/api/collections/",
+            {"title": "Later", "url": "https://example.com/post"},
+            format="json",
+        )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["data"]["is_processed"] is False
+    assert response.data["data"]["scrape_status"] == Collection.SCRAPE_PENDING
+    assert submitted == [
+        ("https://example.com/post", response.data["data"]["id"], False)
+    ]
+
+
+def test_scrape_from_stub_server(authenticated_client, stub_server, allow_local_urls):
+    response = authenticated_client.post(
+        "/api/collections/",
+        {"title": "Stub", "url": f"http://127.0.0.1:{stub_server}/page"},
+        format="json",
+    )
+    collection_id = response.data["data"]["id"]
+
+    status_response = authenticated_client.get(
+        f"/api/collections/{collection_id}/status/"
+    )
+
+    assert status_response.data["data"]["status"] == Collection.SCRAPE_DONE
+    collection = Collection.objects.get(id=collection_id)
+    assert collection.is_processed
+    assert collection.title == "Stub page"
+    assert "stub server" in collection.content
+
+
+def test_failed_scrape_is_reported(authenticated_client, stub_server, allow_local_urls):
+    response = authenticated_client.post(
+        "/api/collections/",
+        {"title": "Broken", "url": f"http://127.0.0.1:{stub_server}/error"},
+        format="json",
+    )
+
+    collection = Collection.objects.get(id=response.data["data"]["id"])
+    assert collection.scrape_status == Collection.SCRAPE_FAILED
+    assert "500" in collection.scrape_error
+    assert not collection.is_processed
+
+
+def test_executor_enforces_global_and_domain_caps(stub_server):
+    StubHandler.peak.clear()
+    StubHandler.total_peak = 0
+
+    def fetch(url):
+        requests.get(url, timeout=5)
+
+    executor = ScrapeExecutor(
+        fetch, max_workers=3, per_domain_concurrency=2, per_domain_rate=0
+    )
+    for host in ("127.0.0.1", "localhost"):
+        for _ in range(6):
+            url = f"http://{host}:{stub_server}/slow"
+            executor.submit(url, url)
+
+    assert executor.wait(timeout=10)
+    executor.shutdown()
+
+    assert StubHandler.peak["127.0.0.1"] <= 2
+    assert StubHandler.peak["localhost"] <= 2
+    assert StubHandler.total_peak <= 3
+    assert sum(StubHandler.peak.values()) >= 3
+
+
+def test_executor_spaces_requests_per_domain():
+    started = []
+    executor = ScrapeExecutor(
+        lambda: started.append(time.monotonic()),
+        max_workers=4,
+        per_domain_concurrency=4,
+        per_domain_rate=20,
+    )
+    for _ in range(4):
+        executor.submit("https://example.com/page")
+
+    assert executor.wait(timeout=5)
+    executor.shutdown()
+
+    gaps = [b - a for a, b in zip(started, started[1:])]
+    assert len(started) == 4
+    assert all(gap >= 0.04 for gap in gaps)
+
+
+def test_scraper_reuses_keep_alive_connection(stub_http, allow_local_urls):
+    port = stub_http.server_address[1]
+    scraper = URLScraperService(timeout=5, session=build_session())
+
+    results = [scraper.scrape(f"http://127.0.0.1:{port}/page") for _ in range(5)]
+
+    assert all(result["success"] for result in results)
+    assert stub_http.connections == 1
+
+
+def _forbid_parsing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("page should not be parsed")
+
+    monkeypatch.setattr(URLScraperService, "extract", fail)
+
+
+def _create(client, url):
+    response = client.post(
+        "/api/collections/", {"title": "Clip", "url": url}, format="json"
+    )
+    return Collection.objects.get(id=response.data["data"]["id"])
+
+
+def test_refresh_sends_etag_and_skips_on_304(
+    authenticated_client, stub_server, allow_local_urls, monkeypatch
+):
+    collection = _create(authenticated_client, f"http://127.0.0.1:{stub_server}/etag")
+    assert collection.etag == '"v1"'
+    updated_at = collection.updated_at
+
+    _forbid_parsing(monkeypatch)
+    response = authenticated_client.post(f"/api/collections/{collection.id}/refresh/")
+
+    assert response.data["message"] == "内容未变化"
+    collection.refresh_from_db()
+    assert collection.updated_at == updated_at
+
+
+def test_refresh_skips_when_content_hash_matches(
+    authenticated_client, stub_server, allow_local_urls, monkeypatch
+):
+    collection = _create(authenticated_client, f"http://127.0.0.1:{stub_server}/page")
+    assert len(collection.content_hash) == 64
+
+    _forbid_parsing(monkeypatch)
+    response = authenticated_client.post(f"/api/collections/{collection.id}/refresh/")
+
+    assert response.data["message"] == "内容未变化"
+
+
+def test_refresh_reparses_changed_content(
+    authenticated_client, stub_server, allow_local_urls
+):
+    collection = _create(authenticated_client, f"http://127.0.0.1:{stub_server}/page")
+    Collection.objects.filter(id=collection.id).update(
+        content_hash="stale", text_hash=""
+    )
+
+    response = authenticated_client.post(f"/api/collections/{collection.id}/refresh/")
+
+    assert response.data["message"] == "刷新成功"
+    collection.refresh_from_db()
+    assert "stub server" in collection.content
+
+
+def _scraper(max_bytes=None):
+    return URLScraperService(timeout=5, session=build_session(), max_bytes=max_bytes)
+
+
+def test_rejects_unsupported_content_type(stub_server, allow_local_urls):
+    result = _scraper().scrape(f"http://127.0.0.1:{stub_server}/pdf")
+
+    assert not result["success"]
+    assert "application/pdf" in result["error"]
+
+
+def test_rejects_body_over_byte_cap(stub_server, allow_local_urls):
+    result = _scraper(max_bytes=100_000).scrape(f"http://127.0.0.1:{stub_server}/huge")
+
+    assert not result["success"]
+    assert "页面过大" in result["error"]
+
+
+def test_metadata_only_stops_after_head(stub_server, allow_local_urls):
+    url = f"http://127.0.0.1:{stub_server}/huge"
+
+    result = _scraper(max_bytes=100_000).scrape(url, metadata_only=True)
+
+    assert result["success"]
+    assert result["title"] == "Big page"
+    assert result["image"] == "https://cdn.example.com/cover.png"
+    assert result["favicon"] == f"http://127.0.0.1:{stub_server}/static/icon.png"
+    assert result["content"] == ""
+    assert "etag" not in result
+
+
+def test_meta_charset_is_honoured(stub_server, allow_local_urls):
+    url = f"http://127.0.0.1:{stub_server}/gbk"
+
+    head_only = _scraper().scrape(url, metadata_only=True)
+    full = _scraper().scrape(url)
+
+    assert head_only["title"] == "中文标题"
+    assert full["title"] == "中文标题"
+    assert "正文内容" in full["content"]
@@ -0,0 +1,164 @@
+"""
+Tests for content-addressed storage of scraped collection bodies.
+"""
+
+import pytest
+from rest_framework import status
+
+from apps.collections import blobs
+from apps.collections.models import Collection, ContentBlob
+from utils.blob_store import BlobStore, get_blob_store
+
+
+pytestmark = pytest.mark.django_db
+
+PAGE_TEXT = "Scraped article body. " * 200
+
+
+def _collection(owner, **kwargs):
+    return Collection.objects.create(
+        title="Clip", url="https://example.com/a", owner=owner, **kwargs
+    )
+
+
+def test_blob_store_compresses_and_dedupes(tmp_path):
+    store = BlobStore(tmp_path)
+    data = PAGE_TEXT.encode("utf-8")
+
+    first = store.put(data)
+    second = store.put(data)
+
+    assert first.hash == second.hash
+    assert first.stored_size < first.size
+    assert store.get(first.hash) == data
+    assert len(list(tmp_path.rglob(f"{first.hash}.*"))) == 1
+
+
+def test_collection_row_holds_only_hash_and_size(test_user):
+    collection = _collection(test_user, content=PAGE_TEXT, html_content="<p>x</p>")
+
+    row = Collection.objects.values().get(id=collection.id)
+    assert "content" not in row
+    assert row["text_size"] == len(PAGE_TEXT.encode("utf-8"))
+    assert get_blob_store().exists(row["text_hash"])
+    assert Collection.objects.get(id=collection.id).content == PAGE_TEXT
+    assert collection.word_count == len(PAGE_TEXT.split())
+
+
+def test_same_body_is_shared_and_refcounted(
+    test_user, django_user_model, django_capture_on_commit_callbacks
+):
+    other = django_user_model.objects.create_user(
+        username="other", email="other@example.com", password="testpass123"
+    )
+    first = _collection(test_user, content=PAGE_TEXT)
+    second = _collection(other, content=PAGE_TEXT)
+
+    blob = ContentBlob.objects.get(hash=first.text_hash)
+    assert first.text_hash == second.text_hash
+    assert blob.refcount == 2
+
+    first.delete()
+    assert ContentBlob.objects.get(hash=blob.hash).refcount == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not ContentBlob.objects.filter(hash=blob.hash).exists()
+    assert not get_blob_store().exists(blob.hash)
+
+
+def test_updating_content_releases_old_blob(
+    test_user, django_capture_on_commit_callbacks
+):
+    collection = _collection(test_user, content=PAGE_TEXT)
+    old_hash = collection.text_hash
+
+    collection.content = "Rewritten body"
+    with django_capture_on_commit_callbacks(execute=True):
+        collection.save()
+
+    assert collection.text_hash != old_hash
+    assert not ContentBlob.objects.filter(hash=old_hash).exists()
+
+
+def test_list_does_not_read_blobs(authenticated_client, test_user, monkeypatch):
+    collection = _collection(test_user, content=PAGE_TEXT)
+
+    def fail(blob_hash):
+        raise AssertionError("list should not decompress bodies")
+
+    monkeypatch.setattr(blobs, "read_text", fail)
+    response = authenticated_client.get("/api/collections/")
+    assert response.status_code == status.HTTP_200_OK
+
+    monkeypatch.undo()
+    detail = authenticated_client.get(f"/api/collections/{collection.id}/")
+    assert detail.data["data"]["content"] == PAGE_TEXT
+
+
+def test_search_matches_collection_bodies(
+    authenticated_client, test_user, django_user_model, monkeypatch
+):
+    match = _collection(test_user, content="Notes on sparse matrices and TF-IDF")
+    _collection(test_user, content="Unrelated", html_content="<p>sparse</p>")
+    other = django_user_model.objects.create_user(username="other", password="x")
+    _collection(other, content="Notes on sparse matrices and TF-IDF")
+
+    def fail(blob_hash):
+        raise AssertionError("search should not decompress bodies")
+
+    monkeypatch.setattr(blobs, "read_text", fail)
+    response = authenticated_client.get("/api/collections/", {"search": "SPARSE"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.data["data"]] == [match.id]
+
+
+def test_search_text_keeps_only_a_bounded_excerpt(
+    authenticated_client, test_user, settings
+):
+    settings.COLLECTION_SEARCH_TEXT_MAX_CHARS = 40
+    collection = _collection(test_user, content=PAGE_TEXT + " needle")
+
+    blob = ContentBlob.objects.get(hash=collection.text_hash)
+    assert blob.search_text == PAGE_TEXT[:40]
+    response = authenticated_client.get("/api/collections/", {"search": "scraped"})
+    assert [item["id"] for item in response.data["data"]] == [collection.id]
+
+
+def test_release_keeps_file_reacquired_before_cleanup(
+    test_user, django_capture_on_commit_callbacks
+):
+    collection = _collection(test_user, content=PAGE_TEXT)
+    blob_hash = collection.text_hash
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        collection.delete()
+    assert ContentBlob.objects.get(hash=blob_hash).refcount == 0
+
+    # Another clip of the same page arrives before the cleanup runs
+    assert blobs.acquire_text(PAGE_TEXT, searchable=True)[0] == blob_hash
+    for callback in callbacks:
+        callback()
+
+    assert ContentBlob.objects.get(hash=blob_hash).refcount == 1
+    assert get_blob_store().exists(blob_hash)
+
+
+def test_acquire_restores_file_deleted_before_the_row_is_written(
+    test_user, monkeypatch
+):
+    store = get_blob_store()
+    put = store.put
+
+    def put_then_lose(data):
+        # The cleanup of an earlier release deletes the file right after put
+        stored = put(data)
+        store.delete(stored.hash)
+        monkeypatch.setattr(store, "put", put)
+        return stored
+
+    monkeypatch.setattr(store, "put", put_then_lose)
+    blob_hash, _ = blobs.acquire_text(PAGE_TEXT, searchable=True)
+
+    assert store.get(blob_hash) == PAGE_TEXT.encode("utf-8")
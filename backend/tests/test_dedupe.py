@@ -0,0 +1,166 @@
+"""
+Tests for near-duplicate detection.
+"""
+
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+
+from apps.collections.models import Collection
+from apps.collections.services import apply_scrape_result
+from apps.dedupe.models import ContentSignature
+from apps.dedupe.services import (
+    backfill_signatures,
+    compute_simhash,
+    find_duplicates,
+    hamming_distance,
+)
+from apps.notes.models import Note
+from apps.users.models import User
+
+
+pytestmark = pytest.mark.django_db
+
+ARTICLE = (
+    "Django makes it easier to build better web apps more quickly and with less "
+    "code. It takes care of much of the hassle of web development, so you can "
+    "focus on writing your app without needing to reinvent the wheel. It is free "
+    "and open source and has a thriving and active community."
+)
+
+
+def test_simhash_is_stable_for_small_edits():
+    original = compute_simhash(ARTICLE)
+    edited = compute_simhash(ARTICLE + " Great documentation.")
+    unrelated = compute_simhash(
+        "Sourdough bread needs flour water salt and a lively starter that has been "
+        "fed twice a day for about a week before the first bake."
+    )
+
+    assert hamming_distance(original, edited) <= 3
+    assert hamming_distance(original, unrelated) > 3
+
+
+def test_short_text_has_no_signature(test_user):
+    note = Note.objects.create(title="Short", content="hello", owner=test_user)
+
+    assert not ContentSignature.objects.filter(object_id=note.id).exists()
+
+
+def test_find_duplicates_across_notes_and_collections(test_user):
+    note = Note.objects.create(title="Pasted", content=ARTICLE, owner=test_user)
+    collection = Collection.objects.create(
+        title="Clipped",
+        url="https://www.djangoproject.com/",
+        content=ARTICLE,
+        owner=test_user,
+    )
+
+    duplicates = find_duplicates(test_user.id, "note", note.id)
+
+    assert [(d["type"], d["id"]) for d in duplicates] == [
+        ("collection", collection.id)
+    ]
+
+
+def test_lookup_is_scoped_to_owner(authenticated_client, test_user):
+    Note.objects.create(title="Mine", content=ARTICLE, owner=test_user)
+    other = User.objects.create_user(username="other", password="pass12345")
+    private = Note.objects.create(title="Private", content=ARTICLE, owner=other)
+
+    response = authenticated_client.get(f"/api/dedupe/note/{private.id}/")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.data["code"] == 404
+    assert response.data["message"] == "对象不存在"
+    assert find_duplicates(test_user.id, "note", private.id) == []
+
+
+def test_note_create_returns_duplicate_warning(authenticated_client, test_user):
+    existing = Note.objects.create(title="Original", content=ARTICLE, owner=test_user)
+
+    response = authenticated_client.post(
+        "/api/notes/", {"title": "Copy", "content": ARTICLE}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["duplicates"][0]["id"] == existing.id
+
+
+def test_collection_status_reports_duplicates_after_scrape(
+    authenticated_client, test_user, settings
+):
+    settings.SCRAPE_EAGER = False
+    existing = Note.objects.create(title="Original", content=ARTICLE, owner=test_user)
+
+    response = authenticated_client.post(
+        "/api/collections/",
+        {"title": "Clip", "url": "https://example.com/django"},
+        format="json",
+    )
+    collection_id = response.data["data"]["id"]
+    assert "duplicates" not in response.data
+
+    pending = authenticated_client.get(f"/api/collections/{collection_id}/status/")
+    assert "duplicates" not in pending.data["data"]
+
+    collection = Collection.objects.get(id=collection_id)
+    apply_scrape_result(
+        collection, {"success": True, "title": "Clip", "content": ARTICLE}
+    )
+    collection.save()
+
+    done = authenticated_client.get(f"/api/collections/{collection_id}/status/")
+    assert [(d["type"], d["id"]) for d in done.data["data"]["duplicates"]] == [
+        ("note", existing.id)
+    ]
+
+
+def test_duplicate_report_groups_copies(authenticated_client, test_user):
+    for index in range(3):
+        Note.objects.create(title=f"Copy {index}", content=ARTICLE, owner=test_user)
+    Note.objects.create(
+        title="Different",
+        content="Completely different text about gardening tomatoes peppers and "
+        "herbs in a small balcony garden during the summer months.",
+        owner=test_user,
+    )
+
+    response = authenticated_client.get("/api/dedupe/report/?type=note")
+
+    assert response.status_code == status.HTTP_200_OK
+    groups = response.data["data"]["groups"]
+    assert len(groups) == 1
+    assert groups[0]["size"] == 3
+
+
+def test_delete_removes_signature(test_user):
+    note = Note.objects.create(title="Gone", content=ARTICLE, owner=test_user)
+    note_id = note.id
+
+    note.delete()
+
+    assert not ContentSignature.objects.filter(
+        source_type="note", object_id=note_id
+    ).exists()
+
+
+def test_backfill_signatures_covers_unsigned_rows(test_user, capsys):
+    Note.objects.bulk_create(
+        [
+            Note(title=f"Old {i}", slug=f"old-{i}", plain_text=ARTICLE, owner=test_user)
+            for i in range(2)
+        ]
+    )
+    Note.objects.bulk_create(
+        [Note(title="Short", slug="short", plain_text="too short", owner=test_user)]
+    )
+    signed = Note.objects.create(title="Signed", content=ARTICLE, owner=test_user)
+    assert ContentSignature.objects.count() == 1
+
+    call_command("backfill_signatures", "--user", str(test_user.id))
+
+    assert "2" in capsys.readouterr().out
+    assert ContentSignature.objects.filter(source_type="note").count() == 3
+    assert len(find_duplicates(test_user.id, "note", signed.id)) == 2
+    assert backfill_signatures() == 0
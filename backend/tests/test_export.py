@@ -0,0 +1,124 @@
+"""
+Tests for the streaming user data export.
+"""
+
+import io
+import json
+import zipfile
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+
+from apps.collections.models import Collection
+from apps.notes.models import Note
+from apps.users.models import User
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _export(client, export_type=None):
+    params = {"type": export_type} if export_type else {}
+    response = client.get("/api/auth/export/", params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    return response, b"".join(response.streaming_content)
+
+
+def _upload(client, note, data=b"attachment body"):
+    response = client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile("doc.txt", data, content_type="text/plain"),
+            "name": "设计/草稿",
+            "note": note.id,
+        },
+        format="multipart",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.data["data"]["id"]
+
+
+def test_json_export_contains_only_own_data(
+    authenticated_client, test_user, test_note, test_tag, test_category
+):
+    other = User.objects.create_user(username="other", password="pass12345")
+    Note.objects.create(title="Secret", content="hidden", owner=other)
+    Collection.objects.create(
+        title="Article", url="https://example.com/a", owner=test_user
+    )
+
+    response, body = _export(authenticated_client)
+    data = json.loads(body)
+
+    assert response["Content-Type"] == "application/json"
+    assert "attachment;" in response["Content-Disposition"]
+    assert data["user"]["username"] == "testuser"
+    assert [note["id"] for note in data["notes"]] == [test_note.id]
+    assert data["notes"][0]["tag_ids"] == [test_tag.id]
+    assert data["notes"][0]["category_id"] == test_category.id
+    assert [tag["name"] for tag in data["tags"]] == ["Test Tag"]
+    assert [category["id"] for category in data["categories"]] == [test_category.id]
+    assert [c["title"] for c in data["collections"]] == ["Article"]
+    assert data["attachments"] == []
+
+
+def test_ndjson_export_one_record_per_line(authenticated_client, test_note):
+    _upload(authenticated_client, test_note)
+
+    response, body = _export(authenticated_client, "ndjson")
+    records = [json.loads(line) for line in body.decode().splitlines()]
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert [record["type"] for record in records] == [
+        "header",
+        "category",
+        "tag",
+        "note",
+        "attachment",
+    ]
+    assert records[-1]["data"]["archive_path"].endswith(".txt")
+
+
+def test_zip_export_contains_markdown_and_attachment_files(
+    authenticated_client, test_note
+):
+    Note.objects.filter(id=test_note.id).update(content="# 标题\n\n正文")
+    attachment_id = _upload(authenticated_client, test_note)
+
+    response, body = _export(authenticated_client, "zip")
+    archive = zipfile.ZipFile(io.BytesIO(body))
+    names = archive.namelist()
+
+    assert response["Content-Type"] == "application/zip"
+    assert archive.testzip() is None
+    assert "export.ndjson" in names
+    markdown = archive.read(f"notes/{test_note.id}-Test Note.md").decode()
+    assert markdown.startswith('---\ntitle: "Test Note"\n')
+    assert 'tags: ["Test Tag"]' in markdown
+    assert markdown.endswith("# 标题\n\n正文")
+    assert archive.read(f"attachments/{attachment_id}-设计_草稿.txt") == (
+        b"attachment body"
+    )
+
+
+def test_export_query_count_does_not_grow_with_notes(
+    authenticated_client, test_user, test_tag, django_assert_max_num_queries
+):
+    for i in range(40):
+        note = Note.objects.create(title=f"Note {i}", content="x", owner=test_user)
+        note.tags.add(test_tag)
+
+    with django_assert_max_num_queries(12):
+        _, body = _export(authenticated_client)
+
+    notes = json.loads(body)["notes"]
+    assert len(notes) == 40
+    assert all(note["tag_ids"] == [test_tag.id] for note in notes)
+
+
+def test_unknown_export_type_rejected(authenticated_client):
+    response = authenticated_client.get("/api/auth/export/", {"type": "xml"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,66 @@
+"""
+Tests for the scraper's HTML parsing backends.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from apps.collections import parsers
+from apps.collections.metadata import HeadMetadataParser
+from apps.collections.parsers import SoupParserBackend, get_parser_backend
+
+
+CORPUS_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "corpus"
+
+PAGE = """<html><head>
+<title>Plain title</title>
+<meta name="twitter:title" content="Twitter title">
+<meta name="description" content="Meta description">
+<link rel="apple-touch-icon" href="/touch.png">
+<meta name="twitter:image" content="https://cdn.example.com/t.png">
+</head><body><nav>Menu</nav><main><p>Main text</p><script>x()</script></main>
+<footer>Footer</footer></body></html>"""
+
+
+def test_soup_backend_extracts_metadata_and_content():
+    result = SoupParserBackend().parse(PAGE, "https://example.com/a/b")
+
+    assert result == {
+        "title": "Twitter title",
+        "description": "Meta description",
+        "favicon": "https://example.com/touch.png",
+        "image": "https://cdn.example.com/t.png",
+        "content": "Main text",
+    }
+
+
+def test_head_parser_matches_backend_metadata():
+    head = HeadMetadataParser()
+    for start in range(0, len(PAGE), 7):
+        head.feed(PAGE[start : start + 7])
+
+    assert head.done
+    assert head.title == "Twitter title"
+    assert head.favicon("https://example.com/") == "https://example.com/touch.png"
+
+
+@pytest.mark.parametrize("path", sorted(CORPUS_DIR.glob("*.html")), ids=str)
+def test_backends_agree_on_corpus(path):
+    pytest.importorskip("lxml")
+    html = path.read_text(encoding="utf-8")
+
+    lxml_result = get_parser_backend("lxml").parse(html, "https://example.com/")
+    soup_result = get_parser_backend("html.parser").parse(html, "https://example.com/")
+
+    assert lxml_result == soup_result
+    assert lxml_result["title"]
+    assert lxml_result["content"]
+
+
+def test_auto_falls_back_without_lxml(monkeypatch):
+    monkeypatch.setattr(parsers, "lxml", None)
+
+    assert get_parser_backend("auto").name == "html.parser"
+    with pytest.raises(ValueError):
+        get_parser_backend("lxml")
@@ -0,0 +1,141 @@
+"""
+Tests for the collection favicon/cover-image proxy.
+"""
+
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from rest_framework import status
+
+from apps.collections.image_proxy import sign_image
+from apps.collections.models import Collection
+from utils.file_cache import LRUFileCache
+from utils.images import make_thumbnail
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _png(size, mode="RGB"):
+    output = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128)[: len(mode)]).save(output, "PNG")
+    return output.getvalue()
+
+
+COVER = _png((2000, 1000))
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    hits = []
+
+    def do_GET(self):
+        type(self).hits.append(self.path)
+        if self.path == "/cover.png":
+            body, content_type = COVER, "image/png"
+        else:
+            body, content_type = b"<html></html>", "text/html"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server(allow_local_urls):
+    ImageHandler.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _proxy(client, url, size="thumb", **headers):
+    return client.get(f"/api/collections/image/{sign_image(url, size)}/", **headers)
+
+
+def test_list_returns_proxied_thumbnail_urls(authenticated_client, test_user):
+    Collection.objects.create(
+        title="Clip",
+        url="https://github.com/a",
+        favicon="https://github.com/favicon.ico",
+        image="http://10.0.0.1/cover.png",
+        owner=test_user,
+    )
+
+    item = authenticated_client.get("/api/collections/").data["data"][0]
+
+    assert item["favicon"].startswith("http://testserver/api/collections/image/")
+    # Addresses the proxy would refuse are passed through untouched
+    assert item["image"] == "http://10.0.0.1/cover.png"
+
+
+def test_proxy_serves_cached_immutable_thumbnail(api_client, image_server):
+    url = f"{image_server}/cover.png"
+
+    response = _proxy(api_client, url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "image/webp"
+    assert "immutable" in response["Cache-Control"]
+    body = response.getvalue()
+    assert Image.open(io.BytesIO(body)).size == (480, 240)
+
+    again = _proxy(api_client, url)
+    assert again.getvalue() == body
+    assert ImageHandler.hits == ["/cover.png"]
+
+    not_modified = _proxy(api_client, url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_proxy_rejects_tampered_token(api_client, image_server):
+    token = sign_image(f"{image_server}/cover.png", "thumb")
+    forged = token.replace(token[-4:], "AAAA")
+
+    response = api_client.get(f"/api/collections/image/{forged}/")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert ImageHandler.hits == []
+
+
+def test_proxy_rejects_non_images(api_client, image_server):
+    response = _proxy(api_client, f"{image_server}/page.html")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "immutable" not in response["Cache-Control"]
+
+
+def test_thumbnail_keeps_transparency():
+    thumbnail = make_thumbnail(_png((300, 300), "RGBA"), 64)
+
+    image = Image.open(io.BytesIO(thumbnail.data))
+    assert image.size == (64, 64)
+    assert image.mode == "RGBA"
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path):
+    cache = LRUFileCache(tmp_path, max_bytes=250)
+    first = cache.put("a" * 64, b"1" * 100)
+    second = cache.put("b" * 64, b"2" * 100)
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+
+    cache.get("a" * 64)  # first becomes most recently used
+    cache.put("c" * 64, b"3" * 100)
+
+    assert cache.get("a" * 64) is not None
+    assert cache.get("b" * 64) is None
+    assert cache.get("c" * 64) is not None
+    assert cache.size() <= 250
@@ -0,0 +1,304 @@
+"""
+Tests for importing a user data export as new data with remapped IDs.
+"""
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.attachments.models import Attachment
+from apps.categories.models import Category
+from apps.collections.models import Collection
+from apps.dedupe.models import ContentSignature
+from apps.dedupe.services import find_duplicates
+from apps.graph.models import GraphLink, GraphNode
+from apps.notes.models import Note, NoteReference, NoteVector
+from apps.tags.models import Tag
+from apps.users.imports import import_export
+from apps.users.models import User
+from apps.users.storage import get_usage
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _export(client, path, **params):
+    response = client.get("/api/auth/export/", params)
+    assert response.status_code == status.HTTP_200_OK
+    path.write_bytes(b"".join(response.streaming_content))
+    return str(path)
+
+
+@pytest.fixture
+def importer():
+    return User.objects.create_user(username="importer", password="pass12345")
+
+
+@pytest.fixture
+def source(authenticated_client, test_user, test_note, test_tag, test_category):
+    """A small account with a category tree, linked notes and an attachment."""
+    child = Category.objects.create(
+        name="Child", slug="child", parent=test_category, owner=test_user
+    )
+    Category.objects.create(name="Leaf", slug="leaf", parent=child, owner=test_user)
+    link = f"/notes/{test_note.id}"
+    linked = Note.objects.create(
+        title="Linked",
+        content=f"See [the test note]({link}) and [[note:{test_note.id}]]",
+        category=child,
+        owner=test_user,
+    )
+    linked.tags.add(test_tag)
+    Collection.objects.create(
+        title="Article",
+        url="https://example.com/a",
+        content="saved article body",
+        owner=test_user,
+    )
+    authenticated_client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile(
+                "doc.txt", b"file body", content_type="text/plain"
+            ),
+            "name": "doc",
+            "note": linked.id,
+        },
+        format="multipart",
+    )
+    return linked
+
+
+def test_import_remaps_ids_and_rewrites_links(
+    authenticated_client, importer, source, test_note, tmp_path
+):
+    path = _export(authenticated_client, tmp_path / "full.zip", type="zip")
+
+    counts = import_export(importer, path)
+
+    assert counts == {
+        "category": 3,
+        "tag": 1,
+        "note": 2,
+        "collection": 1,
+        "attachment": 1,
+    }
+    notes = {note.title: note for note in Note.objects.filter(owner=importer)}
+    imported, target = notes["Linked"], notes["Test Note"]
+    assert imported.id != source.id
+    assert imported.content == (
+        f"See [the test note](/notes/{target.id}) and [[note:{target.id}]]"
+    )
+    assert "/notes/" not in imported.plain_text
+    assert imported.slug != source.slug
+    assert imported.category.name == "Child"
+    assert imported.category.owner == importer
+    assert [tag.name for tag in imported.tags.all()] == ["Test Tag"]
+    assert imported.tags.get().owner == importer
+    assert set(
+        NoteReference.objects.filter(source=imported).values_list("target_id", "syntax")
+    ) == {(target.id, "markdown"), (target.id, "wiki")}
+
+    attachment = Attachment.objects.get(owner=importer)
+    assert attachment.note_id == imported.id
+    assert attachment.file.read() == b"file body"
+    assert Collection.objects.get(owner=importer).content == "saved article body"
+    usage = get_usage(importer)
+    assert usage.notes_count == 2
+    assert usage.attachments_count == 1
+    assert usage.collections_count == 1
+
+
+def test_imported_category_tree_is_valid(
+    authenticated_client, importer, source, test_category, tmp_path
+):
+    path = _export(authenticated_client, tmp_path / "full.ndjson", type="ndjson")
+
+    import_export(importer, path)
+
+    root = Category.objects.get(owner=importer, parent=None)
+    assert root.tree_id != test_category.tree_id
+    assert [c.name for c in root.get_descendants(include_self=True)] == [
+        "Test Category",
+        "Child",
+        "Leaf",
+    ]
+    leaf = Category.objects.get(owner=importer, name="Leaf")
+    assert leaf.level == 2
+    assert leaf.path == "Test Category/Child/Leaf"
+    # The source tree was not touched by the rebuild
+    assert test_category.get_descendant_count() == 2
+    # Saving after import keeps MPTT consistent
+    Category.objects.create(name="Late", slug="late", parent=root, owner=importer)
+    root.refresh_from_db()
+    assert root.get_descendant_count() == 3
+
+
+def test_import_merges_tags_by_name(authenticated_client, importer, source, tmp_path):
+    existing = Tag.objects.create(name="Test Tag", slug="mine", owner=importer)
+    path = _export(authenticated_client, tmp_path / "full.json")
+
+    import_export(importer, path)
+
+    assert Tag.objects.filter(owner=importer).count() == 1
+    imported = Note.objects.get(owner=importer, title="Linked")
+    assert list(imported.tags.values_list("id", flat=True)) == [existing.id]
+
+
+def test_import_builds_graph_and_vectors(
+    authenticated_client, importer, source, tmp_path
+):
+    path = _export(authenticated_client, tmp_path / "full.json")
+
+    import_export(importer, path)
+
+    nodes = GraphNode.objects.filter(owner=importer)
+    assert sorted(nodes.values_list("node_type", flat=True)) == [
+        "category",
+        "category",
+        "category",
+        "note",
+        "note",
+        "tag",
+    ]
+    imported = Note.objects.get(owner=importer, title="Linked")
+    note_node = nodes.get(node_type="note", data__note_id=imported.id)
+    assert note_node.data["category"] == "Child"
+    assert note_node.data["tags"] == ["Test Tag"]
+    links = GraphLink.objects.filter(owner=importer, source=note_node)
+    assert sorted(links.values_list("link_type", flat=True)) == [
+        "parent",
+        "reference",
+        "tagged",
+    ]
+    assert NoteVector.objects.filter(owner=importer).count() == 2
+
+
+def test_import_builds_content_signatures(
+    authenticated_client, test_user, importer, tmp_path
+):
+    article = (
+        "Django makes it easier to build better web apps more quickly and with "
+        "less code, so you can focus on writing your app without reinventing it."
+    )
+    Note.objects.create(title="Copy", content=article, owner=test_user)
+    Collection.objects.create(
+        title="Clip",
+        url="https://example.com/django",
+        content=article,
+        is_processed=True,
+        owner=test_user,
+    )
+    path = _export(authenticated_client, tmp_path / "full.json")
+
+    import_export(importer, path)
+
+    signatures = ContentSignature.objects.filter(owner=importer)
+    assert sorted(signatures.values_list("source_type", flat=True)) == [
+        "collection",
+        "note",
+    ]
+    note = Note.objects.get(owner=importer, title="Copy")
+    assert [d["type"] for d in find_duplicates(importer.id, "note", note.id)] == [
+        "collection"
+    ]
+
+
+def test_import_query_count_does_not_grow_with_notes(
+    authenticated_client,
+    test_user,
+    test_tag,
+    importer,
+    tmp_path,
+    django_assert_max_num_queries,
+    settings,
+):
+    # The similarity refresh the import schedules runs in the background
+    settings.NOTE_SIMILARITY_EAGER = False
+
+    def export_with(name, count):
+        Note.objects.filter(owner=test_user).delete()
+        for i in range(count):
+            note = Note.objects.create(
+                title=f"{name} {i}", content=f"body {i}", owner=test_user
+            )
+            note.tags.add(test_tag)
+        return _export(authenticated_client, tmp_path / f"{name}.ndjson", type="ndjson")
+
+    small, large = export_with("small", 5), export_with("large", 50)
+
+    with django_assert_max_num_queries(40) as small_queries:
+        import_export(importer, small)
+    with django_assert_max_num_queries(40) as large_queries:
+        import_export(importer, large)
+
+    # The first import also creates the tag; the second one merges into it
+    assert len(large_queries.captured_queries) <= len(small_queries.captured_queries)
+    assert Note.objects.filter(owner=importer).count() == 55
+
+
+def test_import_endpoint(authenticated_client, test_user, test_note, tmp_path):
+    path = _export(authenticated_client, tmp_path / "full.json")
+    other = APIClient()
+    other.force_authenticate(
+        user=User.objects.create_user(username="other", password="pass12345")
+    )
+
+    with open(path, "rb") as f:
+        response = other.post("/api/auth/import/", {"file": f}, format="multipart")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"]["note"] == 1
+    assert Note.objects.filter(owner__username="other").count() == 1
+    assert not list((tmp_path / "uploads").iterdir())
+
+
+def test_import_rejects_incremental_exports(
+    authenticated_client, importer, test_note, tmp_path
+):
+    path = _export(
+        authenticated_client,
+        tmp_path / "inc.ndjson",
+        type="ndjson",
+        since=timezone.now().isoformat(),
+    )
+
+    with pytest.raises(CommandError, match="全量"):
+        call_command("import_data", path, user="importer")
+    response = authenticated_client.post(
+        "/api/auth/import/",
+        {"file": SimpleUploadedFile("inc.ndjson", open(path, "rb").read())},
+        format="multipart",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Note.objects.filter(owner=importer).exists()
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda lines: lines + ["{not json"],
+        lambda lines: lines + ['{"type": "note"}'],
+        lambda lines: lines + ['{"type": "note", "data": {"id": 999}}'],
+        lambda lines: lines + ['{"type": "collection", "data": {"id": 5}}'],
+    ],
+)
+def test_import_endpoint_rejects_malformed_records(
+    authenticated_client, test_note, tmp_path, corrupt
+):
+    path = _export(authenticated_client, tmp_path / "full.ndjson", type="ndjson")
+    lines = open(path, encoding="utf-8").read().splitlines()
+    body = "\n".join(corrupt(lines)).encode()
+    before = Note.objects.count()
+
+    response = authenticated_client.post(
+        "/api/auth/import/",
+        {"file": SimpleUploadedFile("bad.ndjson", body)},
+        format="multipart",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Note.objects.count() == before
@@ -0,0 +1,224 @@
+"""
+Tests for incremental exports, tombstones and restoring an export chain.
+"""
+
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from rest_framework import status
+
+from apps.attachments.models import Attachment
+from apps.categories.models import Category
+from apps.collections.models import Collection
+from apps.notes.models import Note
+from apps.tags.models import Tag
+from apps.users.backup import ExportReader
+from apps.users.authentication import get_cached_user
+from apps.users.models import Profile, Tombstone, User
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _export(client, **params):
+    response = client.get("/api/auth/export/", params)
+    assert response.status_code == status.HTTP_200_OK
+    return b"".join(response.streaming_content)
+
+
+def _records(body):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+def _age(model, ids, days=1):
+    """Push rows back in time so they fall before the next watermark."""
+    past = timezone.now() - timedelta(days=days)
+    model.objects.filter(id__in=ids).update(updated_at=past)
+
+
+def _upload(client, note, data):
+    response = client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile("doc.txt", data, content_type="text/plain"),
+            "name": "doc",
+            "note": note.id,
+        },
+        format="multipart",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.data["data"]["id"]
+
+
+def test_incremental_export_has_only_changes_and_tombstones(
+    authenticated_client, test_user, test_note, test_tag, test_category
+):
+    stale = Note.objects.create(title="Stale", content="old", owner=test_user)
+    doomed = Note.objects.create(title="Doomed", content="bye", owner=test_user)
+    _age(Note, [test_note.id, stale.id, doomed.id])
+    _age(Tag, [test_tag.id])
+    _age(Category, [test_category.id])
+    since = timezone.now() - timedelta(hours=1)
+
+    Note.objects.filter(id=test_note.id).update(content="edited")
+    Note.objects.get(id=test_note.id).save()
+    doomed_id = doomed.id
+    doomed.delete()
+
+    records = _records(
+        _export(authenticated_client, type="ndjson", since=since.isoformat())
+    )
+
+    header = records[0]["data"]
+    assert header["since"] is not None
+    assert header["watermark"] == header["exported_at"]
+    body = [(record["type"], record["data"]["id"]) for record in records[1:]]
+    assert body == [("note", test_note.id), ("tombstone", doomed_id)]
+    assert records[-1]["data"]["type"] == "note"
+
+
+def test_tag_changes_mark_note_updated(test_user, test_note, test_tag):
+    _age(Note, [test_note.id])
+    before = Note.objects.get(id=test_note.id).updated_at
+
+    test_tag.notes.remove(test_note)
+
+    assert Note.objects.get(id=test_note.id).updated_at > before
+
+
+def test_bulk_attachment_delete_records_tombstones(authenticated_client, test_note):
+    ids = [_upload(authenticated_client, test_note, b"x%d" % i) for i in range(3)]
+
+    authenticated_client.delete(
+        "/api/attachments/bulk_delete/", {"ids": ids}, format="json"
+    )
+
+    tombstones = Tombstone.objects.filter(object_type="attachment")
+    assert sorted(tombstones.values_list("object_id", flat=True)) == sorted(ids)
+
+
+def test_account_deletion_records_no_tombstones(test_user, test_note):
+    test_user.delete()
+
+    assert not Tombstone.objects.exists()
+
+
+def test_since_validation(authenticated_client, settings):
+    invalid = authenticated_client.get("/api/auth/export/", {"since": "yesterday"})
+    expired = authenticated_client.get(
+        "/api/auth/export/",
+        {"since": (timezone.now() - timedelta(days=120)).isoformat()},
+    )
+
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+    assert expired.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_expire_tombstones_command(test_user, settings):
+    settings.EXPORT_TOMBSTONE_RETENTION_DAYS = 30
+    Tombstone.objects.create(
+        owner=test_user,
+        object_type="note",
+        object_id=1,
+        deleted_at=timezone.now() - timedelta(days=31),
+    )
+    kept = Tombstone.objects.create(owner=test_user, object_type="note", object_id=2)
+
+    call_command("expire_tombstones")
+
+    assert list(Tombstone.objects.all()) == [kept]
+
+
+def _write(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_bytes(body)
+    return str(path)
+
+
+def test_restore_applies_full_then_incremental_chain(
+    authenticated_client, test_user, test_note, test_tag, test_category, tmp_path
+):
+    child = Category.objects.create(
+        name="Child", slug="child", parent=test_category, owner=test_user
+    )
+    doomed = Note.objects.create(title="Doomed", content="bye", owner=test_user)
+    Collection.objects.create(
+        title="Article", url="https://example.com/a", owner=test_user
+    )
+    _upload(authenticated_client, test_note, b"first file")
+    full = _write(tmp_path, "full.zip", _export(authenticated_client, type="zip"))
+    with ExportReader(full) as reader:
+        watermark = reader.header["watermark"]
+
+    edited = Note.objects.get(id=test_note.id)
+    edited.content = "edited content"
+    edited.category = child
+    edited.save()
+    doomed.delete()
+    added = Note.objects.create(title="Added", content="new", owner=test_user)
+    added.tags.add(test_tag)
+    attachment_id = _upload(authenticated_client, added, b"second file")
+    incremental = _write(
+        tmp_path,
+        "inc.zip",
+        _export(authenticated_client, type="zip", since=watermark),
+    )
+
+    # Lose everything, then rebuild it from the chain
+    for model in (Attachment, Note, Collection, Category, Tag):
+        model.objects.filter(owner=test_user).delete()
+    call_command("restore_export", full, incremental, user="testuser")
+
+    notes = {note.title: note for note in Note.objects.filter(owner=test_user)}
+    assert set(notes) == {"Test Note", "Added"}
+    assert notes["Test Note"].id == test_note.id
+    assert notes["Test Note"].content == "edited content"
+    assert notes["Test Note"].category.name == "Child"
+    assert list(notes["Added"].tags.values_list("id", flat=True)) == [test_tag.id]
+    assert Category.objects.get(id=child.id).parent_id == test_category.id
+    assert Collection.objects.filter(owner=test_user).count() == 1
+    restored = Attachment.objects.get(id=attachment_id)
+    assert restored.note_id == added.id
+    assert restored.file.read() == b"second file"
+    assert Attachment.objects.filter(owner=test_user).count() == 2
+
+
+def test_restore_applies_preferences(
+    authenticated_client, test_user, tmp_path, user_cache
+):
+    Profile.objects.create(user=test_user, theme="dark", language="en-US")
+    full = _write(tmp_path, "full.ndjson", _export(authenticated_client, type="ndjson"))
+    with ExportReader(full) as reader:
+        assert reader.header["preferences"]["theme"] == "dark"
+
+    Profile.objects.filter(user=test_user).update(theme="light", language="zh-CN")
+    get_cached_user(test_user.id)
+    call_command("restore_export", full, user="testuser")
+
+    profile = Profile.objects.get(user=test_user)
+    assert (profile.theme, profile.language) == ("dark", "en-US")
+    assert get_cached_user(test_user.id).profile.theme == "dark"
+
+
+def test_restore_rejects_gaps_and_foreign_ids(
+    authenticated_client, test_user, test_note, tmp_path
+):
+    full = _write(tmp_path, "full.ndjson", _export(authenticated_client, type="ndjson"))
+    later = (timezone.now() + timedelta(hours=1)).isoformat()
+    gap = _write(
+        tmp_path,
+        "gap.ndjson",
+        _export(authenticated_client, type="ndjson", since=later),
+    )
+    with pytest.raises(CommandError, match="不连续"):
+        call_command("restore_export", full, gap, user="testuser")
+    with pytest.raises(CommandError, match="全量"):
+        call_command("restore_export", gap, user="testuser")
+
+    User.objects.create_user(username="other", password="pass12345")
+    with pytest.raises(CommandError, match="其他用户"):
+        call_command("restore_export", full, user="other")
@@ -0,0 +1,110 @@
+"""
+Tests for the internal link (backlinks) index.
+"""
+
+import pytest
+from rest_framework import status
+
+from apps.graph.services import get_hybrid_graph_data
+from apps.notes.links import extract_note_links
+from apps.notes.models import Note, NoteReference
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_extract_supports_markdown_and_wiki_syntax():
+    links = extract_note_links(
+        "See [Intro](/notes/3) and [[note:5]], also [[7]]. "
+        "![image](/notes/9) is not a link. Again [Intro](/notes/3/)."
+    )
+
+    assert [(link.target_id, link.syntax) for link in links] == [
+        (3, NoteReference.SYNTAX_MARKDOWN),
+        (5, NoteReference.SYNTAX_WIKI),
+        (7, NoteReference.SYNTAX_WIKI),
+    ]
+    assert links[0].anchor_text == "Intro"
+
+
+def test_save_indexes_only_own_notes(test_user, django_user_model):
+    target = Note.objects.create(title="Target", content="", owner=test_user)
+    other_user = django_user_model.objects.create_user(
+        username="other", email="other@example.com", password="testpass123"
+    )
+    foreign = Note.objects.create(title="Foreign", content="", owner=other_user)
+
+    source = Note.objects.create(
+        title="Source",
+        content=f"[T](/notes/{target.id}) [[{foreign.id}]]",
+        owner=test_user,
+    )
+
+    assert list(
+        NoteReference.objects.filter(source=source).values_list("target_id", flat=True)
+    ) == [target.id]
+
+
+def test_edit_updates_index(test_user):
+    first = Note.objects.create(title="First", content="", owner=test_user)
+    second = Note.objects.create(title="Second", content="", owner=test_user)
+    source = Note.objects.create(
+        title="Source", content=f"[[{first.id}]]", owner=test_user
+    )
+
+    source.content = f"[Second](/notes/{second.id})"
+    source.save()
+
+    refs = NoteReference.objects.filter(source=source)
+    assert [(r.target_id, r.anchor_text) for r in refs] == [(second.id, "Second")]
+
+
+def test_unchanged_content_skips_reindex(test_user):
+    target = Note.objects.create(title="Target", content="", owner=test_user)
+    source = Note.objects.create(
+        title="Source", content=f"[[{target.id}]]", owner=test_user
+    )
+    NoteReference.objects.filter(source=source).delete()
+
+    source.view_count = 5
+    source.save()
+
+    assert not NoteReference.objects.filter(source=source).exists()
+
+
+def test_backlinks_endpoint(authenticated_client, test_user):
+    target = Note.objects.create(title="Target", content="", owner=test_user)
+    source = Note.objects.create(
+        title="Source",
+        content=f"Read [the target](/notes/{target.id})",
+        owner=test_user,
+    )
+
+    response = authenticated_client.get(f"/api/notes/{target.id}/backlinks/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"] == [
+        {
+            "id": source.id,
+            "title": "Source",
+            "slug": source.slug,
+            "anchor_text": "the target",
+            "syntax": NoteReference.SYNTAX_MARKDOWN,
+        }
+    ]
+
+
+def test_hybrid_graph_uses_reference_index(test_user):
+    target = Note.objects.create(title="Target", content="", owner=test_user)
+    source = Note.objects.create(
+        title="Source", content=f"[[note:{target.id}]]", owner=test_user
+    )
+
+    data = get_hybrid_graph_data(test_user, mode="sync_only")
+
+    reference_links = [
+        link for link in data["links"] if link["type"] == "references"
+    ]
+    assert [(link["source"], link["target"]) for link in reference_links] == [
+        (f"note-{source.id}", f"note-{target.id}")
+    ]
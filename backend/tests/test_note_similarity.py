@@ -0,0 +1,196 @@
+"""
+Tests for the similar notes engine.
+"""
+
+import pytest
+from rest_framework import status
+
+from apps.graph.models import GraphLink
+from apps.notes.models import Note, NoteSimilarity, NoteVector
+from apps.notes import similarity
+from apps.notes.similarity import (
+    SimilarityIndex,
+    get_similar_notes,
+    rebuild_user_similarities,
+    term_vector,
+    tokenize,
+)
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _note(owner, title, content):
+    return Note.objects.create(title=title, content=content, owner=owner)
+
+
+def test_tokenize_splits_words_and_cjk_bigrams():
+    tokens = tokenize("Django ORM 知识图谱 的")
+
+    assert "django" in tokens
+    assert "orm" in tokens
+    assert {"知识", "识图", "图谱"} <= set(tokens)
+    assert "的" in tokens
+
+
+def test_term_vector_is_sorted_and_counted():
+    indices, counts = term_vector("python python django")
+
+    assert indices == sorted(indices)
+    assert sorted(counts) == [1, 2]
+
+
+def test_index_ranks_closest_note_first():
+    rows = [
+        term_vector("python django orm queryset"),
+        term_vector("django orm queryset migrations"),
+        term_vector("baking bread flour yeast"),
+    ]
+    index = SimilarityIndex([1, 2, 3], rows)
+
+    neighbors = index.neighbors(1, k=2)
+
+    assert neighbors[0][0] == 2
+    assert all(note_id != 1 for note_id, _ in neighbors)
+
+
+def test_note_save_maintains_vector(test_user):
+    note = _note(test_user, "Vector", "机器学习 入门")
+    vector = NoteVector.objects.get(note=note)
+    original = vector.indices
+
+    note.content = "完全不同的内容 database"
+    note.save()
+
+    vector.refresh_from_db()
+    assert vector.indices != original
+
+
+def test_similar_endpoint(authenticated_client, test_user):
+    source = _note(test_user, "Source", "向量检索 使用 稀疏矩阵 计算 相似度")
+    related = _note(test_user, "Related", "稀疏矩阵 相似度 计算 方法")
+    _note(test_user, "Other", "周末 去 爬山 看 日出")
+
+    response = authenticated_client.get(f"/api/notes/{source.id}/similar/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"][0]["id"] == related.id
+    assert NoteSimilarity.objects.filter(note=source).exists()
+
+
+def test_note_update_invalidates_stored_similarities(test_user):
+    source = _note(test_user, "Source", "python django orm")
+    _note(test_user, "Related", "python django views")
+    rebuild_user_similarities(test_user.id)
+    assert NoteSimilarity.objects.filter(note=source).exists()
+
+    source.content = "gardening tomatoes"
+    source.save()
+
+    assert not NoteSimilarity.objects.filter(note=source).exists()
+
+
+def _similar_ids(note, k=10):
+    return [item.similar_id for item in get_similar_notes(note, k)]
+
+
+def test_larger_limit_recomputes_stored_list(test_user):
+    source = _note(test_user, "Source", "python django orm queryset")
+    first = _note(test_user, "First", "python django orm queryset migrations")
+    second = _note(test_user, "Second", "python django templates")
+
+    rebuild_user_similarities(test_user.id, k=1)
+    assert _similar_ids(source, k=1) == [first.id]
+
+    assert _similar_ids(source, k=2) == [first.id, second.id]
+    assert NoteVector.objects.get(note=source).neighbors_k == 2
+
+
+def test_note_changes_update_other_notes_lists(test_user):
+    source = _note(test_user, "Source", "python django orm queryset")
+    related = _note(test_user, "Related", "python django orm views")
+    assert _similar_ids(source) == [related.id]
+
+    # A new close neighbour joins the stored list without a request for it
+    added = _note(test_user, "Added", "python django orm queryset filters")
+    assert set(
+        NoteSimilarity.objects.filter(note=source).values_list("similar_id", flat=True)
+    ) == {related.id, added.id}
+
+    related.content = "gardening tomatoes"
+    related.save()
+    assert _similar_ids(source) == [added.id]
+
+    added.delete()
+    assert _similar_ids(source) == []
+
+
+def test_stale_index_is_not_rebuilt_in_request(test_user, settings, monkeypatch):
+    source = _note(test_user, "Source", "python django orm queryset")
+    related = _note(test_user, "Related", "python django orm views")
+    assert _similar_ids(source) == [related.id]
+
+    settings.NOTE_SIMILARITY_EAGER = False
+    _note(test_user, "Added", "python django orm queryset filters")
+
+    def fail(user_id):
+        raise AssertionError("index rebuilt in the request")
+
+    monkeypatch.setattr(SimilarityIndex, "for_user", classmethod(fail))
+    # The stored list is served until the background refresh runs
+    assert _similar_ids(source, k=5) == [related.id]
+    assert similarity.get_user_index(test_user.id) is None
+
+
+def test_rebuild_emits_similar_graph_links(test_user):
+    _note(test_user, "First", "rust ownership borrow checker")
+    _note(test_user, "Second", "rust borrow checker lifetimes")
+
+    count = rebuild_user_similarities(test_user.id, emit_graph_links=True)
+
+    assert count == 2
+    assert GraphLink.objects.filter(owner=test_user, link_type="similar").count() == 1
+
+
+def test_missing_vector_is_not_written_during_get(test_user, settings):
+    source = _note(test_user, "Source", "python django orm queryset")
+    related = _note(test_user, "Related", "python django orm views")
+    assert _similar_ids(source) == [related.id]
+
+    settings.NOTE_SIMILARITY_EAGER = False
+    (imported,) = Note.objects.bulk_create(
+        [
+            Note(
+                title="Imported",
+                slug="imported",
+                content="python django orm queryset filters",
+                plain_text="python django orm queryset filters",
+                owner=test_user,
+            )
+        ]
+    )
+
+    similar = get_similar_notes(imported)
+
+    assert [item.similar_id for item in similar] == [source.id, related.id]
+    assert not NoteVector.objects.filter(note=imported).exists()
+    assert not NoteSimilarity.objects.filter(note=imported).exists()
+
+    # The background refresh fills the vector in
+    similarity.refresh_user_similarities(test_user.id)
+    assert NoteVector.objects.filter(note=imported, neighbors_stale=False).exists()
+    assert _similar_ids(imported) == [source.id, related.id]
+
+
+def test_index_cache_evicts_least_recently_used(test_user, settings, monkeypatch):
+    other = test_user.__class__.objects.create_user(username="o", password="pass12345")
+    _note(test_user, "First", "python django orm")
+    _note(other, "Second", "rust borrow checker")
+    monkeypatch.setattr(similarity, "_index_cache", similarity.OrderedDict())
+
+    first = similarity.build_user_index(test_user.id)
+    settings.NOTE_SIMILARITY_INDEX_CACHE_BYTES = first.nbytes + 1
+    similarity.build_user_index(other.id)
+
+    assert similarity.get_user_index(test_user.id) is None
+    assert similarity.get_user_index(other.id) is not None
@@ -0,0 +1,120 @@
+"""
+Tests for the signal-maintained profile counters and their reconciliation.
+"""
+
+import pytest
+from django.core.management import call_command
+
+from apps.categories.models import Category
+from apps.notes.models import Note
+from apps.tags.models import Tag
+from apps.users.counters import adjust_counters, reconcile_counters
+from apps.users.models import Profile, User
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _counts(user):
+    return Profile.objects.values_list(
+        "notes_count", "categories_count", "tags_count"
+    ).get(user=user)
+
+
+@pytest.fixture
+def profile(test_user):
+    return Profile.objects.create(user=test_user)
+
+
+def test_new_profile_starts_from_current_totals(test_user, test_note, test_tag):
+    Note.objects.create(title="Old", content="x", owner=test_user, is_archived=True)
+
+    Profile.objects.create(user=test_user)
+
+    # test_note's category counts too; the archived note doesn't
+    assert _counts(test_user) == (1, 1, 1)
+
+
+def test_creates_and_deletes_adjust_counters(test_user, profile):
+    category = Category.objects.create(name="A", slug="a", owner=test_user)
+    tag = Tag.objects.create(name="t", slug="t", owner=test_user)
+    note = Note.objects.create(title="N", content="x", owner=test_user)
+    Note.objects.create(title="Hidden", content="x", owner=test_user, is_archived=True)
+    assert _counts(test_user) == (1, 1, 1)
+
+    note.delete()
+    tag.delete()
+    category.delete()
+    assert _counts(test_user) == (0, 0, 0)
+
+
+def test_archive_toggle_moves_note_counter(authenticated_client, test_note, profile):
+    user = test_note.owner
+    assert _counts(user)[0] == 1
+
+    authenticated_client.post(f"/api/notes/{test_note.id}/archive/")
+    assert _counts(user)[0] == 0
+    # Saving again without a change doesn't count twice
+    note = Note.objects.get(id=test_note.id)
+    note.title = "Renamed"
+    note.save()
+    assert _counts(user)[0] == 0
+
+    response = authenticated_client.post(
+        f"/api/notes/{test_note.id}/unarchive/?archived=true"
+    )
+    assert response.status_code == 200
+    assert _counts(user)[0] == 1
+
+
+def test_archive_without_loaded_flag(test_note, profile):
+    note = Note.objects.only("id", "owner_id").get(id=test_note.id)
+    note.is_archived = True
+    note.save(update_fields=["is_archived"])
+
+    assert _counts(test_note.owner)[0] == 0
+
+
+def test_queryset_delete_counts_every_row(test_user, profile):
+    for i in range(3):
+        Note.objects.create(title=f"N{i}", content="x", owner=test_user)
+    Note.objects.create(title="Old", content="x", owner=test_user, is_archived=True)
+
+    Note.objects.filter(owner=test_user).delete()
+
+    assert _counts(test_user)[0] == 0
+
+
+def test_adjust_never_goes_below_zero(test_user, profile):
+    adjust_counters(test_user.id, tags_count=-5)
+
+    assert _counts(test_user)[2] == 0
+
+
+def test_reconcile_fixes_drift_with_one_query_per_model(
+    test_user, test_note, profile, django_assert_num_queries
+):
+    other = User.objects.create_user(username="other", password="pass12345")
+    Profile.objects.create(user=other)
+    Note.objects.bulk_create(
+        [Note(title=f"B{i}", slug=f"b{i}", owner=other) for i in range(4)]
+    )
+    Profile.objects.filter(user=test_user).update(tags_count=9)
+
+    # 3 aggregates + profile scan + one bulk update
+    with django_assert_num_queries(5):
+        assert reconcile_counters() == 2
+
+    assert _counts(test_user) == (1, 1, 1)
+    assert _counts(other) == (4, 0, 0)
+    with django_assert_num_queries(4):
+        assert reconcile_counters() == 0
+
+
+def test_reconcile_command_limits_to_users(test_user, profile, capsys):
+    Profile.objects.filter(user=test_user).update(notes_count=7)
+
+    call_command("reconcile_profile_counts", "--user", str(test_user.id))
+
+    assert _counts(test_user)[0] == 0
+    assert "1" in capsys.readouterr().out
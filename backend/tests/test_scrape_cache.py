@@ -0,0 +1,195 @@
+"""
+Tests for the shared scrape-result cache and URL normalization.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from apps.collections.models import Collection
+from apps.collections.scrape_cache import cached_scrape
+from utils.url_normalizer import normalize_url
+
+
+pytestmark = pytest.mark.django_db
+
+
+class FakeScraper:
+    """Returns a canned result after a delay and counts fetches."""
+
+    def __init__(self, success=True, delay=0.0):
+        self.success = success
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def scrape(self, url, metadata_only=False):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if not self.success:
+            return {"success": False, "error": "HTTP 错误：500"}
+        return {
+            "success": True,
+            "not_modified": False,
+            "title": "Popular article",
+            "description": "",
+            "content": "Body text",
+            "html_content": "<p>Body text</p>",
+            "favicon": None,
+            "image": None,
+            "etag": '"v1"',
+            "last_modified": "",
+            "content_hash": "abc",
+        }
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM", "https://example.com/"),
+        ("http://example.com:80/a#section", "http://example.com/a"),
+        ("https://example.com:8443/a/", "https://example.com:8443/a/"),
+        (
+            "https://example.com/p?id=7&utm_source=x&UTM_Medium=y&fbclid=z&page=2",
+            "https://example.com/p?id=7&page=2",
+        ),
+        ("https://example.com./p?gclid=1", "https://example.com/p"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_variants_of_same_url_share_one_fetch():
+    scraper = FakeScraper()
+
+    first = cached_scrape("https://example.com/post?utm_source=feed", scraper=scraper)
+    second = cached_scrape("https://EXAMPLE.com/post#comments", scraper=scraper)
+
+    assert scraper.calls == 1
+    assert "cached" not in first
+    assert second["cached"] is True
+    assert second["content"] == "Body text"
+
+
+def test_concurrent_scrapes_are_single_flight():
+    scraper = FakeScraper(delay=0.1)
+    results = []
+
+    def clip():
+        results.append(cached_scrape("https://example.com/hot", scraper=scraper))
+
+    threads = [threading.Thread(target=clip) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert scraper.calls == 1
+    assert [r["title"] for r in results] == ["Popular article"] * 6
+
+
+def test_metadata_only_reuses_full_result_without_validators():
+    scraper = FakeScraper()
+    cached_scrape("https://example.com/post", scraper=scraper)
+
+    result = cached_scrape("https://example.com/post", metadata_only=True)
+
+    assert scraper.calls == 1
+    assert result["title"] == "Popular article"
+    assert result["content"] == ""
+    assert "etag" not in result
+
+
+def test_large_bodies_cache_only_metadata(settings):
+    settings.SCRAPE_CACHE_MAX_ENTRY_BYTES = 10
+    scraper = FakeScraper()
+
+    cached_scrape("https://example.com/big", scraper=scraper)
+    metadata = cached_scrape("https://example.com/big", metadata_only=True)
+    full = cached_scrape("https://example.com/big", scraper=scraper)
+
+    assert metadata["cached"] is True
+    assert metadata["title"] == "Popular article"
+    assert metadata["content"] == ""
+    assert "etag" not in metadata
+    assert scraper.calls == 2
+    assert full["content"] == "Body text"
+
+
+def test_failures_are_not_cached():
+    scraper = FakeScraper(success=False)
+
+    cached_scrape("https://example.com/broken", scraper=scraper)
+    cached_scrape("https://example.com/broken", scraper=scraper)
+
+    assert scraper.calls == 2
+
+
+def test_cache_disabled_with_zero_ttl(settings):
+    settings.SCRAPE_CACHE_TTL = 0
+    scraper = FakeScraper()
+
+    cached_scrape("https://example.com/post", scraper=scraper)
+    cached_scrape("https://example.com/post", scraper=scraper)
+
+    assert scraper.calls == 2
+
+
+@pytest.fixture
+def stub_port_counter(allow_local_urls):
+    hits = []
+    body = (
+        b"<html><head><title>Shared</title></head>"
+        b"<body><article>Shared page body</article></body></html>"
+    )
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1], hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_second_user_clip_is_served_from_cache(
+    authenticated_client, django_user_model, stub_port_counter
+):
+    port, hits = stub_port_counter
+    url = f"http://127.0.0.1:{port}/article"
+    authenticated_client.post(
+        "/api/collections/", {"title": "A", "url": url}, format="json"
+    )
+
+    other = django_user_model.objects.create_user(
+        username="other", email="other@example.com", password="testpass123"
+    )
+    authenticated_client.force_authenticate(user=other)
+    authenticated_client.post(
+        "/api/collections/",
+        {"title": "B", "url": f"{url}?utm_campaign=share"},
+        format="json",
+    )
+
+    clip = Collection.objects.get(owner=other)
+    assert hits == ["/article"]
+    assert clip.is_processed
+    assert clip.content == "Shared page body"
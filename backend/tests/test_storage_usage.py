@@ -0,0 +1,154 @@
+"""
+Tests for the incrementally maintained per-user storage usage ledger.
+"""
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+
+from apps.attachments.models import Attachment
+from apps.collections.models import Collection
+from apps.notes.models import Note
+from apps.users.models import StorageUsage
+from apps.users.storage import USAGE_FIELDS, get_usage, reconcile_usage
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _usage(user) -> dict:
+    row = StorageUsage.objects.get(user=user)
+    return {field: getattr(row, field) for field in USAGE_FIELDS}
+
+
+def _assert_in_sync(user):
+    """The incremental ledger must equal a full recount."""
+    incremental = _usage(user)
+    reconcile_usage([user.id])
+    assert incremental == _usage(user)
+    return incremental
+
+
+def _upload(client, data, name="doc.txt"):
+    response = client.post(
+        "/api/attachments/",
+        {
+            "file": SimpleUploadedFile(name, data, content_type="text/plain"),
+            "name": name,
+        },
+        format="multipart",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return Attachment.objects.get(id=response.data["data"]["id"])
+
+
+def test_note_changes_track_utf8_content_bytes(test_user):
+    get_usage(test_user)
+
+    note = Note.objects.create(title="笔记", content="你好", owner=test_user)
+    assert _assert_in_sync(test_user)["notes_bytes"] == 6
+
+    note = Note.objects.get(id=note.id)
+    note.content = "hello world"
+    note.save()
+    note.title = "只改标题"
+    note.save(update_fields=["title"])
+    usage = _assert_in_sync(test_user)
+    assert (usage["notes_count"], usage["notes_bytes"]) == (1, 11)
+
+    note.delete()
+    usage = _assert_in_sync(test_user)
+    assert (usage["notes_count"], usage["notes_bytes"]) == (0, 0)
+
+
+def test_deduplicated_attachments_count_logical_and_stored_bytes(
+    authenticated_client, test_user, test_note
+):
+    get_usage(test_user)
+
+    first = _upload(authenticated_client, b"x" * 100)
+    _upload(authenticated_client, b"x" * 100)
+    Attachment.objects.create(
+        owner=test_user,
+        note=test_note,
+        name="old",
+        file=ContentFile(b"y" * 10, name="old.txt"),
+        mime_type="text/plain",
+    )
+    usage = _assert_in_sync(test_user)
+    assert usage["attachments_count"] == 3
+    assert usage["attachments_bytes"] == 210
+    assert usage["attachments_stored_bytes"] == 110
+
+    first.delete()
+    usage = _assert_in_sync(test_user)
+    assert usage["attachments_bytes"] == 110
+    assert usage["attachments_stored_bytes"] == 110
+
+    call_command("dedupe_attachments")
+    assert _assert_in_sync(test_user)["attachments_stored_bytes"] == 110
+
+
+def test_bulk_delete_updates_ledger(authenticated_client, test_user):
+    get_usage(test_user)
+    ids = [_upload(authenticated_client, b"same").id for _ in range(3)]
+    unique = _upload(authenticated_client, b"unique")
+
+    authenticated_client.delete(
+        "/api/attachments/bulk_delete/",
+        {"ids": ids[:2] + [unique.id]},
+        format="json",
+    )
+
+    usage = _assert_in_sync(test_user)
+    assert usage["attachments_count"] == 1
+    assert usage["attachments_stored_bytes"] == 4
+
+
+def test_collection_body_sizes(test_user):
+    get_usage(test_user)
+
+    collection = Collection.objects.create(
+        title="Article", url="https://example.com/a", owner=test_user
+    )
+    collection.content = "正文"
+    collection.html_content = "<p>正文</p>"
+    collection.save()
+    usage = _assert_in_sync(test_user)
+    assert usage["collections_count"] == 1
+    assert usage["collections_bytes"] == collection.text_size + collection.html_size
+
+    collection.delete()
+    assert _assert_in_sync(test_user)["collections_bytes"] == 0
+
+
+def test_reconcile_command_fixes_drift(test_user, test_note):
+    get_usage(test_user)
+    StorageUsage.objects.filter(user=test_user).update(notes_count=99, notes_bytes=-5)
+
+    call_command("reconcile_storage", user=[test_user.id])
+
+    usage = _usage(test_user)
+    assert usage["notes_count"] == 1
+    assert usage["notes_bytes"] == len(test_note.content.encode("utf-8"))
+
+
+def test_storage_endpoint_reads_one_row(
+    authenticated_client, test_user, test_note, django_assert_max_num_queries
+):
+    _upload(authenticated_client, b"data")
+    authenticated_client.get("/api/auth/storage/")
+
+    with django_assert_max_num_queries(3):
+        response = authenticated_client.get("/api/auth/storage/")
+
+    data = response.data["data"]
+    assert response.status_code == status.HTTP_200_OK
+    assert data["notes_count"] == 1
+    assert data["attachments_count"] == 1
+    assert data["attachments_size"] == 4
+    assert data["total_size"] == (
+        data["notes_size"] + data["attachments_stored_size"] + data["collections_size"]
+    )
@@ -0,0 +1,195 @@
+"""
+Tests for the DNS cache, IP pinning and per-hop redirect validation.
+"""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+from django.core.exceptions import ValidationError
+
+from apps.collections.services import URLScraperService
+from utils.dns_cache import DNSCache
+from utils.http_client import build_session, validated_get
+from utils.ssrf_validator import SSRFValidator, is_public_address
+
+PAGE = b"<html><head><title>Pinned</title></head><body><p>ok</p></body></html>"
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    hosts = []
+
+    def do_GET(self):
+        type(self).hosts.append(self.headers["Host"])
+        parsed = urlparse(self.path)
+        if parsed.path in ("/redirect", "/loop"):
+            target = parse_qs(parsed.query).get("to", [self.path])[0]
+            self.send_response(302)
+            self.send_header("Location", target)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeResolver:
+    """Maps hostnames to fixed addresses and counts lookups."""
+
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def __call__(self, hostname):
+        self.calls.append(hostname)
+        if hostname not in self.records:
+            raise socket.gaierror(socket.EAI_NONAME, hostname)
+        return self.records[hostname]
+
+
+class LoopbackValidator(SSRFValidator):
+    """Treats the stub server's address as the only public one."""
+
+    def is_allowed_address(self, address):
+        return address == "127.0.0.1"
+
+
+@pytest.fixture
+def port():
+    RecordingHandler.hosts = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def resolver():
+    return FakeResolver(
+        {
+            "site.example": ["127.0.0.1"],
+            "rebind.example": ["127.0.0.2"],
+        }
+    )
+
+
+@pytest.fixture
+def validator(resolver):
+    return LoopbackValidator(
+        allowed_domains=["site.example", "rebind.example"],
+        dns_cache=DNSCache(resolver),
+    )
+
+
+@pytest.fixture
+def session(validator):
+    return build_session(resolve_host=validator.resolve)
+
+
+def test_dns_cache_expires_after_ttl():
+    now = [0.0]
+    resolver = FakeResolver({"a.example": ["93.184.216.34"]})
+    cache = DNSCache(resolver, ttl=30, clock=lambda: now[0])
+
+    assert cache.resolve("a.example") == ("93.184.216.34",)
+    assert cache.resolve("A.example.") == ("93.184.216.34",)
+    now[0] = 31
+    cache.resolve("a.example")
+
+    assert resolver.calls == ["a.example", "a.example"]
+    assert cache.resolve("203.0.113.9") == ("203.0.113.9",)
+    assert len(resolver.calls) == 2
+
+
+def test_public_address_check():
+    assert is_public_address("93.184.216.34")
+    private = [
+        "127.0.0.1",
+        "10.1.2.3",
+        "169.254.169.254",
+        "100.64.0.1",
+        "::1",
+        "fd00::1",
+        "::ffff:192.168.0.1",
+        "224.0.0.1",
+    ]
+    for address in private:
+        assert not is_public_address(address), address
+
+
+def test_mixed_records_are_rejected():
+    resolver = FakeResolver({"mixed.example": ["93.184.216.34", "10.0.0.1"]})
+    validator = SSRFValidator(dns_cache=DNSCache(resolver))
+
+    with pytest.raises(ValidationError):
+        validator.resolve("mixed.example")
+
+
+def test_connects_to_validated_ip(port, resolver, validator, session):
+    url = f"http://site.example:{port}/page"
+
+    for _ in range(2):
+        response = validated_get(url, session=session, validate=validator.validate)
+        assert response.status_code == 200
+
+    # The fake name never hits system DNS: the socket went to the cached IP
+    assert resolver.calls == ["site.example"]
+    assert RecordingHandler.hosts == [f"site.example:{port}"] * 2
+
+
+def test_redirect_hops_are_revalidated(port, resolver, validator, session):
+    base = f"http://site.example:{port}"
+
+    response = validated_get(
+        f"{base}/redirect?to=/page", session=session, validate=validator.validate
+    )
+    assert response.status_code == 200
+    assert len(response.history) == 1
+
+    for target in ("http://other.test/", f"http://rebind.example:{port}/page"):
+        with pytest.raises(ValidationError):
+            validated_get(
+                f"{base}/redirect?to={target}",
+                session=session,
+                validate=validator.validate,
+            )
+
+    assert "other.test" not in resolver.calls
+    assert not any(host.startswith("rebind") for host in RecordingHandler.hosts)
+
+
+def test_redirect_limit(port, validator, session):
+    with pytest.raises(requests.TooManyRedirects):
+        validated_get(
+            f"http://site.example:{port}/loop",
+            session=session,
+            validate=validator.validate,
+            max_redirects=3,
+        )
+    assert len(RecordingHandler.hosts) == 4
+
+
+def test_scraper_reports_unsafe_redirect(port, validator, session, monkeypatch):
+    monkeypatch.setattr("apps.collections.services.validate_url", validator.validate)
+    scraper = URLScraperService(timeout=5, session=session)
+
+    result = scraper.scrape(
+        f"http://site.example:{port}/redirect?to=http://rebind.example/"
+    )
+
+    assert result["success"] is False
+    assert result["error"].startswith("URL 不安全")
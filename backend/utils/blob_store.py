@@ -0,0 +1,138 @@
+"""
+内容寻址 Blob 存储模块
+
+以内容的 SHA-256 作为键，把压缩后的数据写入本地文件系统：
+- 路径：<root>/<hash[:2]>/<hash[2:4]>/<hash>.<codec>
+- 压缩：安装 zstandard 时使用 zstd，否则使用标准库 zlib
+- 写入先落临时文件再原子重命名，相同内容只存一份
+
+本地文件系统是对象存储的替身，接口只有 put/get/delete/exists。
+"""
+
+import hashlib
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard 为可选依赖
+    zstandard = None
+
+
+CODEC_ZSTD = "zst"
+CODEC_ZLIB = "zz"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+class StoredBlob(NamedTuple):
+    """写入结果"""
+
+    hash: str
+    size: int
+    stored_size: int
+    codec: str
+
+
+def content_hash(data: bytes) -> str:
+    """计算内容哈希（Blob 键）"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def default_codec() -> str:
+    """当前环境可用的最佳压缩编码"""
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("读取 zstd 压缩的 Blob 需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class BlobStore:
+    """
+    本地文件系统 Blob 存储
+
+    Args:
+        root: 存储根目录
+        codec: 新写入数据使用的压缩编码，默认自动选择
+    """
+
+    def __init__(self, root, codec: Optional[str] = None):
+        self.root = Path(root)
+        self.codec = codec or default_codec()
+
+    def path(self, blob_hash: str, codec: str) -> Path:
+        return self.root / blob_hash[:2] / blob_hash[2:4] / f"{blob_hash}.{codec}"
+
+    def _find(self, blob_hash: str) -> Optional[tuple[Path, str]]:
+        for codec in (CODEC_ZSTD, CODEC_ZLIB):
+            path = self.path(blob_hash, codec)
+            if path.exists():
+                return path, codec
+        return None
+
+    def exists(self, blob_hash: str) -> bool:
+        return self._find(blob_hash) is not None
+
+    def put(self, data: bytes) -> StoredBlob:
+        """写入数据；内容已存在时不重复写入"""
+        blob_hash = content_hash(data)
+        found = self._find(blob_hash)
+        if found:
+            path, codec = found
+            return StoredBlob(blob_hash, len(data), path.stat().st_size, codec)
+
+        payload = compress(data, self.codec)
+        path = self.path(blob_hash, self.codec)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return StoredBlob(blob_hash, len(data), len(payload), self.codec)
+
+    def get(self, blob_hash: str) -> bytes:
+        """读取并解压数据，不存在时抛出 FileNotFoundError"""
+        found = self._find(blob_hash)
+        if not found:
+            raise FileNotFoundError(blob_hash)
+        path, codec = found
+        return decompress(path.read_bytes(), codec)
+
+    def delete(self, blob_hash: str) -> None:
+        found = self._find(blob_hash)
+        if found:
+            found[0].unlink(missing_ok=True)
+
+
+_store = None
+
+
+def get_blob_store() -> BlobStore:
+    """按 settings.BLOB_STORE_ROOT 获取共享存储实例"""
+    global _store
+    from django.conf import settings
+
+    root = Path(settings.BLOB_STORE_ROOT)
+    if _store is None or _store.root != root:
+        _store = BlobStore(root)
+    return _store
@@ -0,0 +1,27 @@
+"""
+批量删除模块
+
+QuerySet.delete() 在模型有 pre/post_delete 接收器或级联关系时，会先把待删除的行
+（及其级联对象）读入内存并逐行发送信号，大批量删除时开销与行数成正比。
+
+delete_without_signals 以一条 DELETE 语句删除查询集中的行：
+- 不收集级联对象：引用这些行的子表数据需由调用方先行删除或置空
+- 不发送 pre_delete / post_delete 信号：信号中的收尾（计数、文件、Blob 引用等）
+  需由调用方显式完成
+- 依赖 Django 的私有接口 QuerySet._raw_delete，行为由 tests/test_bulk_delete.py
+  固定，升级 Django 时以该测试为准
+"""
+
+
+def delete_without_signals(queryset) -> int:
+    """
+    一条 DELETE 删除查询集中的全部行
+
+    Args:
+        queryset: 待删除的查询集（不能包含切片）
+
+    Returns:
+        删除的行数
+    """
+    # 查询集为空时 _raw_delete 返回 None
+    return queryset._raw_delete(queryset.db) or 0
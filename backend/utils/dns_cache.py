@@ -0,0 +1,115 @@
+"""
+DNS 解析缓存模块
+
+抓取前的 SSRF 校验与实际建连共用同一次解析结果：
+- 解析结果按主机名缓存，过期（TTL）后重新解析
+- 建连直接使用缓存中校验过的 IP，避免二次解析带来的延迟与 DNS 重绑定
+- 解析函数可替换，测试中使用假解析器
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+# 默认缓存有效期（秒）；getaddrinfo 不返回记录 TTL，使用固定值
+DEFAULT_TTL = 60.0
+
+# 默认最多缓存的主机名数量
+DEFAULT_MAX_ENTRIES = 1024
+
+Resolver = Callable[[str], Sequence[str]]
+
+
+def system_resolver(hostname: str) -> list[str]:
+    """使用系统解析器解析主机名，返回去重后的 IP 列表（保持系统给出的顺序）"""
+    addresses = []
+    for info in socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM):
+        address = info[4][0]
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+def _ip_literal(hostname: str) -> Optional[str]:
+    try:
+        return str(ipaddress.ip_address(hostname.strip("[]")))
+    except ValueError:
+        return None
+
+
+class DNSCache:
+    """
+    带 TTL 的 DNS 解析缓存（线程安全）
+
+    Args:
+        resolver: 解析函数，接收主机名返回 IP 列表，默认使用系统解析器
+        ttl: 缓存有效期（秒）
+        max_entries: 最多缓存的主机名数量，超出时淘汰最久未使用的条目
+        clock: 单调时钟，便于测试
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[Resolver] = None,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.resolver = resolver or system_resolver
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, hostname: str) -> tuple[str, ...]:
+        """
+        解析主机名
+
+        IP 字面量直接返回；解析失败时抛出 socket.gaierror（不缓存失败结果）。
+        """
+        literal = _ip_literal(hostname)
+        if literal:
+            return (literal,)
+
+        key = hostname.rstrip(".").lower()
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        addresses = tuple(self.resolver(key))
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f"无法解析主机名：{key}")
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return addresses
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_dns_cache() -> DNSCache:
+    """获取进程内共享的解析缓存（有效期读取 settings.SCRAPE_DNS_TTL）"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from django.conf import settings
+
+                _cache = DNSCache(ttl=getattr(settings, "SCRAPE_DNS_TTL", DEFAULT_TTL))
+    return _cache
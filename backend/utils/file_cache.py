@@ -0,0 +1,120 @@
+"""
+本地文件缓存模块
+
+内容寻址的磁盘缓存，按总大小预算做 LRU 淘汰：
+- 对象：<root>/objects/<hash[:2]>/<hash><后缀>，相同内容只存一份
+- 引用：<root>/refs/<key[:2]>/<key>，内容为对象文件名；多个键可指向同一对象
+- 命中时更新对象的修改时间，超出预算时按修改时间从旧到新删除对象
+- 引用指向的对象已被淘汰时视为未命中
+
+写入先落临时文件再原子重命名，多进程共享同一目录是安全的。
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class LRUFileCache:
+    """
+    按磁盘预算 LRU 淘汰的内容寻址缓存
+
+    Args:
+        root: 缓存根目录
+        max_bytes: 对象文件总大小上限
+    """
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None
+
+    def _ref_path(self, key: str) -> Path:
+        return self.root / "refs" / key[:2] / key
+
+    def _object_path(self, name: str) -> Path:
+        return self.root / "objects" / name[:2] / name
+
+    def get(self, key: str) -> Optional[Path]:
+        """按键查找对象文件，命中时标记为最近使用"""
+        ref = self._ref_path(key)
+        try:
+            name = ref.read_text().strip()
+        except FileNotFoundError:
+            return None
+
+        path = self._object_path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            ref.unlink(missing_ok=True)
+            return None
+        return path
+
+    def put(self, key: str, data: bytes, suffix: str = "") -> Path:
+        """写入对象并建立引用，必要时淘汰最久未使用的对象"""
+        name = hashlib.sha256(data).hexdigest() + suffix
+        path = self._object_path(name)
+        if path.exists():
+            os.utime(path)
+        else:
+            _atomic_write(path, data)
+            self._grow(len(data))
+        _atomic_write(self._ref_path(key), name.encode("ascii"))
+        return path
+
+    def size(self) -> int:
+        """当前对象文件总大小（扫描目录）"""
+        return sum(size for _, _, size in self._scan())
+
+    def _scan(self):
+        objects = self.root / "objects"
+        if not objects.exists():
+            return []
+        entries = []
+        for path in objects.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _grow(self, added: int) -> None:
+        with self._lock:
+            if self._total is None:
+                self._total = self.size()
+            else:
+                self._total += added
+            if self._total > self.max_bytes:
+                self._total = self._evict()
+
+    def _evict(self) -> int:
+        """删除最久未使用的对象直到低于预算，返回剩余总大小"""
+        entries = sorted(self._scan(), key=lambda entry: entry[0])
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        return total
@@ -0,0 +1,222 @@
+"""
+HTTP 客户端模块
+
+为外部网页抓取提供可复用的 keep-alive 会话：
+- 每个线程一个 requests.Session（Session 本身不保证线程安全）
+- 按主机维护 urllib3 连接池，同一站点的连续抓取复用 TCP/TLS 连接
+- 声明支持的压缩编码（gzip/deflate，安装 brotli/zstandard 后自动追加）
+- 不保存 Cookie，避免不同用户的抓取之间互相串用
+- 建连时经 DNS 缓存解析并校验 IP，直接连接校验过的地址（IP 固定）
+- 手动跟随重定向，每一跳都重新做 SSRF 校验
+"""
+
+import socket
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Callable, Optional, Sequence
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    NameResolutionError,
+    NewConnectionError,
+)
+from urllib3.util.request import ACCEPT_ENCODING
+
+# 默认缓存的主机连接池数量
+DEFAULT_POOL_CONNECTIONS = 32
+
+# 默认每个主机连接池保留的最大连接数
+DEFAULT_POOL_MAXSIZE = 4
+
+# 默认最多跟随的重定向次数
+DEFAULT_MAX_REDIRECTS = 5
+
+_local = threading.local()
+
+
+class PinnedConnectionMixin:
+    """
+    建连时通过 resolve_host 解析主机名并校验地址，然后直接连接该 IP
+
+    TLS 的 SNI 与证书校验仍使用原主机名。resolve_host 抛出的校验异常
+    （如 ValidationError）原样向上传递，不会被当作网络错误重试。
+    """
+
+    resolve_host: Callable[[str], Sequence[str]]
+
+    def _new_conn(self):
+        hostname = self._dns_host
+        try:
+            addresses = self.resolve_host(hostname)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                error = e
+            finally:
+                self._dns_host = hostname
+        raise error
+
+
+def _pinned_pool_classes(resolve_host: Callable[[str], Sequence[str]]) -> dict:
+    """生成使用指定解析函数的连接池类"""
+    resolve = staticmethod(resolve_host)
+    http_conn = type(
+        "PinnedHTTPConnection",
+        (PinnedConnectionMixin, HTTPConnection),
+        {"resolve_host": resolve},
+    )
+    https_conn = type(
+        "PinnedHTTPSConnection",
+        (PinnedConnectionMixin, HTTPSConnection),
+        {"resolve_host": resolve},
+    )
+    return {
+        "http": type(
+            "PinnedHTTPConnectionPool",
+            (HTTPConnectionPool,),
+            {"ConnectionCls": http_conn},
+        ),
+        "https": type(
+            "PinnedHTTPSConnectionPool",
+            (HTTPSConnectionPool,),
+            {"ConnectionCls": https_conn},
+        ),
+    }
+
+
+class PinnedHTTPAdapter(HTTPAdapter):
+    """建连地址由 resolve_host 决定的适配器"""
+
+    def __init__(self, resolve_host: Callable[[str], Sequence[str]], **kwargs):
+        self.resolve_host = resolve_host
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _pinned_pool_classes(
+            self.resolve_host
+        )
+
+
+def build_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    resolve_host: Optional[Callable[[str], Sequence[str]]] = None,
+) -> requests.Session:
+    """
+    创建带连接池的会话
+
+    Args:
+        pool_connections: 缓存的主机连接池数量
+        pool_maxsize: 每个主机连接池保留的最大连接数
+        resolve_host: 建连时的解析函数（主机名 -> IP 列表），
+            默认经共享 DNS 缓存解析并拒绝内网地址
+
+    Returns:
+        配置好的 requests.Session
+    """
+    if resolve_host is None:
+        from .ssrf_validator import resolve_host
+
+    session = requests.Session()
+    adapter = PinnedHTTPAdapter(
+        resolve_host,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    # 经代理转发时无法固定目标 IP，不读取环境变量中的代理配置
+    session.trust_env = False
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    获取当前线程的共享会话
+
+    连接池大小读取 settings.SCRAPER_POOL_CONNECTIONS / SCRAPER_POOL_MAXSIZE。
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        from django.conf import settings
+
+        session = build_session(
+            pool_connections=getattr(
+                settings, "SCRAPER_POOL_CONNECTIONS", DEFAULT_POOL_CONNECTIONS
+            ),
+            pool_maxsize=getattr(
+                settings, "SCRAPER_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE
+            ),
+        )
+        _local.session = session
+    return session
+
+
+def close_session() -> None:
+    """关闭当前线程的会话（释放连接池）"""
+    session = getattr(_local, "session", None)
+    if session is not None:
+        session.close()
+        _local.session = None
+
+
+def validated_get(
+    url: str,
+    session: Optional[requests.Session] = None,
+    validate: Optional[Callable[[str], object]] = None,
+    max_redirects: int = DEFAULT_MAX_REDIRECTS,
+    **kwargs,
+) -> requests.Response:
+    """
+    经 SSRF 校验的 GET 请求
+
+    不使用 requests 的自动重定向，而是逐跳校验 URL 后再请求；
+    建连地址的校验由会话的解析函数完成（见 build_session）。
+
+    Args:
+        url: 请求地址
+        session: HTTP 会话，默认使用当前线程共享的会话
+        validate: URL 校验函数，不安全时抛出异常，默认 ssrf_validator.validate_url
+        max_redirects: 最多跟随的重定向次数
+        **kwargs: 传给 session.get 的其他参数
+
+    Raises:
+        ValidationError: 任意一跳 URL 或其解析地址不安全
+        requests.TooManyRedirects: 重定向次数超过上限
+    """
+    if validate is None:
+        from .ssrf_validator import validate_url as validate
+
+    session = session or get_session()
+    kwargs["allow_redirects"] = False
+    history = []
+    while True:
+        validate(url)
+        response = session.get(url, **kwargs)
+        location = session.get_redirect_target(response)
+        if not location:
+            response.history = history
+            return response
+
+        response.close()
+        if len(history) >= max_redirects:
+            raise requests.TooManyRedirects(
+                f"重定向次数超过 {max_redirects} 次", response=response
+            )
+        history.append(response)
+        url = urljoin(response.url, location)
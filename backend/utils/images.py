@@ -0,0 +1,144 @@
+"""
+图片处理模块
+
+基于 Pillow 的缩略图生成：
+- JPEG 使用 draft 模式在解码阶段直接缩小，避免解码整张大图
+- 保留透明通道，输出 WebP（Pillow 不支持 WebP 时输出 PNG）
+- 像素数超过上限的图片直接拒绝，防止解压炸弹
+- 多个固定宽度的衍生图只解码一次，从大到小逐级缩小
+"""
+
+import io
+from typing import NamedTuple
+
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError, features
+
+# 允许解码的最大像素数
+MAX_PIXELS = 40_000_000
+
+THUMBNAIL_QUALITY = 80
+
+
+class ImageError(Exception):
+    """图片无法识别或不允许处理"""
+
+
+class Thumbnail(NamedTuple):
+    """缩略图结果"""
+
+    data: bytes
+    content_type: str
+    width: int
+    height: int
+
+
+def thumbnail_format() -> tuple[str, str]:
+    """缩略图输出格式：(Pillow 格式名, Content-Type)"""
+    if features.check("webp"):
+        return "WEBP", "image/webp"
+    return "PNG", "image/png"
+
+
+def _open(data: bytes) -> Image.Image:
+    """打开图片并检查像素数（只读取文件头，不解码）"""
+    try:
+        image = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f"无法识别的图片：{e}") from e
+    if image.width * image.height > MAX_PIXELS:
+        raise ImageError(f"图片过大：{image.width}x{image.height}")
+    return image
+
+
+def _flatten_mode(image: Image.Image) -> Image.Image:
+    """转换为 RGB，带透明通道时转换为 RGBA"""
+    has_alpha = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def _encode(image: Image.Image) -> Thumbnail:
+    image_format, content_type = thumbnail_format()
+    output = io.BytesIO()
+    image.save(output, image_format, quality=THUMBNAIL_QUALITY)
+    return Thumbnail(output.getvalue(), content_type, image.width, image.height)
+
+
+def image_size(data: bytes) -> tuple[int, int]:
+    """读取图片尺寸（考虑 EXIF 方向，不解码像素）"""
+    image = _open(data)
+    width, height = image.size
+    try:
+        orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+    except Exception:
+        orientation = 1
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    return width, height
+
+
+def make_derivatives(
+    data: bytes, widths, full_size: bool = True
+) -> tuple[int, int, dict[str, Thumbnail]]:
+    """
+    生成固定宽度的衍生图
+
+    只生成比原图窄的宽度；动图只返回尺寸，不生成衍生图（避免丢失动画）。
+
+    Args:
+        data: 原始图片数据
+        widths: 目标宽度列表
+        full_size: 是否同时生成原尺寸的转码图（键为 "full"）
+
+    Returns:
+        (原图宽, 原图高, {宽度字符串或 "full": 衍生图})
+
+    Raises:
+        ImageError: 图片无法识别或像素数过大
+    """
+    image = _open(data)
+    if getattr(image, "is_animated", False):
+        width, height = image_size(data)
+        return width, height, {}
+
+    try:
+        image = ImageOps.exif_transpose(image)
+        image = _flatten_mode(image)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f"无法识别的图片：{e}") from e
+
+    results = {}
+    if full_size:
+        results["full"] = _encode(image)
+
+    # 从大到小逐级缩小，每一级以上一级的结果为输入
+    source = image
+    for width in sorted({w for w in widths if w < image.width}, reverse=True):
+        height = max(1, round(image.height * width / image.width))
+        source = source.resize((width, height), Image.Resampling.LANCZOS)
+        results[str(width)] = _encode(source)
+    return image.width, image.height, results
+
+
+def make_thumbnail(data: bytes, max_size: int) -> Thumbnail:
+    """
+    生成不超过 max_size × max_size 的缩略图（保持宽高比，不放大）
+
+    Args:
+        data: 原始图片数据
+        max_size: 最长边像素数
+
+    Raises:
+        ImageError: 图片无法识别或像素数过大
+    """
+    image = _open(data)
+    try:
+        # ICO 等多尺寸格式默认取最大的一帧；JPEG 直接按比例解码
+        image.draft("RGB", (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f"无法识别的图片：{e}") from e
+
+    return _encode(_flatten_mode(image))
@@ -2,8 +2,12 @@
 SSRF 防护模块
 
 提供 URL 白名单验证和内部网络地址检测功能，防止 SSRF 攻击
+
+主机名解析结果经 utils.dns_cache 缓存，抓取时直接连接校验过的 IP
+（见 utils.http_client.build_session）。
 """
 
+import ipaddress
 import os
 from typing import List, Optional
 from urllib.parse import urlparse
@@ -11,6 +15,8 @@ from django.core.exceptions import ValidationError
 from django.core.validators import URLValidator
 from django.utils.translation import gettext_lazy as _
 
+from .dns_cache import DNSCache, get_dns_cache
+
 
 # 默认允许的域名列表
 DEFAULT_ALLOWED_DOMAINS = [
@@ -81,6 +87,28 @@ def is_private_ip(hostname: str) -> bool:
     return False
 
 
+def is_public_address(address: str) -> bool:
+    """
+    检查解析得到的 IP 是否为公网地址
+
+    拒绝回环、私有、链路本地、运营商级 NAT、保留及组播地址，
+    IPv4 映射的 IPv6 地址按其 IPv4 地址判断。
+
+    Args:
+        address: IP 地址字符串
+
+    Returns:
+        公网地址返回 True，否则返回 False
+    """
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
 def is_internal_network(hostname: str) -> bool:
     """
     检查是否为企业内部网络地址
@@ -116,15 +144,21 @@ class SSRFValidator:
     提供 URL 白名单验证和内部网络检测功能
     """
 
-    def __init__(self, allowed_domains: Optional[List[str]] = None):
+    def __init__(
+        self,
+        allowed_domains: Optional[List[str]] = None,
+        dns_cache: Optional[DNSCache] = None,
+    ):
         """
         初始化验证器
 
         Args:
             allowed_domains: 允许的域名列表，None 表示使用默认列表
+            dns_cache: 解析缓存，None 表示使用进程内共享缓存
         """
         self.allowed_domains = allowed_domains or get_allowed_domains()
         self.url_validator = URLValidator()
+        self.dns_cache = dns_cache
 
     def validate(self, url: str) -> None:
         """
@@ -201,6 +235,35 @@ class SSRFValidator:
 
         return False
 
+    def is_allowed_address(self, address: str) -> bool:
+        """检查解析得到的 IP 是否允许连接"""
+        return is_public_address(address)
+
+    def resolve(self, hostname: str) -> tuple:
+        """
+        解析主机名并校验全部地址
+
+        任一地址不允许连接即拒绝，防止混合解析记录绕过校验。
+
+        Args:
+            hostname: 主机名
+
+        Returns:
+            校验通过的 IP 元组，供建连直接使用
+
+        Raises:
+            ValidationError: 解析到不允许连接的地址时抛出
+            socket.gaierror: 无法解析时抛出
+        """
+        addresses = (self.dns_cache or get_dns_cache()).resolve(hostname)
+        for address in addresses:
+            if not self.is_allowed_address(address):
+                raise ValidationError(
+                    _("主机 %(host)s 解析到内部地址 %(address)s"),
+                    params={"host": hostname, "address": address},
+                )
+        return addresses
+
     def is_safe(self, url: str) -> bool:
         """
         检查 URL 是否安全（不抛出异常）
@@ -235,6 +298,19 @@ def validate_url(url: str) -> None:
     default_validator.validate(url)
 
 
+def resolve_host(hostname: str) -> tuple:
+    """
+    解析并校验主机名的便捷函数（抓取会话建连时调用）
+
+    Args:
+        hostname: 主机名
+
+    Returns:
+        校验通过的 IP 元组
+    """
+    return default_validator.resolve(hostname)
+
+
 def is_url_safe(url: str) -> bool:
     """
     检查 URL 是否安全的便捷函数
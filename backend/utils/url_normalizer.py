@@ -0,0 +1,76 @@
+"""
+URL 规范化模块
+
+把指向同一页面的不同写法归一为同一个 URL，用作缓存键：
+- 协议、主机名转小写，去掉默认端口与主机名末尾的点
+- 去掉片段（#...）
+- 去掉 utm_* 等跟踪参数，其余参数保持原有顺序
+- 空路径补为 /
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 跟踪参数前缀
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+# 常见跟踪参数
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "gbraid",
+        "wbraid",
+        "msclkid",
+        "yclid",
+        "igshid",
+        "mc_cid",
+        "mc_eid",
+        "_hsenc",
+        "_hsmi",
+        "mkt_tok",
+        "spm",
+    }
+)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def is_tracking_param(name: str) -> bool:
+    """检查查询参数是否为跟踪参数"""
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化 URL
+
+    Args:
+        url: 原始 URL
+
+    Returns:
+        规范化后的 URL；端口非法等无法解析的 URL 原样返回
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if "@" in parts.netloc:
+        netloc = parts.netloc.rsplit("@", 1)[0] + "@" + netloc
+
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(name)
+    ]
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
@@ -100,19 +100,32 @@ export const authApi = {
         notes_size: number;
         attachments_count: number;
         attachments_size: number;
-        images_count: number;
-        images_size: number;
+        attachments_stored_size: number;
+        collections_count: number;
+        collections_size: number;
         total_size: number;
+        updated_at: string;
       };
     }>('/auth/storage/');
     return response.data;
   },
 
-  // 导出用户数据
-  async exportData() {
-    const response = await api.get<{ code: number; message: string; data: Record<string, unknown> }>(
-      '/auth/export/'
-    );
+  // 导出用户数据（服务端流式生成文件）
+  async exportData(type: 'json' | 'ndjson' | 'zip' = 'json') {
+    const response = await api.get<Blob>('/auth/export/', {
+      params: { type },
+      responseType: 'blob',
+    });
+    return response.data;
+  },
+
+  // 导入导出文件（作为新数据导入）
+  async importData(file: File) {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await api.post('/auth/import/', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
     return response.data;
   },
 